@@ -0,0 +1,102 @@
+"""
+Cache des corrigés compilés (exercise_graders.compile_answer_key)
+
+Le corrigé d'un exercice ne dépend que de son type et de son contenu : il est
+compilé une seule fois puis conservé dans un cache LRU local au processus.
+La clé contient l'identifiant de l'exercice, son type et une empreinte du
+contenu JSON ; un exercice modifié produit donc une nouvelle clé, même si la
+modification passe par un script qui contourne les routes d'édition.
+
+Les entrées d'un exercice modifié ou supprimé sont en plus retirées
+immédiatement (événements after_update / after_delete du modèle Exercise)
+pour ne pas occuper le cache inutilement.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from models import Exercise
+from exercise_graders import compile_answer_key
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+def content_hash(raw_content):
+    """Empreinte sha1 du contenu brut d'un exercice."""
+    if raw_content is None:
+        raw_content = ''
+    return hashlib.sha1(raw_content.encode('utf-8')).hexdigest()
+
+
+class AnswerKeyCache:
+    """
+    Cache LRU (thread-safe) des corrigés compilés.
+
+    Attributs:
+        max_entries: nombre maximal de corrigés conservés
+        hits / misses: compteurs de consultation
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, exercise):
+        """
+        Retourne le corrigé compilé d'un exercice (compilé au premier appel).
+
+        Raises:
+            GradingError: Type non pris en charge ou contenu invalide
+        """
+        key = (exercise.id, exercise.exercise_type, content_hash(exercise.content))
+        with self._lock:
+            answer_key = self._entries.get(key)
+            if answer_key is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return answer_key
+            self.misses += 1
+
+        # Compilation hors verrou : deux compilations concurrentes donnent le même résultat
+        answer_key = compile_answer_key(exercise.exercise_type, exercise.content)
+        with self._lock:
+            self._entries[key] = answer_key
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return answer_key
+
+    def invalidate(self, exercise_id):
+        """Retire tous les corrigés d'un exercice."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == exercise_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+answer_key_cache = AnswerKeyCache()
+
+
+def get_answer_key(exercise):
+    """Corrigé compilé d'un exercice depuis le cache du processus."""
+    return answer_key_cache.get(exercise)
+
+
+@event.listens_for(Exercise, 'after_update')
+@event.listens_for(Exercise, 'after_delete')
+def _invalidate_answer_key(mapper, connection, target):
+    answer_key_cache.invalidate(target.id)
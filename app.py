@@ -19,289 +19,42 @@ def get_blank_location(global_blank_index, sentences):
         blank_count += blanks_in_sentence
     return -1, -1
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, abort, send_from_directory, current_app
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, abort, send_from_directory, current_app
 from integrate_select_school_fix import integrate_select_school_fix
 from flask_login import login_user, login_required, logout_user, current_user
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
-from flask_wtf import FlaskForm, CSRFProtect
+from werkzeug.exceptions import NotFound
+from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, MultipleFileField
 from wtforms.validators import DataRequired
 from flask_wtf.csrf import generate_csrf
 
-from extensions import db, init_extensions, login_manager
+from extensions import db, login_manager
 from models import User, Class, Course, Exercise, ExerciseAttempt, CourseFile, student_class_association, course_exercise
 from forms import ExerciseForm
-from modified_submit import bp as exercise_bp
-from payment_routes import payment_bp
+from statistics_service import get_teacher_statistics, get_exercise_counts, get_student_counts, iter_student_rows
+from exercise_graders import grade_exercise, GradingError
+from progress_service import get_progress_grid, get_course_stats_grid, get_exercise_student_ids
+from log_pipeline import category_log, configure_logging
+from upload_pipeline import save_upload, UploadRejected
+from upload_serving import send_upload
+from exercise_access import can_view_exercise_stats, exercise_in_course
+from app_factory import create_app, init_database
+from loading_profiles import (
+    course_page_query, class_page_query, teacher_classes_query, exercise_stats_query, stats_course_query
+)
 
 
 
 
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('flask_app.log')
-    ]
-)
+# Journal asynchrone (console et flask_app.log écrits par un thread dédié, voir log_pipeline)
+configure_logging(os.environ.get('LOG_LEVEL', 'INFO'))
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-app.logger.setLevel(logging.DEBUG)
-
-
-# Route de diagnostic pour tous les exercices fill_in_blanks
-@app.route('/debug-all-fill-in-blanks')
-def debug_all_fill_in_blanks():
-    # Route de diagnostic pour analyser tous les exercices fill_in_blanks
-    if not current_user.is_authenticated or not current_user.is_admin:
-        return "Accès non autorisé", 403
-        
-    results = []
-    
-    # En-tête
-    results.append("<h1>DIAGNOSTIC TOUS LES EXERCICES FILL_IN_BLANKS</h1>")
-    
-    # 1. Environnement
-    results.append("<h2>1. ENVIRONNEMENT</h2>")
-    
-    # Vérifier les variables d'environnement
-    env_vars = {
-        'FLASK_ENV': os.environ.get('FLASK_ENV', 'non défini'),
-        'DATABASE_URL': os.environ.get('DATABASE_URL', 'non défini')[:10] + '...' if os.environ.get('DATABASE_URL') else 'non défini',
-        'RAILWAY_ENVIRONMENT': os.environ.get('RAILWAY_ENVIRONMENT', 'non défini'),
-        'PORT': os.environ.get('PORT', 'non défini')
-    }
-    
-    results.append("<h3>Variables d'environnement:</h3>")
-    for key, value in env_vars.items():
-        results.append(f"<p>{key}: {value}</p>")
-    
-    # 2. Liste des exercices
-    results.append("<h2>2. LISTE DES EXERCICES FILL_IN_BLANKS</h2>")
-    
-    try:
-        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
-        results.append(f"<p>Nombre d'exercices fill_in_blanks: {len(exercises)}</p>")
-        
-        if exercises:
-            results.append("<table border='1' style='border-collapse: collapse; width: 100%;'>")
-            results.append("<tr><th>ID</th><th>Titre</th><th>Image</th><th>Blancs</th><th>Mots</th><th>Cohérence</th></tr>")
-            
-            for ex in exercises:
-                try:
-                    content = json.loads(ex.content)
-                    
-                    # Compter les blancs
-                    total_blanks = 0
-                    
-                    if 'sentences' in content:
-                        sentences_blanks = sum(s.count('___') for s in content['sentences'])
-                        total_blanks = sentences_blanks
-                    elif 'text' in content:
-                        text_blanks = content['text'].count('___')
-                        total_blanks = text_blanks
-                    
-                    # Compter les mots
-                    words = []
-                    if 'words' in content:
-                        words = content['words']
-                    elif 'available_words' in content:
-                        words = content['available_words']
-                    
-                    # Vérifier la cohérence
-                    coherence = "✓" if total_blanks == len(words) else "[ECHEC]"
-                    coherence_color = "green" if total_blanks == len(words) else "red"
-                    
-                    # Image
-                    has_image = "✓" if ex.image_path else "[ECHEC]"
-                    image_color = "green" if ex.image_path else "gray"
-                    
-                    results.append(f"<tr>")
-                    results.append(f"<td>{ex.id}</td>")
-                    results.append(f"<td>{ex.title}</td>")
-                    results.append(f"<td style='color: {image_color};'>{has_image}</td>")
-                    results.append(f"<td>{total_blanks}</td>")
-                    results.append(f"<td>{len(words)}</td>")
-                    results.append(f"<td style='color: {coherence_color};'>{coherence}</td>")
-                    results.append(f"</tr>")
-                except Exception as e:
-                    results.append(f"<tr><td>{ex.id}</td><td>{ex.title}</td><td colspan='4' style='color: red;'>Erreur: {str(e)}</td></tr>")
-            
-            results.append("</table>")
-        else:
-            results.append("<p>Aucun exercice fill_in_blanks trouvé.</p>")
-    except Exception as e:
-        results.append(f"<p style='color: red;'>Erreur lors de la récupération des exercices: {str(e)}</p>")
-    
-    # 3. Liste des exercices word_placement
-    results.append("<h2>3. LISTE DES EXERCICES WORD_PLACEMENT</h2>")
-    
-    try:
-        exercises = Exercise.query.filter_by(exercise_type='word_placement').all()
-        results.append(f"<p>Nombre d'exercices word_placement: {len(exercises)}</p>")
-        
-        if exercises:
-            results.append("<table border='1' style='border-collapse: collapse; width: 100%;'>")
-            results.append("<tr><th>ID</th><th>Titre</th><th>Image</th><th>Blancs</th><th>Mots</th><th>Cohérence</th></tr>")
-            
-            for ex in exercises:
-                try:
-                    content = json.loads(ex.content)
-                    
-                    # Compter les blancs
-                    total_blanks = 0
-                    
-                    if 'sentences' in content:
-                        sentences_blanks = sum(s.count('___') for s in content['sentences'])
-                        total_blanks = sentences_blanks
-                    elif 'text' in content:
-                        text_blanks = content['text'].count('___')
-                        total_blanks = text_blanks
-                    
-                    # Compter les mots
-                    words = []
-                    if 'words' in content:
-                        words = content['words']
-                    elif 'available_words' in content:
-                        words = content['available_words']
-                    
-                    # Vérifier la cohérence
-                    coherence = "✓" if total_blanks == len(words) else "[ECHEC]"
-                    coherence_color = "green" if total_blanks == len(words) else "red"
-                    
-                    # Image
-                    has_image = "✓" if ex.image_path else "[ECHEC]"
-                    image_color = "green" if ex.image_path else "gray"
-                    
-                    results.append(f"<tr>")
-                    results.append(f"<td>{ex.id}</td>")
-                    results.append(f"<td>{ex.title}</td>")
-                    results.append(f"<td style='color: {image_color};'>{has_image}</td>")
-                    results.append(f"<td>{total_blanks}</td>")
-                    results.append(f"<td>{len(words)}</td>")
-                    results.append(f"<td style='color: {coherence_color};'>{coherence}</td>")
-                    results.append(f"</tr>")
-                except Exception as e:
-                    results.append(f"<tr><td>{ex.id}</td><td>{ex.title}</td><td colspan='4' style='color: red;'>Erreur: {str(e)}</td></tr>")
-            
-            results.append("</table>")
-        else:
-            results.append("<p>Aucun exercice word_placement trouvé.</p>")
-    except Exception as e:
-        results.append(f"<p style='color: red;'>Erreur lors de la récupération des exercices: {str(e)}</p>")
-    
-    # 4. Test de la logique de scoring
-    results.append("<h2>4. TEST DE LA LOGIQUE DE SCORING</h2>")
-    
-    # Test avec sentences
-    results.append("<h3>Test avec sentences</h3>")
-    test_content_sentences = {
-        "sentences": ["Le ___ mange une ___ rouge."],
-        "words": ["chat", "pomme"]
-    }
-    
-    # Simuler des réponses utilisateur parfaites
-    user_answers_sentences = {
-        'answer_0': 'chat',
-        'answer_1': 'pomme'
-    }
-    
-    # Calculer le score
-    try:
-        total_blanks = sum(s.count('___') for s in test_content_sentences['sentences'])
-        correct_blanks = 0
-        
-        for i in range(total_blanks):
-            answer_key = f'answer_{i}'
-            user_answer = user_answers_sentences.get(answer_key, '')
-            correct_answer = test_content_sentences['words'][i] if i < len(test_content_sentences['words']) else ''
-            
-            if user_answer.lower() == correct_answer.lower():
-                correct_blanks += 1
-        
-        score = round((correct_blanks / total_blanks) * 100) if total_blanks > 0 else 0
-        
-        results.append(f"<p>Score avec sentences: {correct_blanks}/{total_blanks} = {score}%</p>")
-        if score == 100:
-            results.append("<p style='color: green;'>✓ Test sentences réussi!</p>")
-        else:
-            results.append("<p style='color: red;'>[ECHEC] Test sentences échoué!</p>")
-    except Exception as e:
-        results.append(f"<p style='color: red;'>Erreur test sentences: {str(e)}</p>")
-    
-    # Test avec text
-    results.append("<h3>Test avec text</h3>")
-    test_content_text = {
-        "text": "Le ___ mange une ___ rouge.",
-        "words": ["chat", "pomme"]
-    }
-    
-    # Simuler des réponses utilisateur parfaites
-    user_answers_text = {
-        'answer_0': 'chat',
-        'answer_1': 'pomme'
-    }
-    
-    # Calculer le score
-    try:
-        total_blanks = test_content_text['text'].count('___')
-        correct_blanks = 0
-        
-        for i in range(total_blanks):
-            answer_key = f'answer_{i}'
-            user_answer = user_answers_text.get(answer_key, '')
-            correct_answer = test_content_text['words'][i] if i < len(test_content_text['words']) else ''
-            
-            if user_answer.lower() == correct_answer.lower():
-                correct_blanks += 1
-        
-        score = round((correct_blanks / total_blanks) * 100) if total_blanks > 0 else 0
-        
-        results.append(f"<p>Score avec text: {correct_blanks}/{total_blanks} = {score}%</p>")
-        if score == 100:
-            results.append("<p style='color: green;'>✓ Test text réussi!</p>")
-        else:
-            results.append("<p style='color: red;'>[ECHEC] Test text échoué!</p>")
-    except Exception as e:
-        results.append(f"<p style='color: red;'>Erreur test text: {str(e)}</p>")
-    
-    # 5. Conclusion
-    results.append("<h2>5. CONCLUSION</h2>")
-    results.append("<p>Si tous les tests ci-dessus sont réussis (affichés en vert), la logique de scoring est correcte.</p>")
-    results.append("<p>Vérifiez particulièrement:</p>")
-    results.append("<ul>")
-    results.append("<li>Que le nombre de blancs correspond au nombre de mots pour chaque exercice</li>")
-    results.append("<li>Que les tests de scoring donnent bien 100%</li>")
-    results.append("<li>Que les exercices problématiques sont identifiés (marqués en rouge)</li>")
-    results.append("</ul>")
-    
-    return "<br>".join(results)
-# Configuration selon l'environnement
-config_name = os.environ.get('FLASK_ENV', 'development')
-if config_name == 'production':
-    from config import ProductionConfig
-    app.config.from_object(ProductionConfig)
-else:
-    app.config['SECRET_KEY'] = 'your-secret-key-here'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Global request logging removed to restore normal operation
-
-# Initialize CSRF protection
-csrf = CSRFProtect()
-csrf.init_app(app)
-
-# Register blueprints
-app.register_blueprint(exercise_bp, url_prefix='/exercise')
-
-# Register payment blueprint
-# Le préfixe d'URL '/payment' est déjà défini dans le Blueprint
-app.register_blueprint(payment_bp)
+# Configuration (config.py), extensions, blueprints et services : voir app_factory
+app = create_app()
 
 # Ajout du filtre shuffle pour Jinja2
 @app.template_filter('shuffle')
@@ -322,72 +75,14 @@ def chr_filter_registered(value):
     except (ValueError, TypeError):
         return str(value)
 
-app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max-limit
-
-# S'assurer que le dossier d'upload existe
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
 # Configuration de l'extension pour les fichiers
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Initialisation des extensions
-from extensions import init_extensions
-init_extensions(app)
-
-# Initialisation automatique de la base de données
-def init_database():
-    """Initialise la base de données de manière sécurisée"""
-    try:
-        with app.app_context():
-            # Créer toutes les tables si elles n'existent pas
-            db.create_all()
-            app.logger.info("Tables de base de donnees creees avec succes")
-        
-        # Créer le compte administrateur par défaut si nécessaire
-        admin_email = os.environ.get('ADMIN_EMAIL', 'admin@classesnumeriques.com')
-        admin_user = User.query.filter_by(email=admin_email).first()
-        
-        if not admin_user:
-            from werkzeug.security import generate_password_hash
-            admin_user = User(
-                username='admin',
-                email=admin_email,
-                name='Administrateur',
-                password_hash=generate_password_hash('AdminSecure2024!'),
-                role='admin',
-                subscription_status='approved',
-                subscription_type='admin',
-                approved_by='system'
-            )
-            db.session.add(admin_user)
-            db.session.commit()
-            app.logger.info(f"Compte administrateur cree: {admin_email}")
-        else:
-            app.logger.info(f"Compte administrateur existant: {admin_email}")
-        
-            # Approuver automatiquement mr.zahiri@gmail.com et lui donner les droits admin
-            zahiri_user = User.query.filter_by(email='mr.zahiri@gmail.com').first()
-            if zahiri_user:
-                zahiri_user.subscription_status = 'approved'
-                zahiri_user.role = 'admin'  # Donner les droits admin
-                zahiri_user.subscription_type = 'admin'
-                zahiri_user.approved_by = 'system'
-                db.session.commit()
-                app.logger.info("mr.zahiri@gmail.com approuve et promu administrateur")
-            else:
-                app.logger.info("Compte mr.zahiri@gmail.com non trouve - sera approuve a la creation")
-                
-    except Exception as e:
-        app.logger.error(f"Erreur lors de l'initialisation de la base: {e}")
-        # Ne pas faire planter l'app, continuer quand même
-
-# Initialiser la base de données seulement si on n'est pas en mode import
-if __name__ == '__main__' or os.environ.get('FLASK_ENV') == 'production':
-    init_database()
+# Tables, compte administrateur et dossier des envois : une fois par déploiement
+# avec `flask --app app init-db` (voir app_factory.init_database)
 
 # Enregistrement des blueprints (déjà fait ligne 48)
 
@@ -473,26 +168,17 @@ def generate_unique_filename(filename):
     return f"{timestamp}_{random_id}{ext}"
 
 def safe_file_save(file, filepath):
-    """Sauvegarder un fichier de manière sécurisée avec vérification de taille"""
+    """Sauvegarder un fichier en flux, avec vérification du type et de la taille"""
     try:
-        # Créer le répertoire parent s'il n'existe pas
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        # Sauvegarder le fichier
-        file.save(filepath)
-        
-        # Vérifier que le fichier a été sauvegardé correctement
-        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-            current_app.logger.info(f"[UPLOAD_SUCCESS] Fichier sauvegardé: {filepath} ({os.path.getsize(filepath)} bytes)")
-            return True
-        else:
-            current_app.logger.error(f"[UPLOAD_ERROR] Fichier vide ou non sauvegardé: {filepath}")
-            # Supprimer le fichier vide s'il existe
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            return False
+        # Copie par blocs dans un fichier temporaire puis renommage atomique
+        upload = save_upload(file, filepath)
+        category_log.UPLOAD_SUCCESS.info('Fichier sauvegardé: %s (%s bytes, sha256 %s)', filepath, upload.size, upload.sha256[:12])
+        return True
+    except UploadRejected as e:
+        category_log.UPLOAD_ERROR.error('Fichier refusé: %s', e)
+        return False
     except Exception as e:
-        current_app.logger.error(f"[UPLOAD_ERROR] Erreur lors de la sauvegarde: {str(e)}")
+        category_log.UPLOAD_ERROR.error('Erreur lors de la sauvegarde: %s', e)
         return False
 
 def generate_consistent_image_path(filename):
@@ -509,22 +195,18 @@ def add_csrf_token(response):
         response.set_cookie('csrf_token', generate_csrf())
     return response
 
-@app.before_request
-def log_request_info():
-    logger.debug('Headers: %s', request.headers)
-    logger.debug('Body: %s', request.get_data())
-    logger.debug('URL: %s', request.url)
-    logger.debug('Method: %s', request.method)
-    logger.debug('Path: %s', request.path)
-
 # Route pour servir les fichiers uploadés
 @app.route('/static/uploads/<path:filename>')
 def uploaded_file(filename):
-    """Sert les fichiers uploadés depuis le dossier static/uploads"""
+    """Sert les fichiers uploadés depuis le dossier static/uploads (ETag, 304, Range)"""
     try:
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
-    except FileNotFoundError:
-        logger.error(f"Fichier non trouvé: {filename}")
+        return send_upload(app.config['UPLOAD_FOLDER'], filename)
+    except NotFound:
+        # Image demandée à un ancien emplacement : redirection vers l'emplacement réel
+        response = app.extensions['image_fallback'].fallback_response(request.path)
+        if response is not None:
+            return response
+        logger.error('Fichier non trouvé: %s', filename)
         return "Fichier non trouvé", 404
 
 # Routes
@@ -543,7 +225,7 @@ def index():
             return render_template('login.html')
     except Exception as e:
         # En cas d'erreur avec current_user, afficher la page d'accueil par défaut
-        app.logger.error(f"Erreur route index: {str(e)}")
+        app.logger.error('Erreur route index: %s', e)
         return render_template('login.html')
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -578,7 +260,7 @@ def login():
                         db.session.commit()
                         app.logger.info("[OK] mr.zahiri@gmail.com auto-approuvé en tant qu'enseignant-admin")
                     except Exception as e:
-                        app.logger.error(f"Erreur lors de l'auto-approbation: {e}")
+                        app.logger.error("Erreur lors de l'auto-approbation: %s", e)
                         # Continuer quand même la connexion
                         pass
                 else:
@@ -651,7 +333,7 @@ def register_teacher():
         except Exception as e:
             db.session.rollback()
             flash('Erreur lors de l\'inscription.', 'error')
-            print(f"Erreur d'inscription : {str(e)}")
+            app.logger.error("Erreur d'inscription : %s", e)
     
     return render_template('register_teacher.html')
 
@@ -689,7 +371,7 @@ def register_school():
         except Exception as e:
             db.session.rollback()
             flash('Erreur lors de l\'inscription.', 'error')
-            app.logger.error(f"Erreur d'inscription école : {str(e)}")
+            app.logger.error("Erreur d'inscription école : %s", e)
     
     return render_template('register.html', user_type='school')
 
@@ -786,8 +468,9 @@ def teacher_dashboard():
         flash('Accès non autorisé.', 'error')
         return redirect(url_for('index'))
     
-    classes = Class.query.filter_by(teacher_id=current_user.id).all()
-    return render_template('teacher_dashboard.html', classes=classes)
+    classes = teacher_classes_query(current_user.id).all()
+    total_students = len({student.id for class_obj in classes for student in class_obj.students})
+    return render_template('teacher_dashboard.html', classes=classes, total_students=total_students)
 
 
 
@@ -854,10 +537,10 @@ def get_courses(class_id):
 def delete_class(class_id):
     logger.debug('='*50)
     logger.debug('TENTATIVE DE SUPPRESSION DE CLASSE')
-    logger.debug(f'class_id: {class_id}')
-    logger.debug(f'user: {current_user.name} (id: {current_user.id})')
-    logger.debug(f'headers: {dict(request.headers)}')
-    logger.debug(f'form data: {dict(request.form)}')
+    logger.debug('class_id: %s', class_id)
+    logger.debug('user: %s (id: %s)', current_user.name, current_user.id)
+    logger.debug('headers: %s', request.headers)
+    logger.debug('form data: %s', request.form)
     
     # Vérification du token CSRF
     if not request.form.get('csrf_token'):
@@ -869,13 +552,13 @@ def delete_class(class_id):
         # Récupération et vérification de la classe
         class_obj = Class.query.get(class_id)
         if not class_obj:
-            logger.error(f"Classe {class_id} non trouvée")
+            logger.error('Classe %s non trouvée', class_id)
             flash('Classe non trouvée.', 'error')
             return redirect(url_for('teacher_dashboard'))
         
         # Vérification des permissions
         if class_obj.teacher_id != current_user.id:
-            logger.error(f"L'utilisateur {current_user.name} n'est pas le professeur de la classe {class_obj.name}")
+            logger.error("L'utilisateur %s n'est pas le professeur de la classe %s", current_user.name, class_obj.name)
             flash('Vous n\'êtes pas autorisé à supprimer cette classe.', 'error')
             return redirect(url_for('teacher_dashboard'))
         
@@ -894,17 +577,17 @@ def delete_class(class_id):
             db.session.delete(class_obj)
             db.session.commit()
             
-            logger.info(f"Classe {class_name} supprimée avec succès")
+            logger.info('Classe %s supprimée avec succès', class_name)
             flash(f'La classe {class_name} a été supprimée avec succès !', 'success')
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Erreur SQL lors de la suppression: {str(e)}")
+            logger.error('Erreur SQL lors de la suppression: %s', e)
             flash('Une erreur est survenue lors de la suppression de la classe.', 'error')
             return redirect(url_for('view_class', class_id=class_id))
             
     except Exception as e:
-        logger.error(f"Erreur inattendue: {str(e)}")
+        logger.error('Erreur inattendue: %s', e)
         flash('Une erreur inattendue est survenue.', 'error')
         
     return redirect(url_for('teacher_dashboard'))
@@ -932,7 +615,7 @@ def delete_course(course_id):
                 if os.path.exists(file_path):
                     os.remove(file_path)
             except Exception as e:
-                app.logger.error(f"Erreur lors de la suppression du fichier {course_file.filename}: {str(e)}")
+                app.logger.error('Erreur lors de la suppression du fichier %s: %s', course_file.filename, e)
         
         # Supprimer le cours (les fichiers et exercices seront supprimés automatiquement grâce à cascade)
         db.session.delete(course)
@@ -941,7 +624,7 @@ def delete_course(course_id):
     except Exception as e:
         db.session.rollback()
         flash('Une erreur est survenue lors de la suppression du cours.', 'error')
-        app.logger.error(f"Erreur lors de la suppression du cours {course_id}: {str(e)}")
+        app.logger.error('Erreur lors de la suppression du cours %s: %s', course_id, e)
     
     return redirect(url_for('view_class', class_id=class_obj.id))
 
@@ -950,11 +633,11 @@ def delete_course(course_id):
 def remove_student_from_class(class_id, student_id):
     logger.debug('='*50)
     logger.debug('TENTATIVE DE SUPPRESSION D\'ÉTUDIANT')
-    logger.debug(f'class_id: {class_id}')
-    logger.debug(f'student_id: {student_id}')
-    logger.debug(f'user: {current_user.name} (id: {current_user.id}, is_teacher: {current_user.is_teacher})')
-    logger.debug(f'headers: {dict(request.headers)}')
-    logger.debug(f'form data: {dict(request.form)}')
+    logger.debug('class_id: %s', class_id)
+    logger.debug('student_id: %s', student_id)
+    logger.debug('user: %s (id: %s, is_teacher: %s)', current_user.name, current_user.id, current_user.is_teacher)
+    logger.debug('headers: %s', request.headers)
+    logger.debug('form data: %s', request.form)
     
     # Vérification du token CSRF
     if not request.form.get('csrf_token'):
@@ -964,7 +647,7 @@ def remove_student_from_class(class_id, student_id):
     
     # Vérification des permissions
     if not current_user.is_teacher:
-        logger.error(f"Accès refusé : l'utilisateur {current_user.name} n'est pas un enseignant")
+        logger.error("Accès refusé : l'utilisateur %s n'est pas un enseignant", current_user.name)
         flash('Accès réservé aux enseignants.', 'error')
         return redirect(url_for('index'))
     
@@ -972,24 +655,24 @@ def remove_student_from_class(class_id, student_id):
         # Vérification de la classe
         class_obj = Class.query.get(class_id)
         if not class_obj:
-            logger.error(f"Classe {class_id} non trouvée")
+            logger.error('Classe %s non trouvée', class_id)
             flash('Classe non trouvée.', 'error')
             return redirect(url_for('teacher_dashboard'))
             
         if class_obj.teacher_id != current_user.id:
-            logger.error(f"L'utilisateur {current_user.name} n'est pas le professeur de la classe {class_obj.name}")
+            logger.error("L'utilisateur %s n'est pas le professeur de la classe %s", current_user.name, class_obj.name)
             flash('Vous n\'êtes pas le professeur de cette classe.', 'error')
             return redirect(url_for('teacher_dashboard'))
         
         # Vérification de l'étudiant
         student = User.query.get(student_id)
         if not student:
-            logger.error(f"Étudiant {student_id} non trouvé")
+            logger.error('Étudiant %s non trouvé', student_id)
             flash('Étudiant non trouvé.', 'error')
             return redirect(url_for('view_class', class_id=class_id))
             
         if not student in class_obj.students:
-            logger.error(f"L'étudiant {student.name} n'est pas dans la classe {class_obj.name}")
+            logger.error("L'étudiant %s n'est pas dans la classe %s", student.name, class_obj.name)
             flash('Cet étudiant n\'est pas inscrit dans cette classe.', 'error')
             return redirect(url_for('view_class', class_id=class_id))
         
@@ -997,16 +680,16 @@ def remove_student_from_class(class_id, student_id):
             # Supprimer l'étudiant de la classe
             class_obj.students.remove(student)
             db.session.commit()
-            logger.info(f"Étudiant {student.name} supprimé avec succès de la classe {class_obj.name}")
+            logger.info('Étudiant %s supprimé avec succès de la classe %s', student.name, class_obj.name)
             flash(f'L\'étudiant {student.name} a été retiré de la classe avec succès.', 'success')
             
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Erreur SQL lors de la suppression: {str(e)}")
+            logger.error('Erreur SQL lors de la suppression: %s', e)
             flash('Une erreur est survenue lors de la suppression de l\'étudiant.', 'error')
             
     except Exception as e:
-        logger.error(f"Erreur inattendue: {str(e)}")
+        logger.error('Erreur inattendue: %s', e)
         flash('Une erreur inattendue est survenue.', 'error')
         
     return redirect(url_for('view_class', class_id=class_id))
@@ -1041,20 +724,20 @@ def exercise_library():
     exercises = query.all()
 
     # Debug: afficher le nombre d'exercices trouvés
-    app.logger.info(f"Nombre d'exercices trouvés : {len(exercises)}")
+    app.logger.info("Nombre d'exercices trouvés : %s", len(exercises))
     for ex in exercises:
-        app.logger.info(f"Exercice : {ex.title} (type: {ex.exercise_type})")
+        app.logger.info('Exercice : %s (type: %s)', ex.title, ex.exercise_type)
 
     # Debug: afficher les types d'exercices passés au template
-    current_app.logger.debug(f"Types d'exercices passés au template: {Exercise.EXERCISE_TYPES}")
+    current_app.logger.debug("Types d'exercices passés au template: %s", Exercise.EXERCISE_TYPES)
     
     # Debug supplémentaire: vérifier si "Mots à placer" est présent
     word_placement_present = any(type_id == 'word_placement' for type_id, type_name in Exercise.EXERCISE_TYPES)
-    current_app.logger.debug(f"'Mots à placer' présent dans la liste: {word_placement_present}")
+    current_app.logger.debug("'Mots à placer' présent dans la liste: %s", word_placement_present)
     
     # Debug: afficher chaque type individuellement
     for i, (type_id, type_name) in enumerate(Exercise.EXERCISE_TYPES):
-        current_app.logger.debug(f"  {i+1}. {type_id} -> {type_name}")
+        current_app.logger.debug('  %s. %s -> %s', i+1, type_id, type_name)
     
     return render_template('teacher/exercise_library.html', 
                          exercises=exercises,
@@ -1069,18 +752,18 @@ def exercise_library():
 # @login_required  # TEMPORAIREMENT DÉSACTIVÉ POUR TEST
 def view_exercise(exercise_id, course_id=None):
     import sys
-    print(f'[VIEW_EXERCISE_DEBUG] Starting view_exercise for ID {exercise_id}', flush=True)
+    category_log.VIEW_EXERCISE_DEBUG.debug('Starting view_exercise for ID %s', exercise_id)
     sys.stdout.flush()
     try:
-        app.logger.info(f'Accessing exercise {exercise_id}')
+        app.logger.debug('Accessing exercise %s', exercise_id)
         exercise = Exercise.query.get_or_404(exercise_id)
-        print(f'[VIEW_EXERCISE_DEBUG] Exercise type: {exercise.exercise_type}')
-        app.logger.info(f'Found exercise: {exercise.title}')
+        category_log.VIEW_EXERCISE_DEBUG.debug('Exercise type: %s', exercise.exercise_type)
+        app.logger.debug('Found exercise: %s', exercise.title)
         course_id = request.args.get('course_id', type=int)
         course = Course.query.get(course_id) if course_id else None
-        app.logger.info(f'Course ID: {course_id}, Course: {course.title if course else None}')
+        app.logger.debug('Course ID: %s, Course: %s', course_id, course.title if course else None)
     except Exception as e:
-        app.logger.error(f'Error accessing exercise: {str(e)}')
+        app.logger.error('Error accessing exercise: %s', e)
         app.logger.exception('Full error:')
         return 'Une erreur est survenue lors de l\'accès à l\'exercice.', 500
     
@@ -1112,7 +795,7 @@ def view_exercise(exercise_id, course_id=None):
     # mais seulement si l'exercice a été soumis (pour éviter d'afficher les réponses par défaut)
     show_answers = False
     if attempt:
-        print(f'[VIEW_EXERCISE_DEBUG] Found attempt ID: {attempt.id}')
+        category_log.VIEW_EXERCISE_DEBUG.debug('Found attempt ID: %s', attempt.id)
         # Vérifier si l'exercice a été soumis (présence de feedback)
         if attempt.feedback and attempt.feedback.strip():
             show_answers = True
@@ -1126,12 +809,12 @@ def view_exercise(exercise_id, course_id=None):
                         # Pour les autres formats de feedback
                         blank_counter = len(user_answers)
                         user_answers[f'answer_{blank_counter}'] = item['student_answer']
-                print(f'[VIEW_EXERCISE_DEBUG] User answers: {user_answers}')
+                category_log.VIEW_EXERCISE_DEBUG.debug('User answers: %s', user_answers)
             except Exception as e:
-                app.logger.error(f'Error parsing attempt feedback: {str(e)}')
-                print(f'[VIEW_EXERCISE_DEBUG] Error parsing feedback: {str(e)}')
+                app.logger.error('Error parsing attempt feedback: %s', e)
+                category_log.VIEW_EXERCISE_DEBUG.debug('Error parsing feedback: %s', e)
         else:
-            print(f'[VIEW_EXERCISE_DEBUG] Attempt exists but no feedback, not showing answers')
+            category_log.VIEW_EXERCISE_DEBUG.debug('Attempt exists but no feedback, not showing answers')
             # Réinitialiser user_answers pour éviter d'afficher des réponses par défaut
             user_answers = {}
     
@@ -1142,24 +825,24 @@ def view_exercise(exercise_id, course_id=None):
     #     return redirect(url_for('index'))
         
     # Récupérer les statistiques et le contenu de l'exercice
-    app.logger.info(f'Exercise type: {exercise.exercise_type}')
-    app.logger.info(f'Raw content: {exercise.content}')
+    app.logger.debug('Exercise type: %s', exercise.exercise_type)
+    app.logger.debug('Raw content: %s', exercise.content)
     try:
         content = exercise.get_content()
-        app.logger.info(f'Parsed content: {content}')
+        app.logger.debug('Parsed content: %s', content)
         # Mélange des éléments de droite pour les appariements
         if exercise.exercise_type == 'pairs':
             # Support pour la nouvelle structure avec 'pairs'
             if 'pairs' in content:
-                app.logger.info('Processing pairs with new structure')
+                app.logger.debug('Processing pairs with new structure')
                 # Convertir la nouvelle structure vers l'ancienne pour compatibilité
                 pairs = content.get('pairs', [])
                 left_items = [pair['left'] for pair in pairs]
                 right_items = [pair['right'] for pair in pairs]
                 content['left_items'] = left_items
                 content['right_items'] = right_items
-                app.logger.info(f'Left items: {left_items}')
-                app.logger.info(f'Right items: {right_items}')
+                app.logger.debug('Left items: %s', left_items)
+                app.logger.debug('Right items: %s', right_items)
                 
                 # Mélanger les éléments de droite
                 import random
@@ -1167,11 +850,11 @@ def view_exercise(exercise_id, course_id=None):
                 random.shuffle(shuffled)
                 content['shuffled_right_items'] = [item for idx, item in shuffled]
                 content['shuffled_indices'] = [idx for idx, item in shuffled]
-                app.logger.info(f'Shuffled right items: {content["shuffled_right_items"]}')
-                app.logger.info(f'Shuffled indices: {content["shuffled_indices"]}')
+                app.logger.debug('Shuffled right items: %s', content["shuffled_right_items"])
+                app.logger.debug('Shuffled indices: %s', content["shuffled_indices"])
             # Support pour l'ancienne structure avec 'right_items'
             elif 'right_items' in content:
-                app.logger.info('Processing pairs with old structure')
+                app.logger.debug('Processing pairs with old structure')
                 right_items = content.get('right_items', [])
                 import random
                 shuffled = list(enumerate(right_items))
@@ -1180,37 +863,37 @@ def view_exercise(exercise_id, course_id=None):
                 content['shuffled_indices'] = [idx for idx, item in shuffled]
             else:
                 app.logger.error('No pairs or right_items found in content')
-                app.logger.error(f'Content keys: {list(content.keys())}')
+                app.logger.error('Content keys: %s', list(content.keys()))
         
         # Traitement spécifique pour les exercices "Souligner les mots"
         elif exercise.exercise_type == 'underline_words':
-            app.logger.info('Processing underline_words exercise')
-            app.logger.info(f'Content keys: {list(content.keys())}')
+            app.logger.debug('Processing underline_words exercise')
+            app.logger.debug('Content keys: %s', list(content.keys()))
             
             # Vérifier que les données nécessaires sont présentes
             if 'words' in content:
                 words_data = content['words']
-                app.logger.info(f'Found {len(words_data)} sentences in words data')
+                app.logger.debug('Found %s sentences in words data', len(words_data))
                 
                 for i, sentence_data in enumerate(words_data):
-                    app.logger.info(f'Sentence {i}: {sentence_data.get("text", "NO TEXT")}')
-                    app.logger.info(f'Words to underline {i}: {sentence_data.get("words_to_underline", "NO WORDS")}')
+                    app.logger.debug('Sentence %s: %s', i, sentence_data.get("text", "NO TEXT"))
+                    app.logger.debug('Words to underline %s: %s', i, sentence_data.get("words_to_underline", "NO WORDS"))
                 
                 # Ajouter les instructions si elles ne sont pas présentes
                 if 'instructions' not in content:
                     content['instructions'] = 'Cliquez sur les mots à souligner dans les phrases ci-dessous.'
-                    app.logger.info('Added default instructions')
+                    app.logger.debug('Added default instructions')
             else:
                 app.logger.error('No words data found in underline_words exercise')
-                app.logger.error(f'Available keys: {list(content.keys())}')
+                app.logger.error('Available keys: %s', list(content.keys()))
                 # Créer une structure vide pour éviter les erreurs
                 content['words'] = []
                 content['instructions'] = 'Aucune phrase trouvée pour cet exercice.'
         
         # Traitement spécifique pour les exercices "Mots mêlés"
         elif exercise.exercise_type == 'word_search':
-            app.logger.info('Processing word_search exercise')
-            app.logger.info(f'Content keys: {list(content.keys())}')
+            app.logger.debug('Processing word_search exercise')
+            app.logger.debug('Content keys: %s', list(content.keys()))
             
             # Vérifier que les données nécessaires sont présentes
             if 'words' in content and ('grid_size' in content or ('grid_width' in content and 'grid_height' in content)):
@@ -1228,7 +911,7 @@ def view_exercise(exercise_id, course_id=None):
                     height = content['grid_height']
                     grid_size = {'width': width, 'height': height}
                 
-                app.logger.info(f'Found {len(words)} words to place in {width}x{height} grid')
+                app.logger.debug('Found %s words to place in %sx%s grid', len(words), width, height)
                 
                 # Générer la grille avec les mots placés
                 try:
@@ -1236,7 +919,7 @@ def view_exercise(exercise_id, course_id=None):
                     grid, placed_words = generate_word_search_grid(words, grid_size['width'], grid_size['height'])
                     content['grid'] = grid
                     content['placed_words'] = placed_words
-                    app.logger.info(f'Grid generated successfully with {len(placed_words)} words placed')
+                    app.logger.debug('Grid generated successfully with %s words placed', len(placed_words))
                 except ImportError:
                     app.logger.warning('word_search_generator not available, using improved simple grid generation')
                     # Génération améliorée de grille
@@ -1340,12 +1023,12 @@ def view_exercise(exercise_id, course_id=None):
                             if can_place_word(word, start_row, start_col, direction):
                                 place_word(word, start_row, start_col, direction)
                                 placed = True
-                                app.logger.info(f'Placed word "{word}" at ({start_row}, {start_col}) direction {direction}')
+                                app.logger.debug('Placed word "%s" at (%s, %s) direction %s', word, start_row, start_col, direction)
                             
                             attempts += 1
                         
                         if not placed:
-                            app.logger.warning(f'Could not place word "{word}" after {max_attempts} attempts')
+                            app.logger.warning('Could not place word "%s" after %s attempts', word, max_attempts)
                     
                     # Remplir les cases vides avec des lettres aléatoires
                     for i in range(height):
@@ -1355,15 +1038,15 @@ def view_exercise(exercise_id, course_id=None):
                     
                     content['grid'] = grid
                     content['placed_words'] = placed_words
-                    app.logger.info(f'Improved grid generated with {len(placed_words)} words placed out of {len(words)} total words')
+                    app.logger.debug('Improved grid generated with %s words placed out of %s total words', len(placed_words), len(words))
                 
                 # Ajouter les instructions si elles ne sont pas présentes
                 if 'instructions' not in content:
                     content['instructions'] = 'Trouvez tous les mots cachés dans la grille ci-dessous.'
-                    app.logger.info('Added default instructions for word_search')
+                    app.logger.debug('Added default instructions for word_search')
             else:
                 app.logger.error('No words or grid_size found in word_search exercise')
-                app.logger.error(f'Available keys: {list(content.keys())}')
+                app.logger.error('Available keys: %s', list(content.keys()))
                 # Créer une structure vide pour éviter les erreurs
                 content['words'] = []
                 content['grid'] = []
@@ -1371,40 +1054,40 @@ def view_exercise(exercise_id, course_id=None):
         
         # Traitement spécifique pour les exercices "Mots à placer"
         elif exercise.exercise_type == 'word_placement':
-            print(f'[WORD_PLACEMENT_DISPLAY] Processing word_placement exercise')
-            print(f'[WORD_PLACEMENT_DISPLAY] Content keys: {list(content.keys())}')
-            print(f'[WORD_PLACEMENT_DISPLAY] Raw content: {content}')
+            category_log.WORD_PLACEMENT_DISPLAY.info('Processing word_placement exercise')
+            category_log.WORD_PLACEMENT_DISPLAY.info('Content keys: %s', content.keys())
+            category_log.WORD_PLACEMENT_DISPLAY.info('Raw content: %s', content)
             
             # Vérifier que les données nécessaires sont présentes
             if 'sentences' in content and 'words' in content:
                 sentences = content['sentences']
                 words = content['words']
-                print(f'[WORD_PLACEMENT_DISPLAY] Found {len(sentences)} sentences and {len(words)} words')
+                category_log.WORD_PLACEMENT_DISPLAY.info('Found %s sentences and %s words', len(sentences), len(words))
                 
                 # Ajouter les instructions si elles ne sont pas présentes
                 if 'instructions' not in content:
                     content['instructions'] = 'Faites glisser les mots dans les bonnes phrases ou cliquez pour les placer.'
-                    app.logger.info('Added default instructions for word_placement')
+                    app.logger.debug('Added default instructions for word_placement')
                 
                 # Pour word_placement, les phrases sont des chaînes simples avec des "___"
                 # Pas besoin de traiter comme des dictionnaires avec blanks
                 for i, sentence in enumerate(sentences):
                     if isinstance(sentence, str):
                         blank_count = sentence.count('___')
-                        app.logger.info(f'Sentence {i}: "{sentence}" with {blank_count} blanks')
+                        app.logger.debug('Sentence %s: "%s" with %s blanks', i, sentence, blank_count)
                     else:
-                        app.logger.warning(f'Sentence {i} is not a string: {type(sentence)}')
+                        app.logger.warning('Sentence %s is not a string: %s', i, type(sentence))
                 
-                app.logger.info(f'Available words: {words}')
+                app.logger.debug('Available words: %s', words)
             else:
                 app.logger.error('No sentences or words found in word_placement exercise')
-                app.logger.error(f'Available keys: {list(content.keys())}')
+                app.logger.error('Available keys: %s', list(content.keys()))
                 # Créer une structure vide pour éviter les erreurs
                 content['sentences'] = []
                 content['words'] = []
                 content['instructions'] = 'Aucune donnée trouvée pour cet exercice.'
     except Exception as e:
-        app.logger.error(f'Error parsing content: {str(e)}')
+        app.logger.error('Error parsing content: %s', e)
         app.logger.exception('Full error:')
         content = {'questions': []}
     progress = None
@@ -1415,27 +1098,27 @@ def view_exercise(exercise_id, course_id=None):
     # Choisir le template en fonction du type d'exercice
     if exercise.exercise_type == 'pairs':
         template = 'exercise_types/pairs_fixed.html'  # TEMPLATE CORRIGÉ
-        app.logger.info(f'Using FIXED template for pairs: {template}')
+        app.logger.debug('Using FIXED template for pairs: %s', template)
     elif exercise.exercise_type == 'underline_words':
         template = 'exercise_types/underline_words.html'  # TEMPLATE ORIGINAL RESTAURÉ
-        app.logger.info(f'Using ORIGINAL template for underline_words: {template}')
+        app.logger.debug('Using ORIGINAL template for underline_words: %s', template)
     else:
         template = f'exercise_types/{exercise.exercise_type}.html'
-        app.logger.info(f'Using template: {template}')
+        app.logger.debug('Using template: %s', template)
     
     try:
         # Vérifier que le template existe
         if not os.path.exists(os.path.join(app.template_folder, template)):
-            app.logger.error(f'Template not found: {template}')
+            app.logger.error('Template not found: %s', template)
             return 'Le template pour ce type d\'exercice n\'existe pas.', 500
         
         # Vérifier que les variables sont correctes
-        app.logger.info(f'Variables for template:')
-        app.logger.info(f'- exercise: {exercise}')
-        app.logger.info(f'- attempt: {attempt}')
-        app.logger.info(f'- content: {content}')
-        app.logger.info(f'- progress: {progress}')
-        app.logger.info(f'- course: {course}')
+        app.logger.debug('Variables for template:')
+        app.logger.debug('- exercise: %s', exercise)
+        app.logger.debug('- attempt: %s', attempt)
+        app.logger.debug('- content: %s', content)
+        app.logger.debug('- progress: %s', progress)
+        app.logger.debug('- course: %s', course)
         
         return render_template(template,
                             exercise=exercise,
@@ -1446,7 +1129,7 @@ def view_exercise(exercise_id, course_id=None):
                             user_answers=user_answers,
                             show_answers=show_answers)
     except Exception as e:
-        app.logger.error(f'Error rendering template: {str(e)}')
+        app.logger.error('Error rendering template: %s', e)
         app.logger.exception('Full template error:')
         return 'Une erreur est survenue lors de l\'affichage de l\'exercice.', 500
 
@@ -1463,7 +1146,7 @@ def view_exercise_teacher(exercise_id):
 @app.route('/course/<int:course_id>')
 @login_required
 def view_course(course_id):
-    course = Course.query.get_or_404(course_id)
+    course = course_page_query().filter_by(id=course_id).first_or_404()
 
     # Vérifier que l'utilisateur a accès au cours
     if not current_user.is_teacher and not current_user.is_enrolled(course.class_obj.id):
@@ -1491,6 +1174,10 @@ def view_course(course_id):
         }
 
 
+        # Grille élèves × exercices lue en une requête (student_exercise_progress)
+        student_ids = [student.id for student in course.class_obj.students]
+        progress_grid = get_progress_grid(exercises, student_ids)
+
         for exercise in exercises:
             exercise_stats = {
                 'title': exercise.title,
@@ -1499,34 +1186,33 @@ def view_course(course_id):
                 'needs_grading': 0
             }
 
-            total_students = len(course.class_obj.students)
+            total_students = len(student_ids)
             if total_students > 0:
                 completed = 0
                 total_score = 0
-                needs_grading = 0
 
-                for student in course.class_obj.students:
-                    progress = exercise.get_student_progress(student.id)
-                    if progress and progress.get('best_score') is not None:
+                for student_id in student_ids:
+                    progress = progress_grid[(student_id, exercise.id)]
+                    if progress['attempts_count'] > 0:
                         completed += 1
                         total_score += progress['best_score']
-                    elif progress and progress.get('needs_grading'):
-                        needs_grading += 1
 
                 exercise_stats['completion_rate'] = (completed / total_students) * 100
                 if completed > 0:
                     exercise_stats['average_score'] = total_score / completed
-                exercise_stats['needs_grading'] = needs_grading
 
             stats['exercises_stats'].append(exercise_stats)
 
     # Calcul de la progression pour les étudiants (partie droite)
     progress_records = []
+    student_progress = {}
     total_exercises = len(exercises)
     if not current_user.is_teacher:
+        progress_grid = get_progress_grid(exercises, [current_user.id])
         for ex in exercises:
-            progress = ex.get_student_progress(current_user.id)
-            if progress and progress.get('best_score', 0) >= 70:
+            progress = progress_grid[(current_user.id, ex.id)]
+            student_progress[ex.id] = progress
+            if progress.get('best_score', 0) >= 70:
                 progress_records.append({'exercise_id': ex.id, 'student_id': current_user.id})
 
     return render_template('view_course.html',
@@ -1535,6 +1221,7 @@ def view_course(course_id):
                          exercises_available=exercises_available,
                          stats=stats,
                          progress_records=progress_records,
+                         student_progress=student_progress,
                          total_exercises=total_exercises)
 
 @app.route('/class/<int:class_id>/create_course', methods=['GET', 'POST'])
@@ -1632,11 +1319,11 @@ def join_class_by_code():
 @app.route('/class/<int:class_id>/view')
 @login_required
 def view_class(class_id):
-    class_obj = Class.query.get_or_404(class_id)
+    class_obj = class_page_query().filter_by(id=class_id).first_or_404()
 
     # Si c'est l'enseignant de la classe
     if current_user.is_teacher and class_obj.teacher_id == current_user.id:
-        return view_class_teacher(class_id)
+        return render_class_teacher(class_obj)
 
     # Si c'est un étudiant inscrit dans la classe
     if not current_user.is_teacher and class_obj in current_user.classes_enrolled:
@@ -1649,17 +1336,24 @@ def view_class(class_id):
 @login_required
 @teacher_required
 def view_class_teacher(class_id):
-    class_obj = Class.query.get_or_404(class_id)
+    class_obj = class_page_query().filter_by(id=class_id).first_or_404()
     if class_obj.teacher_id != current_user.id:
         flash('Vous n\'êtes pas le professeur de cette classe.', 'error')
         return redirect(url_for('index'))
-    return render_template('view_class.html', class_obj=class_obj)
+    return render_class_teacher(class_obj)
+
+def render_class_teacher(class_obj):
+    # Statistiques élèves × cours lues en une requête (student_exercise_progress)
+    student_course_stats = get_course_stats_grid(
+        class_obj.courses, [student.id for student in class_obj.students]
+    )
+    return render_template('view_class.html', class_obj=class_obj, student_course_stats=student_course_stats)
 
 @app.route('/course/<int:course_id>/add-exercise', methods=['POST'])
 @login_required
 def add_exercise_to_course(course_id):
-    app.logger.info(f"[add_exercise_to_course] Début de l'ajout d'exercice au cours {course_id}")
-    app.logger.info(f"[add_exercise_to_course] Utilisateur: {current_user.id} ({current_user.role})")
+    app.logger.info("[add_exercise_to_course] Début de l'ajout d'exercice au cours %s", course_id)
+    app.logger.info('[add_exercise_to_course] Utilisateur: %s (%s)', current_user.id, current_user.role)
 
     if not current_user.is_teacher:
         app.logger.warning("[add_exercise_to_course] Tentative d'accès non autorisé")
@@ -1667,7 +1361,7 @@ def add_exercise_to_course(course_id):
         return redirect(url_for('index'))
 
     course = Course.query.get_or_404(course_id)
-    app.logger.info(f"[add_exercise_to_course] Cours trouvé: {course.title}")
+    app.logger.info('[add_exercise_to_course] Cours trouvé: %s', course.title)
 
     # Vérifier que l'utilisateur est le propriétaire de la classe
     if course.class_obj.teacher_id != current_user.id:
@@ -1676,7 +1370,7 @@ def add_exercise_to_course(course_id):
         return redirect(url_for('index'))
 
     exercise_id = request.form.get('exercise_id')
-    app.logger.info(f"[add_exercise_to_course] ID de l'exercice reçu: {exercise_id}")
+    app.logger.info("[add_exercise_to_course] ID de l'exercice reçu: %s", exercise_id)
 
     if not exercise_id:
         app.logger.warning("[add_exercise_to_course] Aucun exercice sélectionné")
@@ -1684,7 +1378,7 @@ def add_exercise_to_course(course_id):
         return redirect(url_for('view_course', course_id=course_id))
 
     exercise = Exercise.query.get_or_404(exercise_id)
-    app.logger.info(f"[add_exercise_to_course] Exercice trouvé: {exercise.title}")
+    app.logger.info('[add_exercise_to_course] Exercice trouvé: %s', exercise.title)
 
     # Vérifier que l'exercice n'est pas déjà dans le cours
     if exercise in course.exercises:
@@ -1693,21 +1387,21 @@ def add_exercise_to_course(course_id):
         return redirect(url_for('view_course', course_id=course_id))
 
     try:
-        app.logger.info(f"[add_exercise_to_course] Tentative d'ajout de l'exercice {exercise_id} au cours {course_id}")
-        app.logger.info(f"[add_exercise_to_course] État actuel du cours - Exercices: {[ex.id for ex in course.exercises]}")
+        app.logger.info("[add_exercise_to_course] Tentative d'ajout de l'exercice %s au cours %s", exercise_id, course_id)
+        app.logger.info('[add_exercise_to_course] État actuel du cours - Exercices: %s', [ex.id for ex in course.exercises])
 
         course.exercises.append(exercise)
         db.session.commit()
 
-        app.logger.info(f"[add_exercise_to_course] Nouvel état du cours - Exercices: {[ex.id for ex in course.exercises]}")
+        app.logger.info('[add_exercise_to_course] Nouvel état du cours - Exercices: %s', [ex.id for ex in course.exercises])
         flash('Exercice ajouté au cours avec succès !', 'success')
         return redirect(url_for('view_course', course_id=course_id))
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"[add_exercise_to_course] Erreur lors de l'ajout : {str(e)}")
-        app.logger.error(f"[add_exercise_to_course] Type d'erreur : {type(e).__name__}")
+        app.logger.error("[add_exercise_to_course] Erreur lors de l'ajout : %s", e)
+        app.logger.error("[add_exercise_to_course] Type d'erreur : %s", type(e).__name__)
         import traceback
-        app.logger.error(f"[add_exercise_to_course] Traceback : {traceback.format_exc()}")
+        app.logger.error('[add_exercise_to_course] Traceback : %s', traceback.format_exc())
         flash('Erreur lors de l\'ajout de l\'exercice au cours.', 'error')
         return redirect(url_for('view_course', course_id=course_id))
 
@@ -1734,7 +1428,7 @@ def remove_exercise_from_course(course_id, exercise_id):
     except Exception as e:
         db.session.rollback()
         flash('Erreur lors du retrait de l\'exercice du cours.', 'error')
-        print(f"Erreur : {str(e)}")
+        app.logger.error("Erreur lors du retrait de l'exercice du cours : %s", e)
 
     return redirect(url_for('view_course', course_id=course_id))
 
@@ -1744,11 +1438,11 @@ def process_quick_add_exercise(exercise_id):
     try:
         # Récupérer l'exercice
         exercise = Exercise.query.get_or_404(exercise_id)
-        app.logger.info(f"[quick_add_exercise] Exercice trouvé: {exercise.title}")
+        app.logger.info('[quick_add_exercise] Exercice trouvé: %s', exercise.title)
 
         # Récupérer toutes les classes de l'utilisateur
         classes = Class.query.filter_by(teacher_id=current_user.id).all()
-        app.logger.info(f"[quick_add_exercise] Nombre de classes trouvées: {len(classes)}")
+        app.logger.info('[quick_add_exercise] Nombre de classes trouvées: %s', len(classes))
 
         # Récupérer la classe sélectionnée si elle existe
         selected_class_id = request.args.get('class_id')
@@ -1759,9 +1453,9 @@ def process_quick_add_exercise(exercise_id):
                 class_obj = Class.query.get(int(selected_class_id))
                 if class_obj and class_obj.teacher_id == current_user.id:
                     selected_courses = Course.query.filter_by(class_id=int(selected_class_id)).all()
-                    app.logger.info(f"[quick_add_exercise] Cours trouvés pour la classe {selected_class_id}: {len(selected_courses)}")
+                    app.logger.info('[quick_add_exercise] Cours trouvés pour la classe %s: %s', selected_class_id, len(selected_courses))
             except ValueError:
-                app.logger.error(f"[quick_add_exercise] ID de classe invalide: {selected_class_id}")
+                app.logger.error('[quick_add_exercise] ID de classe invalide: %s', selected_class_id)
                 selected_courses = []
 
         # Si c'est une requête POST, traiter l'ajout de l'exercice
@@ -1769,7 +1463,7 @@ def process_quick_add_exercise(exercise_id):
             class_id = request.form.get('class_id')
             course_id = request.form.get('course_id')
 
-            app.logger.info(f"[process_quick_add_exercise] Données reçues - class_id: {class_id}, course_id: {course_id}")
+            app.logger.info('[process_quick_add_exercise] Données reçues - class_id: %s, course_id: %s', class_id, course_id)
 
             if not class_id or not course_id:
                 flash('Veuillez sélectionner une classe et un cours.', 'error')
@@ -1789,13 +1483,13 @@ def process_quick_add_exercise(exercise_id):
 
             # Ajouter l'exercice au cours s'il n'y est pas déjà
             if exercise not in course.exercises:
-                app.logger.info(f"[process_quick_add_exercise] Ajout de l'exercice {exercise_id} au cours {course_id}")
+                app.logger.info("[process_quick_add_exercise] Ajout de l'exercice %s au cours %s", exercise_id, course_id)
                 course.exercises.append(exercise)
                 db.session.commit()
                 flash('Exercice ajouté avec succès au cours !', 'success')
                 return redirect(url_for('view_course', course_id=course_id))
             else:
-                app.logger.info(f"[process_quick_add_exercise] L'exercice {exercise_id} est déjà dans le cours {course_id}")
+                app.logger.info("[process_quick_add_exercise] L'exercice %s est déjà dans le cours %s", exercise_id, course_id)
                 flash('Cet exercice est déjà dans le cours.', 'info')
                 return redirect(url_for('view_course', course_id=course_id))
 
@@ -1808,10 +1502,10 @@ def process_quick_add_exercise(exercise_id):
 
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"[process_quick_add_exercise] Erreur lors de l'ajout de l'exercice: {str(e)}")
-        app.logger.error(f"[process_quick_add_exercise] Type d'erreur: {type(e).__name__}")
+        app.logger.error("[process_quick_add_exercise] Erreur lors de l'ajout de l'exercice: %s", e)
+        app.logger.error("[process_quick_add_exercise] Type d'erreur: %s", type(e).__name__)
         import traceback
-        app.logger.error(f"[process_quick_add_exercise] Traceback: {traceback.format_exc()}")
+        app.logger.error('[process_quick_add_exercise] Traceback: %s', traceback.format_exc())
         flash('Une erreur est survenue lors de l\'ajout de l\'exercice.', 'error')
         return redirect(url_for('process_quick_add_exercise', exercise_id=exercise_id))
 
@@ -1979,7 +1673,7 @@ def submit_exercise(exercise_id):
             return redirect(url_for('student_classes'))
         
         # Vérifier que l'exercice fait partie du cours
-        if exercise not in course.exercises:
+        if not exercise_in_course(exercise.id, course.id):
             flash('Cet exercice ne fait pas partie du cours.', 'error')
             return redirect(url_for('view_course', course_id=course_id))
     
@@ -1990,177 +1684,13 @@ def submit_exercise(exercise_id):
         return redirect(url_for('view_exercise', exercise_id=exercise_id))
         return redirect(url_for('view_exercise', exercise_id=exercise_id, course_id=course_id))
     
-    # Traiter les réponses
-    answers = []
-    score = 0
-    feedback = []
-    content = exercise.get_content()
-    
-    if exercise.exercise_type == 'qcm':
-        total_questions = len(content['questions'])
-        correct_answers = 0
-        
-        app.logger.debug(f'Content: {content}')
-        for i, question in enumerate(content['questions']):
-            answer = request.form.get(f'answer_{i}')
-            app.logger.debug(f'Réponse brute pour la question {i}: {answer}')
-            
-            # Convertir la réponse en entier
-            try:
-                answer = int(answer) if answer is not None else -1
-            except (ValueError, TypeError):
-                answer = -1
-            answers.append(answer)
-            
-            # Accepter à la fois 'correct' et 'correct_answer' comme clé de la bonne réponse
-            correct_key = 'correct'
-            if 'correct' not in question and 'correct_answer' in question:
-                correct_key = 'correct_answer'
-            if correct_key not in question:
-                app.logger.error(f"La question {i} ne contient pas la clé 'correct' ou 'correct_answer'. Structure de la question : {question}")
-                feedback.append({
-                    'question': i + 1,
-                    'correct': False,
-                    'message': "Erreur interne : la question est mal structurée. Merci de contacter l'enseignant."
-                })
-                continue  # On passe à la question suivante
-            # S'assurer que la valeur est bien un entier pour la comparaison
-            try:
-                correct = int(question[correct_key])
-            except (ValueError, TypeError, KeyError):
-                correct = -1
-            app.logger.debug(f'Question {i} - Réponse de l\'utilisateur: {answer}, Réponse correcte: {correct}')
-            
-            # Forcer la conversion en int pour éviter les erreurs de type
-            try:
-                answer_int = int(answer)
-            except (ValueError, TypeError):
-                app.logger.warning(f"Impossible de convertir la réponse utilisateur '{answer}' en int pour la question {i}.")
-                answer_int = -999
-            try:
-                correct_int = int(correct)
-            except (ValueError, TypeError):
-                app.logger.warning(f"Impossible de convertir la réponse correcte '{correct}' en int pour la question {i}.")
-                correct_int = -999
-            # Vérifier si la réponse est correcte
-            if answer_int == correct_int:
-                correct_answers += 1
-                app.logger.debug(f'Question {i} - Bonne réponse !')
-                feedback.append({
-                    'question': i + 1,
-                    'correct': True,
-                    'message': 'Bonne réponse !'
-                })
-            else:
-                # Récupérer le texte de la réponse correcte
-                correct_option = question['options'][correct] if 0 <= correct < len(question['options']) else 'Non spécifiée'
-                app.logger.debug(f'Question {i} - Mauvaise réponse. Attendu: {correct_option}')
-                feedback.append({
-                    'question': i + 1,
-                    'correct': False,
-                    'message': f'La réponse correcte était : {correct_option}'
-                })
-        
-        app.logger.debug(f'Réponses correctes: {correct_answers}, Total questions: {total_questions}')
-        score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-        app.logger.debug(f'Score final: {score}%')
-    
-    elif exercise.exercise_type == 'fill_in_blanks':
-        # Cette implémentation a été désactivée car elle est en conflit avec l'implémentation plus complète
-        # Voir lignes ~3415-3510 pour l'implémentation active.
-        pass
-
-    elif exercise.exercise_type == 'word_placement':
-        user_answers = []
-        correct_answers = content.get('answers', [])
-        
-        # Récupérer toutes les réponses de l'utilisateur dans l'ordre séquentiel
-        i = 0
-        while True:
-            answer = request.form.get(f'answer_{i}')
-            if answer is None:
-                break
-            user_answers.append(answer.strip())
-            i += 1
-        
-        app.logger.debug(f'[WORD_PLACEMENT_SCORING] Réponses utilisateur: {user_answers}')
-        app.logger.debug(f'[WORD_PLACEMENT_SCORING] Réponses correctes: {correct_answers}')
-        
-        if len(user_answers) != len(correct_answers):
-            flash('Nombre de réponses incorrect.', 'error')
-            return redirect(url_for('view_exercise', exercise_id=exercise_id))
-        
-        score = 0
-        feedback = []
-        for i, (user_ans, correct_ans) in enumerate(zip(user_answers, correct_answers)):
-            # Comparaison insensible à la casse et aux espaces
-            is_correct = user_ans.strip().lower() == correct_ans.strip().lower()
-            score += 1 if is_correct else 0
-            feedback.append({
-                'user_answer': user_ans,
-                'correct_answer': correct_ans,
-                'is_correct': is_correct,
-                'position': i + 1
-            })
-        
-        max_score = len(correct_answers)
-        score = (score / max_score) * 100 if max_score > 0 else 0
-        
-        app.logger.debug(f'[WORD_PLACEMENT_SCORING] Score final: {score}% ({score}/{max_score})')
-    
-    elif exercise.exercise_type == 'word_search':
-        found_words = request.form.getlist('found_words[]')
-        total_words = len(content['words'])
-        correct_words = 0
-        
-        # Convertir les mots trouvés et les mots à chercher en minuscules pour la comparaison
-        found_words = [word.lower().strip() for word in found_words]
-        target_words = [word.lower().strip() for word in content['words']]
-        
-        for word in found_words:
-            if word in target_words:
-                correct_words += 1
-                feedback.append({
-                    'word': word,
-                    'correct': True,
-                    'message': 'Mot trouvé !'
-                })
-        
-        # Ajouter le feedback pour les mots non trouvés
-        for word in target_words:
-            if word not in found_words:
-                feedback.append({
-                    'word': word,
-                    'correct': False,
-                    'message': 'Mot non trouvé'
-                })
-        
-        score = (correct_words / total_words) * 100 if total_words > 0 else 0
-        
-    elif exercise.exercise_type == 'pairs':
-        # Structure attendue : 'correct_pairs': [[0, 0], [1, 1], ...], left_items, right_items
-        correct_pairs = content.get('correct_pairs', [])
-        total_pairs = len(correct_pairs)
-        correct_count = 0
-        user_pairs = []
-        for i in range(total_pairs):
-            left = request.form.get(f'left_{i}')
-            right = request.form.get(f'right_{i}')
-            if left is not None and right is not None:
-                try:
-                    left_idx = int(left)
-                    right_idx = int(right)
-                    user_pairs.append([left_idx, right_idx])
-                    answers.append({'left': left_idx, 'right': right_idx})
-                except (ValueError, TypeError):
-                    continue
-        for pair in correct_pairs:
-            if pair in user_pairs:
-                correct_count += 1
-                feedback.append({'pair': pair, 'correct': True, 'message': 'Paire correcte !'})
-            else:
-                feedback.append({'pair': pair, 'correct': False, 'message': 'Paire incorrecte'})
-        score = (correct_count / total_pairs) * 100 if total_pairs > 0 else 0
+    # Traiter les réponses (correcteur du type d'exercice, voir exercise_graders)
+    try:
+        result = grade_exercise(exercise, request.form, validate=True)
+    except GradingError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('view_exercise', exercise_id=exercise_id))
+    score, answers, feedback = result.score, result.answers, result.feedback
     
     # S'assurer que le score est un nombre valide
     if score is None:
@@ -2190,36 +1720,21 @@ def submit_exercise(exercise_id):
 @login_required
 @teacher_required
 def exercise_stats(exercise_id):
-    exercise = Exercise.query.get_or_404(exercise_id)
+    exercise = exercise_stats_query().filter_by(id=exercise_id).first_or_404()
     course_id = request.args.get('course_id', type=int)
     
     # Vérifier que l'enseignant a le droit d'accéder à ces statistiques
-    has_access = False
-    
-    # Vérifier si l'enseignant est le créateur de l'exercice
-    if exercise.teacher_id == current_user.id:
-        has_access = True
-    else:
-        # Vérifier si l'exercice est utilisé dans l'une des classes de l'enseignant
-        teacher_classes = Class.query.filter_by(teacher_id=current_user.id).all()
-        for class_obj in teacher_classes:
-            for course in class_obj.courses:
-                if exercise in course.exercises:
-                    has_access = True
-                    break
-            if has_access:
-                break
-    
-    if not has_access:
+    # (auteur de l'exercice ou exercice utilisé dans l'une de ses classes)
+    if not can_view_exercise_stats(current_user, exercise.id):
         flash("Vous n'avez pas l'autorisation de voir ces statistiques.", "error")
         return redirect(url_for('index'))
     
+    # Récupérer les informations du cours si spécifié (avant get_stats, qui le relit)
+    course = stats_course_query().filter_by(id=course_id).first() if course_id else None
+    
     # Récupérer les statistiques
     stats = exercise.get_stats(course_id)
     
-    # Récupérer les informations du cours si spécifié
-    course = Course.query.get(course_id) if course_id else None
-    
     # Ajouter les informations de progression pour chaque étudiant
     student_progress = []
     
@@ -2228,17 +1743,15 @@ def exercise_stats(exercise_id):
         students_to_show = course.class_obj.students
     else:
         # Sans cours spécifié, montrer tous les étudiants qui ont déjà fait l'exercice
-        attempts = ExerciseAttempt.query.filter_by(exercise_id=exercise.id).all()
-        student_ids = list(set([a.student_id for a in attempts]))  # Utiliser set() pour éliminer les doublons
+        student_ids = get_exercise_student_ids(exercise.id)
         students_to_show = User.query.filter(User.id.in_(student_ids), User.role=='student').all()
     
+    progress_grid = get_progress_grid([exercise], [student.id for student in students_to_show])
     for student in students_to_show:
-        progress = exercise.get_student_progress(student.id)
-        if progress:
-            student_progress.append({
-                'student': student,
-                'progress': progress
-            })
+        student_progress.append({
+            'student': student,
+            'progress': progress_grid[(student.id, exercise.id)]
+        })
     
     return render_template('exercise_stats.html',
                          exercise=exercise,
@@ -2330,19 +1843,18 @@ def get_available_exercises(course_id):
 # @login_required  # Commenté pour les tests sans authentification
 
 def submit_answer(exercise_id, course_id=0):
-    app.logger.info(f"[DEBUG] submit_exercise_answer called for exercise_id={exercise_id}")
-    print("\n=== DÉBUT SUBMIT_ANSWER ===\n")
-    print(f"[DEBUG] Soumission pour l'exercice {exercise_id}")
+    category_log.SUBMIT_DEBUG.info('submit_exercise_answer called for exercise_id=%s', exercise_id)
+    category_log.SUBMIT_DEBUG.debug("Soumission pour l'exercice %s", exercise_id)
     # print(f"[DEBUG] Utilisateur: {current_user.username} (ID: {current_user.id})")  # Commenté pour tests sans auth
-    print("[DEBUG] Form data:", request.form)
-    print("[DEBUG] Form data type:", type(request.form))
+    category_log.SUBMIT_DEBUG.debug('Form data: %s', request.form)
+    category_log.SUBMIT_DEBUG.debug('Form data type: %s', type(request.form))
     
     exercise = Exercise.query.get_or_404(exercise_id)
     # Utiliser le course_id de l'URL ou du formulaire comme fallback
     if not course_id:
         course_id = request.form.get('course_id')
-    print(f"[DEBUG] Course ID from route: {course_id}")
-    print(f"[DEBUG] Course ID from form: {request.form.get('course_id')}")
+    category_log.SUBMIT_DEBUG.debug('Course ID from route: %s', course_id)
+    category_log.SUBMIT_DEBUG.debug('Course ID from form: %s', request.form.get('course_id'))
     
     # if not course_id:  # Commenté pour tests sans cours
     #     flash('Erreur: Cours non spécifié', 'error')
@@ -2355,215 +1867,19 @@ def submit_answer(exercise_id, course_id=0):
     #     flash('Vous n\'avez pas accès à cet exercice.', 'error')
     #     return redirect(url_for('exercise_library'))
     
-    answers = {}
-    score = 0
-    feedback = []
-
-    if exercise.exercise_type == 'qcm':
-        print("\n=== DÉBUT SCORING QCM ===")
-        content = exercise.get_content()
-        print(f"[QCM_DEBUG] Content: {content}")
-        
-        if not isinstance(content, dict) or 'questions' not in content:
-            print("[QCM_DEBUG] Structure invalide!")
-            flash('Structure de l\'exercice invalide.', 'error')
-            return redirect(url_for('view_exercise', exercise_id=exercise_id))
-
-        total_questions = len(content['questions'])
-        correct_answers = 0
-        print(f"[QCM_DEBUG] Total questions: {total_questions}")
-
-        for i, question in enumerate(content['questions']):
-            student_answer = request.form.get(f'answer_{i}')
-            correct_answer = question.get('correct_answer')
-            
-            print(f"[QCM_DEBUG] Question {i}:")
-            print(f"  - Texte: {question.get('text')}")
-            print(f"  - Réponse étudiant (answer_{i}): {student_answer}")
-            print(f"  - Bonne réponse: {correct_answer}")
-            print(f"  - Choices: {question.get('choices')}")
-            
-            is_correct = False
-            if student_answer is not None and correct_answer is not None:
-                is_correct = int(student_answer) == int(correct_answer)
-                if is_correct:
-                    correct_answers += 1
-                    print(f"  - [CORRECT] Bonne reponse!")
-                else:
-                    print(f"  - [INCORRECT] {student_answer} != {correct_answer}")
-            else:
-                print(f"  - [WARNING] DONNEES MANQUANTES: student={student_answer}, correct={correct_answer}")
-
-            feedback.append({
-                'question': question['text'],
-                'student_answer': question['choices'][int(student_answer)] if student_answer and int(student_answer) < len(question['choices']) else 'Aucune réponse',
-                'correct_answer': question['choices'][correct_answer] if correct_answer < len(question['choices']) else 'Erreur',
-                'is_correct': is_correct
-            })
-
-        score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-        print(f"[QCM_DEBUG] Score final: {correct_answers}/{total_questions} = {score}%")
-        print("=== FIN SCORING QCM ===\n")
-
-    elif exercise.exercise_type == 'underline_words':
-        content = exercise.get_content()
-        
-        # Gérer les deux structures possibles : 'sentences' ou 'words'
-        sentences_data = content.get('sentences') or content.get('words', [])
-        
-        if not isinstance(content, dict) or not sentences_data:
-            flash('Structure de l\'exercice invalide.', 'error')
-            return redirect(url_for('view_exercise', exercise_id=exercise_id, course_id=course_id))
-
-        total_sentences = len(sentences_data)
-        correct_sentences = 0
-
-        for i, sentence_data in enumerate(sentences_data):
-            student_answers = request.form.getlist(f'underlined_words_{i}[]')
-            correct_words = set(word.lower() for word in sentence_data['words_to_underline'])
-            student_words = set(word.lower() for word in student_answers)
-
-            is_correct = student_words == correct_words
-            if is_correct:
-                correct_sentences += 1
-
-            feedback.append({
-                'sentence': sentence_data['text'],
-                'student_words': list(student_words),
-                'correct_words': list(correct_words),
-                'is_correct': is_correct
-            })
-
-        score = (correct_sentences / total_sentences) * 100 if total_sentences > 0 else 0
-
-    elif exercise.exercise_type == 'pairs':
-        content = exercise.get_content()
-        if not isinstance(content, dict) or 'pairs' not in content:
-            flash('Structure de l\'exercice invalide.', 'error')
-            return redirect(url_for('view_exercise', exercise_id=exercise_id, course_id=course_id))
-
-        total_pairs = len(content['pairs'])
-        correct_pairs = 0
-
-        # Créer un dictionnaire des paires correctes
-        correct_matches = {pair['first']: pair['second'] for pair in content['pairs']}
-
-        for first, correct_second in correct_matches.items():
-            student_answer = request.form.get(f'pair_{first}')
-            is_correct = student_answer == correct_second
-
-            if is_correct:
-                correct_pairs += 1
-
-            feedback.append({
-                'first': first,
-                'student_answer': student_answer,
-                'correct_answer': correct_second,
-                'is_correct': is_correct
-            })
-
-        score = (correct_pairs / total_pairs) * 100 if total_pairs > 0 else 0
-
-    elif exercise.exercise_type == 'fill_in_blanks':
-        content = exercise.get_content()
-        print("[DEBUG] Contenu de l'exercice:", content)
-
-        # Vérification de la structure attendue
-        if not isinstance(content, dict) or 'sentences' not in content or not isinstance(content['sentences'], list):
-            app.logger.error(f"[ERREUR STRUCTURE] L'exercice {exercise.id} n'a pas de clé 'sentences' valide dans son contenu: {content}")
-            flash("Erreur de configuration de l'exercice : structure des phrases manquante ou invalide.", 'error')
-            return redirect(url_for('view_exercise', exercise_id=exercise_id, course_id=course_id))
-
-        total_questions = len(content['sentences'])
-        correct_answers = 0
-
-        for i in range(total_questions):
-            student_answer = request.form.get(f'answer_{i}')
-            correct_answer = content['sentences'][i]['answer']
-            print(f"[DEBUG] Question {i + 1}:")
-            print(f"[DEBUG] - Réponse de l'étudiant : {student_answer}")
-            print(f"[DEBUG] - Réponse correcte : {correct_answer}")
-
-            if student_answer and student_answer.strip().lower() == correct_answer.strip().lower():
-                correct_answers += 1
-                feedback.append({
-                    'question': content['sentences'][i]['text'],
-                    'student_answer': student_answer,
-                    'correct_answer': correct_answer,
-                    'is_correct': True
-                })
-            else:
-                feedback.append({
-                    'question': content['sentences'][i]['text'],
-                    'student_answer': student_answer or '',
-                    'correct_answer': correct_answer,
-                    'is_correct': False
-                })
-
-        score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-
-    elif exercise.exercise_type == 'word_placement':
-        print("\n=== DÉBUT SCORING WORD_PLACEMENT ===")
-        content = exercise.get_content()
-        print(f"[WORD_PLACEMENT_DEBUG] Content: {content}")
-        
-        if not isinstance(content, dict) or 'sentences' not in content or 'answers' not in content:
-            print("[WORD_PLACEMENT_DEBUG] Structure invalide!")
-            flash('Structure de l\'exercice invalide.', 'error')
-            return redirect(url_for('view_exercise', exercise_id=exercise_id))
-
-        sentences = content['sentences']
-        correct_answers = content['answers']
-        
-        # CORRECTION: Compter le nombre réel de blancs dans les phrases
-        total_blanks_in_sentences = sum(s.count('___') for s in sentences)
-        total_blanks = max(total_blanks_in_sentences, len(correct_answers))
-        
-        correct_count = 0
-        
-        print(f"[WORD_PLACEMENT_DEBUG] Total blanks in sentences: {total_blanks_in_sentences}")
-        print(f"[WORD_PLACEMENT_DEBUG] Total answers: {len(correct_answers)}")
-        print(f"[WORD_PLACEMENT_DEBUG] Using total_blanks = {total_blanks}")
-        print(f"[WORD_PLACEMENT_DEBUG] Expected answers: {correct_answers}")
-
-        # Vérifier chaque réponse
-        for i in range(total_blanks):
-            student_answer = request.form.get(f'answer_{i}')
-            expected_answer = correct_answers[i] if i < len(correct_answers) else ''
-            
-            print(f"[WORD_PLACEMENT_DEBUG] Blank {i}:")
-            print(f"  - Réponse étudiant (answer_{i}): {student_answer}")
-            print(f"  - Réponse attendue: {expected_answer}")
-            
-            if student_answer and student_answer.strip().lower() == expected_answer.strip().lower():
-                correct_count += 1
-                feedback.append({
-                    'blank_index': i,
-                    'student_answer': student_answer,
-                    'correct_answer': expected_answer,
-                    'is_correct': True
-                })
-            else:
-                feedback.append({
-                    'blank_index': i,
-                    'student_answer': student_answer or '',
-                    'correct_answer': expected_answer,
-                    'is_correct': False
-                })
-
-        score = (correct_count / total_blanks) * 100 if total_blanks > 0 else 0
-        print(f"[WORD_PLACEMENT_DEBUG] Score final: {score}% ({correct_count}/{total_blanks} = {correct_count/total_blanks if total_blanks > 0 else 0})")
-
-    else:
-        print(f"[ERROR] Type d'exercice non pris en charge: {exercise.exercise_type}")
-        flash(f'Le type d\'exercice {exercise.exercise_type} n\'est pas pris en charge.', 'error')
+    # Correction via le registre des correcteurs (voir exercise_graders)
+    try:
+        result = grade_exercise(exercise, request.form)
+    except GradingError as e:
+        flash(str(e), 'error')
         return redirect(url_for('view_exercise', exercise_id=exercise_id))
+    score, answers, feedback = result.score, result.answers, result.feedback
             
     # Créer une nouvelle tentative
     try:
         # Convertir le score en float pour s'assurer qu'il est bien numérique
         score = float(score)
-        app.logger.debug(f'Création de la tentative - Score: {score}')
+        app.logger.debug('Création de la tentative - Score: %s', score)
         
         attempt = ExerciseAttempt(
             student_id=current_user.id,
@@ -2582,52 +1898,16 @@ def submit_answer(exercise_id, course_id=0):
         return redirect(url_for('view_exercise', exercise_id=exercise_id, course_id=course_id))
         
     except Exception as e:
-        app.logger.error(f'Erreur lors de la création de la tentative: {str(e)}')
+        app.logger.error('Erreur lors de la création de la tentative: %s', e)
         db.session.rollback()
         flash('Une erreur est survenue lors de l\'enregistrement de votre tentative.', 'error')
         return redirect(url_for('view_exercise', exercise_id=exercise_id, course_id=course_id))
     return redirect(url_for('view_exercise', exercise_id=exercise_id))
 
-@app.route('/debug/exercises')
-@login_required
-def debug_exercises():
-    if not current_user.is_teacher:
-        return "Accès non autorisé", 403
-        
-    exercises = Exercise.query.all()
-    debug_info = []
-    
-    for ex in exercises:
-        debug_info.append({
-            'id': ex.id,
-            'title': ex.title,
-            'type': ex.exercise_type,
-            'content': ex.content,
-            'parsed_content': ex.get_content()
-        })
-    
-    return render_template('debug_exercises.html', exercises=debug_info)
-
-@app.route('/debug/images')
-def debug_images():
-    # Lister tous les fichiers dans le dossier uploads
-    files = []
-    upload_dir = app.config['UPLOAD_FOLDER']
-    for filename in os.listdir(upload_dir):
-        if filename.startswith('pair_left_'):
-            file_path = os.path.join(upload_dir, filename)
-            if os.path.isfile(file_path):
-                files.append({
-                    'name': filename,
-                    'url': url_for('static', filename=f'uploads/{filename}'),
-                    'size': os.path.getsize(file_path)
-                })
-    
-    return render_template('debug_images.html', files=files)
+
 
 import random
-from blueprints.diagnose_select_school_route import diagnose_select_school_bp
-from blueprints.fix_payment_select_school import fix_payment_select_school_bp
+from fix_payment_select_school import fix_payment_select_school_bp
 
 
 def generate_word_search_grid(words, max_attempts=3):
@@ -2810,40 +2090,22 @@ def preview_exercise(exercise_id):
     return render_template(template, exercise=exercise, content=content)
 
 
-
-
-
-
 # Route supprimée car dupliquée avec /exercise/create
 
-# Route pour la soumission des exercices (intégrée directement)
-@app.route('/test-submit')
-def test_submit():
-    return render_template('test_submit.html')
-
-@app.route('/test-minimal')
-def test_minimal():
-    """Route pour tester un formulaire ultra-minimal"""
-    return render_template('test_minimal_form.html')
-
-@app.route('/test-pure-html')
-def test_pure_html():
-    """Route pour tester un formulaire HTML pur sans JavaScript"""
-    return render_template('test_pure_html.html')
 
 @app.route('/exercise/<int:exercise_id>/answer', methods=['POST'])
 # @login_required  # TEMPORAIREMENT DÉSACTIVÉ POUR TEST
 def handle_exercise_answer(exercise_id):
-    print(f"[ROUTE_DEBUG] Route /exercise/{exercise_id}/answer accessed")
-    print(f"[DIAGNOSTIC] handle_exercise_answer called with exercise_id={exercise_id}")
-    app.logger.info(f"[DIAGNOSTIC] Function entry - exercise_id={exercise_id}")
+    category_log.ROUTE_DEBUG.debug('Route /exercise/%s/answer accessed', exercise_id)
+    category_log.DIAGNOSTIC.debug('handle_exercise_answer called with exercise_id=%s', exercise_id)
+    category_log.DIAGNOSTIC.info('Function entry - exercise_id=%s', exercise_id)
     try:
-        app.logger.info(f"[SUBMIT_DEBUG] Starting handle_exercise_answer for exercise {exercise_id}")
+        category_log.SUBMIT_DEBUG.info('Starting handle_exercise_answer for exercise %s', exercise_id)
         exercise = Exercise.query.get_or_404(exercise_id)
-        app.logger.info(f"[SUBMIT_DEBUG] Exercise found: {exercise.title}, type: {exercise.exercise_type}")
+        category_log.SUBMIT_DEBUG.info('Exercise found: %s, type: %s', exercise.title, exercise.exercise_type)
         course_id = request.form.get('course_id')
         course = Course.query.get(course_id) if course_id else None
-        app.logger.info(f"[SUBMIT_DEBUG] Form data keys: {list(request.form.keys())}")
+        category_log.SUBMIT_DEBUG.info('Form data keys: %s', request.form.keys())
         
         # Vérifier que l'étudiant a accès à l'exercice si c'est via un cours
         # TEMPORAIREMENT DÉSACTIVÉ POUR TEST SANS AUTHENTIFICATION
@@ -2853,846 +2115,24 @@ def handle_exercise_answer(exercise_id):
         #         flash('Vous n\'avez pas accès à cet exercice.', 'error')
         #         return redirect(url_for('index'))
         
-        # Récupérer les réponses et calculer le score
-        answers = {}
-        score = 0
-        max_score = 0
-        feedback = {}
-        
-        if exercise.exercise_type == 'drag_and_drop':
-            # Gestion des exercices glisser-déposer
-            content = json.loads(exercise.content)
-            app.logger.info(f"[DRAG_DROP_DEBUG] Processing drag_and_drop exercise {exercise_id}")
-            app.logger.info(f"[DRAG_DROP_DEBUG] Form data: {dict(request.form)}")
-            
-            user_order = []
-            feedback = []
-            
-            # Récupérer les réponses du formulaire
-            for i in range(len(content['draggable_items'])):
-                val = request.form.get(f'answer_{i}')
-                app.logger.info(f"[DRAG_DROP_DEBUG] answer_{i} = {val} (type: {type(val)})")
-                try:
-                    idx = int(val) if val is not None else -1
-                    user_order.append(idx)
-                except (ValueError, TypeError):
-                    user_order.append(-1)
-            
-            correct_order = content.get('correct_order', [])
-            app.logger.info(f"[DRAG_DROP_DEBUG] User order: {user_order}")
-            app.logger.info(f"[DRAG_DROP_DEBUG] Correct order: {correct_order}")
-            
-            # Calculer le score
-            score_count = 0
-            for i, (user_idx, correct_idx) in enumerate(zip(user_order, correct_order)):
-                user_item = content['draggable_items'][user_idx] if 0 <= user_idx < len(content['draggable_items']) else "Vide"
-                correct_item = content['draggable_items'][correct_idx] if 0 <= correct_idx < len(content['draggable_items']) else "Vide"
-                is_correct = (user_idx == correct_idx) and (user_idx != -1)
-                
-                feedback.append({
-                    'zone': i+1,
-                    'expected': correct_item,
-                    'given': user_item,
-                    'is_correct': is_correct
-                })
-                
-                if is_correct:
-                    score_count += 1
-                    
-                app.logger.info(f"[DRAG_DROP_DEBUG] Zone {i+1}: user={user_idx}, correct={correct_idx}, match={is_correct}")
-            
-            max_score = len(correct_order)
-            score = round((score_count / max_score) * 100) if max_score > 0 else 0
-            
-            # DEBUG: Log final scoring results
-            app.logger.info(f"[DRAG_DROP_DEBUG] Score count: {score_count}")
-            app.logger.info(f"[DRAG_DROP_DEBUG] Max score: {max_score}")
-            app.logger.info(f"[DRAG_DROP_DEBUG] Final score: {score}%")
-            
-            # Créer le feedback summary pour drag_and_drop
-            feedback_summary = {
-                'score': score,
-                'score_count': score_count,
-                'max_score': max_score,
-                'details': feedback
-            }
+        # Récupérer les réponses et calculer le score (registre des correcteurs, voir exercise_graders)
+        try:
+            result = grade_exercise(exercise, request.form)
+        except GradingError as e:
+            flash(str(e), 'error')
+            return redirect(url_for('view_exercise', exercise_id=exercise_id))
+        score, answers, feedback_to_save = result.score, result.answers, result.feedback
             
-            # Pour drag_and_drop, on utilise le score en pourcentage mais on sauvegarde aussi le score_count
-            answers = {f'answer_{i}': str(user_order[i]) for i in range(len(user_order))}
+        attempt = ExerciseAttempt(
+            student_id=current_user.id,
+            exercise_id=exercise.id,
+            answers=json.dumps(answers),
+            score=score,
+            feedback=json.dumps(feedback_to_save)
+        )
         
-        elif exercise.exercise_type == 'word_search':
-            # Gestion des exercices mots mêlés
-            content = json.loads(exercise.content)
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Processing word_search exercise {exercise_id}")
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les mots à trouver
-            words_to_find = content.get('words', [])
-            if not words_to_find:
-                app.logger.error(f"[WORD_SEARCH_DEBUG] No words found in exercise content")
-                flash('Erreur: aucun mot trouvé dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Words to find: {words_to_find}")
-            
-            # Récupérer les mots trouvés par l'utilisateur depuis les champs word_0, word_1, etc.
-            found_words = []
-            for key, value in request.form.items():
-                if key.startswith('word_') and value:
-                    word = value.strip().upper()
-                    if word and word != 'UNDEFINED':  # Éviter les valeurs vides ou non définies
-                        found_words.append(word)
-            
-            # Alternative: récupérer depuis un champ caché ou une liste (pour compatibilité)
-            if not found_words:
-                found_words_str = request.form.get('found_words', '')
-                if found_words_str:
-                    found_words = [word.strip().upper() for word in found_words_str.split(',') if word.strip()]
-            
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Found words by user: {found_words}")
-            
-            # Calculer le score
-            correct_words = []
-            incorrect_words = []
-            
-            for word in found_words:
-                if word in words_to_find:
-                    correct_words.append(word)
-                else:
-                    incorrect_words.append(word)
-            
-            # Mots manqués
-            missed_words = [word for word in words_to_find if word not in found_words]
-            
-            score_count = len(correct_words)
-            max_score = len(words_to_find)
-            score = (score_count / max_score) * 100 if max_score > 0 else 0
-            
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Correct words: {correct_words}")
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Incorrect words: {incorrect_words}")
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Missed words: {missed_words}")
-            app.logger.info(f"[WORD_SEARCH_DEBUG] Score: {score_count}/{max_score} = {score}%")
-            
-            # Créer le feedback
-            feedback = {
-                'correct_words': correct_words,
-                'incorrect_words': incorrect_words,
-                'missed_words': missed_words,
-                'total_found': len(found_words),
-                'total_correct': score_count,
-                'total_words': max_score
-            }
-            
-            feedback_summary = {
-                'score': score,
-                'score_count': score_count,
-                'max_score': max_score,
-                'details': feedback
-            }
-            
-            # Sauvegarder les réponses
-            answers = {'found_words': ','.join(found_words)}
-        
-        elif exercise.exercise_type == 'pairs':
-            # Gestion des exercices d'association de paires
-            content = json.loads(exercise.content)
-            app.logger.info(f"[PAIRS_DEBUG] Processing pairs exercise {exercise_id}")
-            app.logger.info(f"[PAIRS_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les paires originales
-            original_pairs = content.get('pairs', [])
-            if not original_pairs:
-                app.logger.error(f"[PAIRS_DEBUG] No pairs found in exercise content")
-                flash('Erreur: aucune paire trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            # Créer un dictionnaire des bonnes réponses (left_index -> right_index)
-            correct_answers = {}
-            for i, pair in enumerate(original_pairs):
-                correct_answers[i] = i  # L'index de gauche correspond à l'index de droite original
-            
-            app.logger.info(f"[PAIRS_DEBUG] Correct answers: {correct_answers}")
-            
-            # Récupérer les réponses de l'utilisateur
-            user_answers = {}
-            for i in range(len(original_pairs)):
-                left_value = request.form.get(f'left_{i}')
-                if left_value:
-                    try:
-                        right_index = int(left_value)
-                        user_answers[i] = right_index
-                        app.logger.info(f"[PAIRS_DEBUG] User paired left_{i} with right_{right_index}")
-                    except (ValueError, TypeError):
-                        app.logger.warning(f"[PAIRS_DEBUG] Invalid value for left_{i}: {left_value}")
-            
-            app.logger.info(f"[PAIRS_DEBUG] User answers: {user_answers}")
-            
-            # Calculer le score
-            score_count = 0
-            feedback = []
-            
-            for left_index in range(len(original_pairs)):
-                user_right_index = user_answers.get(left_index, -1)
-                correct_right_index = correct_answers.get(left_index, -1)
-                is_correct = user_right_index == correct_right_index
-                
-                if is_correct:
-                    score_count += 1
-                
-                # Créer le feedback pour cette paire
-                left_item = original_pairs[left_index]['left'] if left_index < len(original_pairs) else None
-                expected_right = original_pairs[correct_right_index]['right'] if 0 <= correct_right_index < len(original_pairs) else None
-                given_right = original_pairs[user_right_index]['right'] if 0 <= user_right_index < len(original_pairs) else None
-                
-                feedback.append({
-                    'left_index': left_index,
-                    'left_item': left_item,
-                    'expected_right': expected_right,
-                    'given_right': given_right,
-                    'is_correct': is_correct
-                })
-                
-                app.logger.info(f"[PAIRS_DEBUG] Pair {left_index}: user={user_right_index}, correct={correct_right_index}, is_correct={is_correct}")
-            
-            max_score = len(original_pairs)
-            score = (score_count / max_score) * 100 if max_score > 0 else 0
-            
-            # DEBUG: Log final scoring results
-            app.logger.info(f"[PAIRS_DEBUG] Score count: {score_count}")
-            app.logger.info(f"[PAIRS_DEBUG] Max score: {max_score}")
-            app.logger.info(f"[PAIRS_DEBUG] Final score: {score}%")
-            
-            # Créer le feedback summary pour pairs
-            feedback_summary = {
-                'score': score,
-                'score_count': score_count,
-                'max_score': max_score,
-                'details': feedback
-            }
-            
-            # Pour pairs, on utilise le score en pourcentage
-            answers = {f'left_{i}': str(user_answers.get(i, -1)) for i in range(len(original_pairs))}
-        
-        elif exercise.exercise_type == 'underline_words':
-            # Gestion des exercices "Souligner les mots"
-            content = json.loads(exercise.content)
-            app.logger.info(f"[UNDERLINE_DEBUG] Processing underline_words exercise {exercise_id}")
-            app.logger.info(f"[UNDERLINE_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les phrases originales (structure 'words' au lieu de 'sentences')
-            sentences = content.get('words', [])  # CORRECTION: utiliser 'words' au lieu de 'sentences'
-            if not sentences:
-                app.logger.error(f"[UNDERLINE_DEBUG] No words/sentences found in exercise content")
-                app.logger.error(f"[UNDERLINE_DEBUG] Available content keys: {list(content.keys())}")
-                flash('Erreur: aucune phrase trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[UNDERLINE_DEBUG] Found {len(sentences)} sentences to process")
-            
-            # Calculer le score pour chaque phrase
-            total_sentences = len(sentences)
-            correct_sentences = 0
-            feedback = []
-            
-            for i, sentence_data in enumerate(sentences):
-                # Récupérer les mots que l'utilisateur a soulignés pour cette phrase
-                # Le template utilise selected_words_{i} avec des mots séparés par des virgules
-                user_underlined_str = request.form.get(f'selected_words_{i}', '')
-                user_underlined = [word.strip() for word in user_underlined_str.split(',') if word.strip()]
-                app.logger.info(f"[UNDERLINE_DEBUG] Sentence {i}: user underlined string '{user_underlined_str}'")
-                app.logger.info(f"[UNDERLINE_DEBUG] Sentence {i}: user underlined list {user_underlined}")
-                
-                # Récupérer les mots qui devaient être soulignés
-                expected_words = sentence_data.get('words_to_underline', [])
-                app.logger.info(f"[UNDERLINE_DEBUG] Sentence {i}: expected words {expected_words}")
-                
-                # Normaliser les mots (minuscules, sans ponctuation, sans apostrophes)
-                def normalize_word(word):
-                    # Convertir en minuscules
-                    normalized = word.lower()
-                    # Supprimer la ponctuation au début et à la fin
-                    normalized = normalized.strip('.,!?;:\'"()[]{}«»')
-                    # Gérer les apostrophes (l'autoroute -> autoroute)
-                    if normalized.startswith(("l'", "d'", "n'", "m'", "t'", "s'", "c'", "j'", "qu'")):
-                        normalized = normalized[2:]  # Supprimer l' d' etc.
-                    elif normalized.startswith(("la", "le", "les", "un", "une", "du", "de", "des")):
-                        # Garder les articles complets
-                        pass
-                    return normalized
-                
-                user_words_normalized = set(normalize_word(word) for word in user_underlined if word.strip())
-                expected_words_normalized = set(normalize_word(word) for word in expected_words if word.strip())
-                
-                app.logger.info(f"[UNDERLINE_DEBUG] Sentence {i}: user normalized {user_words_normalized}")
-                app.logger.info(f"[UNDERLINE_DEBUG] Sentence {i}: expected normalized {expected_words_normalized}")
-                
-                # Vérifier si la phrase est correcte (tous les mots attendus sont soulignés)
-                is_correct = user_words_normalized == expected_words_normalized
-                if is_correct:
-                    correct_sentences += 1
-                
-                # Créer le feedback pour cette phrase
-                sentence_text = sentence_data.get('text', '')  # CORRECTION: utiliser 'text' au lieu de 'words'
-                feedback.append({
-                    'sentence_index': i,
-                    'sentence_text': sentence_text,
-                    'user_underlined': list(user_words_normalized),
-                    'expected_words': list(expected_words_normalized),
-                    'is_correct': is_correct,
-                    'missing_words': list(expected_words_normalized - user_words_normalized),
-                    'extra_words': list(user_words_normalized - expected_words_normalized)
-                })
-                
-                app.logger.info(f"[UNDERLINE_DEBUG] Sentence {i}: is_correct={is_correct}")
-            
-            # Calculer le score final
-            score = (correct_sentences / total_sentences) * 100 if total_sentences > 0 else 0
-            
-            # DEBUG: Log final scoring results
-            app.logger.info(f"[UNDERLINE_DEBUG] Correct sentences: {correct_sentences}")
-            app.logger.info(f"[UNDERLINE_DEBUG] Total sentences: {total_sentences}")
-            app.logger.info(f"[UNDERLINE_DEBUG] Final score: {score}%")
-            
-            # Créer le feedback summary pour underline_words
-            feedback_summary = {
-                'score': score,
-                'correct_sentences': correct_sentences,
-                'total_sentences': total_sentences,
-                'details': feedback
-            }
-            
-            # Pour underline_words, on utilise le score en pourcentage
-            answers = {f'selected_words_{i}': request.form.get(f'selected_words_{i}', '') for i in range(len(sentences))}
-        
-        elif exercise.exercise_type == 'dictation':
-            # Gestion des exercices de dictée
-            content = json.loads(exercise.content)
-            app.logger.info(f"[DICTATION_DEBUG] Processing dictation exercise {exercise_id}")
-            app.logger.info(f"[DICTATION_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les phrases de référence
-            reference_sentences = content.get('sentences', [])
-            if not reference_sentences:
-                app.logger.error(f"[DICTATION_DEBUG] No sentences found in exercise content")
-                flash('Erreur: aucune phrase trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[DICTATION_DEBUG] Found {len(reference_sentences)} sentences to check")
-            
-            # Calculer le score pour chaque phrase
-            total_sentences = len(reference_sentences)
-            correct_sentences = 0
-            feedback = []
-            user_answers = {}
-            
-            for i, reference_sentence in enumerate(reference_sentences):
-                # Récupérer la réponse de l'utilisateur
-                user_answer = request.form.get(f'dictation_answer_{i}', '').strip()
-                reference_text = reference_sentence.strip()
-                
-                user_answers[f'dictation_answer_{i}'] = user_answer
-                
-                app.logger.info(f"[DICTATION_DEBUG] Sentence {i}: user='{user_answer}' vs reference='{reference_text}'")
-                
-                # Normaliser les textes pour la comparaison
-                def normalize_text(text):
-                    # Convertir en minuscules
-                    normalized = text.lower()
-                    # Supprimer la ponctuation
-                    import string
-                    normalized = normalized.translate(str.maketrans('', '', string.punctuation))
-                    # Supprimer les espaces multiples
-                    normalized = ' '.join(normalized.split())
-                    return normalized
-                
-                user_normalized = normalize_text(user_answer)
-                reference_normalized = normalize_text(reference_text)
-                
-                app.logger.info(f"[DICTATION_DEBUG] Sentence {i}: normalized user='{user_normalized}' vs reference='{reference_normalized}'")
-                
-                # Vérifier si la phrase est correcte
-                is_correct = user_normalized == reference_normalized
-                if is_correct:
-                    correct_sentences += 1
-                
-                # Calculer la similarité (pourcentage de mots corrects)
-                user_words = user_normalized.split()
-                reference_words = reference_normalized.split()
-                
-                if reference_words:
-                    # Compter les mots corrects (même position)
-                    correct_words = 0
-                    max_length = max(len(user_words), len(reference_words))
-                    
-                    for j in range(max_length):
-                        user_word = user_words[j] if j < len(user_words) else ''
-                        ref_word = reference_words[j] if j < len(reference_words) else ''
-                        if user_word == ref_word and user_word != '':
-                            correct_words += 1
-                    
-                    similarity = (correct_words / len(reference_words)) * 100
-                else:
-                    similarity = 100 if not user_words else 0
-                
-                # Créer le feedback pour cette phrase
-                feedback.append({
-                    'sentence_index': i,
-                    'user_answer': user_answer,
-                    'reference_sentence': reference_text,
-                    'is_correct': is_correct,
-                    'similarity': round(similarity, 1),
-                    'status': 'Correct' if is_correct else f'Similarité: {round(similarity, 1)}%'
-                })
-            
-            # Calculer le score final
-            max_score = total_sentences
-            score_count = correct_sentences
-            score = round((score_count / max_score) * 100) if max_score > 0 else 0
-            
-            app.logger.info(f"[DICTATION_DEBUG] Final score: {score_count}/{max_score} = {score}%")
-            
-            feedback_summary = {
-                'score': score,
-                'correct_sentences': correct_sentences,
-                'total_sentences': total_sentences,
-                'details': feedback
-            }
-            # Pour dictation, on utilise le score en pourcentage
-            answers = user_answers
-        
-        elif exercise.exercise_type == 'image_labeling':
-            # Gestion des exercices d'étiquetage d'image
-            content = json.loads(exercise.content)
-            app.logger.info(f"[IMAGE_LABELING_DEBUG] Processing image_labeling exercise {exercise_id}")
-            app.logger.info(f"[IMAGE_LABELING_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les zones définies dans l'exercice
-            zones = content.get('zones', [])
-            if not zones:
-                app.logger.error(f"[IMAGE_LABELING_DEBUG] No zones found in exercise content")
-                flash('Erreur: aucune zone trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[IMAGE_LABELING_DEBUG] Found {len(zones)} zones to check")
-            
-            # Récupérer les réponses de l'utilisateur depuis le JSON
-            user_answers_json = request.form.get('user_answers', '{}')
-            try:
-                user_answers_data = json.loads(user_answers_json)
-                app.logger.info(f"[IMAGE_LABELING_DEBUG] User answers: {user_answers_data}")
-            except json.JSONDecodeError:
-                app.logger.error(f"[IMAGE_LABELING_DEBUG] Invalid JSON in user_answers: {user_answers_json}")
-                user_answers_data = {}
-            
-            # Calculer le score
-            total_zones = len(zones)
-            correct_zones = 0
-            feedback = []
-            
-            for i, zone in enumerate(zones):
-                zone_id = str(i + 1)  # Les zones sont numérotées à partir de 1
-                expected_label = zone.get('label', '')
-                user_label = user_answers_data.get(zone_id, '')
-                
-                is_correct = user_label.lower().strip() == expected_label.lower().strip()
-                if is_correct:
-                    correct_zones += 1
-                
-                feedback.append({
-                    'zone_id': zone_id,
-                    'expected_label': expected_label,
-                    'user_label': user_label,
-                    'is_correct': is_correct,
-                    'status': 'Correct' if is_correct else f'Attendu: {expected_label}, Réponse: {user_label}'
-                })
-                
-                app.logger.info(f"[IMAGE_LABELING_DEBUG] Zone {zone_id}: expected='{expected_label}', user='{user_label}', correct={is_correct}")
-            
-            # Calculer le score final
-            max_score = total_zones
-            score_count = correct_zones
-            score = round((score_count / max_score) * 100) if max_score > 0 else 0
-            
-            app.logger.info(f"[IMAGE_LABELING_DEBUG] Final score: {score_count}/{max_score} = {score}%")
-            
-            feedback_summary = {
-                'score': score,
-                'correct_zones': correct_zones,
-                'total_zones': total_zones,
-                'details': feedback
-            }
-            
-            # Pour image_labeling, on utilise le score en pourcentage
-            answers = user_answers_data
-        
-        elif exercise.exercise_type == 'qcm_multichoix':
-            # Gestion des exercices QCM Multichoix
-            content = json.loads(exercise.content)
-            app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Processing qcm_multichoix exercise {exercise_id}")
-            app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les questions de l'exercice
-            questions = content.get('questions', [])
-            if not questions:
-                app.logger.error(f"[QCM_MULTICHOIX_DEBUG] No questions found in exercise content")
-                flash('Erreur: aucune question trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Found {len(questions)} questions to check")
-            
-            # Calculer le score
-            total_questions = len(questions)
-            correct_questions = 0
-            feedback_details = []
-            user_answers_data = {}
-            
-            for question_index, question in enumerate(questions):
-                # Récupérer les réponses de l'utilisateur pour cette question
-                user_selected = request.form.getlist(f'question_{question_index}[]')
-                app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Raw user_selected for question {question_index}: {user_selected}")
-                user_selected_indices = [int(idx) for idx in user_selected if idx.isdigit()]
-                
-                # Récupérer les bonnes réponses pour cette question
-                correct_options = question.get('correct_options', [])
-                
-                app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Question {question_index}: user={user_selected_indices}, correct={correct_options}")
-                app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Question {question_index}: user_set={set(user_selected_indices)}, correct_set={set(correct_options)}")
-                
-                # Vérifier si les réponses correspondent exactement
-                is_correct = set(user_selected_indices) == set(correct_options)
-                app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Question {question_index}: is_correct={is_correct}")
-                if is_correct:
-                    correct_questions += 1
-                
-                # Créer le feedback pour cette question
-                user_options = [question['options'][i] for i in user_selected_indices if i < len(question['options'])]
-                correct_options_text = [question['options'][i] for i in correct_options if i < len(question['options'])]
-                
-                feedback_details.append({
-                    'question_index': question_index,
-                    'question_text': question.get('question', ''),
-                    'user_selected': user_options,
-                    'correct_options': correct_options_text,
-                    'is_correct': is_correct,
-                    'status': 'Correct' if is_correct else f'Attendu: {", ".join(correct_options_text)}, Réponse: {", ".join(user_options) if user_options else "Aucune réponse"}'
-                })
-                
-                # Sauvegarder les réponses utilisateur
-                user_answers_data[f'question_{question_index}'] = user_selected_indices
-            
-            # Calculer le score final
-            max_score = total_questions
-            score_count = correct_questions
-            score = round((score_count / max_score) * 100) if max_score > 0 else 0
-            
-            app.logger.info(f"[QCM_MULTICHOIX_DEBUG] Final score: {score_count}/{max_score} = {score}%")
-            
-            feedback_summary = {
-                'score': score,
-                'correct_questions': correct_questions,
-                'total_questions': total_questions,
-                'details': feedback_details
-            }
-            
-            # Pour qcm_multichoix, on utilise le score en pourcentage
-            answers = user_answers_data
-        
-        elif exercise.exercise_type == 'flashcards':
-            # Gestion des exercices Flashcards
-            content = json.loads(exercise.content)
-            app.logger.info(f"[FLASHCARDS_DEBUG] Processing flashcards exercise {exercise_id}")
-            app.logger.info(f"[FLASHCARDS_DEBUG] Form data: {dict(request.form)}")
-            
-            # Récupérer les cartes de l'exercice
-            cards = content.get('cards', [])
-            if not cards:
-                app.logger.error(f"[FLASHCARDS_DEBUG] No cards found in exercise content")
-                flash('Erreur: aucune carte trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[FLASHCARDS_DEBUG] Found {len(cards)} cards to check")
-            
-            # Récupérer le score et les réponses depuis le formulaire
-            final_score = request.form.get('final_score', '0')
-            correct_answers_count = request.form.get('correct_answers', '0')
-            total_answers_count = request.form.get('total_answers', '0')
-            
-            try:
-                score = float(final_score)
-                score_count = int(correct_answers_count)
-                max_score = int(total_answers_count)
-            except (ValueError, TypeError):
-                app.logger.error(f"[FLASHCARDS_DEBUG] Invalid score data: final_score={final_score}, correct={correct_answers_count}, total={total_answers_count}")
-                score = 0
-                score_count = 0
-                max_score = len(cards)
-            
-            app.logger.info(f"[FLASHCARDS_DEBUG] Score received: {score_count}/{max_score} = {score}%")
-            
-            # Récupérer les réponses individuelles pour chaque carte
-            user_answers = {}
-            feedback_details = []
-            
-            for i in range(len(cards)):
-                card_answer = request.form.get(f'card_{i}_answer', '')
-                card_correct = request.form.get(f'card_{i}_correct', 'false') == 'true'
-                
-                user_answers[f'card_{i}'] = {
-                    'answer': card_answer,
-                    'correct': card_correct,
-                    'expected': cards[i].get('answer', '') if i < len(cards) else ''
-                }
-                
-                feedback_details.append({
-                    'card_index': i,
-                    'question': cards[i].get('question', '') if i < len(cards) else '',
-                    'expected_answer': cards[i].get('answer', '') if i < len(cards) else '',
-                    'user_answer': card_answer,
-                    'is_correct': card_correct
-                })
-            
-            feedback_summary = {
-                'score': score,
-                'score_count': score_count,
-                'max_score': max_score,
-                'total_cards': len(cards),
-                'details': feedback_details
-            }
-            
-            app.logger.info(f"[FLASHCARDS_DEBUG] Final feedback: {feedback_summary}")
-            
-            # Pour flashcards, on utilise le score calculé côté frontend
-            answers = user_answers
-        
-        elif exercise.exercise_type == 'fill_in_blanks':
-            # Gestion des exercices Texte à trous avec la même logique que Mots à placer
-            content = json.loads(exercise.content)
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Processing fill_in_blanks exercise {exercise_id}")
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Form data: {dict(request.form)}")
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Exercise content keys: {list(content.keys())}")
-            
-            # Compter le nombre réel de blancs dans le contenu
-            total_blanks_in_content = 0
-            
-            # Analyser le format de l'exercice et compter les blancs réels
-            # CORRECTION: Éviter le double comptage entre 'text' et 'sentences'
-            # Priorité à 'sentences' s'il existe, sinon utiliser 'text'
-            if 'sentences' in content:
-                sentences_blanks = sum(s.count('___') for s in content['sentences'])
-                total_blanks_in_content = sentences_blanks
-                app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Format 'sentences' détecté: {sentences_blanks} blancs dans sentences")
-                # Log détaillé pour chaque phrase et ses blancs
-                for i, sentence in enumerate(content['sentences']):
-                    blanks_in_sentence = sentence.count('___')
-                    app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Phrase {i}: '{sentence}' contient {blanks_in_sentence} blancs")
-            elif 'text' in content:
-                text_blanks = content['text'].count('___')
-                total_blanks_in_content = text_blanks
-                app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Format 'text' détecté: {text_blanks} blancs dans text")
-            
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Total blancs trouvés dans le contenu: {total_blanks_in_content}")
-            # Log détaillé pour chaque phrase et ses blancs
-            if 'sentences' in content:
-                for i, sentence in enumerate(content['sentences']):
-                    blanks_in_sentence = sentence.count('___')
-                    app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Phrase {i}: '{sentence}' contient {blanks_in_sentence} blancs")
-            
-            # Récupérer les réponses correctes (peut être 'words' ou 'available_words')
-            correct_answers = content.get('words', [])
-            if not correct_answers:
-                correct_answers = content.get('available_words', [])
-            
-            if not correct_answers:
-                app.logger.error(f"[FILL_IN_BLANKS_DEBUG] No correct answers found in exercise content")
-                flash('Erreur: aucune réponse correcte trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Found {len(correct_answers)} correct answers: {correct_answers}")
-            
-            # Utiliser le nombre réel de blancs trouvés dans le contenu
-            total_blanks = max(total_blanks_in_content, len(correct_answers))
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Using total_blanks = {total_blanks}")
-            
-            correct_blanks = 0
-            feedback_details = []
-            user_answers_data = {}
-            
-            # Vérifier chaque blanc individuellement - Même logique que word_placement
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Traitement de {total_blanks} blancs au total")
-            for i in range(total_blanks):
-                # Récupérer la réponse de l'utilisateur pour ce blanc
-                user_answer = request.form.get(f'answer_{i}', '').strip()
-                
-                # Récupérer la réponse correcte correspondante
-                correct_answer = correct_answers[i] if i < len(correct_answers) else ''
-                
-                app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Blank {i}:")
-                app.logger.info(f"  - Réponse étudiant (answer_{i}): {user_answer}")
-                app.logger.info(f"  - Réponse attendue: {correct_answer}")
-                
-                # Vérifier si la réponse est correcte (insensible à la casse)
-                is_correct = user_answer and user_answer.strip().lower() == correct_answer.strip().lower()
-                if is_correct:
-                    correct_blanks += 1
-                
-                # Créer le feedback pour ce blanc
-                # Déterminer l'index de la phrase à laquelle appartient ce blanc
-                sentence_index = -1
-                local_blank_index = -1
-                if 'sentences' in content:
-                    sentence_index, local_blank_index = get_blank_location(i, content['sentences'])
-                    app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Blank {i} est dans la phrase {sentence_index}, position locale {local_blank_index}")
-                
-                feedback_details.append({
-                    'blank_index': i,
-                    'user_answer': user_answer or '',
-                    'correct_answer': correct_answer,
-                    'is_correct': is_correct,
-                    'status': 'Correct' if is_correct else f'Attendu: {correct_answer}, Réponse: {user_answer or "Vide"}',
-                    'sentence_index': sentence_index,
-                    'sentence': content['sentences'][sentence_index] if sentence_index >= 0 and 'sentences' in content else ''
-                })
-                
-                # Sauvegarder les réponses utilisateur
-                user_answers_data[f'answer_{i}'] = user_answer
-            
-            # Calculer le score final basé sur le nombre réel de blancs - Exactement comme word_placement
-            score = (correct_blanks / total_blanks) * 100 if total_blanks > 0 else 0
-            
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Score final: {score}% ({correct_blanks}/{total_blanks})")
-            
-            feedback_summary = {
-                'score': score,
-                'correct_blanks': correct_blanks,
-                'total_blanks': total_blanks,
-                'details': feedback_details
-            }
-            
-            # Pour fill_in_blanks, on utilise le score calculé
-            answers = user_answers_data
-        
-                # Logique de scoring pour fill_in_blanks
-        elif exercise.exercise_type == 'fill_in_blanks':
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Traitement de l'exercice fill_in_blanks ID {exercise_id}")
-            content = exercise.get_content()
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Contenu de l'exercice: {content}")
-            
-            total_blanks_in_content = 0
-            
-            # Analyser le format de l'exercice et compter les blancs réels
-            # CORRECTION: Éviter le double comptage entre 'text' et 'sentences'
-            # Priorité à 'sentences' s'il existe, sinon utiliser 'text'
-            if 'sentences' in content:
-                sentences_blanks = sum(s.count('___') for s in content['sentences'])
-                total_blanks_in_content = sentences_blanks
-                app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Format 'sentences' détecté: {sentences_blanks} blancs dans sentences")
-                # Log détaillé pour chaque phrase et ses blancs
-                for i, sentence in enumerate(content['sentences']):
-                    blanks_in_sentence = sentence.count('___')
-                    app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Phrase {i}: '{sentence}' contient {blanks_in_sentence} blancs")
-            elif 'text' in content:
-                text_blanks = content['text'].count('___')
-                total_blanks_in_content = text_blanks
-                app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Format 'text' détecté: {text_blanks} blancs dans text")
-            
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Total blancs trouvés dans le contenu: {total_blanks_in_content}")
-            # Log détaillé pour chaque phrase et ses blancs
-            if 'sentences' in content:
-                for i, sentence in enumerate(content['sentences']):
-                    blanks_in_sentence = sentence.count('___')
-                    app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Phrase {i}: '{sentence}' contient {blanks_in_sentence} blancs")
-            
-            # Récupérer les réponses correctes (peut être 'words' ou 'available_words')
-            correct_answers = content.get('words', [])
-            if not correct_answers:
-                correct_answers = content.get('available_words', [])
-            
-            if not correct_answers:
-                app.logger.error(f"[FILL_IN_BLANKS_DEBUG] No correct answers found in exercise content")
-                flash('Erreur: aucune réponse correcte trouvée dans l\'exercice.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Found {len(correct_answers)} correct answers: {correct_answers}")
-            
-            # Utiliser le nombre réel de blancs trouvés dans le contenu
-            total_blanks = max(total_blanks_in_content, len(correct_answers))
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Using total_blanks = {total_blanks}")
-            
-            correct_blanks = 0
-            feedback_details = []
-            user_answers_data = {}
-            
-            # Vérifier chaque blanc individuellement - Même logique que word_placement
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Traitement de {total_blanks} blancs au total")
-            for i in range(total_blanks):
-                # Récupérer la réponse de l'utilisateur pour ce blanc
-                user_answer = request.form.get(f'answer_{i}', '').strip()
-                
-                # Récupérer la réponse correcte correspondante
-                correct_answer = correct_answers[i] if i < len(correct_answers) else ''
-                
-                app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Blank {i}:")
-                app.logger.info(f"  - Réponse étudiant (answer_{i}): {user_answer}")
-                app.logger.info(f"  - Réponse attendue: {correct_answer}")
-                
-                # Vérifier si la réponse est correcte (insensible à la casse)
-                is_correct = user_answer and user_answer.strip().lower() == correct_answer.strip().lower()
-                if is_correct:
-                    correct_blanks += 1
-                
-                # Créer le feedback pour ce blanc
-                # Déterminer l'index de la phrase à laquelle appartient ce blanc
-                sentence_index = -1
-                local_blank_index = -1
-                if 'sentences' in content:
-                    sentence_index, local_blank_index = get_blank_location(i, content['sentences'])
-                    app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Blank {i} est dans la phrase {sentence_index}, position locale {local_blank_index}")
-                
-                feedback_details.append({
-                    'blank_index': i,
-                    'user_answer': user_answer or '',
-                    'correct_answer': correct_answer,
-                    'is_correct': is_correct,
-                    'status': 'Correct' if is_correct else f'Attendu: {correct_answer}, Réponse: {user_answer or "Vide"}',
-                    'sentence_index': sentence_index,
-                    'sentence': content['sentences'][sentence_index] if sentence_index >= 0 and 'sentences' in content else ''
-                })
-                
-                # Sauvegarder les réponses utilisateur
-                user_answers_data[f'answer_{i}'] = user_answer
-            
-            # Calculer le score final basé sur le nombre réel de blancs - Exactement comme word_placement
-            score = (correct_blanks / total_blanks) * 100 if total_blanks > 0 else 0
-            
-            app.logger.info(f"[FILL_IN_BLANKS_DEBUG] Score final: {score}% ({correct_blanks}/{total_blanks})")
-            
-            feedback_summary = {
-                'score': score,
-                'correct_blanks': correct_blanks,
-                'total_blanks': total_blanks,
-                'details': feedback_details
-            }
-            
-            # Pour fill_in_blanks, on utilise le score calculé
-            answers = user_answers_data
-        
-        # Créer une nouvelle tentative
-        # Pour drag_and_drop, pairs, underline_words, dictation, image_labeling, flashcards, qcm_multichoix, fill_in_blanks, feedback est feedback_summary (sinon feedback dict habituel)
-        if exercise.exercise_type in ['drag_and_drop', 'pairs', 'underline_words', 'dictation', 'image_labeling', 'flashcards', 'qcm_multichoix', 'fill_in_blanks']:
-            feedback_to_save = feedback_summary
-        else:
-            feedback_to_save = feedback
-            
-        attempt = ExerciseAttempt(
-            student_id=current_user.id,
-            exercise_id=exercise.id,
-            answers=json.dumps(answers),
-            score=score,
-            feedback=json.dumps(feedback_to_save)
-        )
-        
-        db.session.add(attempt)
-        db.session.commit()
+        db.session.add(attempt)
+        db.session.commit()
         
         # Créer un message de feedback pour l'utilisateur
         if score >= 80:
@@ -3706,173 +2146,9 @@ def handle_exercise_answer(exercise_id):
         return render_template('feedback.html', exercise=exercise, attempt=attempt, answers=answers, feedback=feedback_to_save)
     
     except Exception as e:
-        app.logger.error(f"Erreur lors de la soumission: {e}")
+        app.logger.error('Erreur lors de la soumission: %s', e)
         return jsonify({'success': False, 'error': 'Une erreur est survenue'}), 500
 
-@app.route('/force-admin-setup')
-def force_admin_setup():
-    """Route temporaire pour forcer l'approbation admin"""
-    try:
-        # Approuver mr.zahiri@gmail.com
-        zahiri_user = User.query.filter_by(email='mr.zahiri@gmail.com').first()
-        if zahiri_user:
-            zahiri_user.subscription_status = 'approved'
-            zahiri_user.role = 'teacher'
-            zahiri_user.subscription_type = 'teacher'
-            zahiri_user.approved_by = None
-            db.session.commit()
-            
-        # Approuver aussi jemathsia@example.com (Mr Aziz)
-        aziz_user = User.query.filter_by(email='jemathsia@example.com').first()
-        if aziz_user:
-            aziz_user.subscription_status = 'approved'
-            aziz_user.role = 'teacher'
-            aziz_user.subscription_type = 'teacher'
-            aziz_user.approved_by = None
-            aziz_user.approval_date = datetime.utcnow()
-            db.session.commit()
-            
-        return f"[OK] Comptes approuvés ! <br>[OK] mr.zahiri@gmail.com (enseignant)<br>[OK] jemathsia@example.com (enseignant)<br><a href='/login'>Se connecter</a>"
-    except Exception as e:
-        return f"[ERREUR] Erreur: {e}"
-
-@app.route('/create-test-exercises')
-def create_test_exercises():
-    """Route pour créer des exercices de test"""
-    try:
-        from models import Exercise
-        from datetime import datetime
-        
-        # Récupérer l'utilisateur enseignant
-        teacher = User.query.filter_by(email='mr.zahiri@gmail.com').first()
-        if not teacher:
-            teacher = User.query.filter_by(email='jemathsia@example.com').first()
-        
-        if not teacher:
-            return "[ERREUR] Aucun enseignant trouvé"
-        
-        # Créer des exercices de test
-        exercises_data = [
-            {
-                'title': 'QCM Test - Les Capitales',
-                'exercise_type': 'qcm',
-                'subject': 'Géographie',
-                'content': '{"question": "Quelle est la capitale de la France ?", "options": ["Paris", "Lyon", "Marseille", "Toulouse"], "correct_answer": 0, "explanation": "Paris est la capitale de la France depuis 1792."}'
-            },
-            {
-                'title': 'Texte à Trous - Grammaire',
-                'exercise_type': 'fill_in_blanks',
-                'subject': 'Français',
-                'content': '{"text": "Le chat ____ sa nourriture dans le ____.", "blanks": [{"word": "mange", "position": 1}, {"word": "jardin", "position": 2}], "sentences": ["Le chat mange sa nourriture dans le jardin."]}'
-            },
-            {
-                'title': 'Association de Paires - Histoire',
-                'exercise_type': 'pairs',
-                'subject': 'Histoire',
-                'content': '{"pairs": [{"left": "1789", "right": "Révolution française"}, {"left": "1804", "right": "Sacre de Napoléon"}, {"left": "1815", "right": "Waterloo"}]}'
-            }
-        ]
-        
-        created_count = 0
-        for ex_data in exercises_data:
-            # Vérifier si l'exercice existe déjà
-            existing = Exercise.query.filter_by(title=ex_data['title']).first()
-            if not existing:
-                exercise = Exercise(
-                    title=ex_data['title'],
-                    exercise_type=ex_data['exercise_type'],
-                    subject=ex_data['subject'],
-                    content=ex_data['content'],
-                    teacher_id=teacher.id,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(exercise)
-                created_count += 1
-        
-        db.session.commit()
-        
-        return f"[OK] {created_count} exercices de test créés ! <br><a href='/exercise/library'>Voir la bibliothèque</a>"
-        
-    except Exception as e:
-        return f"[ERREUR] Erreur lors de la création: {e}"
-
-@app.route('/debug-edit-exercise/<int:exercise_id>')
-def debug_edit_exercise(exercise_id):
-    """Route de debug pour éditer directement le JSON d'un exercice"""
-    try:
-        from models import Exercise
-        exercise = Exercise.query.get_or_404(exercise_id)
-        
-        html = f"""
-        <h2>Debug - Édition directe JSON</h2>
-        <h3>Exercice: {exercise.title}</h3>
-        <p><strong>Type:</strong> {exercise.exercise_type}</p>
-        <p><strong>Contenu actuel:</strong></p>
-        <form method="GET" action="/debug-update-exercise/{exercise_id}">
-            <textarea name="content" rows="10" cols="80" style="width:100%">{exercise.content or ''}</textarea><br><br>
-            <button type="submit" style="background:green;color:white;padding:10px;">Sauvegarder JSON</button>
-        </form>
-        <br>
-        <h4>Format attendu pour "Mots à placer":</h4>
-        <pre>{{"sentences": ["Cette phrase est-elle ___ ou ___ ?"], "words": ["déclarative", "interrogative", "impérative"]}}</pre>
-        <br>
-        <a href="/exercise/library">Retour à la bibliothèque</a>
-        """
-        return html
-        
-    except Exception as e:
-        return f"[ERREUR] Erreur: {e}"
-
-@app.route('/debug-update-exercise/<int:exercise_id>', methods=['GET', 'POST'])
-def debug_update_exercise(exercise_id):
-    """Route pour sauvegarder le JSON modifié"""
-    try:
-        from models import Exercise
-        from flask import request
-        
-        exercise = Exercise.query.get_or_404(exercise_id)
-        
-        # Récupérer le contenu depuis GET ou POST
-        new_content = request.args.get('content') or request.form.get('content', '')
-        
-        if new_content:
-            exercise.content = new_content
-            db.session.commit()
-            return f"[OK] Exercice mis à jour ! <br><a href='/exercise/{exercise_id}'>Voir l'exercice</a> | <a href='/exercise/library'>Bibliothèque</a>"
-        else:
-            return f"[ERREUR] Aucun contenu fourni. <a href='/debug-edit-exercise/{exercise_id}'>Retour</a>"
-        
-    except Exception as e:
-        return f"[ERREUR] Erreur lors de la sauvegarde: {e}"
-
-@app.route('/test_upload', methods=['GET', 'POST'])
-def test_upload():
-    """Page de test pour l'upload d'images"""
-    if request.method == 'POST':
-        if 'test_image' not in request.files:
-            flash('Aucun fichier sélectionné', 'error')
-            return redirect(request.url)
-        
-        file = request.files['test_image']
-        if file.filename == '':
-            flash('Aucun fichier sélectionné', 'error')
-            return redirect(request.url)
-        
-        if file and allowed_file(file.filename):
-            filename = generate_unique_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
-            # Utiliser la fonction sécurisée
-            if safe_file_save(file, filepath):
-                image_path = generate_consistent_image_path(filename)
-                flash(f'Image uploadée avec succès: {image_path}', 'success')
-                return render_template('test_upload.html', uploaded_image=image_path)
-            else:
-                flash('Erreur lors de l\'upload de l\'image', 'error')
-        else:
-            flash('Type de fichier non autorisé', 'error')
-    
-    return render_template('test_upload.html')
 
 @app.route('/exercise/<int:exercise_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -3937,18 +2213,18 @@ def edit_exercise(exercise_id):
                     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                     if safe_file_save(file, filepath):
                         exercise.image_path = generate_consistent_image_path(filename)
-                        app.logger.info(f"[EDIT_DEBUG] Image sauvegardée: {exercise.image_path}")
+                        category_log.EDIT_DEBUG.info('Image sauvegardée: %s', exercise.image_path)
                     else:
                         flash('Erreur lors de l\'upload de l\'image', 'error')
             
             # Traitement spécifique par type d'exercice
             if exercise.exercise_type == 'qcm':
-                current_app.logger.info(f'[QCM_EDIT_DEBUG] Traitement du contenu QCM')
-                current_app.logger.info(f'[QCM_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.QCM_EDIT_DEBUG.info('Traitement du contenu QCM')
+                category_log.QCM_EDIT_DEBUG.info('Tous les champs du formulaire: %s', request.form.keys())
                 
                 # Récupérer les questions du formulaire
                 questions_data = request.form.getlist('questions[]')
-                current_app.logger.info(f'[QCM_EDIT_DEBUG] Questions trouvées: {questions_data}')
+                category_log.QCM_EDIT_DEBUG.info('Questions trouvées: %s', questions_data)
                 
                 # Validation des questions
                 if not questions_data or not any(q.strip() for q in questions_data):
@@ -4005,11 +2281,11 @@ def edit_exercise(exercise_id):
                 # Mettre à jour le contenu
                 content = {'questions': questions}
                 exercise.content = json.dumps(content)
-                current_app.logger.info(f'[QCM_EDIT_DEBUG] Contenu sauvegardé: {len(questions)} questions')
+                category_log.QCM_EDIT_DEBUG.info('Contenu sauvegardé: %s questions', len(questions))
                 
             elif exercise.exercise_type == 'qcm_multichoix':
-                current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Traitement du contenu QCM Multichoix')
-                current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Traitement du contenu QCM Multichoix')
+                category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Tous les champs du formulaire: %s', request.form.keys())
                 
                 # Récupérer les questions du formulaire
                 questions_data = []
@@ -4034,9 +2310,9 @@ def edit_exercise(exercise_id):
                     except (ValueError, TypeError):
                         correct_indices = []
                     
-                    current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Question {question_index}: {question_text}')
-                    current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Options {question_index}: {options}')
-                    current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Correct indices {question_index}: {correct_indices}')
+                    category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Question %s: %s', question_index, question_text)
+                    category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Options %s: %s', question_index, options)
+                    category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Correct indices %s: %s', question_index, correct_indices)
                     
                     # Filtrer les options vides
                     filtered_options = [opt.strip() for opt in options if opt and opt.strip()]
@@ -4073,7 +2349,7 @@ def edit_exercise(exercise_id):
                         
                         # Ajouter le chemin de l'image au contenu
                         content['image'] = f'static/uploads/{unique_filename}'
-                        current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Nouvelle image sauvegardée: {content["image"]}')
+                        category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Nouvelle image sauvegardée: %s', content["image"])
                     else:
                         # Conserver l'image existante
                         if 'image' in current_content:
@@ -4085,18 +2361,18 @@ def edit_exercise(exercise_id):
                 
                 # Mettre à jour le contenu
                 exercise.content = json.dumps(content, ensure_ascii=False)
-                current_app.logger.info(f'[QCM_MULTICHOIX_EDIT_DEBUG] Contenu sauvegardé: {len(questions_data)} questions')
+                category_log.QCM_MULTICHOIX_EDIT_DEBUG.info('Contenu sauvegardé: %s questions', len(questions_data))
                 
             elif exercise.exercise_type == 'fill_in_blanks':
-                print(f'[FILL_BLANKS_EDIT_DEBUG] Traitement du contenu Texte à trous')
-                print(f'[FILL_BLANKS_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.FILL_BLANKS_EDIT_DEBUG.debug('Traitement du contenu Texte à trous')
+                category_log.FILL_BLANKS_EDIT_DEBUG.debug('Tous les champs du formulaire: %s', request.form.keys())
 
                 # Récupérer les phrases et mots du formulaire
                 sentences = request.form.getlist('sentences[]')
                 words = request.form.getlist('words[]')
                 
-                print(f'[FILL_BLANKS_EDIT_DEBUG] Phrases trouvées: {sentences}')
-                print(f'[FILL_BLANKS_EDIT_DEBUG] Mots trouvés: {words}')
+                category_log.FILL_BLANKS_EDIT_DEBUG.debug('Phrases trouvées: %s', sentences)
+                category_log.FILL_BLANKS_EDIT_DEBUG.debug('Mots trouvés: %s', words)
                 
                 # Filtrer les phrases et mots vides
                 sentences = [s.strip() for s in sentences if s.strip()]
@@ -4128,18 +2404,18 @@ def edit_exercise(exercise_id):
                     'words': words
                 }
                 exercise.content = json.dumps(content)
-                print(f'[FILL_BLANKS_EDIT_DEBUG] Contenu sauvegardé: {len(sentences)} phrases, {len(words)} mots')
+                category_log.FILL_BLANKS_EDIT_DEBUG.debug('Contenu sauvegardé: %s phrases, %s mots', len(sentences), len(words))
             
             elif exercise.exercise_type == 'word_placement':
-                print(f'[WORD_PLACEMENT_EDIT_DEBUG] Traitement du contenu Mots à placer')
-                print(f'[WORD_PLACEMENT_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.WORD_PLACEMENT_EDIT_DEBUG.debug('Traitement du contenu Mots à placer')
+                category_log.WORD_PLACEMENT_EDIT_DEBUG.debug('Tous les champs du formulaire: %s', request.form.keys())
 
                 # Récupérer les phrases et mots du formulaire
                 sentences = request.form.getlist('sentences[]')
                 words = request.form.getlist('words[]')
                 
-                print(f'[WORD_PLACEMENT_EDIT_DEBUG] Phrases trouvées: {sentences}')
-                print(f'[WORD_PLACEMENT_EDIT_DEBUG] Mots trouvés: {words}')
+                category_log.WORD_PLACEMENT_EDIT_DEBUG.debug('Phrases trouvées: %s', sentences)
+                category_log.WORD_PLACEMENT_EDIT_DEBUG.debug('Mots trouvés: %s', words)
                 
                 # Filtrer les phrases et mots vides
                 sentences = [s.strip() for s in sentences if s.strip()]
@@ -4197,10 +2473,10 @@ def edit_exercise(exercise_id):
                         exercise.image_path = f"uploads/{filename}"
                 
                 exercise.content = json.dumps(content, ensure_ascii=False)
-                print(f'[WORD_PLACEMENT_EDIT_DEBUG] Contenu sauvegardé: {len(sentences)} phrases, {len(words)} mots, {len(answers)} réponses')
+                category_log.WORD_PLACEMENT_EDIT_DEBUG.debug('Contenu sauvegardé: %s phrases, %s mots, %s réponses', len(sentences), len(words), len(answers))
             
             elif exercise.exercise_type == 'word_search':
-                print(f'[WORD_SEARCH_EDIT_DEBUG] Traitement du contenu Mots mêlés')
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Traitement du contenu Mots mêlés')
                 
                 # Récupérer les mots à trouver
                 words = request.form.getlist('words[]')
@@ -4234,10 +2510,10 @@ def edit_exercise(exercise_id):
                     'instructions': 'Trouvez tous les mots cachés dans la grille ci-dessous.'
                 }
                 exercise.content = json.dumps(content)
-                print(f'[WORD_SEARCH_EDIT_DEBUG] Contenu sauvegardé: {len(filtered_words)} mots, grille {grid_size}x{grid_size}')
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Contenu sauvegardé: %s mots, grille %sx%s', len(filtered_words), grid_size, grid_size)
             
             elif exercise.exercise_type == 'drag_and_drop':
-                print(f'[DRAG_DROP_EDIT_DEBUG] Traitement du contenu Glisser-déposer')
+                category_log.DRAG_DROP_EDIT_DEBUG.debug('Traitement du contenu Glisser-déposer')
                 
                 # Traitement pour glisser-déposer (édition)
                 drag_items = request.form.getlist('drag_items[]')
@@ -4282,10 +2558,10 @@ def edit_exercise(exercise_id):
                     'correct_order': correct_order
                 }
                 exercise.content = json.dumps(content)
-                print(f'[DRAG_DROP_EDIT_DEBUG] Contenu sauvegardé: {len(filtered_drag_items)} éléments, {len(filtered_drop_zones)} zones')
+                category_log.DRAG_DROP_EDIT_DEBUG.debug('Contenu sauvegardé: %s éléments, %s zones', len(filtered_drag_items), len(filtered_drop_zones))
             
             elif exercise.exercise_type == 'underline_words':
-                print(f'[UNDERLINE_EDIT_DEBUG] Traitement du contenu Souligner les mots')
+                category_log.UNDERLINE_EDIT_DEBUG.debug('Traitement du contenu Souligner les mots')
                 
                 # Récupérer les instructions et phrases
                 instructions = request.form.get('instructions', '').strip()
@@ -4318,7 +2594,7 @@ def edit_exercise(exercise_id):
                         'sentence': sentence,
                         'words_to_underline': specific_words
                     })
-                    print(f'[UNDERLINE_EDIT_DEBUG] Phrase {i+1}: "{sentence}" -> Mots: {specific_words}')
+                    category_log.UNDERLINE_EDIT_DEBUG.debug('Phrase %s: "%s" -> Mots: %s', i+1, sentence, specific_words)
                 
                 # Mettre à jour le contenu
                 content = {
@@ -4326,25 +2602,25 @@ def edit_exercise(exercise_id):
                     'words': words_data
                 }
                 exercise.content = json.dumps(content)
-                print(f'[UNDERLINE_EDIT_DEBUG] Contenu sauvegardé: {len(sentences)} phrases avec mots spécifiques par phrase')
+                category_log.UNDERLINE_EDIT_DEBUG.debug('Contenu sauvegardé: %s phrases avec mots spécifiques par phrase', len(sentences))
             
             elif exercise.exercise_type == 'image_labeling':
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Traitement du contenu Image Labeling (format compatible)')
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Traitement du contenu Image Labeling (format compatible)')
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Tous les champs du formulaire: %s', request.form.keys())
                 
                 # Récupérer les étiquettes (format compatible avec création)
                 labels = request.form.getlist('image_labels[]')
                 labels = [label.strip() for label in labels if label.strip()]
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Étiquettes trouvées: {labels}')
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Étiquettes trouvées: %s', labels)
                 
                 # Récupérer les zones (format compatible avec création)
                 zone_x_list = request.form.getlist('zone_x[]')
                 zone_y_list = request.form.getlist('zone_y[]')
                 zone_label_list = request.form.getlist('zone_label[]')
                 
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Zones X: {zone_x_list}')
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Zones Y: {zone_y_list}')
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Zones Labels: {zone_label_list}')
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Zones X: %s', zone_x_list)
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Zones Y: %s', zone_y_list)
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Zones Labels: %s', zone_label_list)
                 
                 # Construire les zones
                 zones = []
@@ -4360,9 +2636,9 @@ def edit_exercise(exercise_id):
                                 'y': y,
                                 'label': label
                             })
-                            current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Zone {i}: x={x}, y={y}, label="{label}"')
+                            category_log.IMAGE_LABELING_EDIT_DEBUG.info('Zone %s: x=%s, y=%s, label="%s"', i, x, y, label)
                     except (ValueError, TypeError) as e:
-                        current_app.logger.error(f'[IMAGE_LABELING_EDIT_DEBUG] Erreur conversion zone {i}: {e}')
+                        category_log.IMAGE_LABELING_EDIT_DEBUG.error('Erreur conversion zone %s: %s', i, e)
                 
                 # Gestion de l'image principale
                 main_image = exercise.content and json.loads(exercise.content).get('main_image', '') if exercise.content else ''
@@ -4373,7 +2649,7 @@ def edit_exercise(exercise_id):
                         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                         file.save(filepath)
                         main_image = f'static/uploads/{filename}'
-                        current_app.logger.info(f"[IMAGE_LABELING_EDIT_DEBUG] Nouvelle image principale: {main_image}")
+                        category_log.IMAGE_LABELING_EDIT_DEBUG.info('Nouvelle image principale: %s', main_image)
                 
                 # Validation
                 if not labels:
@@ -4391,7 +2667,7 @@ def edit_exercise(exercise_id):
                 # Validation critique : vérifier la cohérence entre étiquettes et zones
                 if len(labels) != len(zones):
                     flash(f'Erreur de cohérence : {len(labels)} étiquettes mais {len(zones)} zones. Il faut le même nombre d\'étiquettes et de zones.', 'error')
-                    current_app.logger.error(f'[IMAGE_LABELING_EDIT_DEBUG] Incohérence: {len(labels)} étiquettes vs {len(zones)} zones')
+                    category_log.IMAGE_LABELING_EDIT_DEBUG.error('Incohérence: %s étiquettes vs %s zones', len(labels), len(zones))
                     return render_template('exercise_types/image_labeling_edit.html', exercise=exercise, content=json.loads(exercise.content) if exercise.content else {})
                 
                 # Mettre à jour le contenu (format standard)
@@ -4401,10 +2677,10 @@ def edit_exercise(exercise_id):
                     'zones': zones
                 }
                 exercise.content = json.dumps(content)
-                current_app.logger.info(f'[IMAGE_LABELING_EDIT_DEBUG] Contenu sauvegardé: {len(labels)} étiquettes, {len(zones)} zones (format compatible)')
+                category_log.IMAGE_LABELING_EDIT_DEBUG.info('Contenu sauvegardé: %s étiquettes, %s zones (format compatible)', len(labels), len(zones))
             
             elif exercise.exercise_type == 'flashcards':
-                current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Traitement du contenu Flashcards')
+                category_log.FLASHCARDS_EDIT_DEBUG.info('Traitement du contenu Flashcards')
                 
                 # Récupérer les questions et réponses
                 questions = request.form.getlist('card_questions[]')
@@ -4447,7 +2723,7 @@ def edit_exercise(exercise_id):
                             card_data['image'] = clean_path
                         else:
                             card_data['image'] = f'uploads/{os.path.basename(clean_path)}'
-                        current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Conservation image existante: {card_data["image"]}')
+                        category_log.FLASHCARDS_EDIT_DEBUG.info('Conservation image existante: %s', card_data["image"])
                     
                     # Ensuite, traiter la nouvelle image si elle est fournie
                     if i < len(card_images) and card_images[i] and card_images[i].filename != '':
@@ -4457,9 +2733,9 @@ def edit_exercise(exercise_id):
                             if card_data['image'] and os.path.exists(os.path.join('static', card_data['image'])):
                                 try:
                                     os.remove(os.path.join('static', card_data['image']))
-                                    current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Ancienne image supprimée: {card_data["image"]}')
+                                    category_log.FLASHCARDS_EDIT_DEBUG.info('Ancienne image supprimée: %s', card_data["image"])
                                 except Exception as e:
-                                    current_app.logger.error(f'[FLASHCARDS_EDIT_DEBUG] Erreur suppression ancienne image: {e}')
+                                    category_log.FLASHCARDS_EDIT_DEBUG.error('Erreur suppression ancienne image: %s', e)
                             
                             # Enregistrer la nouvelle image
                             filename = generate_unique_filename(image_file.filename)
@@ -4470,10 +2746,10 @@ def edit_exercise(exercise_id):
                             
                             image_file.save(filepath)
                             card_data['image'] = f'uploads/{filename}'
-                            current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Nouvelle image enregistrée: {card_data["image"]}')
+                            category_log.FLASHCARDS_EDIT_DEBUG.info('Nouvelle image enregistrée: %s', card_data["image"])
                     
                     cards_data.append(card_data)
-                    current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Carte {i+1}: "{question[:30]}..." -> "{answer}" (Image: {card_data["image"]})')
+                    category_log.FLASHCARDS_EDIT_DEBUG.info('Carte %s: "%s..." -> "%s" (Image: %s)', i+1, question[:30], answer, card_data["image"])
                 
                 # Nettoyer les images orphelines si des cartes ont été supprimées
                 if exercise.content:
@@ -4486,21 +2762,21 @@ def edit_exercise(exercise_id):
                                     if os.path.exists(old_image_path) and not any(card.get('image') == old_card['image'] for card in cards_data):
                                         try:
                                             os.remove(old_image_path)
-                                            current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Image orpheline supprimée: {old_card["image"]}')
+                                            category_log.FLASHCARDS_EDIT_DEBUG.info('Image orpheline supprimée: %s', old_card["image"])
                                         except Exception as e:
-                                            current_app.logger.error(f'[FLASHCARDS_EDIT_DEBUG] Erreur suppression image orpheline: {e}')
+                                            category_log.FLASHCARDS_EDIT_DEBUG.error('Erreur suppression image orpheline: %s', e)
                     except Exception as e:
-                        current_app.logger.error(f'[FLASHCARDS_EDIT_DEBUG] Erreur nettoyage images orphelines: {e}')
+                        category_log.FLASHCARDS_EDIT_DEBUG.error('Erreur nettoyage images orphelines: %s', e)
                 
                 # Mettre à jour le contenu
                 content = {
                     'cards': cards_data
                 }
                 exercise.content = json.dumps(content)
-                current_app.logger.info(f'[FLASHCARDS_EDIT_DEBUG] Contenu sauvegardé: {len(cards_data)} cartes')
+                category_log.FLASHCARDS_EDIT_DEBUG.info('Contenu sauvegardé: %s cartes', len(cards_data))
             
             elif exercise.exercise_type == 'pairs':
-                print(f'[PAIRS_EDIT_DEBUG] Traitement du contenu Association de paires')
+                category_log.PAIRS_EDIT_DEBUG.debug('Traitement du contenu Association de paires')
                 
                 pairs = []
                 pair_ids = set()
@@ -4562,10 +2838,10 @@ def edit_exercise(exercise_id):
                 # Mettre à jour le contenu
                 content = {'pairs': pairs}
                 exercise.content = json.dumps(content)
-                print(f'[PAIRS_EDIT_DEBUG] Contenu sauvegardé: {len(pairs)} paires')
+                category_log.PAIRS_EDIT_DEBUG.debug('Contenu sauvegardé: %s paires', len(pairs))
             
             elif exercise.exercise_type == 'dictation':
-                print(f'[DICTATION_EDIT_DEBUG] Traitement du contenu Dictée')
+                category_log.DICTATION_EDIT_DEBUG.debug('Traitement du contenu Dictée')
                 
                 # Récupérer les instructions
                 instructions = request.form.get('dictation_instructions', '').strip()
@@ -4622,14 +2898,14 @@ def edit_exercise(exercise_id):
                     'audio_files': audio_files
                 }
                 exercise.content = json.dumps(content)
-                print(f'[DICTATION_EDIT_DEBUG] Contenu sauvegardé: {len(sentences)} phrases, {len(audio_files)} fichiers audio')
+                category_log.DICTATION_EDIT_DEBUG.debug('Contenu sauvegardé: %s phrases, %s fichiers audio', len(sentences), len(audio_files))
             
             elif exercise.exercise_type == 'legend':
-                current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Traitement du contenu Légende')
+                category_log.LEGEND_EDIT_DEBUG.info('Traitement du contenu Légende')
                 
                 # Récupérer le mode de légende
                 legend_mode = request.form.get('legend_mode', 'classic')
-                current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Mode sélectionné: {legend_mode}')
+                category_log.LEGEND_EDIT_DEBUG.info('Mode sélectionné: %s', legend_mode)
                 
                 # Récupérer les instructions
                 instructions = request.form.get('legend_instructions', '').strip()
@@ -4674,14 +2950,14 @@ def edit_exercise(exercise_id):
                             except ValueError:
                                 continue
                 
-                current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Zones trouvées: {sorted(zone_indices)}')
+                category_log.LEGEND_EDIT_DEBUG.info('Zones trouvées: %s', sorted(zone_indices))
                 
                 for zone_index in sorted(zone_indices):
                     x = request.form.get(f'zone_{zone_index}_x')
                     y = request.form.get(f'zone_{zone_index}_y')
                     legend = request.form.get(f'zone_{zone_index}_legend', '').strip()
                     
-                    current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Zone {zone_index}: x={x}, y={y}, legend="{legend}"')
+                    category_log.LEGEND_EDIT_DEBUG.info('Zone %s: x=%s, y=%s, legend="%s"', zone_index, x, y, legend)
                     
                     if x and y and legend:
                         try:
@@ -4693,9 +2969,9 @@ def edit_exercise(exercise_id):
                                 'legend': legend
                             })
                             elements.append(legend)
-                            current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Zone {zone_index} ajoutée avec succès')
+                            category_log.LEGEND_EDIT_DEBUG.info('Zone %s ajoutée avec succès', zone_index)
                         except ValueError as e:
-                            current_app.logger.error(f'[LEGEND_EDIT_DEBUG] Erreur conversion zone {zone_index}: {e}')
+                            category_log.LEGEND_EDIT_DEBUG.error('Erreur conversion zone %s: %s', zone_index, e)
                             continue
                 
                 if not zones:
@@ -4742,7 +3018,7 @@ def edit_exercise(exercise_id):
                         'grid_rows': grid_rows,
                         'grid_cols': grid_cols
                     }
-                    current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Mode grille: {len(grid_elements)} éléments, grille {grid_rows}x{grid_cols}')
+                    category_log.LEGEND_EDIT_DEBUG.info('Mode grille: %s éléments, grille %sx%s', len(grid_elements), grid_rows, grid_cols)
                 
                 elif legend_mode == 'spatial':
                     # Mode spatial - récupérer les éléments et zones spatiales
@@ -4804,7 +3080,7 @@ def edit_exercise(exercise_id):
                         'elements': spatial_elements,
                         'zones': spatial_zones
                     }
-                    current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Mode spatial: {len(spatial_elements)} éléments, {len(spatial_zones)} zones')
+                    category_log.LEGEND_EDIT_DEBUG.info('Mode spatial: %s éléments, %s zones', len(spatial_elements), len(spatial_zones))
                 
                 else:
                     # Mode classique - utiliser la logique des zones existante
@@ -4815,7 +3091,7 @@ def edit_exercise(exercise_id):
                         'zones': zones,
                         'elements': elements
                     }
-                current_app.logger.info(f'[LEGEND_EDIT_DEBUG] Contenu sauvegardé avec succès - Mode: {legend_mode}, Image: {main_image_path}')
+                category_log.LEGEND_EDIT_DEBUG.info('Contenu sauvegardé avec succès - Mode: %s, Image: %s', legend_mode, main_image_path)
             
             # Mettre à jour l'exercice en base (les champs de base sont déjà mis à jour au début de la fonction POST)
             # exercise.title, exercise.description, exercise.subject sont déjà mis à jour aux lignes 2751-2753
@@ -4827,7 +3103,7 @@ def edit_exercise(exercise_id):
             return redirect(url_for('view_exercise', exercise_id=exercise.id))
             
         except Exception as e:
-            print(f'Erreur lors de la modification: {e}')
+            app.logger.error('Erreur lors de la modification: %s', e)
             flash(f'Erreur lors de la modification de l\'exercice: {str(e)}', 'error')
             return render_template('edit_exercise.html', exercise=exercise)
 
@@ -4841,51 +3117,8 @@ def teacher_statistics():
         flash('Accès refusé. Vous devez être enseignant.', 'error')
         return redirect(url_for('dashboard'))
     
-    # Récupérer toutes les classes de l'enseignant
-    classes = Class.query.filter_by(teacher_id=current_user.id).all()
-    
-    # Calculer les statistiques pour chaque classe
-    classes_stats = []
-    for class_obj in classes:
-        # Récupérer tous les exercices de la classe
-        all_exercises = []
-        for course in class_obj.courses:
-            all_exercises.extend(course.exercises)
-        
-        # Calculer les statistiques pour chaque étudiant
-        students_stats = []
-        for student in class_obj.students:
-            # Compter les exercices complétés
-            completed_exercises = ExerciseAttempt.query.filter_by(
-                student_id=student.id
-            ).join(Exercise).filter(
-                Exercise.id.in_([ex.id for ex in all_exercises])
-            ).count()
-            
-            # Calculer le score moyen
-            attempts = ExerciseAttempt.query.filter_by(
-                student_id=student.id
-            ).join(Exercise).filter(
-                Exercise.id.in_([ex.id for ex in all_exercises])
-            ).all()
-            
-            if attempts:
-                average_score = sum(attempt.score or 0 for attempt in attempts) / len(attempts)
-            else:
-                average_score = None
-            
-            students_stats.append({
-                'student': student,
-                'completed_exercises': completed_exercises,
-                'total_exercises': len(all_exercises),
-                'average_score': average_score
-            })
-        
-        classes_stats.append({
-            'class': class_obj,
-            'students': students_stats,
-            'total_exercises': len(all_exercises)
-        })
+    # Statistiques de toutes les classes calculées par agrégats SQL groupés
+    classes_stats = get_teacher_statistics(current_user.id)
     
     return render_template('teacher/statistics.html', classes_stats=classes_stats)
 
@@ -4903,117 +3136,19 @@ def export_class_pdf(class_id):
         flash('Classe non trouvée.', 'error')
         return redirect(url_for('teacher_statistics'))
     
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from io import BytesIO
-    from datetime import datetime
-    
-    # Créer le buffer pour le PDF
-    buffer = BytesIO()
+    from export_utils import write_class_pdf, stream_export_file, PDF_MIMETYPE
     
-    # Créer le document PDF
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Titre
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=1  # Centré
+    # Les lignes élèves sont lues depuis l'agrégat SQL et dessinées au fil de l'eau
+    path = write_class_pdf(
+        class_obj.name,
+        iter_student_rows([class_obj.id]),
+        get_exercise_counts([class_obj.id]).get(class_obj.id, 0),
+        get_student_counts([class_obj.id]).get(class_obj.id, 0),
+        teacher_name=current_user.name
     )
-    story.append(Paragraph(f'Statistiques de la classe : {class_obj.name}', title_style))
-    story.append(Spacer(1, 20))
-    
-    # Informations générales
-    info_style = styles['Normal']
-    story.append(Paragraph(f'<b>Enseignant :</b> {current_user.name}', info_style))
-    story.append(Paragraph(f'<b>Date d\'export :</b> {datetime.now().strftime("%d/%m/%Y à %H:%M")}', info_style))
-    story.append(Paragraph(f'<b>Nombre d\'élèves :</b> {len(class_obj.students)}', info_style))
-    story.append(Spacer(1, 20))
-    
-    # Récupérer tous les exercices de la classe
-    all_exercises = []
-    for course in class_obj.courses:
-        all_exercises.extend(course.exercises)
-    
-    story.append(Paragraph(f'<b>Nombre d\'exercices :</b> {len(all_exercises)}', info_style))
-    story.append(Spacer(1, 30))
-    
-    # Tableau des résultats
-    story.append(Paragraph('<b>Résultats par élève</b>', styles['Heading2']))
-    story.append(Spacer(1, 10))
     
-    # Données du tableau
-    data = [['Élève', 'Exercices complétés', 'Score moyen (%)', 'Progression']]
-    
-    for student in class_obj.students:
-        # Compter les exercices complétés
-        completed_exercises = ExerciseAttempt.query.filter_by(
-            student_id=student.id
-        ).join(Exercise).filter(
-            Exercise.id.in_([ex.id for ex in all_exercises])
-        ).count()
-        
-        # Calculer le score moyen
-        attempts = ExerciseAttempt.query.filter_by(
-            student_id=student.id
-        ).join(Exercise).filter(
-            Exercise.id.in_([ex.id for ex in all_exercises])
-        ).all()
-        
-        if attempts:
-            average_score = sum(attempt.score or 0 for attempt in attempts) / len(attempts)
-            score_text = f'{average_score:.1f}%'
-        else:
-            score_text = '-'
-        
-        # Calculer la progression
-        if len(all_exercises) > 0:
-            progression = f'{completed_exercises}/{len(all_exercises)}'
-        else:
-            progression = '0/0'
-        
-        data.append([
-            student.name or student.username,
-            str(completed_exercises),
-            score_text,
-            progression
-        ])
-    
-    # Créer le tableau
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    story.append(table)
-    
-    # Construire le PDF
-    doc.build(story)
-    
-    # Préparer la réponse
-    buffer.seek(0)
     filename = f'statistiques_{class_obj.name}_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
-    
-    from flask import make_response
-    response = make_response(buffer.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return stream_export_file(path, filename, PDF_MIMETYPE)
 
 @app.route('/teacher/export/excel/<int:class_id>')
 @login_required
@@ -5029,92 +3164,19 @@ def export_class_excel(class_id):
         flash('Classe non trouvée.', 'error')
         return redirect(url_for('teacher_statistics'))
     
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment
-    from io import BytesIO
-    from datetime import datetime
-    
-    # Créer le workbook Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f'Statistiques {class_obj.name}'
-    
-    # Style pour les en-têtes
-    header_font = Font(bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-    center_alignment = Alignment(horizontal='center', vertical='center')
-    
-    # Informations générales
-    ws['A1'] = f'Statistiques de la classe : {class_obj.name}'
-    ws['A1'].font = Font(bold=True, size=16)
-    ws.merge_cells('A1:D1')
-    
-    ws['A3'] = f'Enseignant : {current_user.name}'
-    ws['A4'] = f'Date d\'export : {datetime.now().strftime("%d/%m/%Y à %H:%M")}'
-    ws['A5'] = f'Nombre d\'élèves : {len(class_obj.students)}'
-    
-    # Récupérer tous les exercices de la classe
-    all_exercises = []
-    for course in class_obj.courses:
-        all_exercises.extend(course.exercises)
-    
-    ws['A6'] = f'Nombre d\'exercices : {len(all_exercises)}'
+    from export_utils import write_class_excel, stream_export_file, EXCEL_MIMETYPE
     
-    # En-têtes du tableau
-    headers = ['Élève', 'Exercices complétés', 'Score moyen (%)', 'Progression']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=8, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-    
-    # Données des étudiants
-    for row, student in enumerate(class_obj.students, 9):
-        # Compter les exercices complétés
-        completed_exercises = ExerciseAttempt.query.filter_by(
-            student_id=student.id
-        ).join(Exercise).filter(
-            Exercise.id.in_([ex.id for ex in all_exercises])
-        ).count()
-        
-        # Calculer le score moyen
-        attempts = ExerciseAttempt.query.filter_by(
-            student_id=student.id
-        ).join(Exercise).filter(
-            Exercise.id.in_([ex.id for ex in all_exercises])
-        ).all()
-        
-        if attempts:
-            average_score = sum(attempt.score or 0 for attempt in attempts) / len(attempts)
-        else:
-            average_score = None
-        
-        # Remplir les cellules
-        ws.cell(row=row, column=1, value=student.name or student.username)
-        ws.cell(row=row, column=2, value=completed_exercises)
-        ws.cell(row=row, column=3, value=f'{average_score:.1f}' if average_score is not None else '-')
-        ws.cell(row=row, column=4, value=f'{completed_exercises}/{len(all_exercises)}')
-        
-        # Centrer les données
-        for col in range(1, 5):
-            ws.cell(row=row, column=col).alignment = center_alignment
-    
-    # Ajuster la largeur des colonnes
-    ws.column_dimensions['A'].width = 20
-    ws.column_dimensions['B'].width = 18
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 15
-    
-    # Créer le buffer pour Excel
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    # Classeur write-only : les lignes ne sont jamais toutes en mémoire
+    path = write_class_excel(
+        class_obj.name,
+        iter_student_rows([class_obj.id]),
+        get_exercise_counts([class_obj.id]).get(class_obj.id, 0),
+        get_student_counts([class_obj.id]).get(class_obj.id, 0),
+        teacher_name=current_user.name
+    )
     
-    # Préparer la réponse
     filename = f'statistiques_{class_obj.name}_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
-    
-    from flask import make_response
-    response = make_response(buffer.getvalue())
+    return stream_export_file(path, filename, EXCEL_MIMETYPE)
 
 # ===== ROUTE D'ÉDITION D'EXERCICE SUPPRIMÉE =====
 # Cette route était en conflit avec la route robuste /exercise/edit_exercise/<int:exercise_id>
@@ -5126,24 +3188,24 @@ def export_class_excel(class_id):
 @login_required
 def edit_exercise_blueprint(exercise_id):
     """Route d'édition d'exercice avec logique légende complète"""
-    print(f'[EDIT_POST_DEBUG] POST request received for exercise {exercise_id}')
-    print(f'[EDIT_POST_DEBUG] Form data keys: {list(request.form.keys())}')
-    print(f'[EDIT_POST_DEBUG] Form data: {dict(request.form)}')
+    category_log.EDIT_POST_DEBUG.debug('POST request received for exercise %s', exercise_id)
+    category_log.EDIT_POST_DEBUG.debug('Form data keys: %s', request.form.keys())
+    category_log.EDIT_POST_DEBUG.debug('Form data: %s', request.form)
     
     exercise = Exercise.query.get_or_404(exercise_id)
     
     if request.method == 'GET':
-        print(f'[EDIT_DEBUG] Exercise ID: {exercise_id}')
-        print(f'[EDIT_DEBUG] Exercise type: {repr(exercise.exercise_type)}')
-        print(f'[EDIT_DEBUG] Exercise title: {repr(exercise.title)}')
-        print(f'[EDIT_DEBUG] Template path: {repr("exercise_types/legend_edit.html")}')
+        category_log.EDIT_DEBUG.debug('Exercise ID: %s', exercise_id)
+        category_log.EDIT_DEBUG.debug('Exercise type: %r', exercise.exercise_type)
+        category_log.EDIT_DEBUG.debug('Exercise title: %r', exercise.title)
+        category_log.EDIT_DEBUG.debug('Template path: %r', "exercise_types/legend_edit.html")
         
         content = json.loads(exercise.content) if exercise.content else {}
-        print(f'[EDIT_DEBUG] Content type: {type(content)}')
-        print(f'[EDIT_DEBUG] Content keys: {list(content.keys()) if isinstance(content, dict) else "Not a dict"}')
+        category_log.EDIT_DEBUG.debug('Content type: %s', type(content))
+        category_log.EDIT_DEBUG.debug('Content keys: %s', content.keys() if isinstance(content, dict) else "Not a dict")
         
         attempts = ExerciseAttempt.query.filter_by(exercise_id=exercise_id).all()
-        print(f'[EDIT_DEBUG] Attempts count: {len(attempts)}')
+        category_log.EDIT_DEBUG.debug('Attempts count: %s', len(attempts))
         
         # Rediriger vers le template d'édition approprié selon le type
         if exercise.exercise_type == 'legend':
@@ -5152,9 +3214,9 @@ def edit_exercise_blueprint(exercise_id):
             return render_template('edit_exercise.html', exercise=exercise)
     
     if request.method == 'POST':
-        print(f'[EDIT_POST_DEBUG] Title: {repr(request.form.get("title", ""))}')
-        print(f'[EDIT_POST_DEBUG] Subject: {repr(request.form.get("subject", ""))}')
-        print(f'[EDIT_POST_DEBUG] Description: {repr(request.form.get("description", ""))}')
+        category_log.EDIT_POST_DEBUG.debug('Title: %r', request.form.get("title", ""))
+        category_log.EDIT_POST_DEBUG.debug('Subject: %r', request.form.get("subject", ""))
+        category_log.EDIT_POST_DEBUG.debug('Description: %r', request.form.get("description", ""))
         
         try:
             # Mise à jour des champs de base
@@ -5165,28 +3227,28 @@ def edit_exercise_blueprint(exercise_id):
             
             # TRAITEMENT SPÉCIFIQUE POUR LES EXERCICES LÉGENDE
             if exercise.exercise_type == 'legend':
-                print(f'[LEGEND_EDIT_DEBUG] Traitement du contenu LÉGENDE')
-                print(f'[LEGEND_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.LEGEND_EDIT_DEBUG.debug('Traitement du contenu LÉGENDE')
+                category_log.LEGEND_EDIT_DEBUG.debug('Tous les champs du formulaire: %s', request.form.keys())
                 
                 current_content = json.loads(exercise.content) if exercise.content else {}
                 
                 # Collecter toutes les zones depuis le formulaire
                 zone_indices = set()
                 for key in request.form.keys():
-                    print(f'[LEGEND_EDIT_DEBUG] Examen clé: {key}')
+                    category_log.LEGEND_EDIT_DEBUG.debug('Examen clé: %s', key)
                     if key.startswith('zone_') and key.endswith('_x'):
                         # Extraction robuste de l'index de zone
                         parts = key.split('_')
-                        print(f'[LEGEND_EDIT_DEBUG] Parts de {key}: {parts}')
+                        category_log.LEGEND_EDIT_DEBUG.debug('Parts de %s: %s', key, parts)
                         if len(parts) >= 3:
                             try:
                                 zone_index = int(parts[1])
                                 zone_indices.add(zone_index)
-                                print(f'[LEGEND_EDIT_DEBUG] Zone détectée: {zone_index}')
+                                category_log.LEGEND_EDIT_DEBUG.debug('Zone détectée: %s', zone_index)
                             except ValueError:
-                                print(f'[LEGEND_EDIT_DEBUG] Index de zone invalide: {key}')
+                                category_log.LEGEND_EDIT_DEBUG.debug('Index de zone invalide: %s', key)
                 
-                print(f'[LEGEND_EDIT_DEBUG] Zones trouvées: {sorted(zone_indices)}')
+                category_log.LEGEND_EDIT_DEBUG.debug('Zones trouvées: %s', sorted(zone_indices))
                 
                 # Sauvegarder les modifications
                 db.session.commit()
@@ -5194,7 +3256,7 @@ def edit_exercise_blueprint(exercise_id):
                 return redirect(url_for('view_exercise', exercise_id=exercise_id))
                 
         except Exception as e:
-            print(f'[EDIT_ERROR] Erreur lors de la modification : {e}')
+            category_log.EDIT_ERROR.error('Erreur lors de la modification : %s', e)
             flash('Erreur lors de la modification de l\'exercice.', 'error')
             db.session.rollback()
     
@@ -5312,326 +3374,6 @@ def migrate_school_column():
         db.session.rollback()
         return f"Erreur : {str(e)}"
 
-@app.route('/fix-uploads-directory')
-def fix_uploads_directory():
-    """Route temporaire pour créer le répertoire static/uploads en production Railway"""
-    
-    try:
-        import os
-        from pathlib import Path
-        
-        # Créer le répertoire static/uploads
-        uploads_dir = Path('static/uploads')
-        uploads_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Créer un fichier .gitkeep pour que le répertoire soit conservé
-        gitkeep_file = uploads_dir / '.gitkeep'
-        gitkeep_file.touch()
-        
-        # Vérifier que le répertoire existe
-        if uploads_dir.exists():
-            return f"SUCCES: Repertoire {uploads_dir} cree avec succes en production Railway ! Les images pourront maintenant etre uploadees et affichees."
-        else:
-            return f"ERREUR: Le repertoire {uploads_dir} n'a pas pu etre cree."
-            
-    except Exception as e:
-        return f"ERREUR lors de la creation du repertoire: {str(e)}"
-
-@app.route('/check-missing-images')
-def check_missing_images():
-    """Route pour identifier les images manquantes en production Railway"""
-    try:
-        import os
-        from pathlib import Path
-        
-        result = []
-        result.append("<h2>DIAGNOSTIC IMAGES PRODUCTION RAILWAY</h2>")
-        
-        # 1. Vérifier le répertoire uploads
-        uploads_dir = Path('static/uploads')
-        result.append(f"<h3>1. Repertoire static/uploads</h3>")
-        result.append(f"<p><strong>Existe:</strong> {uploads_dir.exists()}</p>")
-        
-        if uploads_dir.exists():
-            files = list(uploads_dir.glob('*'))
-            result.append(f"<p><strong>Fichiers presents:</strong> {len(files)}</p>")
-            result.append("<ul>")
-            for f in files:
-                result.append(f"<li>{f.name}</li>")
-            result.append("</ul>")
-        
-        # 2. Vérifier les références dans la DB
-        result.append(f"<h3>2. Exercices avec images dans la base</h3>")
-        exercises_with_images = Exercise.query.filter(Exercise.image_path.isnot(None)).all()
-        result.append(f"<p><strong>Nombre d'exercices avec images:</strong> {len(exercises_with_images)}</p>")
-        
-        missing_images = []
-        for ex in exercises_with_images:
-            if ex.image_path:
-                filename = ex.image_path.split('/')[-1] if '/' in ex.image_path else ex.image_path
-                image_path = uploads_dir / filename
-                
-                result.append(f"<h4>Exercice {ex.id}: {ex.title}</h4>")
-                result.append(f"<p><strong>Image path DB:</strong> {ex.image_path}</p>")
-                result.append(f"<p><strong>Fichier attendu:</strong> {filename}</p>")
-                result.append(f"<p><strong>Fichier existe:</strong> {image_path.exists()}</p>")
-                
-                if not image_path.exists():
-                    missing_images.append(filename)
-                    result.append(f"<p style='color: red;'><strong>MANQUANT</strong></p>")
-                else:
-                    result.append(f"<p style='color: green;'><strong>OK</strong></p>")
-                result.append("<hr>")
-        
-        # 3. Résumé
-        result.append(f"<h3>3. Resume</h3>")
-        result.append(f"<p><strong>Images manquantes:</strong> {len(missing_images)}</p>")
-        if missing_images:
-            result.append("<ul>")
-            for img in missing_images:
-                result.append(f"<li style='color: red;'>{img}</li>")
-            result.append("</ul>")
-        
-        return "<br>".join(result)
-        
-    except Exception as e:
-        return f"<h2>ERREUR:</h2><p>{str(e)}</p>"
-
-@app.route('/create-simple-placeholders')
-def create_simple_placeholders():
-    """Route pour créer des fichiers placeholder simples sans Pillow"""
-    try:
-        import os
-        from pathlib import Path
-        
-        # Créer le répertoire static/uploads
-        uploads_dir = Path('static/uploads')
-        uploads_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Images connues manquantes
-        placeholder_files = [
-            "Capture d'écran 2025-08-14 145027_20250814_182421_Da3gvm.png",
-            "triangle.png", 
-            "clopepe.png",
-            "corps_humain_exemple.jpg"
-        ]
-        
-        created_files = []
-        
-        for filename in placeholder_files:
-            file_path = uploads_dir / filename
-            
-            if not file_path.exists():
-                # Créer un fichier SVG simple comme placeholder
-                svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="800" height="400" xmlns="http://www.w3.org/2000/svg">
-  <rect width="800" height="400" fill="#f0f0f0" stroke="#cccccc" stroke-width="3"/>
-  <text x="400" y="180" font-family="Arial, sans-serif" font-size="24" text-anchor="middle" fill="#666666">
-    IMAGE DE L'EXERCICE
-  </text>
-  <text x="400" y="220" font-family="Arial, sans-serif" font-size="18" text-anchor="middle" fill="#999999">
-    {filename}
-  </text>
-  <text x="400" y="250" font-family="Arial, sans-serif" font-size="14" text-anchor="middle" fill="#999999">
-    Image temporairement indisponible
-  </text>
-</svg>'''
-                
-                # Sauvegarder le fichier SVG avec l'extension d'origine
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(svg_content)
-                
-                created_files.append(filename)
-        
-        result = f"<h2>CREATION PLACEHOLDERS REUSSIE</h2>"
-        result += f"<p><strong>Fichiers crees:</strong> {len(created_files)}</p>"
-        result += "<ul>"
-        for f in created_files:
-            result += f"<li>{f}</li>"
-        result += "</ul>"
-        result += f"<p>Les images devraient maintenant s'afficher dans les exercices !</p>"
-        
-        return result
-        
-    except Exception as e:
-        return f"<h2>ERREUR:</h2><p>{str(e)}</p>"
-
-@app.route('/debug-railway')
-def debug_railway():
-    """Route de diagnostic pour identifier les problemes Railway"""
-    
-    try:
-        debug_info = []
-        
-        # Test 1: Connexion base de données
-        try:
-            from sqlalchemy import text
-            result = db.session.execute(text("SELECT 1"))
-            debug_info.append("OK Connexion base de donnees OK")
-        except Exception as e:
-            debug_info.append(f"ERREUR Connexion base de donnees ERREUR: {str(e)}")
-        
-        # Test 2: Structure table user
-        try:
-            result = db.session.execute(text("""
-                SELECT column_name, data_type 
-                FROM information_schema.columns 
-                WHERE table_name = 'user'
-                ORDER BY column_name
-            """))
-            columns = result.fetchall()
-            debug_info.append(f"[OK] Table user a {len(columns)} colonnes")
-            for col in columns:
-                debug_info.append(f"  - {col[0]} ({col[1]})")
-        except Exception as e:
-            debug_info.append(f"[ERREUR] Structure table user ERREUR: {str(e)}")
-        
-        # Test 3: Import des modèles
-        try:
-            from models import User, Exercise
-            debug_info.append("[OK] Import modeles OK")
-        except Exception as e:
-            debug_info.append(f"[ERREUR] Import modeles ERREUR: {str(e)}")
-        
-        # Test 4: Variables d'environnement
-        import os
-        debug_info.append(f"[OK] FLASK_ENV: {os.environ.get('FLASK_ENV', 'non defini')}")
-        debug_info.append(f"[OK] DATABASE_URL: {'defini' if os.environ.get('DATABASE_URL') else 'non defini'}")
-        
-        # Test 5: Flask-Login
-        try:
-            from flask_login import current_user
-            debug_info.append(f"[OK] Flask-Login import OK")
-            debug_info.append(f"[OK] current_user accessible: {hasattr(current_user, 'is_authenticated')}")
-            debug_info.append(f"[OK] current_user.is_authenticated: {current_user.is_authenticated}")
-        except Exception as e:
-            debug_info.append(f"[ERREUR] Flask-Login ERREUR: {str(e)}")
-        
-        # Test 6: Test route index directement
-        try:
-            debug_info.append("=== TEST ROUTE INDEX ===")
-            if current_user.is_authenticated:
-                debug_info.append(f"[OK] Utilisateur connecte: {current_user.email}")
-                debug_info.append(f"[OK] Role: {current_user.role}")
-            else:
-                debug_info.append("[OK] Utilisateur non connecte - devrait afficher login.html")
-        except Exception as e:
-            debug_info.append(f"[ERREUR] Test route index ERREUR: {str(e)}")
-        
-        return "<br>".join(debug_info)
-        
-    except Exception as e:
-        return f"[ERREUR] Erreur diagnostic: {str(e)}"
-
-@app.route('/test-simple')
-def test_simple():
-    """Route ultra-simple pour tester si Flask fonctionne"""
-    return "[OK] Flask fonctionne parfaitement sur Railway !"
-
-@app.route('/debug-fill-in-blanks-railway')
-def debug_fill_in_blanks_railway():
-    """Route de diagnostic spécifique pour les problèmes fill_in_blanks sur Railway"""
-    try:
-        debug_info = []
-        
-        # 1. Vérifier les exercices fill_in_blanks
-        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
-        debug_info.append(f"<h2>1. EXERCICES FILL_IN_BLANKS: {len(exercises)} trouvés</h2>")
-        
-        for ex in exercises:
-            debug_info.append(f"<h3>Exercice {ex.id}: {ex.title}</h3>")
-            debug_info.append(f"<p><strong>Image path:</strong> {ex.image_path}</p>")
-            
-            # Analyser le contenu JSON
-            content = json.loads(ex.content)
-            debug_info.append(f"<p><strong>Format JSON:</strong> {list(content.keys())}</p>")
-            
-            if 'text' in content:
-                text = content['text']
-                blank_count = text.count('___')
-                debug_info.append(f"<p><strong>Text:</strong> {text}</p>")
-                debug_info.append(f"<p><strong>Blancs dans text:</strong> {blank_count}</p>")
-            
-            if 'sentences' in content:
-                sentences = content['sentences']
-                total_blanks = sum(sentence.count('___') for sentence in sentences)
-                debug_info.append(f"<p><strong>Sentences:</strong> {sentences}</p>")
-                debug_info.append(f"<p><strong>Blancs dans sentences:</strong> {total_blanks}</p>")
-            
-            words = content.get('words', [])
-            debug_info.append(f"<p><strong>Words:</strong> {words} (count: {len(words)})</p>")
-            
-            # Vérifier la cohérence blancs/mots
-            if 'text' in content:
-                text_blanks = content['text'].count('___')
-                word_count = len(words)
-                if text_blanks != word_count:
-                    debug_info.append(f"<p style='color: red;'><strong>ALERTE:</strong> {text_blanks} blancs mais {word_count} mots!</p>")
-                else:
-                    debug_info.append(f"<p style='color: green;'><strong>OK:</strong> {text_blanks} blancs = {word_count} mots</p>")
-        
-        # 2. Vérifier les dossiers et fichiers d'images
-        debug_info.append("<h2>2. VERIFICATION DOSSIERS IMAGES</h2>")
-        
-        import os
-        static_dir = os.path.join(app.root_path, 'static')
-        uploads_dir = os.path.join(static_dir, 'uploads')
-        
-        debug_info.append(f"<p><strong>Dossier static:</strong> {static_dir} - Existe: {os.path.exists(static_dir)}</p>")
-        debug_info.append(f"<p><strong>Dossier uploads:</strong> {uploads_dir} - Existe: {os.path.exists(uploads_dir)}</p>")
-        
-        if os.path.exists(uploads_dir):
-            files = os.listdir(uploads_dir)
-            debug_info.append(f"<p><strong>Fichiers dans uploads:</strong> {len(files)}</p>")
-            debug_info.append("<ul>")
-            for f in files[:10]:  # Afficher les 10 premiers
-                debug_info.append(f"<li>{f}</li>")
-            if len(files) > 10:
-                debug_info.append(f"<li>... et {len(files) - 10} autres</li>")
-            debug_info.append("</ul>")
-        
-        # 3. Test de la logique de scoring
-        debug_info.append("<h2>3. TEST LOGIQUE SCORING</h2>")
-        
-        if exercises:
-            test_exercise = exercises[0]
-            content = json.loads(test_exercise.content)
-            correct_answers = content.get('words', [])
-            
-            debug_info.append(f"<h3>Test avec exercice: {test_exercise.title}</h3>")
-            debug_info.append(f"<p><strong>Réponses correctes:</strong> {correct_answers}</p>")
-            
-            # Test scoring parfait
-            total_blanks = len(correct_answers)
-            score_perfect = round((total_blanks / total_blanks) * 100) if total_blanks > 0 else 0
-            debug_info.append(f"<p><strong>Score parfait attendu:</strong> {total_blanks}/{total_blanks} = {score_perfect}%</p>")
-            
-            # Test scoring partiel (bug Railway)
-            if total_blanks >= 2:
-                score_partial = round((1 / total_blanks) * 100)
-                debug_info.append(f"<p><strong>Score avec 1 seul blanc correct:</strong> 1/{total_blanks} = {score_partial}%</p>")
-                if score_partial == 50:
-                    debug_info.append("<p style='color: red;'><strong>BUG IDENTIFIE:</strong> C'est exactement le problème Railway (50%)!</p>")
-        
-        # 4. Vérifier les variables d'environnement
-        debug_info.append("<h2>4. VARIABLES ENVIRONNEMENT</h2>")
-        env_vars = ['DATABASE_URL', 'FLASK_ENV', 'PORT']
-        for var in env_vars:
-            value = os.environ.get(var, 'NON DEFINI')
-            if var == 'DATABASE_URL' and value != 'NON DEFINI':
-                value = value[:30] + "..." if len(value) > 30 else value
-            debug_info.append(f"<p><strong>{var}:</strong> {value}</p>")
-        
-        # 5. Test de la route d'image
-        debug_info.append("<h2>5. TEST ROUTE IMAGE</h2>")
-        debug_info.append(f"<p><strong>Route statique Flask:</strong> {url_for('static', filename='uploads/test.png')}</p>")
-        
-        return "<br>".join(debug_info)
-        
-    except Exception as e:
-        return f"<h2>[ERREUR] Erreur diagnostic:</h2><p>{str(e)}</p>"
-
-
 
 @app.route('/admin/subscriptions')
 @login_required
@@ -5866,284 +3608,31 @@ def process_payment():
         return redirect(url_for('subscription_status'))
         
     except Exception as e:
-        print(f"[ERROR] Erreur lors du traitement du paiement : {e}")
+        app.logger.error('Erreur lors du traitement du paiement : %s', e)
         flash('Une erreur est survenue lors du traitement du paiement. Veuillez réessayer.', 'error')
         return redirect(url_for('subscription_payment'))
 
 
-
-@app.route('/fix-fill-in-blanks-words')
-def fix_fill_in_blanks_words():
-    """Route pour corriger les exercices Fill-in-the-Blanks avec mots manquants"""
-    try:
-        results = []
-        results.append("<h1>CORRECTION EXERCICES FILL-IN-THE-BLANKS</h1>")
-        
-        # Récupérer tous les exercices fill_in_blanks
-        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
-        results.append(f"<h2>Exercices trouvés: {len(exercises)}</h2>")
-        
-        fixed_count = 0
-        
-        for exercise in exercises:
-            results.append(f"<h3>Exercice {exercise.id}: {exercise.title}</h3>")
-            
-            try:
-                content = json.loads(exercise.content)
-                
-                # Vérifier si les mots sont manquants
-                words = content.get('words', [])
-                available_words = content.get('available_words', [])
-                
-                results.append(f"<p>Mots actuels: {len(words)} | Available_words: {len(available_words)}</p>")
-                
-                if not words and not available_words:
-                    # Exercice sans mots - on va en ajouter des exemples
-                    if 'sentences' in content:
-                        sentences = content['sentences']
-                        total_blanks = sum(s.count('___') for s in sentences)
-                        
-                        # Créer des mots d'exemple basés sur le nombre de blancs
-                        example_words = []
-                        for i in range(total_blanks):
-                            example_words.append(f"mot{i+1}")
-                        
-                        # Mettre à jour le contenu
-                        content['words'] = example_words
-                        content['available_words'] = example_words  # AJOUT: copier vers available_words
-                        exercise.content = json.dumps(content)
-                        
-                        results.append(f"<p style='color: green;'>✓ Ajouté {len(example_words)} mots d'exemple</p>")
-                        fixed_count += 1
-                    else:
-                        results.append("<p style='color: orange;'>⚠ Pas de sentences trouvées</p>")
-                elif words and not available_words:
-                    # Cas où words existe mais available_words est vide - COPIER
-                    content['available_words'] = words
-                    exercise.content = json.dumps(content)
-                    results.append(f"<p style='color: green;'>✓ Copié {len(words)} mots vers available_words</p>")
-                    fixed_count += 1
-                else:
-                    results.append("<p style='color: blue;'>ℹ Exercice déjà avec mots</p>")
-                    
-            except Exception as e:
-                results.append(f"<p style='color: red;'>[ECHEC] Erreur: {e}</p>")
-        
-        # Sauvegarder les changements
-        if fixed_count > 0:
-            db.session.commit()
-            results.append(f"<h2 style='color: green;'>✓ {fixed_count} exercices corrigés et sauvegardés</h2>")
-        else:
-            results.append("<h2 style='color: blue;'>ℹ Aucune correction nécessaire</h2>")
-        
-        return "<br>".join(results)
-        
-    except Exception as e:
-        return f"<h1>Erreur</h1><p>{str(e)}</p>"
-
-@app.route('/fix-production-issues')
-def fix_production_issues():
-    """Route pour diagnostiquer et corriger les problèmes d'images et de scoring en production"""
-    try:
-        import os
-        results = []
-        
-        results.append("<h1>DIAGNOSTIC ET CORRECTION PRODUCTION</h1>")
-        
-        # 1. Vérifier et créer le dossier uploads
-        results.append("<h2>1. VERIFICATION DOSSIER UPLOADS</h2>")
-        
-        static_dir = os.path.join(app.root_path, 'static')
-        uploads_dir = os.path.join(static_dir, 'uploads')
-        
-        results.append(f"<p>Dossier static: {static_dir}</p>")
-        results.append(f"<p>Dossier uploads: {uploads_dir}</p>")
-        
-        # Créer static si nécessaire
-        if not os.path.exists(static_dir):
-            try:
-                os.makedirs(static_dir)
-                results.append("<p style='color: green;'>✓ Dossier static créé</p>")
-            except Exception as e:
-                results.append(f"<p style='color: red;'>[ECHEC] Erreur création static: {e}</p>")
-        else:
-            results.append("<p style='color: green;'>✓ Dossier static existe</p>")
-        
-        # Créer uploads si nécessaire
-        if not os.path.exists(uploads_dir):
-            try:
-                os.makedirs(uploads_dir, exist_ok=True)
-                # Créer .gitkeep
-                gitkeep_path = os.path.join(uploads_dir, ".gitkeep")
-                with open(gitkeep_path, 'w') as f:
-                    f.write("# Dossier uploads pour les images des exercices\n")
-                results.append("<p style='color: green;'>✓ Dossier uploads créé avec .gitkeep</p>")
-            except Exception as e:
-                results.append(f"<p style='color: red;'>[ECHEC] Erreur création uploads: {e}</p>")
-        else:
-            files = os.listdir(uploads_dir)
-            results.append(f"<p style='color: green;'>✓ Dossier uploads existe ({len(files)} fichiers)</p>")
-        
-        # 2. Analyser les exercices fill_in_blanks
-        results.append("<h2>2. ANALYSE EXERCICES TEXTE A TROUS</h2>")
-        
-        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
-        results.append(f"<p>Nombre d'exercices trouvés: {len(exercises)}</p>")
-        
-        for ex in exercises[:5]:  # Analyser les 5 premiers
-            results.append(f"<h3>Exercice {ex.id}: {ex.title}</h3>")
-            
-            # Analyser le contenu
-            try:
-                content = json.loads(ex.content)
-                
-                # Compter les blancs réels
-                total_blanks = 0
-                if 'text' in content:
-                    total_blanks += content['text'].count('___')
-                if 'sentences' in content:
-                    total_blanks += sum(s.count('___') for s in content['sentences'])
-                
-                # Compter les réponses
-                words = content.get('words', [])
-                available_words = content.get('available_words', [])
-                
-                results.append(f"<p>Blancs dans contenu: {total_blanks}</p>")
-                results.append(f"<p>Mots de réponse: {len(words)} (words)</p>")
-                results.append(f"<p>Mots disponibles: {len(available_words)} (available_words)</p>")
-                
-                # Diagnostic du problème
-                if total_blanks != len(words) and len(words) > 0:
-                    results.append(f"<p style='color: red;'>⚠ PROBLÈME: {total_blanks} blancs mais {len(words)} réponses</p>")
-                elif total_blanks == len(words):
-                    results.append(f"<p style='color: green;'>✓ Cohérent: {total_blanks} blancs = {len(words)} réponses</p>")
-                
-                # Vérifier l'image
-                if ex.image_path:
-                    image_full_path = os.path.join(uploads_dir, ex.image_path)
-                    if os.path.exists(image_full_path):
-                        results.append(f"<p style='color: green;'>✓ Image existe: {ex.image_path}</p>")
-                    else:
-                        results.append(f"<p style='color: red;'>[ECHEC] Image manquante: {ex.image_path}</p>")
-                
-            except Exception as e:
-                results.append(f"<p style='color: red;'>Erreur analyse: {e}</p>")
-        
-        # 3. Test de la logique de scoring corrigée
-        results.append("<h2>3. TEST LOGIQUE SCORING CORRIGEE</h2>")
-        
-        # Simuler un exercice avec notre logique corrigée
-        test_content = {
-            "sentences": ["Le ___ mange une ___ rouge."],
-            "words": ["chat", "pomme"]
-        }
-        
-        # Compter les blancs
-        total_blanks_in_content = sum(s.count('___') for s in test_content['sentences'])
-        correct_answers = test_content['words']
-        total_blanks = max(total_blanks_in_content, len(correct_answers))
-        
-        results.append(f"<p>Test: '{test_content['sentences'][0]}'</p>")
-        results.append(f"<p>Blancs détectés: {total_blanks_in_content}</p>")
-        results.append(f"<p>Réponses: {correct_answers}</p>")
-        results.append(f"<p>Total blancs utilisé: {total_blanks}</p>")
-        
-        # Simuler scoring 100%
-        correct_count = 0
-        for i in range(total_blanks):
-            if i < len(correct_answers):
-                correct_count += 1
-        
-        score = round((correct_count / total_blanks) * 100) if total_blanks > 0 else 0
-        results.append(f"<p>Score simulé (toutes correctes): {correct_count}/{total_blanks} = {score}%</p>")
-        
-        if score == 100:
-            results.append("<p style='color: green;'>✓ Logique de scoring corrigée fonctionne</p>")
-        else:
-            results.append("<p style='color: red;'>[ECHEC] Problème avec la logique de scoring</p>")
-        
-        results.append("<h2>4. RÉSUMÉ</h2>")
-        results.append("<p>Diagnostic terminé. Vérifiez les points ci-dessus.</p>")
-        results.append("<p><strong>Actions recommandées:</strong></p>")
-        results.append("<ul>")
-        results.append("<li>Tester un exercice 'Texte à trous' après ces corrections</li>")
-        results.append("<li>Vérifier l'affichage des images</li>")
-        results.append("<li>Valider que le score atteint 100% avec toutes les bonnes réponses</li>")
-        results.append("</ul>")
-        
-        return "<br>".join(results)
-        
-    except Exception as e:
-        return f"<h1>ERREUR</h1><p>Erreur lors du diagnostic: {str(e)}</p><pre>{traceback.format_exc()}</pre>"
-
-
-
 # Intégration de la correction pour la route /payment/select-school
 try:
     from integrate_select_school_fix import integrate_select_school_fix
     integrate_select_school_fix(app)
-    print("✓ Correction de la route /payment/select-school intégrée avec succès")
+    logger.info("Correction de la route /payment/select-school intégrée avec succès")
 except Exception as e:
-    print(f"[ECHEC] Erreur lors de l'intégration de la correction pour /payment/select-school: {str(e)}")
+    logger.error("Erreur lors de l'intégration de la correction pour /payment/select-school: %s", e)
 
 # Enregistrement des blueprints pour la correction select-school
-# Blueprint déjà enregistré: app.register_blueprint(diagnose_select_school_bp)
-app.register_blueprint(fix_payment_select_school_bp)
+# Déjà enregistré par integrate_select_school_fix quand l'intégration a réussi
+if fix_payment_select_school_bp.name not in app.blueprints:
+    app.register_blueprint(fix_payment_select_school_bp)
 
 if __name__ == '__main__':
-    with app.app_context():
-        # Créer les tables si elles n'existent pas
-        db.create_all()
-        
+    # Serveur de développement : initialisation locale avant le démarrage
+    init_database(app)
+
     app.run(debug=True)
 
 
 
-@app.route('/debug-form-data', methods=['GET', 'POST'])
-@login_required
-def debug_form_data():
-    # Route de débogage pour analyser les données POST des formulaires
-    if not current_user.is_admin:
-        flash('Accès non autorisé.', 'danger')
-        return redirect(url_for('index'))
-    
-    if request.method == 'POST':
-        app.logger.info(f"[DEBUG_FORM_DATA] Données POST reçues: {dict(request.form)}")
-        
-        # Analyser les données du formulaire
-        form_data = dict(request.form)
-        
-        # Extraire les champs answer_X
-        answer_fields = {k: v for k, v in form_data.items() if k.startswith('answer_')}
-        
-        # Analyser les indices des champs answer_X
-        answer_indices = []
-        for key in answer_fields.keys():
-            try:
-                index = int(key.split('_')[1])
-                answer_indices.append(index)
-            except (ValueError, IndexError):
-                pass
-        
-        # Trier les indices
-        answer_indices.sort()
-        
-        # Créer un rapport détaillé
-        report = {
-            'total_fields': len(form_data),
-            'answer_fields': len(answer_fields),
-            'answer_indices': answer_indices,
-            'answer_values': {f"answer_{i}": form_data.get(f"answer_{i}", "") for i in answer_indices},
-            'all_form_data': form_data
-        }
-        
-        return jsonify({
-            'success': True,
-            'message': 'Données du formulaire analysées avec succès',
-            'report': report
-        })
-    
-    # Afficher un formulaire de test pour les requêtes GET
-    return render_template('debug/form_data.html')
 from integrate_payment_fix import integrate_fix 
 integrate_fix() 
@@ -0,0 +1,185 @@
+"""
+Fabrique de l'application Flask
+
+create_app() construit l'application à partir des classes de config.py :
+extensions, blueprints, services et commandes CLI. Elle ne touche ni à la
+base de données ni au système de fichiers, de sorte que gunicorn peut
+l'importer une seule fois dans le processus maître (preload_app) puis
+dupliquer les workers par fork, en partageant les pages mémoire.
+
+L'initialisation ponctuelle (tables, compte administrateur, dossier des
+envois) se fait une fois par déploiement avec :
+
+    flask --app app init-db
+
+app.py appelle create_app() puis y ajoute ses routes.
+"""
+
+import os
+
+import click
+from flask import Flask
+
+from config import config as config_classes
+from extensions import db, init_extensions
+from models import User
+from modified_submit import bp as exercise_bp
+from payment_routes import payment_bp
+from job_routes import jobs_bp
+from grading_routes import grading_bp
+from job_queue import job_queue
+from request_metrics import request_metrics
+import progress_service
+import exercise_access
+import image_path_migration
+import asset_scanner
+import log_pipeline
+import db_pool
+import benchmark_image_resolution
+import startup_profile
+from static_asset_index import static_asset_index
+from blob_store import blob_store
+from image_derivatives import derivative_cache
+from utils.image_fallback_middleware import register_image_fallback_middleware
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_config_class(config=None):
+    """
+    Classe de configuration à utiliser.
+
+    Args:
+        config (str|type, optional): Nom de config.py ('development',
+            'production', 'testing') ou classe. Par défaut FLASK_CONFIG,
+            puis FLASK_ENV, puis 'default'.
+    """
+    if config is None:
+        config = os.environ.get('FLASK_CONFIG') or os.environ.get('FLASK_ENV') or 'default'
+    if isinstance(config, str):
+        return config_classes.get(config, config_classes['default'])
+    return config
+
+
+def create_app(config=None, overrides=None):
+    """
+    Construit l'application.
+
+    Args:
+        config (str|type, optional): Voir get_config_class
+        overrides (dict, optional): Clés de configuration appliquées en dernier
+
+    Returns:
+        Flask
+    """
+    # Nom 'app' : même nom de journal et même module de référence qu'avant la fabrique
+    app = Flask('app', root_path=ROOT_PATH)
+    app.config.from_object(get_config_class(config))
+    app.config.update(overrides or {})
+
+    # Base de données, CSRF, connexion, migrations
+    init_extensions(app)
+    # WAL pour SQLite, délai des requêtes derrière PgBouncer (flask db-pool)
+    db_pool.init_app(app)
+
+    # Mesures par route : durée, SQL, rendu, taille (/admin/metrics, flask request-metrics)
+    request_metrics.init_app(app)
+
+    app.register_blueprint(exercise_bp, url_prefix='/exercise')
+    # Le préfixe d'URL '/payment' est déjà défini dans le Blueprint
+    app.register_blueprint(payment_bp)
+
+    # File de tâches d'arrière-plan (exports, statistiques, maintenance des images)
+    job_queue.init_app(app)
+    app.register_blueprint(jobs_bp)
+
+    # Correction par lot des évaluations en classe
+    app.register_blueprint(grading_bp)
+
+    # Niveaux par catégorie, échantillonnage, journal des requêtes (corps sur demande)
+    log_pipeline.init_app(app)
+    # Commande de reconstruction de la table de progression (flask backfill-progress)
+    progress_service.init_app(app)
+    exercise_access.init_app(app)
+    static_asset_index.init_app(app)
+    # Magasin d'images adressé par contenu (flask dedupe-images)
+    blob_store.init_app(app)
+    # Déclinaisons redimensionnées des images (/derivatives/..., helpers srcset)
+    derivative_cache.init_app(app)
+    # Migration par lots des chemins d'images (flask migrate-image-paths)
+    image_path_migration.init_app(app)
+    # Inventaire hors ligne des images manquantes, orphelines et dupliquées (flask scan-assets)
+    asset_scanner.init_app(app)
+    # Banc d'essai des fonctions de résolution des chemins d'images (flask bench-images)
+    benchmark_image_resolution.init_app(app)
+    # Temps d'import de chaque module au démarrage (flask import-profile)
+    startup_profile.init_app(app)
+
+    # Routes de diagnostic, de correction et de test : importées seulement sur demande
+    if app.config.get('ENABLE_DEBUG_ROUTES'):
+        import diagnostic_routes
+        diagnostic_routes.init_app(app)
+
+    # Images demandées à un ancien emplacement : redirection vers l'emplacement réel
+    register_image_fallback_middleware(app)
+
+    register_commands(app)
+    return app
+
+
+def init_database(app):
+    """
+    Initialisation ponctuelle : dossier des envois, tables et compte administrateur.
+
+    Sans effet si tout existe déjà ; peut être relancée à chaque déploiement.
+    """
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    with app.app_context():
+        # Créer toutes les tables si elles n'existent pas
+        db.create_all()
+        app.logger.info("Tables de base de donnees creees avec succes")
+
+        # Créer le compte administrateur par défaut si nécessaire
+        admin_email = os.environ.get('ADMIN_EMAIL', 'admin@classesnumeriques.com')
+        admin_user = User.query.filter_by(email=admin_email).first()
+
+        if not admin_user:
+            from werkzeug.security import generate_password_hash
+            admin_user = User(
+                username='admin',
+                email=admin_email,
+                name='Administrateur',
+                password_hash=generate_password_hash('AdminSecure2024!'),
+                role='admin',
+                subscription_status='approved',
+                subscription_type='admin',
+                approved_by='system'
+            )
+            db.session.add(admin_user)
+            db.session.commit()
+            app.logger.info('Compte administrateur cree: %s', admin_email)
+        else:
+            app.logger.info('Compte administrateur existant: %s', admin_email)
+
+            # Approuver automatiquement mr.zahiri@gmail.com et lui donner les droits admin
+            zahiri_user = User.query.filter_by(email='mr.zahiri@gmail.com').first()
+            if zahiri_user:
+                zahiri_user.subscription_status = 'approved'
+                zahiri_user.role = 'admin'  # Donner les droits admin
+                zahiri_user.subscription_type = 'admin'
+                zahiri_user.approved_by = 'system'
+                db.session.commit()
+                app.logger.info("mr.zahiri@gmail.com approuve et promu administrateur")
+            else:
+                app.logger.info("Compte mr.zahiri@gmail.com non trouve - sera approuve a la creation")
+
+
+def register_commands(app):
+    """Enregistre la commande init-db."""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Crée les tables, le compte administrateur et le dossier des envois."""
+        init_database(app)
+        click.echo('Base de données initialisée.')
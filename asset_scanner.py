@@ -0,0 +1,334 @@
+"""
+Inventaire hors ligne des fichiers orphelins, manquants et dupliqués
+
+check_missing_images() et create_simple_placeholders() (diagnostic_routes.py) ainsi que
+check_image_consistency() (fix_image_paths.py) reparcouraient tout le
+dossier static et tous les exercices à chaque appel, pendant une requête
+HTTP. Le scanner est une commande (flask scan-assets) qui croise :
+
+    - les références d'images d'Exercise.image_path et du contenu JSON
+      des exercices, et les fichiers des CourseFile ;
+    - les fichiers de static/uploads et static/exercises.
+
+Son état (date de modification, taille, empreinte de chaque fichier ;
+empreinte du contenu et références de chaque exercice) est conservé entre
+deux exécutions : seuls les fichiers modifiés sont rehachés et seuls les
+exercices modifiés sont relus.
+
+Le rapport distingue :
+    missing    référence sans aucun fichier de ce nom
+    misplaced  référence absente de son emplacement mais retrouvée par son nom
+    orphans    fichier qu'aucune référence ne désigne
+    duplicates fichiers de même contenu qui n'occupent pas le même espace disque
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+import click
+from flask import current_app
+from sqlalchemy import select
+
+from blob_store import BLOB_DIR, hash_file
+from extensions import db
+from models import CourseFile, Exercise
+from image_path_migration import is_image_reference, iter_references
+from utils.image_path_handler import clean_duplicated_path_segments, normalize_filename
+
+logger = logging.getLogger(__name__)
+
+# Dossiers de static/ inventoriés
+SCAN_ROOTS = ('uploads', 'exercises')
+
+# Fichiers ignorés (temporaires des uploads et du magasin, fichiers cachés)
+IGNORED_SUFFIXES = ('.tmp', '.upload', '.link')
+
+DEFAULT_BATCH_SIZE = 1000
+
+STATE_VERSION = 1
+
+
+def reference_path(value):
+    """Chemin relatif à static/ désigné par une référence, ou None (URL externe)"""
+    if not value or value.startswith(('http://', 'https://', 'data:')):
+        return None
+    path = clean_duplicated_path_segments(value.replace('\\', '/').split('?', 1)[0])
+    if path.startswith('/static/'):
+        return path[len('/static/'):]
+    if path.startswith('static/'):
+        return path[len('static/'):]
+    path = path.lstrip('/')
+    return path if '/' in path else f'uploads/{path}'
+
+
+def content_fingerprint(image_path, content):
+    """Empreinte courte des colonnes d'un exercice (détection des modifications)"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update((image_path or '').encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((content or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AssetScanner:
+    """
+    Inventaire incrémental des références et des fichiers.
+
+    Args:
+        static_folder (str): Dossier static
+        state_path (str, optional): Fichier d'état (sans fichier : inventaire complet à chaque fois)
+        batch_size (int): Nombre d'exercices lus par requête
+    """
+
+    def __init__(self, static_folder, state_path=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.static_folder = static_folder
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.stats = {}
+
+    # ----- état -----
+
+    def load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {'files': {}, 'exercises': {}}
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}, 'exercises': {}}
+        if state.get('version') != STATE_VERSION:
+            return {'files': {}, 'exercises': {}}
+        return state
+
+    def save_state(self, state):
+        if not self.state_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dict(state, version=STATE_VERSION), f)
+        os.replace(temp_path, self.state_path)
+
+    # ----- fichiers -----
+
+    def scan_files(self, previous):
+        """
+        Inventaire des fichiers : chemin relatif → [mtime_ns, taille, sha256, inode].
+
+        L'empreinte d'un fichier dont la date et la taille n'ont pas changé
+        est reprise de l'inventaire précédent.
+        """
+        files = {}
+        hashed = 0
+        for root in SCAN_ROOTS:
+            top = os.path.join(self.static_folder, root)
+            stack = [(top, root)]
+            while stack:
+                directory, relative_dir = stack.pop()
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if entry.name.startswith('.') or entry.name.endswith(IGNORED_SUFFIXES):
+                        continue
+                    relative = f'{relative_dir}/{entry.name}'
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, relative))
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    known = previous.get(relative)
+                    if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+                        sha256 = known[2]
+                    else:
+                        sha256, _ = hash_file(entry.path)
+                        hashed += 1
+                    files[relative] = [stat.st_mtime_ns, stat.st_size, sha256, stat.st_ino]
+        self.stats['files'] = len(files)
+        self.stats['hashed'] = hashed
+        return files
+
+    # ----- références -----
+
+    def scan_exercises(self, previous):
+        """
+        Références de chaque exercice : id (str) → [empreinte, [chemins]].
+
+        Les exercices sont lus par lots (pagination par clé) ; le contenu JSON
+        n'est décodé que si son empreinte a changé.
+        """
+        exercises = {}
+        parsed = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(Exercise.id, Exercise.image_path, Exercise.content)
+                .where(Exercise.id > last_id)
+                .order_by(Exercise.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                break
+            for exercise_id, image_path, content in rows:
+                key = str(exercise_id)
+                fingerprint = content_fingerprint(image_path, content)
+                known = previous.get(key)
+                if known and known[0] == fingerprint:
+                    exercises[key] = known
+                    continue
+                parsed += 1
+                references = set()
+                if is_image_reference(image_path):
+                    references.add(image_path)
+                try:
+                    decoded = json.loads(content) if content else None
+                except ValueError:
+                    decoded = None
+                references.update(path for _, path in iter_references(decoded))
+                exercises[key] = [fingerprint, sorted(references)]
+            last_id = rows[-1][0]
+        self.stats['exercises'] = len(exercises)
+        self.stats['parsed'] = parsed
+        return exercises
+
+    def collect_references(self, exercises):
+        """Chemin relatif → propriétaires ('exercise:12', 'course_file:3')"""
+        references = defaultdict(set)
+        for exercise_id, (_, paths) in exercises.items():
+            for path in paths:
+                relative = reference_path(path)
+                if relative is not None:
+                    references[relative].add(f'exercise:{exercise_id}')
+        for file_id, filename in db.session.execute(select(CourseFile.id, CourseFile.filename)):
+            references[f'uploads/{filename}'].add(f'course_file:{file_id}')
+        self.stats['references'] = len(references)
+        return references
+
+    # ----- rapport -----
+
+    def run(self, full=False):
+        """
+        Inventorie et croise références et fichiers.
+
+        Args:
+            full (bool): Ignorer l'état précédent (tout rehacher et tout relire)
+
+        Returns:
+            dict: missing, misplaced, orphans, duplicates et stats
+        """
+        started = time.monotonic()
+        self.stats = {}
+        state = {'files': {}, 'exercises': {}} if full else self.load_state()
+        files = self.scan_files(state.get('files', {}))
+        exercises = self.scan_exercises(state.get('exercises', {}))
+        references = self.collect_references(exercises)
+
+        by_name = defaultdict(list)
+        for relative in files:
+            name = relative.rsplit('/', 1)[-1]
+            by_name[name].append(relative)
+            normalized = normalize_filename(name)
+            if normalized != name:
+                by_name[normalized].append(relative)
+
+        missing = []
+        misplaced = []
+        used = set()
+        for relative in sorted(references):
+            owners = sorted(references[relative])
+            if relative in files:
+                used.add(relative)
+                continue
+            name = relative.rsplit('/', 1)[-1]
+            candidates = by_name.get(name) or by_name.get(normalize_filename(name))
+            if candidates:
+                found = sorted(candidates)[0]
+                used.add(found)
+                misplaced.append({'path': relative, 'found': found, 'owners': owners})
+            else:
+                missing.append({'path': relative, 'owners': owners})
+
+        # Un blob est utilisé dès qu'un fichier utilisé a le même contenu
+        used_hashes = {files[relative][2] for relative in used}
+        orphans = [
+            {'path': relative, 'size': info[1]}
+            for relative, info in sorted(files.items())
+            if relative not in used
+            and not (relative.startswith(BLOB_DIR + '/') and info[2] in used_hashes)
+        ]
+
+        groups = defaultdict(list)
+        for relative, info in files.items():
+            groups[info[2]].append((relative, info[1], info[3]))
+        duplicates = []
+        for sha256, members in sorted(groups.items()):
+            inodes = {inode for _, _, inode in members}
+            if len(inodes) > 1:
+                size = members[0][1]
+                duplicates.append({
+                    'sha256': sha256,
+                    'paths': sorted(relative for relative, _, _ in members),
+                    'wasted_bytes': size * (len(inodes) - 1),
+                })
+
+        self.save_state({'files': files, 'exercises': exercises})
+        self.stats.update({
+            'missing': len(missing),
+            'misplaced': len(misplaced),
+            'orphans': len(orphans),
+            'duplicate_groups': len(duplicates),
+            'duplicate_bytes': sum(group['wasted_bytes'] for group in duplicates),
+            'elapsed': round(time.monotonic() - started, 3),
+        })
+        return {
+            'missing': missing,
+            'misplaced': misplaced,
+            'orphans': orphans,
+            'duplicates': duplicates,
+            'stats': self.stats,
+        }
+
+
+def default_state_path(app):
+    return os.path.join(app.instance_path, 'asset_scan_state.json')
+
+
+def init_app(app):
+    """Enregistre la commande scan-assets."""
+
+    @app.cli.command('scan-assets')
+    @click.option('--full', is_flag=True, help="Ignorer l'état précédent et tout réexaminer.")
+    @click.option('--json', 'json_path', type=click.Path(dir_okay=False), help="Écrire le rapport complet (JSON).")
+    @click.option('--limit', default=20, show_default=True, help="Nombre d'éléments affichés par catégorie.")
+    def scan_assets_command(full, json_path, limit):
+        """Recense les images manquantes, orphelines et dupliquées."""
+        scanner = AssetScanner(current_app.static_folder, default_state_path(current_app))
+        report = scanner.run(full=full)
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        for item in report['missing'][:limit]:
+            click.echo(f"MANQUANT  {item['path']} ({', '.join(item['owners'])})")
+        for item in report['misplaced'][:limit]:
+            click.echo(f"DÉPLACÉ   {item['path']} -> {item['found']}")
+        for item in report['orphans'][:limit]:
+            click.echo(f"ORPHELIN  {item['path']} ({item['size']} octets)")
+        for group in report['duplicates'][:limit]:
+            click.echo(f"DOUBLON   {', '.join(group['paths'])}")
+        stats = report['stats']
+        click.echo(
+            f"{stats['files']} fichiers ({stats['hashed']} hachés), {stats['exercises']} exercices "
+            f"({stats['parsed']} relus) : {stats['missing']} manquants, {stats['misplaced']} déplacés, "
+            f"{stats['orphans']} orphelins, {stats['duplicate_groups']} groupes de doublons "
+            f"({stats['duplicate_bytes']} octets) en {stats['elapsed']} s"
+        )
@@ -0,0 +1,416 @@
+"""
+Banc d'essai des fonctions de résolution des chemins d'images
+
+Cinq implémentations coexistent (image_url_service, unified_image_service,
+utils/image_path_handler, utils/image_path_manager, image_fallback_handler).
+Le banc les mesure sur une même arborescence static/ synthétique (10 000
+fichiers par défaut, 100 000 avec --files 100000) et un même corpus de
+chemins reprenant les formes rencontrées dans le contenu des exercices :
+segments dupliqués, accents et espaces, barres obliques inverses, anciens
+dossiers, noms nus, images absentes, URLs externes. Le corpus peut aussi
+être extrait de la base (flask bench-images --from-db).
+
+Pour chaque fonction sont rapportés :
+    ops_per_sec       appels par seconde
+    syscalls_per_call appels système de fichiers (stat, listdir, scandir, open...)
+    alloc_per_call    octets alloués au plus fort de l'appel (tracemalloc)
+    found_pct         part des résultats désignant un fichier existant
+
+    python benchmark_image_resolution.py --files 100000 --json resultats.json
+    python benchmark_image_resolution.py --baseline resultats.json   # code 1 si régression
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import click
+from flask import Flask
+
+from image_resolution_cache import image_resolution_cache
+from static_asset_index import static_asset_index, PRIORITY_DIRS
+
+DEFAULT_FILES = 10000
+DEFAULT_CORPUS_SIZE = 2000
+DEFAULT_MIN_TIME = 0.5
+
+# Nombre d'appels mesurés individuellement par tracemalloc
+ALLOCATION_SAMPLE = 200
+
+EXERCISE_TYPES = ('qcm', 'qcm_multichoix', 'flashcards', 'pairs', 'image_labeling', 'legend', 'word_placement')
+
+# Fonctions du module os comptées comme appels système de fichiers
+COUNTED_OS_FUNCTIONS = ('stat', 'lstat', 'listdir', 'scandir', 'access', 'open')
+
+# Registre des fonctions mesurées : nom -> fonction(path, exercise_type)
+RESOLVERS = {}
+
+
+def register_resolver(name):
+    """Décorateur d'enregistrement d'une fonction de résolution à mesurer."""
+    def decorator(func):
+        RESOLVERS[name] = func
+        return func
+    return decorator
+
+
+@register_resolver('image_url_service')
+def resolve_image_url_service(path, exercise_type):
+    from image_url_service import ImageUrlService
+    return ImageUrlService.get_image_url.uncached(path)
+
+
+@register_resolver('image_url_service[cache]')
+def resolve_image_url_service_cached(path, exercise_type):
+    from image_url_service import ImageUrlService
+    return ImageUrlService.get_image_url(path)
+
+
+@register_resolver('unified_image_service')
+def resolve_unified_image_service(path, exercise_type):
+    from unified_image_service import UnifiedImageService
+    return UnifiedImageService.get_image_url.uncached(path, exercise_type)
+
+
+@register_resolver('unified_image_service[cache]')
+def resolve_unified_image_service_cached(path, exercise_type):
+    from unified_image_service import UnifiedImageService
+    return UnifiedImageService.get_image_url(path, exercise_type)
+
+
+@register_resolver('image_path_handler')
+def resolve_image_path_handler(path, exercise_type):
+    from utils import image_path_handler
+    return image_path_handler.get_image_url.uncached(path)
+
+
+@register_resolver('image_path_handler[cache]')
+def resolve_image_path_handler_cached(path, exercise_type):
+    from utils import image_path_handler
+    return image_path_handler.get_image_url(path)
+
+
+@register_resolver('image_path_manager')
+def resolve_image_path_manager(path, exercise_type):
+    from utils.image_path_manager import ImagePathManager
+    return ImagePathManager.get_web_path(ImagePathManager.clean_duplicate_paths(path), exercise_type)
+
+
+@register_resolver('image_fallback_handler')
+def resolve_image_fallback_handler(path, exercise_type):
+    from image_fallback_handler import ImageFallbackHandler
+    if ImageFallbackHandler.image_exists(path):
+        return path
+    return ImageFallbackHandler.find_image_in_alternative_paths(path, exercise_type)
+
+
+@register_resolver('static_asset_index')
+def resolve_static_asset_index(path, exercise_type):
+    """Référence : recherche du seul nom de fichier dans l'index"""
+    if path.startswith(('http://', 'https://')):
+        return path
+    return static_asset_index.lookup(path.replace('\\', '/').rsplit('/', 1)[-1])
+
+
+# ----- arborescence et corpus synthétiques -----
+
+ACCENTED_NAMES = ("été {}.png", "Capture d'écran {}.png", "forêt à {}.jpg", "élève {}.jpeg")
+
+
+def build_tree(static_folder, files=DEFAULT_FILES, seed=0):
+    """
+    Crée une arborescence static/ synthétique de fichiers vides.
+
+    Returns:
+        list: (chemin relatif, nom d'origine) de chaque fichier ; le nom
+        d'origine diffère du nom sur disque pour les fichiers « accentués »,
+        enregistrés sous leur nom normalisé comme le fait l'application
+    """
+    from utils.image_path_handler import normalize_filename
+
+    rng = random.Random(seed)
+    directories = list(PRIORITY_DIRS) + [f'uploads/{t}' for t in EXERCISE_TYPES] + ['images', 'css']
+    for directory in directories:
+        os.makedirs(os.path.join(static_folder, *directory.split('/')), exist_ok=True)
+
+    created = []
+    for i in range(files):
+        directory = rng.choice(directories[:-2])
+        if i % 10 == 0:
+            original = rng.choice(ACCENTED_NAMES).format(i)
+            name = normalize_filename(original)
+        else:
+            original = name = f"img_{i}_{rng.randrange(10 ** 6)}.{rng.choice(('png', 'jpg', 'gif'))}"
+        relative = f'{directory}/{name}'
+        open(os.path.join(static_folder, *relative.split('/')), 'wb').close()
+        created.append((relative, original))
+    return created
+
+
+def build_corpus(tree, size=DEFAULT_CORPUS_SIZE, seed=0):
+    """
+    Corpus de (chemin, type d'exercice) reprenant les formes réelles des références.
+    """
+    rng = random.Random(seed)
+    shapes = [
+        lambda rel, name: f'/static/{rel}',
+        lambda rel, name: f'/static/uploads/static/uploads/{name}',
+        lambda rel, name: f'/static/exercises/exercises/{name}',
+        lambda rel, name: 'static\\' + rel.replace('/', '\\'),
+        lambda rel, name: f'/static/uploads/{rng.choice(EXERCISE_TYPES)}/{name}',
+        lambda rel, name: f'/static/exercises/general/{name}',
+        lambda rel, name: name,
+        lambda rel, name: f'uploads/{name}',
+        lambda rel, name: f'/static/uploads/absent_{rng.randrange(10 ** 6)}.png',
+        lambda rel, name: f'https://res.cloudinary.com/demo/image/upload/{name}',
+    ]
+    corpus = []
+    for _ in range(size):
+        relative, original = rng.choice(tree)
+        shape = rng.choice(shapes)
+        corpus.append((shape(relative, original), rng.choice(EXERCISE_TYPES)))
+    return corpus
+
+
+def corpus_from_database(limit=DEFAULT_CORPUS_SIZE, batch_size=500):
+    """Corpus extrait des références d'images des exercices (lecture par lots)"""
+    from sqlalchemy import select
+    from extensions import db
+    from models import Exercise
+    from image_path_migration import is_image_reference, iter_references
+
+    corpus = []
+    last_id = 0
+    while len(corpus) < limit:
+        rows = db.session.execute(
+            select(Exercise.id, Exercise.exercise_type, Exercise.image_path, Exercise.content)
+            .where(Exercise.id > last_id).order_by(Exercise.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for _, exercise_type, image_path, content in rows:
+            if is_image_reference(image_path):
+                corpus.append((image_path, exercise_type))
+            try:
+                decoded = json.loads(content) if content else None
+            except ValueError:
+                continue
+            corpus.extend((path, exercise_type) for _, path in iter_references(decoded))
+        last_id = rows[-1][0]
+    return corpus[:limit]
+
+
+# ----- mesures -----
+
+@contextlib.contextmanager
+def count_syscalls():
+    """Compte les appels système de fichiers (os.stat, os.listdir, open...)"""
+    counter = {'calls': 0}
+    originals = {name: getattr(os, name) for name in COUNTED_OS_FUNCTIONS}
+    original_open = builtins.open
+
+    def counting(func):
+        def wrapper(*args, **kwargs):
+            counter['calls'] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    for name, func in originals.items():
+        setattr(os, name, counting(func))
+    builtins.open = counting(original_open)
+    try:
+        yield counter
+    finally:
+        for name, func in originals.items():
+            setattr(os, name, func)
+        builtins.open = original_open
+
+
+def measure(resolver, corpus, min_time=DEFAULT_MIN_TIME):
+    """Mesures d'une fonction sur le corpus (voir le docstring du module)"""
+    image_resolution_cache.clear()
+    # Premier passage : résultats, appels système ; remplit les caches
+    with count_syscalls() as syscalls:
+        results = [resolver(path, exercise_type) for path, exercise_type in corpus]
+    found = sum(
+        1 for url in results
+        if url and (url.startswith(('http://', 'https://')) or static_asset_index.exists(url))
+    )
+
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        for path, exercise_type in corpus:
+            resolver(path, exercise_type)
+        calls += len(corpus)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+
+    allocated = 0
+    sample = corpus[:ALLOCATION_SAMPLE]
+    tracemalloc.start()
+    try:
+        for path, exercise_type in sample:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            resolver(path, exercise_type)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops_per_sec': round(calls / elapsed, 1) if elapsed else 0.0,
+        'us_per_call': round(elapsed / calls * 1e6, 2) if calls else 0.0,
+        'syscalls_per_call': round(syscalls['calls'] / len(corpus), 3) if corpus else 0.0,
+        'alloc_per_call': round(allocated / len(sample)) if sample else 0,
+        'found_pct': round(found / len(corpus) * 100, 1) if corpus else 0.0,
+    }
+
+
+def run_benchmark(static_folder, corpus, resolvers=None, min_time=DEFAULT_MIN_TIME):
+    """
+    Mesure les fonctions choisies dans le contexte d'application courant.
+
+    Les journaux et les sorties des fonctions sont neutralisés pendant les
+    mesures pour ne comparer que la résolution elle-même.
+
+    Returns:
+        dict: nom de la fonction -> mesures
+    """
+    previous_index = (static_asset_index.static_folder, static_asset_index.poll_interval)
+    static_asset_index.static_folder = static_folder
+    static_asset_index.poll_interval = 3600
+    static_asset_index.build()
+    previous_cwd = os.getcwd()
+    os.chdir(os.path.dirname(static_folder))
+    logging.disable(logging.CRITICAL)
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in resolvers or RESOLVERS:
+                results[name] = measure(RESOLVERS[name], corpus, min_time)
+    finally:
+        logging.disable(logging.NOTSET)
+        os.chdir(previous_cwd)
+        static_asset_index.static_folder, static_asset_index.poll_interval = previous_index
+        static_asset_index._paths = None
+        image_resolution_cache.clear()
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Régressions par rapport à des mesures de référence.
+
+    Une fonction régresse si son débit baisse de plus de tolerance (20 %)
+    ou si elle fait plus d'appels système par appel.
+
+    Returns:
+        list: descriptions des régressions
+    """
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        if current['ops_per_sec'] < reference['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {current['ops_per_sec']} ops/s (référence {reference['ops_per_sec']})")
+        if current['syscalls_per_call'] > reference['syscalls_per_call']:
+            regressions.append(
+                f"{name}: {current['syscalls_per_call']} appels système/appel "
+                f"(référence {reference['syscalls_per_call']})"
+            )
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'fonction':<30} {'ops/s':>12} {'µs/appel':>10} {'syscalls':>9} {'alloc (o)':>10} {'trouvées':>9}"]
+    for name, r in sorted(results.items(), key=lambda item: -item[1]['ops_per_sec']):
+        lines.append(
+            f"{name:<30} {r['ops_per_sec']:>12,.0f} {r['us_per_call']:>10} {r['syscalls_per_call']:>9} "
+            f"{r['alloc_per_call']:>10} {r['found_pct']:>8}%"
+        )
+    return '\n'.join(lines)
+
+
+def _report(results, json_path, baseline_path, tolerance, echo):
+    echo(format_results(results))
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), tolerance)
+        for regression in regressions:
+            echo(f"RÉGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+@contextlib.contextmanager
+def synthetic_tree(files, seed=0):
+    """Dossier temporaire contenant static/ synthétique ; rend (static_folder, arbre)"""
+    root = tempfile.mkdtemp(prefix='bench_images_')
+    static_folder = os.path.join(root, 'static')
+    try:
+        yield static_folder, build_tree(static_folder, files, seed)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def init_app(app):
+    """Enregistre la commande bench-images."""
+
+    @app.cli.command('bench-images')
+    @click.option('--files', default=DEFAULT_FILES, show_default=True, help="Taille de l'arborescence synthétique.")
+    @click.option('--corpus', 'corpus_size', default=DEFAULT_CORPUS_SIZE, show_default=True)
+    @click.option('--from-db', is_flag=True, help="Prendre le corpus dans le contenu des exercices.")
+    @click.option('--resolver', 'resolvers', multiple=True, type=click.Choice(sorted(RESOLVERS)))
+    @click.option('--min-time', default=DEFAULT_MIN_TIME, show_default=True)
+    @click.option('--json', 'json_path', type=click.Path(dir_okay=False))
+    @click.option('--baseline', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--tolerance', default=0.2, show_default=True)
+    def bench_images_command(files, corpus_size, from_db, resolvers, min_time, json_path, baseline, tolerance):
+        """Compare le coût des fonctions de résolution des chemins d'images."""
+        with synthetic_tree(files) as (static_folder, tree):
+            corpus = corpus_from_database(corpus_size) if from_db else build_corpus(tree, corpus_size)
+            click.echo(f"{len(tree)} fichiers, {len(corpus)} chemins")
+            results = run_benchmark(static_folder, corpus, resolvers or None, min_time)
+        status = _report(results, json_path, baseline, tolerance, click.echo)
+        if status:
+            sys.exit(status)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai de la résolution des chemins d'images")
+    parser.add_argument('--files', type=int, default=DEFAULT_FILES)
+    parser.add_argument('--corpus', type=int, default=DEFAULT_CORPUS_SIZE)
+    parser.add_argument('--resolver', action='append', choices=sorted(RESOLVERS))
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument('--json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    with synthetic_tree(args.files) as (static_folder, tree):
+        app = Flask(__name__, root_path=os.path.dirname(static_folder))
+        with app.app_context():
+            corpus = build_corpus(tree, args.corpus)
+            print(f"{len(tree)} fichiers, {len(corpus)} chemins")
+            results = run_benchmark(static_folder, corpus, args.resolver, args.min_time)
+    return _report(results, args.json, args.baseline, args.tolerance, print)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Magasin de fichiers adressé par contenu (SHA-256)
+
+Chaque fichier envoyé est rangé sous static/uploads/blobs/<aa>/<sha256><ext>,
+où <aa> sont les deux premiers caractères de l'empreinte. Deux envois du
+même contenu aboutissent au même blob : le second ne réécrit rien et
+retourne l'URL existante.
+
+Les fichiers antérieurs au magasin (copies d'une même image dans
+static/uploads/<type>/, static/exercises/...) sont regroupés par la commande
+"flask dedupe-images" : chaque fichier devient un lien physique vers son
+blob, ce qui libère la place des copies tout en laissant les anciennes URLs
+fonctionner, et son chemin est enregistré dans la table image_path_alias
+(utilisée par la règle 'blob' de image_path_migration).
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+import click
+from flask import current_app, has_app_context
+
+from extensions import db
+from models import ImagePathAlias
+from upload_pipeline import stream_to_temp
+
+logger = logging.getLogger(__name__)
+
+# Dossier des blobs, relatif à static/
+BLOB_DIR = 'uploads/blobs'
+
+CHUNK_SIZE = 64 * 1024
+
+# Fichiers regroupés par dedupe-images (images et audio des dictées)
+MEDIA_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg',
+    '.mp3', '.wav', '.ogg', '.m4a',
+)
+
+Blob = namedtuple('Blob', ['sha256', 'extension', 'size', 'url', 'created'])
+
+
+def hash_file(path):
+    """Empreinte SHA-256 et taille d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def normalize_extension(filename_or_extension):
+    """Extension en minuscules avec son point ('.png'), '' si absente"""
+    extension = os.path.splitext(filename_or_extension)[1] or filename_or_extension
+    extension = extension.lower()
+    if not extension.startswith('.') or len(extension) > 10:
+        return ''
+    return extension
+
+
+class BlobStore:
+    """
+    Magasin de blobs sous le dossier static de l'application.
+
+    Args:
+        static_folder (str, optional): Dossier static (par défaut celui de l'application)
+    """
+
+    def __init__(self, static_folder=None):
+        self.static_folder = static_folder
+
+    def init_app(self, app):
+        """Enregistre la commande dedupe-images."""
+        app.extensions['blob_store'] = self
+
+        @app.cli.command('dedupe-images')
+        @click.option('--dry-run', is_flag=True, help="Afficher le bilan sans rien modifier.")
+        def dedupe_images_command(dry_run):
+            """Regroupe les copies identiques des images et des fichiers audio."""
+            report = self.collapse_duplicates(dry_run=dry_run)
+            click.echo(
+                f"{report['files']} fichiers, {report['blobs']} contenus distincts, "
+                f"{report['duplicates']} copies, {report['bytes_reclaimed']} octets récupérables"
+                + (" (simulation)" if dry_run else "")
+            )
+
+    def _folder(self):
+        # Sans dossier imposé, celui de l'application courante
+        if self.static_folder is None and has_app_context():
+            return current_app.static_folder
+        return self.static_folder
+
+    def _relative(self, sha256, extension):
+        return f'{BLOB_DIR}/{sha256[:2]}/{sha256}{extension}'
+
+    def path(self, sha256, extension=''):
+        """Chemin disque du blob"""
+        return os.path.join(self._folder(), *self._relative(sha256, extension).split('/'))
+
+    def url(self, sha256, extension=''):
+        """URL web du blob"""
+        return f'/static/{self._relative(sha256, extension)}'
+
+    def exists(self, sha256, extension=''):
+        return os.path.exists(self.path(sha256, extension))
+
+    def _blob(self, sha256, extension, size, created):
+        return Blob(sha256, extension, size, self.url(sha256, extension), created)
+
+    def put_bytes(self, data, extension=''):
+        """
+        Range un contenu en mémoire dans le magasin.
+
+        Returns:
+            Blob: created vaut False si le contenu était déjà présent
+        """
+        extension = normalize_extension(extension)
+        sha256 = hashlib.sha256(data).hexdigest()
+        target = self.path(sha256, extension)
+        if os.path.exists(target):
+            return self._blob(sha256, extension, len(data), False)
+
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        # Écriture dans un fichier temporaire du même dossier puis renommage
+        # atomique : un blob visible est toujours complet
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self._blob(sha256, extension, len(data), True)
+
+    def put_stream(self, file, filename=None, max_size=None):
+        """
+        Range un fichier envoyé (FileStorage) sans le charger en mémoire.
+
+        Le contenu est recopié par blocs dans un fichier temporaire du
+        magasin, haché et validé au passage (voir upload_pipeline), puis
+        renommé atomiquement vers son blob, ou supprimé si le blob existe.
+
+        Returns:
+            Blob: created vaut False si le contenu était déjà présent
+
+        Raises:
+            UploadRejected: fichier vide, trop volumineux ou de type inattendu
+        """
+        root = os.path.join(self._folder(), *BLOB_DIR.split('/'))
+        with stream_to_temp(file, root, filename=filename, max_size=max_size) as upload:
+            target = self.path(upload.sha256, upload.extension)
+            if os.path.exists(target):
+                return self._blob(upload.sha256, upload.extension, upload.size, False)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            upload.commit(target)
+            return self._blob(upload.sha256, upload.extension, upload.size, True)
+
+    def put_file(self, source, extension=None, link=False):
+        """
+        Range un fichier existant dans le magasin.
+
+        Args:
+            source (str): Chemin du fichier
+            extension (str, optional): Extension du blob (par défaut celle du fichier)
+            link (bool): Créer le blob par lien physique plutôt que par copie
+
+        Returns:
+            Blob: created vaut False si le contenu était déjà présent
+        """
+        extension = normalize_extension(source if extension is None else extension)
+        sha256, size = hash_file(source)
+        target = self.path(sha256, extension)
+        if os.path.exists(target):
+            return self._blob(sha256, extension, size, False)
+
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        if link:
+            try:
+                os.link(source, target)
+                return self._blob(sha256, extension, size, True)
+            except FileExistsError:
+                return self._blob(sha256, extension, size, False)
+            except OSError:
+                # Système de fichiers sans liens physiques : copie
+                pass
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source, temp_path)
+            os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self._blob(sha256, extension, size, True)
+
+    def iter_media_files(self):
+        """Chemins web des images et fichiers audio hors du magasin, dans l'ordre"""
+        folder = self._folder()
+        for current, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            directory = os.path.relpath(current, folder).replace('\\', '/')
+            directory = '' if directory == '.' else directory
+            if directory == BLOB_DIR or directory.startswith(BLOB_DIR + '/'):
+                dirnames[:] = []
+                continue
+            for filename in sorted(filenames):
+                if filename.lower().endswith(MEDIA_EXTENSIONS):
+                    yield f'/static/{directory}/{filename}' if directory else f'/static/{filename}'
+
+    def collapse_duplicates(self, dry_run=False):
+        """
+        Regroupe les fichiers existants dans le magasin.
+
+        Chaque image ou fichier audio de static/ est rangé dans le magasin
+        (par lien physique), son chemin est enregistré comme alias, puis le
+        fichier est remplacé par un lien vers le blob : les copies d'un même
+        contenu ne partagent plus qu'un seul espace disque.
+
+        Returns:
+            dict: files, blobs, duplicates, bytes_reclaimed, aliases
+        """
+        folder = self._folder()
+        report = {'files': 0, 'blobs': 0, 'duplicates': 0, 'bytes_reclaimed': 0, 'aliases': 0}
+        seen = set()
+        known_aliases = {alias.path: alias for alias in ImagePathAlias.query.all()}
+
+        for web_path in self.iter_media_files():
+            source = os.path.join(folder, *web_path[len('/static/'):].split('/'))
+            try:
+                sha256, size = hash_file(source)
+            except OSError as e:
+                logger.warning(f"Fichier illisible ignoré: {source} ({e})")
+                continue
+            extension = normalize_extension(source)
+            target = self.path(sha256, extension)
+            report['files'] += 1
+
+            # Déjà un lien vers le blob : rien à récupérer
+            already_linked = os.path.exists(target) and os.path.samefile(source, target)
+            if sha256 in seen or (os.path.exists(target) and not already_linked):
+                report['duplicates'] += 1
+                if not already_linked:
+                    report['bytes_reclaimed'] += size
+            if sha256 not in seen:
+                seen.add(sha256)
+                report['blobs'] += 1
+
+            if dry_run:
+                continue
+
+            blob = self.put_file(source, extension, link=True)
+            if not os.path.samefile(source, target):
+                self._replace_with_link(source, target)
+
+            alias = known_aliases.get(web_path)
+            if alias is None:
+                alias = ImagePathAlias(path=web_path)
+                db.session.add(alias)
+                known_aliases[web_path] = alias
+                report['aliases'] += 1
+            alias.sha256 = blob.sha256
+            alias.extension = blob.extension
+            alias.size = blob.size
+
+        if not dry_run:
+            db.session.commit()
+        return report
+
+    @staticmethod
+    def _replace_with_link(source, target):
+        """Remplace source par un lien physique vers target (atomiquement)"""
+        temp_path = f'{source}.{os.getpid()}.link'
+        try:
+            os.link(target, temp_path)
+            os.replace(temp_path, source)
+        except OSError as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            logger.warning(f"Lien physique impossible pour {source}: {e}")
+
+
+# Instance partagée (uploads, commande dedupe-images)
+blob_store = BlobStore()
@@ -0,0 +1,134 @@
+"""
+Correction par lot des soumissions d'un exercice
+
+Lors d'une évaluation en classe, toutes les copies d'un même exercice arrivent
+en quelques secondes. grade_batch() les corrige avec un seul corrigé compilé
+(answer_key_cache) puis insère toutes les tentatives ExerciseAttempt en une
+seule insertion groupée, dans une seule transaction (avec la mise à jour de
+student_exercise_progress).
+"""
+
+import json
+import logging
+from datetime import datetime
+
+from werkzeug.datastructures import MultiDict
+
+from extensions import db
+from models import ExerciseAttempt
+from answer_key_cache import get_answer_key
+from exercise_graders import grade_batch_with_key
+from progress_service import record_attempts
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de soumissions par lot
+MAX_BATCH_SUBMISSIONS = 200
+
+
+def _form_value(value):
+    """Valeur de champ telle que request.form la fournirait (toujours une chaîne)."""
+    return '' if value is None else str(value)
+
+
+def _submission_form(answers):
+    """Formulaire équivalent à request.form (les listes deviennent des champs multiples)."""
+    if not isinstance(answers, dict):
+        return None
+    form = MultiDict()
+    for name, value in answers.items():
+        for item in (value if isinstance(value, list) else [value]):
+            form.add(str(name), _form_value(item))
+    return form
+
+
+def _grade_forms(exercise_type, key, forms):
+    """
+    Corrige les formulaires par lot ; si le lot échoue, reprend soumission par
+    soumission pour que seules les copies fautives soient rejetées.
+
+    Returns:
+        list: Un GradingResult par formulaire, ou None pour une copie en échec
+    """
+    try:
+        return grade_batch_with_key(exercise_type, key, forms)
+    except Exception:
+        gradings = []
+        for form in forms:
+            try:
+                gradings.append(grade_batch_with_key(exercise_type, key, [form])[0])
+            except Exception as e:
+                logger.warning("Soumission non corrigée (%s) : %s", exercise_type, e)
+                gradings.append(None)
+        return gradings
+
+
+def grade_batch(exercise, submissions, course_id=None, allowed_student_ids=None):
+    """
+    Corrige et enregistre un lot de soumissions pour un même exercice.
+
+    Args:
+        exercise (Exercise): L'exercice
+        submissions (list): [{'student_id': int, 'answers': {champ: valeur}}, ...]
+            où 'answers' reprend les champs du formulaire de l'exercice
+        course_id (int, optional): Cours associé aux tentatives
+        allowed_student_ids (set, optional): Élèves autorisés (None = pas de restriction)
+
+    Returns:
+        list: Un résultat par soumission, dans l'ordre :
+            {'index', 'student_id', 'score', 'score_count', 'max_score'}
+            ou {'index', 'student_id', 'error'} pour une soumission rejetée
+
+    Raises:
+        GradingError: Type non pris en charge ou contenu invalide
+    """
+    key = get_answer_key(exercise)
+
+    results = [None] * len(submissions)
+    accepted = []
+    for index, submission in enumerate(submissions):
+        student_id = submission.get('student_id') if isinstance(submission, dict) else None
+        form = _submission_form(submission.get('answers', {})) if isinstance(submission, dict) else None
+        if not isinstance(student_id, int) or form is None:
+            results[index] = {'index': index, 'student_id': student_id, 'error': 'Soumission invalide.'}
+        elif allowed_student_ids is not None and student_id not in allowed_student_ids:
+            results[index] = {'index': index, 'student_id': student_id, 'error': 'Élève non autorisé.'}
+        else:
+            accepted.append((index, student_id, form))
+
+    gradings = _grade_forms(exercise.exercise_type, key, [form for _, _, form in accepted])
+
+    now = datetime.utcnow()
+    rows = []
+    for (index, student_id, _), grading in zip(accepted, gradings):
+        if grading is None:
+            results[index] = {'index': index, 'student_id': student_id, 'error': 'Réponses invalides.'}
+            continue
+        rows.append({
+            'student_id': student_id,
+            'exercise_id': exercise.id,
+            'course_id': course_id,
+            'score': float(grading.score),
+            'answers': json.dumps(grading.answers),
+            'feedback': json.dumps(grading.feedback),
+            'completed': True,
+            'created_at': now
+        })
+        results[index] = {
+            'index': index,
+            'student_id': student_id,
+            'score': grading.score,
+            'score_count': grading.score_count,
+            'max_score': grading.max_score
+        }
+
+    if rows:
+        try:
+            db.session.bulk_insert_mappings(ExerciseAttempt, rows)
+            record_attempts(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    return results
@@ -1,8 +1,11 @@
-import os
 import logging
 from flask import current_app
-from utils.image_utils import normalize_image_path
-from utils.image_path_manager import ImagePathManager
+from blob_store import blob_store
+from upload_pipeline import UploadRejected
+from static_asset_index import static_asset_index
+from image_resolution_cache import image_resolution_cache
+
+logger = logging.getLogger(__name__)
 
 # Variable pour simuler cloudinary_configured
 cloudinary_configured = False
@@ -13,7 +16,7 @@ def upload_file(file, folder="uploads", exercise_type=None):
     
     Args:
         file: Objet fichier Flask
-        folder: Dossier de destination (ignoré, utilise toujours 'exercises')
+        folder: Dossier de destination (ignoré, les fichiers sont rangés dans le magasin de blobs)
         exercise_type: Type d'exercice (optionnel)
     
     Returns:
@@ -22,49 +25,26 @@ def upload_file(file, folder="uploads", exercise_type=None):
     if not file or not file.filename:
         return None
     
-    # Générer un nom de fichier unique
-    unique_filename = ImagePathManager.generate_unique_filename(file.filename, exercise_type)
-    
     try:
-        # Stockage local uniquement
-        file.seek(0)
-        file_content = file.read()
-        
-        print(f"DEBUG: Contenu lu en mémoire: {len(file_content)} octets")
-        
-        if len(file_content) == 0:
-            print("ERREUR: Fichier vide détecté")
-            return None
-        
-        # Déterminer le chemin de sauvegarde (toujours dans exercises)
-        upload_folder = os.path.join(current_app.root_path, 'static', 'exercises')
-        os.makedirs(upload_folder, exist_ok=True)
+        # Copie en flux vers le magasin adressé par contenu : un contenu déjà
+        # envoyé n'est pas réécrit et garde la même URL
+        blob = blob_store.put_stream(file)
+        web_path = blob.url
+        logger.debug('Chemin web retourné: %s (%s octets, nouveau: %s)', web_path, blob.size, blob.created)
         
-        # Chemin complet du fichier
-        file_path = os.path.join(upload_folder, unique_filename)
-        
-        # Écrire le contenu sur disque
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
-        
-        # Vérifier que le fichier a été écrit correctement
-        if os.path.exists(file_path):
-            file_size = os.path.getsize(file_path)
-            print(f"DEBUG: Fichier sauvegardé: {file_path} ({file_size} octets)")
-            
-            if file_size > 0:
-                # Retourner le chemin web
-                web_path = f'/static/exercises/{unique_filename}'
-                print(f"DEBUG: Chemin web retourné: {web_path}")
-                return web_path
-            else:
-                print("ERREUR: Fichier sauvegardé mais vide")
-                os.remove(file_path)
-                return None
-        else:
-            print("ERREUR: Fichier non sauvegardé")
-            return None
+        if blob.created:
+            # Rendre le fichier visible de l'index sans attendre la scrutation
+            static_asset_index.add(web_path)
+            image_resolution_cache.invalidate()
+            if current_app.config.get('IMAGE_DERIVATIVES_ON_UPLOAD'):
+                # Déclinaisons redimensionnées préparées hors de la requête
+                from job_queue import get_job_queue
+                get_job_queue().enqueue('image_derivatives', params={'path': web_path})
+        return web_path
             
+    except UploadRejected as e:
+        logger.warning('Fichier refusé: %s', e)
+        return None
     except Exception as e:
-        print(f"ERREUR lors de l'upload: {str(e)}")
+        logger.error("Erreur lors de l'upload: %s", e)
         return None
@@ -0,0 +1,309 @@
+"""
+Pools de connexions, délais des requêtes et réplica de lecture
+
+config.py ne fixait que l'URI PostgreSQL : pool par défaut de SQLAlchemy
+(5 + 10 connexions par processus, quel que soit le modèle de workers),
+aucune vérification des connexions coupées, aucune limite de durée des
+requêtes. engine_options() calcule SQLALCHEMY_ENGINE_OPTIONS d'après le
+profil gunicorn (gunicorn_profiles.worker_settings) :
+
+    sync     pool_size 1                    une requête à la fois par processus
+    gthread  pool_size = GUNICORN_THREADS   une connexion par thread
+    gevent   pool_size 10                   les greenlets au-delà attendent
+                                            (pool_timeout) plutôt que
+                                            d'ouvrir une connexion chacun
+
+max_overflow (DEFAULT_BACKGROUND_CONNECTIONS) couvre les threads de la
+file de tâches. Chaque processus ouvre au plus pool_size + max_overflow
+connexions : workers × (pool_size + max_overflow) doit rester sous
+max_connections de PostgreSQL (ou default_pool_size de PgBouncer),
+`flask db-pool` affiche ce total.
+
+Variables d'environnement (valeurs par défaut entre parenthèses) :
+    DB_POOL_SIZE, DB_MAX_OVERFLOW     remplacent les valeurs du profil
+    DB_POOL_TIMEOUT                   attente maximale d'une connexion (10 s)
+    DB_POOL_RECYCLE                   âge maximal d'une connexion (1800 s)
+    DB_POOL_PRE_PING                  vérifier la connexion avant usage (true)
+    DB_STATEMENT_TIMEOUT_MS           durée maximale d'une requête PostgreSQL (0 : aucune ;
+                                      gunicorn.conf.py fixe 30000 pour les workers web)
+    DB_PGBOUNCER                      PgBouncer en mode transaction (false) : ni
+                                      paramètre de démarrage `options` ni
+                                      requêtes préparées côté serveur (psycopg 3) ;
+                                      le délai est posé par SET LOCAL à chaque
+                                      transaction
+    DB_SQLITE_BUSY_TIMEOUT            attente d'un verrou SQLite (15 s)
+    DATABASE_REPLICA_URL              réplica en lecture seule (bind 'replica')
+
+Le délai ne vise que les requêtes web : les commandes de maintenance
+(`flask db upgrade`, init-db, migrate-image-paths, dedupe-images) peuvent
+légitimement durer plus longtemps. Sans la variable, le délai est nul ;
+gunicorn.conf.py la fixe à WEB_STATEMENT_TIMEOUT_MS avant de charger
+l'application. Si la plateforme la définit pour tous les processus,
+la lever pour une commande avec :
+
+    DB_STATEMENT_TIMEOUT_MS=0 flask --app app init-db
+
+SQLite (développement) passe en journal WAL : les lectures ne bloquent plus
+l'écriture en cours, ce qui permet de tester localement la charge
+concurrente sans PostgreSQL.
+
+Les lectures tolérant un léger retard (exports, synthèses) peuvent être
+envoyées au réplica :
+
+    with read_replica():
+        rows = Exercise.query.filter_by(...).all()
+
+Sans réplica configuré, tout reste sur la base principale. Les écritures
+(flush, UPDATE, DELETE) vont toujours à la base principale.
+
+L'attente d'une connexion et la saturation du pool sont mesurées par
+InstrumentedQueuePool et rapportées par request_metrics.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+import click
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from gunicorn_profiles import worker_settings
+
+DEFAULT_BACKGROUND_CONNECTIONS = 2
+GEVENT_POOL_SIZE = 10
+DEFAULT_POOL_TIMEOUT = 10
+DEFAULT_POOL_RECYCLE = 1800
+DEFAULT_STATEMENT_TIMEOUT_MS = 0
+WEB_STATEMENT_TIMEOUT_MS = 30000
+DEFAULT_SQLITE_BUSY_TIMEOUT = 15
+
+REPLICA_BIND = 'replica'
+REPLICA_FLAG = 'use_replica'
+
+_checkout_observers = []
+
+
+def _flag(value, default=False):
+    if value is None or value == '':
+        return default
+    return str(value).lower() in ('1', 'true', 'on', 'yes')
+
+
+def add_checkout_observer(observer):
+    """observer(pool, seconds, timed_out) est appelé après chaque demande de connexion."""
+    if observer not in _checkout_observers:
+        _checkout_observers.append(observer)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente de chaque connexion (vérification comprise)"""
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        # max_overflow négatif : pas de limite
+        self.capacity = pool_size + max_overflow if max_overflow >= 0 else None
+
+    @property
+    def name(self):
+        return self._orig_logging_name or 'default'
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self._notify(time.perf_counter() - started, True)
+            raise
+        self._notify(time.perf_counter() - started, False)
+        return connection
+
+    def _notify(self, seconds, timed_out):
+        for observer in _checkout_observers:
+            observer(self, seconds, timed_out)
+
+
+def pool_settings(worker=None, environ=None):
+    """
+    Taille du pool d'un processus selon le profil de workers.
+
+    Args:
+        worker (dict, optional): Résultat de worker_settings (défaut : profil courant)
+        environ (dict, optional): Variables d'environnement (défaut : os.environ)
+
+    Returns:
+        dict: pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping,
+        per_process et total (connexions maximales, tous workers confondus)
+    """
+    environ = os.environ if environ is None else environ
+    worker = worker or worker_settings(environ=environ)
+    if worker['worker_class'] == 'gevent':
+        pool_size = min(worker['worker_connections'], GEVENT_POOL_SIZE)
+    else:
+        pool_size = worker['threads']
+    pool_size = int(environ.get('DB_POOL_SIZE', pool_size))
+    max_overflow = int(environ.get('DB_MAX_OVERFLOW', DEFAULT_BACKGROUND_CONNECTIONS))
+    per_process = pool_size + max_overflow
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': int(environ.get('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)),
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE)),
+        'pool_pre_ping': _flag(environ.get('DB_POOL_PRE_PING'), True),
+        'per_process': per_process,
+        'total': per_process * worker['workers'],
+    }
+
+
+def statement_timeout_ms(environ=None):
+    environ = os.environ if environ is None else environ
+    return int(environ.get('DB_STATEMENT_TIMEOUT_MS', DEFAULT_STATEMENT_TIMEOUT_MS))
+
+
+def uses_pgbouncer(environ=None):
+    environ = os.environ if environ is None else environ
+    return _flag(environ.get('DB_PGBOUNCER'))
+
+
+def engine_options(uri, worker=None, environ=None, name='primary'):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS pour une URI.
+
+    Args:
+        uri (str): URI de la base
+        worker (dict, optional): Profil de workers (voir pool_settings)
+        environ (dict, optional): Variables d'environnement (défaut : os.environ)
+        name (str): Nom du pool dans les mesures ('primary', 'replica')
+
+    Returns:
+        dict: Vide pour SQLite en mémoire (Flask-SQLAlchemy impose StaticPool)
+    """
+    environ = os.environ if environ is None else environ
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+
+    pool = pool_settings(worker, environ)
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_logging_name': name,
+        'pool_size': pool['pool_size'],
+        'max_overflow': pool['max_overflow'],
+        'pool_timeout': pool['pool_timeout'],
+        'pool_recycle': pool['pool_recycle'],
+        'pool_pre_ping': pool['pool_pre_ping'],
+    }
+
+    connect_args = {}
+    if backend == 'postgresql':
+        timeout = statement_timeout_ms(environ)
+        if uses_pgbouncer(environ):
+            # PgBouncer refuse le paramètre de démarrage `options` et ne garde
+            # pas les requêtes préparées d'une transaction à l'autre
+            if url.get_driver_name() == 'psycopg':
+                connect_args['prepare_threshold'] = None
+        elif timeout:
+            connect_args['options'] = f'-c statement_timeout={timeout}'
+    elif backend == 'sqlite':
+        connect_args['timeout'] = int(environ.get('DB_SQLITE_BUSY_TIMEOUT', DEFAULT_SQLITE_BUSY_TIMEOUT))
+        connect_args['check_same_thread'] = False
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def replica_binds(environ=None, worker=None):
+    """SQLALCHEMY_BINDS avec le réplica de DATABASE_REPLICA_URL (vide sinon)"""
+    environ = os.environ if environ is None else environ
+    uri = environ.get('DATABASE_REPLICA_URL')
+    if not uri:
+        return {}
+    return {REPLICA_BIND: dict(engine_options(uri, worker, environ, name=REPLICA_BIND), url=uri)}
+
+
+# ----- réglages de session -----
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+
+def install_session_settings(engine, pgbouncer=False, timeout_ms=0):
+    """
+    Réglages posés sur chaque connexion ou transaction d'un moteur.
+
+    SQLite fichier : journal WAL. PostgreSQL derrière PgBouncer : SET LOCAL
+    statement_timeout au début de chaque transaction (un SET de session
+    fuirait vers les autres clients de la connexion serveur).
+    """
+    backend = engine.url.get_backend_name()
+    if backend == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+        if not event.contains(engine, 'connect', _set_sqlite_pragmas):
+            event.listen(engine, 'connect', _set_sqlite_pragmas)
+    elif backend == 'postgresql' and pgbouncer and timeout_ms:
+        statement = f'SET LOCAL statement_timeout = {int(timeout_ms)}'
+
+        def set_statement_timeout(connection):
+            connection.exec_driver_sql(statement)
+
+        event.listen(engine, 'begin', set_statement_timeout)
+
+
+class RoutingSession(Session):
+    """Session Flask-SQLAlchemy qui lit sur le réplica à l'intérieur de read_replica()"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get(REPLICA_FLAG) and not self._flushing
+                and not getattr(clause, 'is_dml', False)):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def read_replica(session=None):
+    """Envoie les lectures du bloc au réplica (s'il est configuré)."""
+    if session is None:
+        from extensions import db
+        session = db.session
+    previous = session.info.get(REPLICA_FLAG, False)
+    session.info[REPLICA_FLAG] = True
+    try:
+        yield session
+    finally:
+        session.info[REPLICA_FLAG] = previous
+
+
+def init_app(app):
+    """Pose les réglages de session sur les moteurs et enregistre la commande db-pool."""
+    from extensions import db
+
+    app.config.setdefault('DB_PGBOUNCER', uses_pgbouncer())
+    app.config.setdefault('DB_STATEMENT_TIMEOUT_MS', statement_timeout_ms())
+    with app.app_context():
+        for engine in db.engines.values():
+            install_session_settings(engine, app.config['DB_PGBOUNCER'], app.config['DB_STATEMENT_TIMEOUT_MS'])
+
+    @app.cli.command('db-pool')
+    def db_pool_command():
+        """Taille des pools par processus et nombre total de connexions."""
+        worker = worker_settings()
+        pool = pool_settings(worker)
+        with app.app_context():
+            for key, engine in db.engines.items():
+                click.echo(f"{key or 'principal'} : {engine.url.render_as_string(hide_password=True)} "
+                           f"({type(engine.pool).__name__})")
+        click.echo(f"Profil {worker['profile']} : {worker['workers']} workers, "
+                   f"concurrence {worker['concurrency']}")
+        click.echo(f"Pool par processus : {pool['pool_size']} + {pool['max_overflow']} "
+                   f"(attente max {pool['pool_timeout']} s, recyclage {pool['pool_recycle']} s)")
+        click.echo(f"Connexions maximales : {pool['total']}")
+        click.echo(f"PgBouncer : {'oui' if app.config['DB_PGBOUNCER'] else 'non'}, "
+                   f"délai des requêtes : {app.config['DB_STATEMENT_TIMEOUT_MS']} ms")
@@ -0,0 +1,1061 @@
+"""
+Routes de diagnostic, de correction et de test
+
+Ces routes (/debug-*, /fix-*, /test-*, /check-missing-images,
+/create-test-exercises, /force-admin-setup...) étaient déclarées dans
+app.py : chaque worker les chargeait, et plusieurs modifient la base sans
+contrôle d'accès. Elles forment désormais un blueprint que app.py n'importe
+et n'enregistre que si ENABLE_DEBUG_ROUTES est activé (configuration ou
+variable d'environnement du même nom).
+
+Les inventaires et corrections d'images ont leurs équivalents hors ligne :
+flask scan-assets, flask migrate-image-paths, flask dedupe-images.
+"""
+
+import json
+import os
+import traceback
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+
+from cloud_storage_no_cloudinary import upload_file
+from extensions import db
+from log_pipeline import category_log
+from models import Exercise, User
+
+diagnostic_bp = Blueprint('diagnostic', __name__)
+
+
+# Route de diagnostic pour tous les exercices fill_in_blanks
+@diagnostic_bp.route('/debug-all-fill-in-blanks')
+def debug_all_fill_in_blanks():
+    # Route de diagnostic pour analyser tous les exercices fill_in_blanks
+    if not current_user.is_authenticated or not current_user.is_admin:
+        return "Accès non autorisé", 403
+        
+    results = []
+    
+    # En-tête
+    results.append("<h1>DIAGNOSTIC TOUS LES EXERCICES FILL_IN_BLANKS</h1>")
+    
+    # 1. Environnement
+    results.append("<h2>1. ENVIRONNEMENT</h2>")
+    
+    # Vérifier les variables d'environnement
+    env_vars = {
+        'FLASK_ENV': os.environ.get('FLASK_ENV', 'non défini'),
+        'DATABASE_URL': os.environ.get('DATABASE_URL', 'non défini')[:10] + '...' if os.environ.get('DATABASE_URL') else 'non défini',
+        'RAILWAY_ENVIRONMENT': os.environ.get('RAILWAY_ENVIRONMENT', 'non défini'),
+        'PORT': os.environ.get('PORT', 'non défini')
+    }
+    
+    results.append("<h3>Variables d'environnement:</h3>")
+    for key, value in env_vars.items():
+        results.append(f"<p>{key}: {value}</p>")
+    
+    # 2. Liste des exercices
+    results.append("<h2>2. LISTE DES EXERCICES FILL_IN_BLANKS</h2>")
+    
+    try:
+        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
+        results.append(f"<p>Nombre d'exercices fill_in_blanks: {len(exercises)}</p>")
+        
+        if exercises:
+            results.append("<table border='1' style='border-collapse: collapse; width: 100%;'>")
+            results.append("<tr><th>ID</th><th>Titre</th><th>Image</th><th>Blancs</th><th>Mots</th><th>Cohérence</th></tr>")
+            
+            for ex in exercises:
+                try:
+                    content = json.loads(ex.content)
+                    
+                    # Compter les blancs
+                    total_blanks = 0
+                    
+                    if 'sentences' in content:
+                        sentences_blanks = sum(s.count('___') for s in content['sentences'])
+                        total_blanks = sentences_blanks
+                    elif 'text' in content:
+                        text_blanks = content['text'].count('___')
+                        total_blanks = text_blanks
+                    
+                    # Compter les mots
+                    words = []
+                    if 'words' in content:
+                        words = content['words']
+                    elif 'available_words' in content:
+                        words = content['available_words']
+                    
+                    # Vérifier la cohérence
+                    coherence = "✓" if total_blanks == len(words) else "[ECHEC]"
+                    coherence_color = "green" if total_blanks == len(words) else "red"
+                    
+                    # Image
+                    has_image = "✓" if ex.image_path else "[ECHEC]"
+                    image_color = "green" if ex.image_path else "gray"
+                    
+                    results.append(f"<tr>")
+                    results.append(f"<td>{ex.id}</td>")
+                    results.append(f"<td>{ex.title}</td>")
+                    results.append(f"<td style='color: {image_color};'>{has_image}</td>")
+                    results.append(f"<td>{total_blanks}</td>")
+                    results.append(f"<td>{len(words)}</td>")
+                    results.append(f"<td style='color: {coherence_color};'>{coherence}</td>")
+                    results.append(f"</tr>")
+                except Exception as e:
+                    results.append(f"<tr><td>{ex.id}</td><td>{ex.title}</td><td colspan='4' style='color: red;'>Erreur: {str(e)}</td></tr>")
+            
+            results.append("</table>")
+        else:
+            results.append("<p>Aucun exercice fill_in_blanks trouvé.</p>")
+    except Exception as e:
+        results.append(f"<p style='color: red;'>Erreur lors de la récupération des exercices: {str(e)}</p>")
+    
+    # 3. Liste des exercices word_placement
+    results.append("<h2>3. LISTE DES EXERCICES WORD_PLACEMENT</h2>")
+    
+    try:
+        exercises = Exercise.query.filter_by(exercise_type='word_placement').all()
+        results.append(f"<p>Nombre d'exercices word_placement: {len(exercises)}</p>")
+        
+        if exercises:
+            results.append("<table border='1' style='border-collapse: collapse; width: 100%;'>")
+            results.append("<tr><th>ID</th><th>Titre</th><th>Image</th><th>Blancs</th><th>Mots</th><th>Cohérence</th></tr>")
+            
+            for ex in exercises:
+                try:
+                    content = json.loads(ex.content)
+                    
+                    # Compter les blancs
+                    total_blanks = 0
+                    
+                    if 'sentences' in content:
+                        sentences_blanks = sum(s.count('___') for s in content['sentences'])
+                        total_blanks = sentences_blanks
+                    elif 'text' in content:
+                        text_blanks = content['text'].count('___')
+                        total_blanks = text_blanks
+                    
+                    # Compter les mots
+                    words = []
+                    if 'words' in content:
+                        words = content['words']
+                    elif 'available_words' in content:
+                        words = content['available_words']
+                    
+                    # Vérifier la cohérence
+                    coherence = "✓" if total_blanks == len(words) else "[ECHEC]"
+                    coherence_color = "green" if total_blanks == len(words) else "red"
+                    
+                    # Image
+                    has_image = "✓" if ex.image_path else "[ECHEC]"
+                    image_color = "green" if ex.image_path else "gray"
+                    
+                    results.append(f"<tr>")
+                    results.append(f"<td>{ex.id}</td>")
+                    results.append(f"<td>{ex.title}</td>")
+                    results.append(f"<td style='color: {image_color};'>{has_image}</td>")
+                    results.append(f"<td>{total_blanks}</td>")
+                    results.append(f"<td>{len(words)}</td>")
+                    results.append(f"<td style='color: {coherence_color};'>{coherence}</td>")
+                    results.append(f"</tr>")
+                except Exception as e:
+                    results.append(f"<tr><td>{ex.id}</td><td>{ex.title}</td><td colspan='4' style='color: red;'>Erreur: {str(e)}</td></tr>")
+            
+            results.append("</table>")
+        else:
+            results.append("<p>Aucun exercice word_placement trouvé.</p>")
+    except Exception as e:
+        results.append(f"<p style='color: red;'>Erreur lors de la récupération des exercices: {str(e)}</p>")
+    
+    # 4. Test de la logique de scoring
+    results.append("<h2>4. TEST DE LA LOGIQUE DE SCORING</h2>")
+    
+    # Test avec sentences
+    results.append("<h3>Test avec sentences</h3>")
+    test_content_sentences = {
+        "sentences": ["Le ___ mange une ___ rouge."],
+        "words": ["chat", "pomme"]
+    }
+    
+    # Simuler des réponses utilisateur parfaites
+    user_answers_sentences = {
+        'answer_0': 'chat',
+        'answer_1': 'pomme'
+    }
+    
+    # Calculer le score
+    try:
+        total_blanks = sum(s.count('___') for s in test_content_sentences['sentences'])
+        correct_blanks = 0
+        
+        for i in range(total_blanks):
+            answer_key = f'answer_{i}'
+            user_answer = user_answers_sentences.get(answer_key, '')
+            correct_answer = test_content_sentences['words'][i] if i < len(test_content_sentences['words']) else ''
+            
+            if user_answer.lower() == correct_answer.lower():
+                correct_blanks += 1
+        
+        score = round((correct_blanks / total_blanks) * 100) if total_blanks > 0 else 0
+        
+        results.append(f"<p>Score avec sentences: {correct_blanks}/{total_blanks} = {score}%</p>")
+        if score == 100:
+            results.append("<p style='color: green;'>✓ Test sentences réussi!</p>")
+        else:
+            results.append("<p style='color: red;'>[ECHEC] Test sentences échoué!</p>")
+    except Exception as e:
+        results.append(f"<p style='color: red;'>Erreur test sentences: {str(e)}</p>")
+    
+    # Test avec text
+    results.append("<h3>Test avec text</h3>")
+    test_content_text = {
+        "text": "Le ___ mange une ___ rouge.",
+        "words": ["chat", "pomme"]
+    }
+    
+    # Simuler des réponses utilisateur parfaites
+    user_answers_text = {
+        'answer_0': 'chat',
+        'answer_1': 'pomme'
+    }
+    
+    # Calculer le score
+    try:
+        total_blanks = test_content_text['text'].count('___')
+        correct_blanks = 0
+        
+        for i in range(total_blanks):
+            answer_key = f'answer_{i}'
+            user_answer = user_answers_text.get(answer_key, '')
+            correct_answer = test_content_text['words'][i] if i < len(test_content_text['words']) else ''
+            
+            if user_answer.lower() == correct_answer.lower():
+                correct_blanks += 1
+        
+        score = round((correct_blanks / total_blanks) * 100) if total_blanks > 0 else 0
+        
+        results.append(f"<p>Score avec text: {correct_blanks}/{total_blanks} = {score}%</p>")
+        if score == 100:
+            results.append("<p style='color: green;'>✓ Test text réussi!</p>")
+        else:
+            results.append("<p style='color: red;'>[ECHEC] Test text échoué!</p>")
+    except Exception as e:
+        results.append(f"<p style='color: red;'>Erreur test text: {str(e)}</p>")
+    
+    # 5. Conclusion
+    results.append("<h2>5. CONCLUSION</h2>")
+    results.append("<p>Si tous les tests ci-dessus sont réussis (affichés en vert), la logique de scoring est correcte.</p>")
+    results.append("<p>Vérifiez particulièrement:</p>")
+    results.append("<ul>")
+    results.append("<li>Que le nombre de blancs correspond au nombre de mots pour chaque exercice</li>")
+    results.append("<li>Que les tests de scoring donnent bien 100%</li>")
+    results.append("<li>Que les exercices problématiques sont identifiés (marqués en rouge)</li>")
+    results.append("</ul>")
+    
+    return "<br>".join(results)
+
+
+@diagnostic_bp.route('/debug/exercises')
+@login_required
+def debug_exercises():
+    if not current_user.is_teacher:
+        return "Accès non autorisé", 403
+        
+    exercises = Exercise.query.all()
+    debug_info = []
+    
+    for ex in exercises:
+        debug_info.append({
+            'id': ex.id,
+            'title': ex.title,
+            'type': ex.exercise_type,
+            'content': ex.content,
+            'parsed_content': ex.get_content()
+        })
+    
+    return render_template('debug_exercises.html', exercises=debug_info)
+
+
+@diagnostic_bp.route('/debug/images')
+def debug_images():
+    # Lister tous les fichiers dans le dossier uploads
+    files = []
+    upload_dir = current_app.config['UPLOAD_FOLDER']
+    for filename in os.listdir(upload_dir):
+        if filename.startswith('pair_left_'):
+            file_path = os.path.join(upload_dir, filename)
+            if os.path.isfile(file_path):
+                files.append({
+                    'name': filename,
+                    'url': url_for('static', filename=f'uploads/{filename}'),
+                    'size': os.path.getsize(file_path)
+                })
+    
+    return render_template('debug_images.html', files=files)
+
+
+@diagnostic_bp.route('/test-submit')
+def test_submit():
+    return render_template('test_submit.html')
+
+
+@diagnostic_bp.route('/test-minimal')
+def test_minimal():
+    """Route pour tester un formulaire ultra-minimal"""
+    return render_template('test_minimal_form.html')
+
+
+@diagnostic_bp.route('/test-pure-html')
+def test_pure_html():
+    """Route pour tester un formulaire HTML pur sans JavaScript"""
+    return render_template('test_pure_html.html')
+
+
+@diagnostic_bp.route('/force-admin-setup')
+def force_admin_setup():
+    """Route temporaire pour forcer l'approbation admin"""
+    try:
+        # Approuver mr.zahiri@gmail.com
+        zahiri_user = User.query.filter_by(email='mr.zahiri@gmail.com').first()
+        if zahiri_user:
+            zahiri_user.subscription_status = 'approved'
+            zahiri_user.role = 'teacher'
+            zahiri_user.subscription_type = 'teacher'
+            zahiri_user.approved_by = None
+            db.session.commit()
+            
+        # Approuver aussi jemathsia@example.com (Mr Aziz)
+        aziz_user = User.query.filter_by(email='jemathsia@example.com').first()
+        if aziz_user:
+            aziz_user.subscription_status = 'approved'
+            aziz_user.role = 'teacher'
+            aziz_user.subscription_type = 'teacher'
+            aziz_user.approved_by = None
+            aziz_user.approval_date = datetime.utcnow()
+            db.session.commit()
+            
+        return f"[OK] Comptes approuvés ! <br>[OK] mr.zahiri@gmail.com (enseignant)<br>[OK] jemathsia@example.com (enseignant)<br><a href='/login'>Se connecter</a>"
+    except Exception as e:
+        return f"[ERREUR] Erreur: {e}"
+
+
+@diagnostic_bp.route('/create-test-exercises')
+def create_test_exercises():
+    """Route pour créer des exercices de test"""
+    try:
+        from models import Exercise
+        from datetime import datetime
+        
+        # Récupérer l'utilisateur enseignant
+        teacher = User.query.filter_by(email='mr.zahiri@gmail.com').first()
+        if not teacher:
+            teacher = User.query.filter_by(email='jemathsia@example.com').first()
+        
+        if not teacher:
+            return "[ERREUR] Aucun enseignant trouvé"
+        
+        # Créer des exercices de test
+        exercises_data = [
+            {
+                'title': 'QCM Test - Les Capitales',
+                'exercise_type': 'qcm',
+                'subject': 'Géographie',
+                'content': '{"question": "Quelle est la capitale de la France ?", "options": ["Paris", "Lyon", "Marseille", "Toulouse"], "correct_answer": 0, "explanation": "Paris est la capitale de la France depuis 1792."}'
+            },
+            {
+                'title': 'Texte à Trous - Grammaire',
+                'exercise_type': 'fill_in_blanks',
+                'subject': 'Français',
+                'content': '{"text": "Le chat ____ sa nourriture dans le ____.", "blanks": [{"word": "mange", "position": 1}, {"word": "jardin", "position": 2}], "sentences": ["Le chat mange sa nourriture dans le jardin."]}'
+            },
+            {
+                'title': 'Association de Paires - Histoire',
+                'exercise_type': 'pairs',
+                'subject': 'Histoire',
+                'content': '{"pairs": [{"left": "1789", "right": "Révolution française"}, {"left": "1804", "right": "Sacre de Napoléon"}, {"left": "1815", "right": "Waterloo"}]}'
+            }
+        ]
+        
+        created_count = 0
+        for ex_data in exercises_data:
+            # Vérifier si l'exercice existe déjà
+            existing = Exercise.query.filter_by(title=ex_data['title']).first()
+            if not existing:
+                exercise = Exercise(
+                    title=ex_data['title'],
+                    exercise_type=ex_data['exercise_type'],
+                    subject=ex_data['subject'],
+                    content=ex_data['content'],
+                    teacher_id=teacher.id,
+                    created_at=datetime.utcnow()
+                )
+                db.session.add(exercise)
+                created_count += 1
+        
+        db.session.commit()
+        
+        return f"[OK] {created_count} exercices de test créés ! <br><a href='/exercise/library'>Voir la bibliothèque</a>"
+        
+    except Exception as e:
+        return f"[ERREUR] Erreur lors de la création: {e}"
+
+
+@diagnostic_bp.route('/debug-edit-exercise/<int:exercise_id>')
+def debug_edit_exercise(exercise_id):
+    """Route de debug pour éditer directement le JSON d'un exercice"""
+    try:
+        from models import Exercise
+        exercise = Exercise.query.get_or_404(exercise_id)
+        
+        html = f"""
+        <h2>Debug - Édition directe JSON</h2>
+        <h3>Exercice: {exercise.title}</h3>
+        <p><strong>Type:</strong> {exercise.exercise_type}</p>
+        <p><strong>Contenu actuel:</strong></p>
+        <form method="GET" action="/debug-update-exercise/{exercise_id}">
+            <textarea name="content" rows="10" cols="80" style="width:100%">{exercise.content or ''}</textarea><br><br>
+            <button type="submit" style="background:green;color:white;padding:10px;">Sauvegarder JSON</button>
+        </form>
+        <br>
+        <h4>Format attendu pour "Mots à placer":</h4>
+        <pre>{{"sentences": ["Cette phrase est-elle ___ ou ___ ?"], "words": ["déclarative", "interrogative", "impérative"]}}</pre>
+        <br>
+        <a href="/exercise/library">Retour à la bibliothèque</a>
+        """
+        return html
+        
+    except Exception as e:
+        return f"[ERREUR] Erreur: {e}"
+
+
+@diagnostic_bp.route('/debug-update-exercise/<int:exercise_id>', methods=['GET', 'POST'])
+def debug_update_exercise(exercise_id):
+    """Route pour sauvegarder le JSON modifié"""
+    try:
+        from models import Exercise
+        from flask import request
+        
+        exercise = Exercise.query.get_or_404(exercise_id)
+        
+        # Récupérer le contenu depuis GET ou POST
+        new_content = request.args.get('content') or request.form.get('content', '')
+        
+        if new_content:
+            exercise.content = new_content
+            db.session.commit()
+            return f"[OK] Exercice mis à jour ! <br><a href='/exercise/{exercise_id}'>Voir l'exercice</a> | <a href='/exercise/library'>Bibliothèque</a>"
+        else:
+            return f"[ERREUR] Aucun contenu fourni. <a href='/debug-edit-exercise/{exercise_id}'>Retour</a>"
+        
+    except Exception as e:
+        return f"[ERREUR] Erreur lors de la sauvegarde: {e}"
+
+
+@diagnostic_bp.route('/test_upload', methods=['GET', 'POST'])
+def test_upload():
+    """Page de test pour l'upload d'images"""
+    if request.method == 'POST':
+        if 'test_image' not in request.files:
+            flash('Aucun fichier sélectionné', 'error')
+            return redirect(request.url)
+        
+        file = request.files['test_image']
+        if file.filename == '':
+            flash('Aucun fichier sélectionné', 'error')
+            return redirect(request.url)
+        
+        # Même chemin que les uploads des exercices (magasin de blobs)
+        image_path = upload_file(file)
+        if image_path:
+            flash(f'Image uploadée avec succès: {image_path}', 'success')
+            return render_template('test_upload.html', uploaded_image=image_path)
+        flash('Erreur lors de l\'upload de l\'image', 'error')
+    
+    return render_template('test_upload.html')
+
+
+@diagnostic_bp.route('/fix-uploads-directory')
+def fix_uploads_directory():
+    """Route temporaire pour créer le répertoire static/uploads en production Railway"""
+    
+    try:
+        import os
+        from pathlib import Path
+        
+        # Créer le répertoire static/uploads
+        uploads_dir = Path('static/uploads')
+        uploads_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Créer un fichier .gitkeep pour que le répertoire soit conservé
+        gitkeep_file = uploads_dir / '.gitkeep'
+        gitkeep_file.touch()
+        
+        # Vérifier que le répertoire existe
+        if uploads_dir.exists():
+            return f"SUCCES: Repertoire {uploads_dir} cree avec succes en production Railway ! Les images pourront maintenant etre uploadees et affichees."
+        else:
+            return f"ERREUR: Le repertoire {uploads_dir} n'a pas pu etre cree."
+            
+    except Exception as e:
+        return f"ERREUR lors de la creation du repertoire: {str(e)}"
+
+
+@diagnostic_bp.route('/check-missing-images')
+def check_missing_images():
+    """Route pour identifier les images manquantes en production Railway"""
+    try:
+        import os
+        from pathlib import Path
+        
+        result = []
+        result.append("<h2>DIAGNOSTIC IMAGES PRODUCTION RAILWAY</h2>")
+        
+        # 1. Vérifier le répertoire uploads
+        uploads_dir = Path('static/uploads')
+        result.append(f"<h3>1. Repertoire static/uploads</h3>")
+        result.append(f"<p><strong>Existe:</strong> {uploads_dir.exists()}</p>")
+        
+        if uploads_dir.exists():
+            files = list(uploads_dir.glob('*'))
+            result.append(f"<p><strong>Fichiers presents:</strong> {len(files)}</p>")
+            result.append("<ul>")
+            for f in files:
+                result.append(f"<li>{f.name}</li>")
+            result.append("</ul>")
+        
+        # 2. Vérifier les références dans la DB
+        result.append(f"<h3>2. Exercices avec images dans la base</h3>")
+        exercises_with_images = Exercise.query.filter(Exercise.image_path.isnot(None)).all()
+        result.append(f"<p><strong>Nombre d'exercices avec images:</strong> {len(exercises_with_images)}</p>")
+        
+        missing_images = []
+        for ex in exercises_with_images:
+            if ex.image_path:
+                filename = ex.image_path.split('/')[-1] if '/' in ex.image_path else ex.image_path
+                image_path = uploads_dir / filename
+                
+                result.append(f"<h4>Exercice {ex.id}: {ex.title}</h4>")
+                result.append(f"<p><strong>Image path DB:</strong> {ex.image_path}</p>")
+                result.append(f"<p><strong>Fichier attendu:</strong> {filename}</p>")
+                result.append(f"<p><strong>Fichier existe:</strong> {image_path.exists()}</p>")
+                
+                if not image_path.exists():
+                    missing_images.append(filename)
+                    result.append(f"<p style='color: red;'><strong>MANQUANT</strong></p>")
+                else:
+                    result.append(f"<p style='color: green;'><strong>OK</strong></p>")
+                result.append("<hr>")
+        
+        # 3. Résumé
+        result.append(f"<h3>3. Resume</h3>")
+        result.append(f"<p><strong>Images manquantes:</strong> {len(missing_images)}</p>")
+        if missing_images:
+            result.append("<ul>")
+            for img in missing_images:
+                result.append(f"<li style='color: red;'>{img}</li>")
+            result.append("</ul>")
+        
+        return "<br>".join(result)
+        
+    except Exception as e:
+        return f"<h2>ERREUR:</h2><p>{str(e)}</p>"
+
+
+@diagnostic_bp.route('/create-simple-placeholders')
+def create_simple_placeholders():
+    """Route pour créer des fichiers placeholder simples sans Pillow"""
+    try:
+        import os
+        from pathlib import Path
+        
+        # Créer le répertoire static/uploads
+        uploads_dir = Path('static/uploads')
+        uploads_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Images connues manquantes
+        placeholder_files = [
+            "Capture d'écran 2025-08-14 145027_20250814_182421_Da3gvm.png",
+            "triangle.png", 
+            "clopepe.png",
+            "corps_humain_exemple.jpg"
+        ]
+        
+        created_files = []
+        
+        for filename in placeholder_files:
+            file_path = uploads_dir / filename
+            
+            if not file_path.exists():
+                # Créer un fichier SVG simple comme placeholder
+                svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<svg width="800" height="400" xmlns="http://www.w3.org/2000/svg">
+  <rect width="800" height="400" fill="#f0f0f0" stroke="#cccccc" stroke-width="3"/>
+  <text x="400" y="180" font-family="Arial, sans-serif" font-size="24" text-anchor="middle" fill="#666666">
+    IMAGE DE L'EXERCICE
+  </text>
+  <text x="400" y="220" font-family="Arial, sans-serif" font-size="18" text-anchor="middle" fill="#999999">
+    {filename}
+  </text>
+  <text x="400" y="250" font-family="Arial, sans-serif" font-size="14" text-anchor="middle" fill="#999999">
+    Image temporairement indisponible
+  </text>
+</svg>'''
+                
+                # Sauvegarder le fichier SVG avec l'extension d'origine
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(svg_content)
+                
+                created_files.append(filename)
+        
+        result = f"<h2>CREATION PLACEHOLDERS REUSSIE</h2>"
+        result += f"<p><strong>Fichiers crees:</strong> {len(created_files)}</p>"
+        result += "<ul>"
+        for f in created_files:
+            result += f"<li>{f}</li>"
+        result += "</ul>"
+        result += f"<p>Les images devraient maintenant s'afficher dans les exercices !</p>"
+        
+        return result
+        
+    except Exception as e:
+        return f"<h2>ERREUR:</h2><p>{str(e)}</p>"
+
+
+@diagnostic_bp.route('/debug-railway')
+def debug_railway():
+    """Route de diagnostic pour identifier les problemes Railway"""
+    
+    try:
+        debug_info = []
+        
+        # Test 1: Connexion base de données
+        try:
+            from sqlalchemy import text
+            result = db.session.execute(text("SELECT 1"))
+            debug_info.append("OK Connexion base de donnees OK")
+        except Exception as e:
+            debug_info.append(f"ERREUR Connexion base de donnees ERREUR: {str(e)}")
+        
+        # Test 2: Structure table user
+        try:
+            result = db.session.execute(text("""
+                SELECT column_name, data_type 
+                FROM information_schema.columns 
+                WHERE table_name = 'user'
+                ORDER BY column_name
+            """))
+            columns = result.fetchall()
+            debug_info.append(f"[OK] Table user a {len(columns)} colonnes")
+            for col in columns:
+                debug_info.append(f"  - {col[0]} ({col[1]})")
+        except Exception as e:
+            debug_info.append(f"[ERREUR] Structure table user ERREUR: {str(e)}")
+        
+        # Test 3: Import des modèles
+        try:
+            from models import User, Exercise
+            debug_info.append("[OK] Import modeles OK")
+        except Exception as e:
+            debug_info.append(f"[ERREUR] Import modeles ERREUR: {str(e)}")
+        
+        # Test 4: Variables d'environnement
+        import os
+        debug_info.append(f"[OK] FLASK_ENV: {os.environ.get('FLASK_ENV', 'non defini')}")
+        debug_info.append(f"[OK] DATABASE_URL: {'defini' if os.environ.get('DATABASE_URL') else 'non defini'}")
+        
+        # Test 5: Flask-Login
+        try:
+            from flask_login import current_user
+            debug_info.append(f"[OK] Flask-Login import OK")
+            debug_info.append(f"[OK] current_user accessible: {hasattr(current_user, 'is_authenticated')}")
+            debug_info.append(f"[OK] current_user.is_authenticated: {current_user.is_authenticated}")
+        except Exception as e:
+            debug_info.append(f"[ERREUR] Flask-Login ERREUR: {str(e)}")
+        
+        # Test 6: Test route index directement
+        try:
+            debug_info.append("=== TEST ROUTE INDEX ===")
+            if current_user.is_authenticated:
+                debug_info.append(f"[OK] Utilisateur connecte: {current_user.email}")
+                debug_info.append(f"[OK] Role: {current_user.role}")
+            else:
+                debug_info.append("[OK] Utilisateur non connecte - devrait afficher login.html")
+        except Exception as e:
+            debug_info.append(f"[ERREUR] Test route index ERREUR: {str(e)}")
+        
+        return "<br>".join(debug_info)
+        
+    except Exception as e:
+        return f"[ERREUR] Erreur diagnostic: {str(e)}"
+
+
+@diagnostic_bp.route('/test-simple')
+def test_simple():
+    """Route ultra-simple pour tester si Flask fonctionne"""
+    return "[OK] Flask fonctionne parfaitement sur Railway !"
+
+
+@diagnostic_bp.route('/debug-fill-in-blanks-railway')
+def debug_fill_in_blanks_railway():
+    """Route de diagnostic spécifique pour les problèmes fill_in_blanks sur Railway"""
+    try:
+        debug_info = []
+        
+        # 1. Vérifier les exercices fill_in_blanks
+        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
+        debug_info.append(f"<h2>1. EXERCICES FILL_IN_BLANKS: {len(exercises)} trouvés</h2>")
+        
+        for ex in exercises:
+            debug_info.append(f"<h3>Exercice {ex.id}: {ex.title}</h3>")
+            debug_info.append(f"<p><strong>Image path:</strong> {ex.image_path}</p>")
+            
+            # Analyser le contenu JSON
+            content = json.loads(ex.content)
+            debug_info.append(f"<p><strong>Format JSON:</strong> {list(content.keys())}</p>")
+            
+            if 'text' in content:
+                text = content['text']
+                blank_count = text.count('___')
+                debug_info.append(f"<p><strong>Text:</strong> {text}</p>")
+                debug_info.append(f"<p><strong>Blancs dans text:</strong> {blank_count}</p>")
+            
+            if 'sentences' in content:
+                sentences = content['sentences']
+                total_blanks = sum(sentence.count('___') for sentence in sentences)
+                debug_info.append(f"<p><strong>Sentences:</strong> {sentences}</p>")
+                debug_info.append(f"<p><strong>Blancs dans sentences:</strong> {total_blanks}</p>")
+            
+            words = content.get('words', [])
+            debug_info.append(f"<p><strong>Words:</strong> {words} (count: {len(words)})</p>")
+            
+            # Vérifier la cohérence blancs/mots
+            if 'text' in content:
+                text_blanks = content['text'].count('___')
+                word_count = len(words)
+                if text_blanks != word_count:
+                    debug_info.append(f"<p style='color: red;'><strong>ALERTE:</strong> {text_blanks} blancs mais {word_count} mots!</p>")
+                else:
+                    debug_info.append(f"<p style='color: green;'><strong>OK:</strong> {text_blanks} blancs = {word_count} mots</p>")
+        
+        # 2. Vérifier les dossiers et fichiers d'images
+        debug_info.append("<h2>2. VERIFICATION DOSSIERS IMAGES</h2>")
+        
+        import os
+        static_dir = os.path.join(current_app.root_path, 'static')
+        uploads_dir = os.path.join(static_dir, 'uploads')
+        
+        debug_info.append(f"<p><strong>Dossier static:</strong> {static_dir} - Existe: {os.path.exists(static_dir)}</p>")
+        debug_info.append(f"<p><strong>Dossier uploads:</strong> {uploads_dir} - Existe: {os.path.exists(uploads_dir)}</p>")
+        
+        if os.path.exists(uploads_dir):
+            files = os.listdir(uploads_dir)
+            debug_info.append(f"<p><strong>Fichiers dans uploads:</strong> {len(files)}</p>")
+            debug_info.append("<ul>")
+            for f in files[:10]:  # Afficher les 10 premiers
+                debug_info.append(f"<li>{f}</li>")
+            if len(files) > 10:
+                debug_info.append(f"<li>... et {len(files) - 10} autres</li>")
+            debug_info.append("</ul>")
+        
+        # 3. Test de la logique de scoring
+        debug_info.append("<h2>3. TEST LOGIQUE SCORING</h2>")
+        
+        if exercises:
+            test_exercise = exercises[0]
+            content = json.loads(test_exercise.content)
+            correct_answers = content.get('words', [])
+            
+            debug_info.append(f"<h3>Test avec exercice: {test_exercise.title}</h3>")
+            debug_info.append(f"<p><strong>Réponses correctes:</strong> {correct_answers}</p>")
+            
+            # Test scoring parfait
+            total_blanks = len(correct_answers)
+            score_perfect = round((total_blanks / total_blanks) * 100) if total_blanks > 0 else 0
+            debug_info.append(f"<p><strong>Score parfait attendu:</strong> {total_blanks}/{total_blanks} = {score_perfect}%</p>")
+            
+            # Test scoring partiel (bug Railway)
+            if total_blanks >= 2:
+                score_partial = round((1 / total_blanks) * 100)
+                debug_info.append(f"<p><strong>Score avec 1 seul blanc correct:</strong> 1/{total_blanks} = {score_partial}%</p>")
+                if score_partial == 50:
+                    debug_info.append("<p style='color: red;'><strong>BUG IDENTIFIE:</strong> C'est exactement le problème Railway (50%)!</p>")
+        
+        # 4. Vérifier les variables d'environnement
+        debug_info.append("<h2>4. VARIABLES ENVIRONNEMENT</h2>")
+        env_vars = ['DATABASE_URL', 'FLASK_ENV', 'PORT']
+        for var in env_vars:
+            value = os.environ.get(var, 'NON DEFINI')
+            if var == 'DATABASE_URL' and value != 'NON DEFINI':
+                value = value[:30] + "..." if len(value) > 30 else value
+            debug_info.append(f"<p><strong>{var}:</strong> {value}</p>")
+        
+        # 5. Test de la route d'image
+        debug_info.append("<h2>5. TEST ROUTE IMAGE</h2>")
+        debug_info.append(f"<p><strong>Route statique Flask:</strong> {url_for('static', filename='uploads/test.png')}</p>")
+        
+        return "<br>".join(debug_info)
+        
+    except Exception as e:
+        return f"<h2>[ERREUR] Erreur diagnostic:</h2><p>{str(e)}</p>"
+
+
+@diagnostic_bp.route('/fix-fill-in-blanks-words')
+def fix_fill_in_blanks_words():
+    """Route pour corriger les exercices Fill-in-the-Blanks avec mots manquants"""
+    try:
+        results = []
+        results.append("<h1>CORRECTION EXERCICES FILL-IN-THE-BLANKS</h1>")
+        
+        # Récupérer tous les exercices fill_in_blanks
+        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
+        results.append(f"<h2>Exercices trouvés: {len(exercises)}</h2>")
+        
+        fixed_count = 0
+        
+        for exercise in exercises:
+            results.append(f"<h3>Exercice {exercise.id}: {exercise.title}</h3>")
+            
+            try:
+                content = json.loads(exercise.content)
+                
+                # Vérifier si les mots sont manquants
+                words = content.get('words', [])
+                available_words = content.get('available_words', [])
+                
+                results.append(f"<p>Mots actuels: {len(words)} | Available_words: {len(available_words)}</p>")
+                
+                if not words and not available_words:
+                    # Exercice sans mots - on va en ajouter des exemples
+                    if 'sentences' in content:
+                        sentences = content['sentences']
+                        total_blanks = sum(s.count('___') for s in sentences)
+                        
+                        # Créer des mots d'exemple basés sur le nombre de blancs
+                        example_words = []
+                        for i in range(total_blanks):
+                            example_words.append(f"mot{i+1}")
+                        
+                        # Mettre à jour le contenu
+                        content['words'] = example_words
+                        content['available_words'] = example_words  # AJOUT: copier vers available_words
+                        exercise.content = json.dumps(content)
+                        
+                        results.append(f"<p style='color: green;'>✓ Ajouté {len(example_words)} mots d'exemple</p>")
+                        fixed_count += 1
+                    else:
+                        results.append("<p style='color: orange;'>⚠ Pas de sentences trouvées</p>")
+                elif words and not available_words:
+                    # Cas où words existe mais available_words est vide - COPIER
+                    content['available_words'] = words
+                    exercise.content = json.dumps(content)
+                    results.append(f"<p style='color: green;'>✓ Copié {len(words)} mots vers available_words</p>")
+                    fixed_count += 1
+                else:
+                    results.append("<p style='color: blue;'>ℹ Exercice déjà avec mots</p>")
+                    
+            except Exception as e:
+                results.append(f"<p style='color: red;'>[ECHEC] Erreur: {e}</p>")
+        
+        # Sauvegarder les changements
+        if fixed_count > 0:
+            db.session.commit()
+            results.append(f"<h2 style='color: green;'>✓ {fixed_count} exercices corrigés et sauvegardés</h2>")
+        else:
+            results.append("<h2 style='color: blue;'>ℹ Aucune correction nécessaire</h2>")
+        
+        return "<br>".join(results)
+        
+    except Exception as e:
+        return f"<h1>Erreur</h1><p>{str(e)}</p>"
+
+
+@diagnostic_bp.route('/fix-production-issues')
+def fix_production_issues():
+    """Route pour diagnostiquer et corriger les problèmes d'images et de scoring en production"""
+    try:
+        import os
+        results = []
+        
+        results.append("<h1>DIAGNOSTIC ET CORRECTION PRODUCTION</h1>")
+        
+        # 1. Vérifier et créer le dossier uploads
+        results.append("<h2>1. VERIFICATION DOSSIER UPLOADS</h2>")
+        
+        static_dir = os.path.join(current_app.root_path, 'static')
+        uploads_dir = os.path.join(static_dir, 'uploads')
+        
+        results.append(f"<p>Dossier static: {static_dir}</p>")
+        results.append(f"<p>Dossier uploads: {uploads_dir}</p>")
+        
+        # Créer static si nécessaire
+        if not os.path.exists(static_dir):
+            try:
+                os.makedirs(static_dir)
+                results.append("<p style='color: green;'>✓ Dossier static créé</p>")
+            except Exception as e:
+                results.append(f"<p style='color: red;'>[ECHEC] Erreur création static: {e}</p>")
+        else:
+            results.append("<p style='color: green;'>✓ Dossier static existe</p>")
+        
+        # Créer uploads si nécessaire
+        if not os.path.exists(uploads_dir):
+            try:
+                os.makedirs(uploads_dir, exist_ok=True)
+                # Créer .gitkeep
+                gitkeep_path = os.path.join(uploads_dir, ".gitkeep")
+                with open(gitkeep_path, 'w') as f:
+                    f.write("# Dossier uploads pour les images des exercices\n")
+                results.append("<p style='color: green;'>✓ Dossier uploads créé avec .gitkeep</p>")
+            except Exception as e:
+                results.append(f"<p style='color: red;'>[ECHEC] Erreur création uploads: {e}</p>")
+        else:
+            files = os.listdir(uploads_dir)
+            results.append(f"<p style='color: green;'>✓ Dossier uploads existe ({len(files)} fichiers)</p>")
+        
+        # 2. Analyser les exercices fill_in_blanks
+        results.append("<h2>2. ANALYSE EXERCICES TEXTE A TROUS</h2>")
+        
+        exercises = Exercise.query.filter_by(exercise_type='fill_in_blanks').all()
+        results.append(f"<p>Nombre d'exercices trouvés: {len(exercises)}</p>")
+        
+        for ex in exercises[:5]:  # Analyser les 5 premiers
+            results.append(f"<h3>Exercice {ex.id}: {ex.title}</h3>")
+            
+            # Analyser le contenu
+            try:
+                content = json.loads(ex.content)
+                
+                # Compter les blancs réels
+                total_blanks = 0
+                if 'text' in content:
+                    total_blanks += content['text'].count('___')
+                if 'sentences' in content:
+                    total_blanks += sum(s.count('___') for s in content['sentences'])
+                
+                # Compter les réponses
+                words = content.get('words', [])
+                available_words = content.get('available_words', [])
+                
+                results.append(f"<p>Blancs dans contenu: {total_blanks}</p>")
+                results.append(f"<p>Mots de réponse: {len(words)} (words)</p>")
+                results.append(f"<p>Mots disponibles: {len(available_words)} (available_words)</p>")
+                
+                # Diagnostic du problème
+                if total_blanks != len(words) and len(words) > 0:
+                    results.append(f"<p style='color: red;'>⚠ PROBLÈME: {total_blanks} blancs mais {len(words)} réponses</p>")
+                elif total_blanks == len(words):
+                    results.append(f"<p style='color: green;'>✓ Cohérent: {total_blanks} blancs = {len(words)} réponses</p>")
+                
+                # Vérifier l'image
+                if ex.image_path:
+                    image_full_path = os.path.join(uploads_dir, ex.image_path)
+                    if os.path.exists(image_full_path):
+                        results.append(f"<p style='color: green;'>✓ Image existe: {ex.image_path}</p>")
+                    else:
+                        results.append(f"<p style='color: red;'>[ECHEC] Image manquante: {ex.image_path}</p>")
+                
+            except Exception as e:
+                results.append(f"<p style='color: red;'>Erreur analyse: {e}</p>")
+        
+        # 3. Test de la logique de scoring corrigée
+        results.append("<h2>3. TEST LOGIQUE SCORING CORRIGEE</h2>")
+        
+        # Simuler un exercice avec notre logique corrigée
+        test_content = {
+            "sentences": ["Le ___ mange une ___ rouge."],
+            "words": ["chat", "pomme"]
+        }
+        
+        # Compter les blancs
+        total_blanks_in_content = sum(s.count('___') for s in test_content['sentences'])
+        correct_answers = test_content['words']
+        total_blanks = max(total_blanks_in_content, len(correct_answers))
+        
+        results.append(f"<p>Test: '{test_content['sentences'][0]}'</p>")
+        results.append(f"<p>Blancs détectés: {total_blanks_in_content}</p>")
+        results.append(f"<p>Réponses: {correct_answers}</p>")
+        results.append(f"<p>Total blancs utilisé: {total_blanks}</p>")
+        
+        # Simuler scoring 100%
+        correct_count = 0
+        for i in range(total_blanks):
+            if i < len(correct_answers):
+                correct_count += 1
+        
+        score = round((correct_count / total_blanks) * 100) if total_blanks > 0 else 0
+        results.append(f"<p>Score simulé (toutes correctes): {correct_count}/{total_blanks} = {score}%</p>")
+        
+        if score == 100:
+            results.append("<p style='color: green;'>✓ Logique de scoring corrigée fonctionne</p>")
+        else:
+            results.append("<p style='color: red;'>[ECHEC] Problème avec la logique de scoring</p>")
+        
+        results.append("<h2>4. RÉSUMÉ</h2>")
+        results.append("<p>Diagnostic terminé. Vérifiez les points ci-dessus.</p>")
+        results.append("<p><strong>Actions recommandées:</strong></p>")
+        results.append("<ul>")
+        results.append("<li>Tester un exercice 'Texte à trous' après ces corrections</li>")
+        results.append("<li>Vérifier l'affichage des images</li>")
+        results.append("<li>Valider que le score atteint 100% avec toutes les bonnes réponses</li>")
+        results.append("</ul>")
+        
+        return "<br>".join(results)
+        
+    except Exception as e:
+        return f"<h1>ERREUR</h1><p>Erreur lors du diagnostic: {str(e)}</p><pre>{traceback.format_exc()}</pre>"
+
+
+@diagnostic_bp.route('/debug-form-data', methods=['GET', 'POST'])
+@login_required
+def debug_form_data():
+    # Route de débogage pour analyser les données POST des formulaires
+    if not current_user.is_admin:
+        flash('Accès non autorisé.', 'danger')
+        return redirect(url_for('index'))
+    
+    if request.method == 'POST':
+        category_log.DEBUG_FORM_DATA.info('Données POST reçues: %s', request.form)
+        
+        # Analyser les données du formulaire
+        form_data = dict(request.form)
+        
+        # Extraire les champs answer_X
+        answer_fields = {k: v for k, v in form_data.items() if k.startswith('answer_')}
+        
+        # Analyser les indices des champs answer_X
+        answer_indices = []
+        for key in answer_fields.keys():
+            try:
+                index = int(key.split('_')[1])
+                answer_indices.append(index)
+            except (ValueError, IndexError):
+                pass
+        
+        # Trier les indices
+        answer_indices.sort()
+        
+        # Créer un rapport détaillé
+        report = {
+            'total_fields': len(form_data),
+            'answer_fields': len(answer_fields),
+            'answer_indices': answer_indices,
+            'answer_values': {f"answer_{i}": form_data.get(f"answer_{i}", "") for i in answer_indices},
+            'all_form_data': form_data
+        }
+        
+        return jsonify({
+            'success': True,
+            'message': 'Données du formulaire analysées avec succès',
+            'report': report
+        })
+    
+    # Afficher un formulaire de test pour les requêtes GET
+    return render_template('debug/form_data.html')
+
+
+
+def init_app(app):
+    """Enregistre les routes de diagnostic."""
+    app.register_blueprint(diagnostic_bp)
@@ -0,0 +1,138 @@
+"""
+Service d'autorisation d'accès aux exercices
+
+Répond à « l'utilisateur U peut-il voir les statistiques / tentatives de
+l'exercice E ? » par une seule requête EXISTS sur class → course →
+course_exercise (index ix_course_exercise_exercise_course), au lieu de
+parcourir les classes, cours et exercices de l'enseignant.
+
+Les réponses sont mémorisées dans flask.g : une vue et ses gabarits qui
+posent plusieurs fois la même question pendant une requête ne paient
+qu'une requête SQL.
+"""
+
+from flask import g, has_app_context
+
+from extensions import db
+from models import Class, Course, Exercise, course_exercise, student_class_association
+
+
+def _memo():
+    """Mémo de la requête (ou du contexte d'application) en cours"""
+    if not has_app_context():
+        return {}
+    if '_exercise_access' not in g:
+        g._exercise_access = {}
+    return g._exercise_access
+
+
+def clear_access_memo():
+    """Oublie les réponses mémorisées (après modification des cours ou des inscriptions)"""
+    if has_app_context():
+        g.pop('_exercise_access', None)
+
+
+def _remember(key, compute):
+    """Réponse mémorisée pour la clé, calculée au premier appel"""
+    memo = _memo()
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def _taught_exists(user_id, exercise_id):
+    """EXISTS : l'exercice est dans un cours d'une classe de l'enseignant"""
+    return db.select(course_exercise.c.exercise_id).join(
+        Course, Course.id == course_exercise.c.course_id
+    ).join(
+        Class, Class.id == Course.class_id
+    ).where(
+        course_exercise.c.exercise_id == exercise_id,
+        Class.teacher_id == user_id
+    ).exists()
+
+
+def _enrolled_exists(user_id, exercise_id):
+    """EXISTS : l'exercice est dans un cours d'une classe où l'étudiant est inscrit"""
+    sc = student_class_association
+    return db.select(course_exercise.c.exercise_id).join(
+        Course, Course.id == course_exercise.c.course_id
+    ).join(
+        sc, sc.c.class_id == Course.class_id
+    ).where(
+        course_exercise.c.exercise_id == exercise_id,
+        sc.c.student_id == user_id
+    ).exists()
+
+
+def _owned_exists(user_id, exercise_id):
+    """EXISTS : l'exercice a été créé par l'utilisateur"""
+    return db.select(Exercise.id).where(
+        Exercise.id == exercise_id,
+        Exercise.teacher_id == user_id
+    ).exists()
+
+
+def can_view_exercise_stats(user, exercise_id):
+    """
+    L'enseignant peut-il voir les statistiques de l'exercice ?
+
+    Oui s'il en est l'auteur ou si l'exercice fait partie d'un cours d'une
+    de ses classes.
+
+    Args:
+        user (User): Utilisateur (current_user)
+        exercise_id (int): Identifiant de l'exercice
+
+    Returns:
+        bool
+    """
+    if not user.is_authenticated or not user.is_teacher:
+        return False
+    return _remember(('stats', user.id, exercise_id), lambda: bool(db.session.scalar(db.select(
+        db.or_(_owned_exists(user.id, exercise_id), _taught_exists(user.id, exercise_id))
+    ))))
+
+
+def can_view_exercise_attempts(user, exercise_id):
+    """
+    L'utilisateur peut-il voir des tentatives de l'exercice ?
+
+    Un enseignant suit la règle des statistiques ; un étudiant doit être
+    inscrit dans une classe dont un cours contient l'exercice.
+
+    Args:
+        user (User): Utilisateur (current_user)
+        exercise_id (int): Identifiant de l'exercice
+
+    Returns:
+        bool
+    """
+    if not user.is_authenticated:
+        return False
+    if user.is_teacher:
+        return can_view_exercise_stats(user, exercise_id)
+    return _remember(('attempts', user.id, exercise_id), lambda: bool(db.session.scalar(db.select(
+        _enrolled_exists(user.id, exercise_id)
+    ))))
+
+
+def exercise_in_course(exercise_id, course_id):
+    """L'exercice fait-il partie du cours ? (sans charger course.exercises)"""
+    return _remember(('course', exercise_id, course_id), lambda: bool(db.session.scalar(db.select(
+        db.select(course_exercise.c.exercise_id).where(
+            course_exercise.c.course_id == course_id,
+            course_exercise.c.exercise_id == exercise_id
+        ).exists()
+    ))))
+
+
+def init_app(app):
+    """Expose les vérifications d'accès aux gabarits."""
+
+    @app.context_processor
+    def inject_exercise_access():
+        return {
+            'can_view_exercise_stats': can_view_exercise_stats,
+            'can_view_exercise_attempts': can_view_exercise_attempts,
+        }
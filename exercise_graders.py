@@ -0,0 +1,839 @@
+"""
+Correcteurs d'exercices (un correcteur par type d'exercice)
+
+La correction se fait en deux étapes :
+
+1. compile_answer_key() transforme le contenu décodé de l'exercice en un
+   corrigé compilé (réponses attendues normalisées, correspondance
+   blanc -> phrase, chaînes de comparaison en minuscules...). Ce travail ne
+   dépend que du contenu et est mis en cache par answer_key_cache.
+2. Le correcteur du type reçoit le corrigé compilé et les données du
+   formulaire (MultiDict ou dict) et retourne un GradingResult en un seul
+   passage sur le formulaire.
+
+Les routes de soumission des élèves vérifient d'abord que le formulaire est
+complet (registre VALIDATORS) : un formulaire incomplet lève GradingError et
+n'est pas corrigé.
+
+Les compilateurs et les correcteurs sont des fonctions pures : aucun accès à
+la base de données, à la requête ou au logger de l'application. Ils peuvent
+être importés, testés et mesurés isolément.
+
+Toutes les routes de soumission (handle_exercise_answer, submit_answer,
+submit_exercise et exercise.submit_answer) passent par ce module ; le
+correcteur est choisi en O(1) dans le registre GRADERS.
+"""
+
+import json
+import string
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Résultat d'une correction
+# - score: pourcentage (0-100)
+# - answers: réponses de l'élève à enregistrer dans ExerciseAttempt.answers
+# - feedback: structure enregistrée dans ExerciseAttempt.feedback
+# - score_count / max_score: nombre d'éléments corrects / total
+GradingResult = namedtuple('GradingResult', ['score', 'answers', 'feedback', 'score_count', 'max_score'])
+
+# Registre des correcteurs : exercise_type -> fonction(key, form) -> GradingResult
+GRADERS = {}
+
+# Registre des compilateurs : exercise_type -> fonction(content) -> corrigé compilé
+COMPILERS = {}
+
+# Correcteurs par lot : exercise_type -> fonction(key, forms) -> [GradingResult]
+# (types dont la correction se fait colonne par colonne sur une matrice de réponses)
+BATCH_GRADERS = {}
+
+# Contrôles de complétude : exercise_type -> fonction(key, form), lève GradingError
+VALIDATORS = {}
+
+BLANK_MARKER = '___'
+
+
+class GradingError(ValueError):
+    """Contenu d'exercice inexploitable ou type non pris en charge (message affichable)."""
+
+
+def register_grader(exercise_type):
+    """Décorateur d'enregistrement d'un correcteur pour un type d'exercice."""
+    def decorator(func):
+        GRADERS[exercise_type] = func
+        return func
+    return decorator
+
+
+def register_compiler(exercise_type):
+    """Décorateur d'enregistrement du compilateur de corrigé d'un type d'exercice."""
+    def decorator(func):
+        COMPILERS[exercise_type] = func
+        return func
+    return decorator
+
+
+def register_batch_grader(exercise_type):
+    """Décorateur d'enregistrement d'un correcteur par lot pour un type d'exercice."""
+    def decorator(func):
+        BATCH_GRADERS[exercise_type] = func
+        return func
+    return decorator
+
+
+def register_validator(exercise_type):
+    """Décorateur d'enregistrement du contrôle de complétude d'un type d'exercice."""
+    def decorator(func):
+        VALIDATORS[exercise_type] = func
+        return func
+    return decorator
+
+
+def get_grader(exercise_type):
+    """Retourne le correcteur d'un type d'exercice ou lève GradingError."""
+    try:
+        return GRADERS[exercise_type]
+    except KeyError:
+        raise GradingError(f"Le type d'exercice {exercise_type} n'est pas pris en charge.")
+
+
+def parse_content(raw_content):
+    """
+    Décode le contenu JSON d'un exercice.
+
+    Args:
+        raw_content (str|dict): Contenu brut (Exercise.content) ou déjà décodé
+
+    Returns:
+        dict: Contenu décodé ({} si vide ou invalide)
+    """
+    if isinstance(raw_content, dict):
+        return raw_content
+    if not raw_content:
+        return {}
+    try:
+        content = json.loads(raw_content)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return content if isinstance(content, dict) else {}
+
+
+def compile_answer_key(exercise_type, content):
+    """
+    Compile le corrigé d'un exercice.
+
+    Args:
+        exercise_type (str): Type de l'exercice
+        content (dict|str): Contenu décodé ou JSON brut
+
+    Returns:
+        dict: Corrigé compilé (structure propre à chaque type)
+
+    Raises:
+        GradingError: Type non pris en charge ou contenu invalide
+    """
+    get_grader(exercise_type)
+    content = parse_content(content)
+    compiler = COMPILERS.get(exercise_type)
+    return compiler(content) if compiler else content
+
+
+def grade_with_key(exercise_type, key, form):
+    """Corrige une soumission à partir d'un corrigé déjà compilé."""
+    return get_grader(exercise_type)(key, form)
+
+
+def grade_batch_with_key(exercise_type, key, forms):
+    """
+    Corrige plusieurs soumissions d'un même exercice avec un seul corrigé.
+
+    Les types disposant d'un correcteur par lot (BATCH_GRADERS) sont corrigés
+    colonne par colonne ; les autres soumission par soumission.
+
+    Returns:
+        list: Un GradingResult par formulaire, dans l'ordre
+    """
+    grader = get_grader(exercise_type)
+    batch_grader = BATCH_GRADERS.get(exercise_type)
+    if batch_grader:
+        return batch_grader(key, forms)
+    return [grader(key, form) for form in forms]
+
+
+def grade_submission(exercise_type, content, form):
+    """
+    Corrige une soumission (compilation du corrigé incluse, sans cache).
+
+    Args:
+        exercise_type (str): Type de l'exercice
+        content (dict): Contenu de l'exercice déjà décodé
+        form: Données du formulaire (request.form ou dict)
+
+    Returns:
+        GradingResult
+
+    Raises:
+        GradingError: Type non pris en charge ou contenu invalide
+    """
+    return grade_with_key(exercise_type, compile_answer_key(exercise_type, content), form)
+
+
+def validate_submission(exercise_type, key, form):
+    """Vérifie qu'une soumission est complète ; lève GradingError sinon."""
+    validator = VALIDATORS.get(exercise_type)
+    if validator:
+        validator(key, form)
+
+
+def grade_exercise(exercise, form, validate=False):
+    """
+    Corrige une soumission pour un objet Exercise avec le corrigé mis en cache.
+
+    Args:
+        validate (bool): Refuser un formulaire incomplet (GradingError) au lieu
+            de le corriger
+    """
+    from answer_key_cache import get_answer_key
+    key = get_answer_key(exercise)
+    if validate:
+        validate_submission(exercise.exercise_type, key, form)
+    return grade_with_key(exercise.exercise_type, key, form)
+
+
+# ===== FONCTIONS UTILITAIRES =====
+
+def percentage(count, total):
+    """Pourcentage count/total (0 si total est nul)."""
+    return (count / total) * 100 if total > 0 else 0
+
+
+def to_int(value, default=-1):
+    """Conversion tolérante en entier."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def getlist(form, name):
+    """Valeurs multiples d'un champ (MultiDict) ou valeur simple (dict)."""
+    if hasattr(form, 'getlist'):
+        return form.getlist(name)
+    value = form.get(name)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def column_hits(matrix, expected):
+    """
+    Compare une matrice de réponses entières au corrigé, colonne par colonne.
+
+    Args:
+        matrix (list): Une ligne par soumission, une colonne par question
+        expected (list): Valeur attendue pour chaque colonne
+
+    Returns:
+        list: Une ligne de booléens par soumission (réponse >= 0 et égale à l'attendu)
+    """
+    if not matrix:
+        return []
+    columns = [[value >= 0 and value == correct for value in column]
+               for column, correct in zip(zip(*matrix), expected)]
+    if not columns:
+        return [[] for _ in matrix]
+    return [list(row) for row in zip(*columns)]
+
+
+def sentence_texts(sentences):
+    """Phrases sous forme de chaînes (les phrases peuvent être des dicts {'text': ...})."""
+    return [s['text'] if isinstance(s, dict) and 'text' in s else (s if isinstance(s, str) else '')
+            for s in sentences]
+
+
+def blank_sentence_map(sentences):
+    """
+    Associe chaque blanc (indice global) à l'indice de sa phrase, en une passe.
+
+    Équivalent à appeler get_blank_location() pour chaque blanc, sans le coût
+    O(blancs × phrases).
+
+    Returns:
+        list: sentence_index pour chaque blanc global
+    """
+    mapping = []
+    for sentence_index, sentence in enumerate(sentences):
+        mapping.extend([sentence_index] * sentence.count(BLANK_MARKER))
+    return mapping
+
+
+def normalize_underlined_word(word):
+    """Normalise un mot souligné (minuscules, ponctuation, élision l' d' ...)."""
+    normalized = word.lower().strip('.,!?;:\'"()[]{}«»')
+    if normalized.startswith(("l'", "d'", "n'", "m'", "t'", "s'", "c'", "j'")):
+        normalized = normalized[2:]
+    elif normalized.startswith("qu'"):
+        normalized = normalized[3:]
+    return normalized
+
+
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+
+def normalize_dictation_text(text):
+    """Normalise une phrase de dictée (minuscules, sans ponctuation, espaces simples)."""
+    return ' '.join(text.lower().translate(_PUNCTUATION_TABLE).split())
+
+
+def _compile_blanks(correct_answers, sentences, total_blanks_in_content):
+    """Corrigé commun à fill_in_blanks et word_placement."""
+    total_blanks = max(total_blanks_in_content, len(correct_answers))
+    sentence_of_blank = blank_sentence_map(sentences)
+    blanks = []
+    for i in range(total_blanks):
+        expected = correct_answers[i] if i < len(correct_answers) else ''
+        sentence_index = sentence_of_blank[i] if i < len(sentence_of_blank) else -1
+        blanks.append((
+            expected,
+            str(expected).strip().lower(),
+            sentence_index,
+            sentences[sentence_index] if sentence_index >= 0 else ''
+        ))
+    return {'blanks': blanks}
+
+
+def _grade_blanks(key, form):
+    """Correction commune à fill_in_blanks et word_placement (un champ answer_i par blanc)."""
+    correct_blanks = 0
+    details = []
+    user_answers = {}
+    for i, (correct_answer, expected_lower, sentence_index, sentence) in enumerate(key['blanks']):
+        user_answer = (form.get(f'answer_{i}') or '').strip()
+        is_correct = bool(user_answer) and user_answer.lower() == expected_lower
+        if is_correct:
+            correct_blanks += 1
+
+        details.append({
+            'blank_index': i,
+            'user_answer': user_answer,
+            'correct_answer': correct_answer,
+            'is_correct': is_correct,
+            'status': 'Correct' if is_correct else f'Attendu: {correct_answer}, Réponse: {user_answer or "Vide"}',
+            'sentence_index': sentence_index,
+            'sentence': sentence
+        })
+        user_answers[f'answer_{i}'] = user_answer
+
+    total_blanks = len(key['blanks'])
+    score = percentage(correct_blanks, total_blanks)
+    feedback = {
+        'score': score,
+        'correct_blanks': correct_blanks,
+        'total_blanks': total_blanks,
+        'details': details
+    }
+    return GradingResult(score, user_answers, feedback, correct_blanks, total_blanks)
+
+
+# ===== CORRECTEURS =====
+
+@register_compiler('qcm')
+def compile_qcm(content):
+    questions = content.get('questions')
+    if not isinstance(questions, list) or not questions:
+        raise GradingError("Structure de l'exercice invalide.")
+
+    compiled = []
+    for question in questions:
+        options = question.get('options') or question.get('choices') or []
+        correct = to_int(question.get('correct', question.get('correct_answer')))
+        compiled.append((
+            question.get('text') or question.get('question', ''),
+            options,
+            correct,
+            options[correct] if 0 <= correct < len(options) else 'Non spécifiée'
+        ))
+    return {'questions': compiled}
+
+
+@register_grader('qcm')
+def grade_qcm(key, form):
+    """QCM : une réponse answer_i (indice d'option) par question."""
+    return grade_qcm_batch(key, [form])[0]
+
+
+@register_validator('qcm')
+def validate_qcm(key, form):
+    for i in range(len(key['questions'])):
+        if to_int(form.get(f'answer_{i}'), None) is None:
+            raise GradingError('Veuillez répondre à toutes les questions.')
+
+
+@register_batch_grader('qcm')
+def grade_qcm_batch(key, forms):
+    questions = key['questions']
+    total_questions = len(questions)
+    matrix = [[to_int(form.get(f'answer_{i}')) for i in range(total_questions)] for form in forms]
+    hits = column_hits(matrix, [correct for _, _, correct, _ in questions])
+
+    results = []
+    for answers, row_hits in zip(matrix, hits):
+        feedback = [{
+            'question': text,
+            'student_answer': options[answer] if 0 <= answer < len(options) else 'Aucune réponse',
+            'correct_answer': correct_text,
+            'is_correct': is_correct
+        } for (text, options, _, correct_text), answer, is_correct in zip(questions, answers, row_hits)]
+        correct_count = sum(row_hits)
+        results.append(GradingResult(
+            percentage(correct_count, total_questions), answers, feedback, correct_count, total_questions
+        ))
+    return results
+
+
+@register_compiler('qcm_multichoix')
+def compile_qcm_multichoix(content):
+    questions = content.get('questions', [])
+    if not questions:
+        raise GradingError("Erreur: aucune question trouvée dans l'exercice.")
+
+    compiled = []
+    for question in questions:
+        options = question.get('options', [])
+        correct_options = question.get('correct_options', [])
+        compiled.append((
+            question.get('question', ''),
+            options,
+            frozenset(correct_options),
+            [options[i] for i in correct_options if i < len(options)]
+        ))
+    return {'questions': compiled}
+
+
+@register_grader('qcm_multichoix')
+def grade_qcm_multichoix(key, form):
+    """QCM à choix multiples : question_i[] contient les options cochées."""
+    questions = key['questions']
+    correct_questions = 0
+    details = []
+    user_answers = {}
+    for question_index, (text, options, correct_set, correct_options_text) in enumerate(questions):
+        selected = [int(idx) for idx in getlist(form, f'question_{question_index}[]') if idx.isdigit()]
+        is_correct = set(selected) == correct_set
+        if is_correct:
+            correct_questions += 1
+
+        user_options = [options[i] for i in selected if i < len(options)]
+        details.append({
+            'question_index': question_index,
+            'question_text': text,
+            'user_selected': user_options,
+            'correct_options': correct_options_text,
+            'is_correct': is_correct,
+            'status': 'Correct' if is_correct else f'Attendu: {", ".join(correct_options_text)}, Réponse: {", ".join(user_options) if user_options else "Aucune réponse"}'
+        })
+        user_answers[f'question_{question_index}'] = selected
+
+    total_questions = len(questions)
+    score = round(percentage(correct_questions, total_questions))
+    feedback = {
+        'score': score,
+        'correct_questions': correct_questions,
+        'total_questions': total_questions,
+        'details': details
+    }
+    return GradingResult(score, user_answers, feedback, correct_questions, total_questions)
+
+
+@register_compiler('pairs')
+def compile_pairs(content):
+    pairs = content.get('pairs', [])
+    if not pairs:
+        raise GradingError("Erreur: aucune paire trouvée dans l'exercice.")
+    return {
+        'lefts': [pair.get('left') for pair in pairs],
+        'rights': [pair.get('right') for pair in pairs]
+    }
+
+
+@register_grader('pairs')
+def grade_pairs(key, form):
+    """Association de paires : left_i contient l'indice de l'élément de droite choisi."""
+    return grade_pairs_batch(key, [form])[0]
+
+
+@register_validator('pairs')
+def validate_pairs(key, form):
+    for i in range(len(key['lefts'])):
+        if to_int(form.get(f'left_{i}') or form.get(f'pair_{i}'), None) is None:
+            raise GradingError('Veuillez associer toutes les paires.')
+
+
+@register_batch_grader('pairs')
+def grade_pairs_batch(key, forms):
+    lefts, rights = key['lefts'], key['rights']
+    total_pairs = len(lefts)
+    # left_i (templates actuels) ou pair_i (ancien formulaire)
+    matrix = [[to_int(form.get(f'left_{i}') or form.get(f'pair_{i}')) for i in range(total_pairs)]
+              for form in forms]
+    hits = column_hits(matrix, range(total_pairs))
+
+    results = []
+    for user_rights, row_hits in zip(matrix, hits):
+        details = [{
+            'left_index': left_index,
+            'left_item': lefts[left_index],
+            'expected_right': rights[left_index],
+            'given_right': rights[user_right_index] if 0 <= user_right_index < total_pairs else None,
+            'is_correct': is_correct
+        } for left_index, (user_right_index, is_correct) in enumerate(zip(user_rights, row_hits))]
+        score_count = sum(row_hits)
+        score = percentage(score_count, total_pairs)
+        feedback = {
+            'score': score,
+            'score_count': score_count,
+            'max_score': total_pairs,
+            'details': details
+        }
+        answers = {f'left_{i}': str(index) for i, index in enumerate(user_rights)}
+        results.append(GradingResult(score, answers, feedback, score_count, total_pairs))
+    return results
+
+
+@register_compiler('fill_in_blanks')
+def compile_fill_in_blanks(content):
+    correct_answers = content.get('words') or content.get('available_words') or []
+    if not correct_answers:
+        raise GradingError("Erreur: aucune réponse correcte trouvée dans l'exercice.")
+
+    # Priorité à 'sentences' pour éviter le double comptage avec 'text'
+    if 'sentences' in content:
+        sentences = sentence_texts(content['sentences'])
+        total_blanks_in_content = sum(s.count(BLANK_MARKER) for s in sentences)
+    else:
+        sentences = []
+        total_blanks_in_content = content.get('text', '').count(BLANK_MARKER)
+
+    return _compile_blanks(correct_answers, sentences, total_blanks_in_content)
+
+
+@register_grader('fill_in_blanks')
+def grade_fill_in_blanks(key, form):
+    """Texte à trous : answer_i (indice global du blanc) comparé à words[i]."""
+    return _grade_blanks(key, form)
+
+
+@register_compiler('word_placement')
+def compile_word_placement(content):
+    if 'sentences' not in content or 'answers' not in content:
+        raise GradingError("Structure de l'exercice invalide.")
+
+    sentences = sentence_texts(content['sentences'])
+    total_blanks_in_content = sum(s.count(BLANK_MARKER) for s in sentences)
+    return _compile_blanks(content['answers'], sentences, total_blanks_in_content)
+
+
+@register_grader('word_placement')
+def grade_word_placement(key, form):
+    """Mots à placer : answer_i (indice global du blanc) comparé à answers[i]."""
+    return _grade_blanks(key, form)
+
+
+@register_validator('word_placement')
+def validate_word_placement(key, form):
+    answered = 0
+    while form.get(f'answer_{answered}') is not None:
+        answered += 1
+    if answered != len(key['blanks']):
+        raise GradingError('Nombre de réponses incorrect.')
+
+
+@register_compiler('underline_words')
+def compile_underline_words(content):
+    sentences = content.get('words') or content.get('sentences') or []
+    if not sentences:
+        raise GradingError("Erreur: aucune phrase trouvée dans l'exercice.")
+    return {'sentences': [(
+        sentence_data.get('text', ''),
+        frozenset(normalize_underlined_word(word)
+                  for word in sentence_data.get('words_to_underline', []) if word.strip())
+    ) for sentence_data in sentences]}
+
+
+@register_grader('underline_words')
+def grade_underline_words(key, form):
+    """Souligner les mots : selected_words_i contient les mots soulignés (séparés par des virgules)."""
+    sentences = key['sentences']
+    correct_sentences = 0
+    details = []
+    answers = {}
+    for i, (text, expected_words) in enumerate(sentences):
+        raw = form.get(f'selected_words_{i}', '')
+        if raw:
+            user_underlined = [word.strip() for word in raw.split(',') if word.strip()]
+        else:
+            user_underlined = getlist(form, f'underlined_words_{i}[]')
+
+        user_words = set(normalize_underlined_word(word) for word in user_underlined if word.strip())
+        is_correct = user_words == expected_words
+        if is_correct:
+            correct_sentences += 1
+
+        details.append({
+            'sentence_index': i,
+            'sentence_text': text,
+            'user_underlined': list(user_words),
+            'expected_words': list(expected_words),
+            'is_correct': is_correct,
+            'missing_words': list(expected_words - user_words),
+            'extra_words': list(user_words - expected_words)
+        })
+        answers[f'selected_words_{i}'] = raw
+
+    total_sentences = len(sentences)
+    score = percentage(correct_sentences, total_sentences)
+    feedback = {
+        'score': score,
+        'correct_sentences': correct_sentences,
+        'total_sentences': total_sentences,
+        'details': details
+    }
+    return GradingResult(score, answers, feedback, correct_sentences, total_sentences)
+
+
+@register_compiler('drag_and_drop')
+def compile_drag_and_drop(content):
+    return {
+        'items': content.get('draggable_items', []),
+        'correct_order': content.get('correct_order', [])
+    }
+
+
+@register_grader('drag_and_drop')
+def grade_drag_and_drop(key, form):
+    """Glisser-déposer : answer_i contient l'indice de l'élément déposé dans la zone i."""
+    return grade_drag_and_drop_batch(key, [form])[0]
+
+
+@register_batch_grader('drag_and_drop')
+def grade_drag_and_drop_batch(key, forms):
+    items, correct_order = key['items'], key['correct_order']
+    max_score = len(correct_order)
+    matrix = [[to_int(form.get(f'answer_{i}')) for i in range(len(items))] for form in forms]
+    hits = column_hits(matrix, correct_order)
+
+    results = []
+    for user_order, row_hits in zip(matrix, hits):
+        details = [{
+            'zone': i + 1,
+            'expected': items[correct_idx] if 0 <= correct_idx < len(items) else 'Vide',
+            'given': items[user_idx] if 0 <= user_idx < len(items) else 'Vide',
+            'is_correct': is_correct
+        } for i, (user_idx, correct_idx, is_correct) in enumerate(zip(user_order, correct_order, row_hits))]
+        score_count = sum(row_hits)
+        score = round(percentage(score_count, max_score))
+        feedback = {
+            'score': score,
+            'score_count': score_count,
+            'max_score': max_score,
+            'details': details
+        }
+        answers = {f'answer_{i}': str(idx) for i, idx in enumerate(user_order)}
+        results.append(GradingResult(score, answers, feedback, score_count, max_score))
+    return results
+
+
+@register_compiler('word_search')
+def compile_word_search(content):
+    words_to_find = content.get('words', [])
+    if not words_to_find:
+        raise GradingError("Erreur: aucun mot trouvé dans l'exercice.")
+    return {'words': list(words_to_find), 'targets': frozenset(words_to_find)}
+
+
+@register_grader('word_search')
+def grade_word_search(key, form):
+    """Mots mêlés : word_i (ou found_words séparés par des virgules) contient les mots trouvés."""
+    words_to_find, targets = key['words'], key['targets']
+
+    found_words = []
+    for name, value in form.items():
+        if name.startswith('word_') and value:
+            word = value.strip().upper()
+            if word and word != 'UNDEFINED':
+                found_words.append(word)
+    if not found_words:
+        found_words = [word.strip().upper() for word in form.get('found_words', '').split(',') if word.strip()]
+
+    found = set(found_words)
+    correct_words = [word for word in found_words if word in targets]
+    incorrect_words = [word for word in found_words if word not in targets]
+    missed_words = [word for word in words_to_find if word not in found]
+
+    score_count = len(correct_words)
+    max_score = len(words_to_find)
+    score = percentage(score_count, max_score)
+    feedback = {
+        'correct_words': correct_words,
+        'incorrect_words': incorrect_words,
+        'missed_words': missed_words,
+        'total_found': len(found_words),
+        'total_correct': score_count,
+        'total_words': max_score
+    }
+    return GradingResult(score, {'found_words': ','.join(found_words)}, feedback, score_count, max_score)
+
+
+@register_compiler('dictation')
+def compile_dictation(content):
+    reference_sentences = content.get('sentences', [])
+    if not reference_sentences:
+        raise GradingError("Erreur: aucune phrase trouvée dans l'exercice.")
+
+    compiled = []
+    for reference_sentence in reference_sentences:
+        reference_text = reference_sentence.strip()
+        reference_normalized = normalize_dictation_text(reference_text)
+        compiled.append((reference_text, reference_normalized, reference_normalized.split()))
+    return {'sentences': compiled}
+
+
+@register_grader('dictation')
+def grade_dictation(key, form):
+    """Dictée : dictation_answer_i comparé à la phrase de référence i (sans casse ni ponctuation)."""
+    sentences = key['sentences']
+    correct_sentences = 0
+    details = []
+    answers = {}
+    for i, (reference_text, reference_normalized, reference_words) in enumerate(sentences):
+        user_answer = (form.get(f'dictation_answer_{i}') or '').strip()
+        answers[f'dictation_answer_{i}'] = user_answer
+
+        user_normalized = normalize_dictation_text(user_answer)
+        is_correct = user_normalized == reference_normalized
+        if is_correct:
+            correct_sentences += 1
+
+        # Similarité : pourcentage de mots corrects à la même position
+        user_words = user_normalized.split()
+        if reference_words:
+            correct_words = sum(1 for user_word, ref_word in zip(user_words, reference_words)
+                                if user_word == ref_word and user_word != '')
+            similarity = (correct_words / len(reference_words)) * 100
+        else:
+            similarity = 100 if not user_words else 0
+
+        details.append({
+            'sentence_index': i,
+            'user_answer': user_answer,
+            'reference_sentence': reference_text,
+            'is_correct': is_correct,
+            'similarity': round(similarity, 1),
+            'status': 'Correct' if is_correct else f'Similarité: {round(similarity, 1)}%'
+        })
+
+    total_sentences = len(sentences)
+    score = round(percentage(correct_sentences, total_sentences))
+    feedback = {
+        'score': score,
+        'correct_sentences': correct_sentences,
+        'total_sentences': total_sentences,
+        'details': details
+    }
+    return GradingResult(score, answers, feedback, correct_sentences, total_sentences)
+
+
+@register_compiler('image_labeling')
+def compile_image_labeling(content):
+    zones = content.get('zones', [])
+    if not zones:
+        raise GradingError("Erreur: aucune zone trouvée dans l'exercice.")
+    # Les zones sont numérotées à partir de 1
+    return {'zones': [(str(i + 1), zone.get('label', ''), zone.get('label', '').lower().strip())
+                      for i, zone in enumerate(zones)]}
+
+
+@register_grader('image_labeling')
+def grade_image_labeling(key, form):
+    """Étiquetage d'image : user_answers (JSON {numéro de zone: étiquette})."""
+    try:
+        user_answers = json.loads(form.get('user_answers', '{}') or '{}')
+    except json.JSONDecodeError:
+        user_answers = {}
+    if not isinstance(user_answers, dict):
+        user_answers = {}
+
+    zones = key['zones']
+    correct_zones = 0
+    details = []
+    for zone_id, expected_label, expected_lower in zones:
+        user_label = str(user_answers.get(zone_id, ''))
+        is_correct = user_label.lower().strip() == expected_lower
+        if is_correct:
+            correct_zones += 1
+        details.append({
+            'zone_id': zone_id,
+            'expected_label': expected_label,
+            'user_label': user_label,
+            'is_correct': is_correct,
+            'status': 'Correct' if is_correct else f'Attendu: {expected_label}, Réponse: {user_label}'
+        })
+
+    total_zones = len(zones)
+    score = round(percentage(correct_zones, total_zones))
+    feedback = {
+        'score': score,
+        'correct_zones': correct_zones,
+        'total_zones': total_zones,
+        'details': details
+    }
+    return GradingResult(score, user_answers, feedback, correct_zones, total_zones)
+
+
+@register_compiler('flashcards')
+def compile_flashcards(content):
+    cards = content.get('cards', [])
+    if not cards:
+        raise GradingError("Erreur: aucune carte trouvée dans l'exercice.")
+    return {'cards': [(card.get('question', ''), card.get('answer', '')) for card in cards]}
+
+
+@register_grader('flashcards')
+def grade_flashcards(key, form):
+    """Cartes mémoire : le score est calculé côté navigateur (final_score, correct_answers, total_answers)."""
+    cards = key['cards']
+    try:
+        score = float(form.get('final_score', '0'))
+        score_count = int(form.get('correct_answers', '0'))
+        max_score = int(form.get('total_answers', '0'))
+    except (ValueError, TypeError):
+        logger.warning("Données de score flashcards invalides")
+        score, score_count, max_score = 0, 0, len(cards)
+
+    answers = {}
+    details = []
+    for i, (question, expected_answer) in enumerate(cards):
+        card_answer = form.get(f'card_{i}_answer', '')
+        card_correct = form.get(f'card_{i}_correct', 'false') == 'true'
+        answers[f'card_{i}'] = {
+            'answer': card_answer,
+            'correct': card_correct,
+            'expected': expected_answer
+        }
+        details.append({
+            'card_index': i,
+            'question': question,
+            'expected_answer': expected_answer,
+            'user_answer': card_answer,
+            'is_correct': card_correct
+        })
+
+    feedback = {
+        'score': score,
+        'score_count': score_count,
+        'max_score': max_score,
+        'total_cards': len(cards),
+        'details': details
+    }
+    return GradingResult(score, answers, feedback, score_count, max_score)
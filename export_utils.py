@@ -1,162 +1,311 @@
-from flask import send_file
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+"""
+Exports Excel et PDF des statistiques de classe
+
+Les lignes élèves sont consommées une par une (typiquement depuis
+statistics_service.iter_student_rows) et écrites au fil de l'eau :
+openpyxl en mode write-only pour Excel, un canvas reportlab page par page
+pour le PDF. Le fichier produit est écrit sur disque puis envoyé par
+morceaux, la mémoire utilisée ne dépend donc pas du nombre d'élèves.
+"""
+
 import os
 import tempfile
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
 from datetime import datetime
 
-def generate_class_excel(class_data):
-    """Génère un fichier Excel avec les statistiques de la classe en utilisant directement openpyxl"""
-    # Créer un nouveau classeur Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    
+from flask import Response, stream_with_context
+
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_MIMETYPE = 'application/pdf'
+
+# Taille des morceaux envoyés au client
+STREAM_CHUNK_SIZE = 64 * 1024
+
+TABLE_HEADERS = ['Élève', 'Exercices complétés', 'Score moyen (%)', 'Progression']
+
+
+def format_student_row(row, total_exercises, score_suffix=''):
+    """
+    Formate une ligne élève pour l'export.
+
+    Args:
+        row: Objet avec name, username, completed_exercises, average_score
+        total_exercises (int): Nombre d'exercices de la classe
+        score_suffix (str): Suffixe du score moyen ('%' dans le PDF)
+
+    Returns:
+        list: [nom, exercices complétés, score moyen, progression]
+    """
+    average_score = row.average_score
+    return [
+        row.name or row.username,
+        row.completed_exercises,
+        f'{average_score:.1f}{score_suffix}' if average_score is not None else '-',
+        f'{row.completed_exercises}/{total_exercises}'
+    ]
+
+
+def _new_export_path(suffix):
+    """Crée un fichier temporaire vide et retourne son chemin."""
+    fd, path = tempfile.mkstemp(prefix='export_', suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def write_class_excel(class_name, rows, total_exercises, students_count, teacher_name=None, path=None):
+    """
+    Écrit le classeur Excel des statistiques d'une classe en mode write-only.
+
+    Args:
+        class_name (str): Nom de la classe
+        rows (iterable): Lignes élèves (voir format_student_row)
+        total_exercises (int): Nombre d'exercices de la classe
+        students_count (int): Nombre d'élèves de la classe
+        teacher_name (str, optional): Nom de l'enseignant
+        path (str, optional): Fichier de destination (temporaire par défaut)
+
+    Returns:
+        str: Chemin du fichier .xlsx écrit
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    path = path or _new_export_path('.xlsx')
+
+    wb = Workbook(write_only=True)
     # Limiter le nom de la feuille à 31 caractères (limite Excel)
-    sheet_name = f"Classe {class_data['class'].name}"
-    if len(sheet_name) > 31:
-        sheet_name = sheet_name[:31]
-    ws.title = sheet_name
-    
-    # Définir les en-têtes
-    headers = ['Nom', 'Exercices complétés', 'Total exercices', 'Score moyen (%)', 'Progression (%)']
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.value = header
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Ajouter les données des élèves
-    for row_idx, student in enumerate(class_data['students'], 2):
-        # Nom
-        ws.cell(row=row_idx, column=1).value = student['student'].name or student['student'].username
-        
-        # Exercices complétés
-        ws.cell(row=row_idx, column=2).value = student['completed_exercises']
-        
-        # Total exercices
-        ws.cell(row=row_idx, column=3).value = student['total_exercises']
-        
-        # Score moyen
-        score_cell = ws.cell(row=row_idx, column=4)
-        if student['average_score'] is not None:
-            score_cell.value = f"{student['average_score']:.1f}"
-        else:
-            score_cell.value = "N/A"
-        
-        # Progression
-        progress_cell = ws.cell(row=row_idx, column=5)
-        if student['total_exercises'] > 0:
-            progress = (student['completed_exercises'] / student['total_exercises']) * 100
-            progress_cell.value = f"{progress:.1f}"
+    ws = wb.create_sheet(title=f'Statistiques {class_name}'[:31])
+
+    # Les largeurs de colonnes doivent être définies avant la première ligne
+    ws.column_dimensions['A'].width = 20
+    ws.column_dimensions['B'].width = 18
+    ws.column_dimensions['C'].width = 15
+    ws.column_dimensions['D'].width = 15
+
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    center_alignment = Alignment(horizontal='center', vertical='center')
+
+    title_cell = WriteOnlyCell(ws, value=f'Statistiques de la classe : {class_name}')
+    title_cell.font = Font(bold=True, size=16)
+    ws.append([title_cell])
+    ws.append([])
+    ws.append([f'Enseignant : {teacher_name or ""}'])
+    ws.append([f'Date d\'export : {datetime.now().strftime("%d/%m/%Y à %H:%M")}'])
+    ws.append([f'Nombre d\'élèves : {students_count}'])
+    ws.append([f'Nombre d\'exercices : {total_exercises}'])
+    ws.append([])
+
+    header_cells = []
+    for header in TABLE_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = center_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in rows:
+        # Centrer les données
+        data_cells = []
+        for value in format_student_row(row, total_exercises):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = center_alignment
+            data_cells.append(cell)
+        ws.append(data_cells)
+
+    wb.save(path)
+    return path
+
+
+def write_class_pdf(class_name, rows, total_exercises, students_count, teacher_name=None, path=None):
+    """
+    Écrit le PDF des statistiques d'une classe page par page.
+
+    Contrairement à SimpleDocTemplate, qui garde toute la story et le tableau
+    en mémoire jusqu'au build, chaque ligne est dessinée dès qu'elle est lue ;
+    seule la page courante est conservée en clair (les pages terminées sont
+    compressées).
+
+    Args:
+        class_name (str): Nom de la classe
+        rows (iterable): Lignes élèves (voir format_student_row)
+        total_exercises (int): Nombre d'exercices de la classe
+        students_count (int): Nombre d'élèves de la classe
+        teacher_name (str, optional): Nom de l'enseignant
+        path (str, optional): Fichier de destination (temporaire par défaut)
+
+    Returns:
+        str: Chemin du fichier .pdf écrit
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    path = path or _new_export_path('.pdf')
+
+    page_width, page_height = A4
+    margin = 50
+    row_height = 18
+    col_widths = [180, 110, 100, 100]
+    table_width = sum(col_widths)
+    left = (page_width - table_width) / 2
+
+    pdf = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+    pdf.setTitle(f'Statistiques de la classe : {class_name}')
+
+    def draw_row(values, y, header=False):
+        if header:
+            pdf.setFillColor(colors.grey)
         else:
-            progress_cell.value = "0.0"
-    
-    # Ajouter des informations générales
-    ws.cell(row=1, column=7).value = "Informations générales"
-    ws.cell(row=1, column=7).font = Font(bold=True)
-    
-    ws.cell(row=2, column=7).value = f"Nombre d'élèves: {len(class_data['students'])}"
-    ws.cell(row=3, column=7).value = f"Total exercices: {class_data['total_exercises']}"
-    ws.cell(row=4, column=7).value = f"Date d'export: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-    
-    # Ajuster la largeur des colonnes
-    for col_idx in range(1, 6):
-        max_length = 0
-        column = get_column_letter(col_idx)
-        
-        for row_idx in range(1, len(class_data['students']) + 2):
-            cell_value = ws.cell(row=row_idx, column=col_idx).value
-            if cell_value:
-                max_length = max(max_length, len(str(cell_value)))
-        
-        adjusted_width = max_length + 2
-        ws.column_dimensions[column].width = adjusted_width
-    
-    # Créer un buffer pour stocker le fichier Excel
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return output
+            pdf.setFillColor(colors.beige)
+        pdf.rect(left, y, table_width, row_height, stroke=1, fill=1)
+        pdf.setFillColor(colors.whitesmoke if header else colors.black)
+        pdf.setFont('Helvetica-Bold' if header else 'Helvetica', 10)
+        x = left
+        for value, width in zip(values, col_widths):
+            pdf.drawCentredString(x + width / 2, y + 5, str(value)[:40])
+            pdf.line(x, y, x, y + row_height)
+            x += width
+
+    # En-tête de la première page
+    y = page_height - margin
+    pdf.setFont('Helvetica-Bold', 18)
+    pdf.drawCentredString(page_width / 2, y - 18, f'Statistiques de la classe : {class_name}')
+    y -= 60
+    pdf.setFont('Helvetica', 11)
+    for line in (
+        f'Enseignant : {teacher_name or ""}',
+        f'Date d\'export : {datetime.now().strftime("%d/%m/%Y à %H:%M")}',
+        f'Nombre d\'élèves : {students_count}',
+        f'Nombre d\'exercices : {total_exercises}',
+    ):
+        pdf.drawString(left, y, line)
+        y -= 16
+    y -= 20
+    pdf.setFont('Helvetica-Bold', 14)
+    pdf.drawString(left, y, 'Résultats par élève')
+    y -= 10 + row_height
+    draw_row(TABLE_HEADERS, y, header=True)
+
+    for row in rows:
+        y -= row_height
+        if y < margin:
+            pdf.showPage()
+            y = page_height - margin - row_height
+            draw_row(TABLE_HEADERS, y, header=True)
+            y -= row_height
+        draw_row(format_student_row(row, total_exercises, score_suffix='%'), y)
+
+    pdf.save()
+    return path
+
+
+def iter_file_chunks(path, chunk_size=STREAM_CHUNK_SIZE, delete=True):
+    """
+    Lit un fichier par morceaux et le supprime une fois envoyé.
+
+    Args:
+        path (str): Fichier à lire
+        chunk_size (int): Taille des morceaux
+        delete (bool): Supprimer le fichier à la fin (ou en cas d'interruption)
+
+    Yields:
+        bytes
+    """
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if delete and os.path.exists(path):
+            os.remove(path)
+
+
+def stream_export_file(path, download_name, mimetype, delete=True):
+    """
+    Construit une réponse Flask qui envoie un fichier d'export par morceaux.
+
+    Args:
+        path (str): Fichier à envoyer
+        download_name (str): Nom proposé au téléchargement
+        mimetype (str): Type MIME
+        delete (bool): Supprimer le fichier après l'envoi
+
+    Returns:
+        Response
+    """
+    response = Response(
+        stream_with_context(iter_file_chunks(path, delete=delete)),
+        mimetype=mimetype,
+        direct_passthrough=True
+    )
+    response.headers['Content-Length'] = str(os.path.getsize(path))
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    return response
+
+
+def generate_class_excel(class_data):
+    """
+    Génère un fichier Excel avec les statistiques de la classe.
+
+    Args:
+        class_data (dict): Structure retournée par statistics_service.get_class_statistics
+
+    Returns:
+        file: Fichier temporaire ouvert en lecture, positionné au début
+    """
+    path = write_class_excel(
+        class_data['class'].name,
+        _rows_from_class_data(class_data),
+        class_data['total_exercises'],
+        len(class_data['students'])
+    )
+    return _open_temporary(path)
+
 
 def generate_class_pdf(class_data):
-    """Génère un fichier PDF avec les statistiques de la classe"""
-    # Créer un buffer pour stocker le PDF
-    buffer = io.BytesIO()
-    
-    # Créer le document PDF
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Heading1']
-    subtitle_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Titre
-    elements.append(Paragraph(f"Statistiques de la classe: {class_data['class'].name}", title_style))
-    elements.append(Spacer(1, 12))
-    
-    # Informations générales
-    elements.append(Paragraph("Informations générales", subtitle_style))
-    elements.append(Spacer(1, 6))
-    info_data = [
-        ["Nombre d'élèves", str(len(class_data['students']))],
-        ["Total exercices", str(class_data['total_exercises'])]
-    ]
-    info_table = Table(info_data, colWidths=[200, 100])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(info_table)
-    elements.append(Spacer(1, 12))
-    
-    # Tableau des élèves
-    elements.append(Paragraph("Résultats par élève", subtitle_style))
-    elements.append(Spacer(1, 6))
-    
-    # En-tête du tableau
-    student_data = [["Élève", "Exercices complétés", "Score moyen (%)", "Progression (%)"]]
-    
-    # Données des élèves
+    """
+    Génère un fichier PDF avec les statistiques de la classe.
+
+    Args:
+        class_data (dict): Structure retournée par statistics_service.get_class_statistics
+
+    Returns:
+        file: Fichier temporaire ouvert en lecture, positionné au début
+    """
+    path = write_class_pdf(
+        class_data['class'].name,
+        _rows_from_class_data(class_data),
+        class_data['total_exercises'],
+        len(class_data['students'])
+    )
+    return _open_temporary(path)
+
+
+def _rows_from_class_data(class_data):
+    """Adapte les dictionnaires élèves de class_data au format ligne."""
+    from statistics_service import StudentStatsRow
+
     for student in class_data['students']:
-        name = student['student'].name or student['student'].username
-        completed = f"{student['completed_exercises']} / {student['total_exercises']}"
-        avg_score = f"{student['average_score']:.1f}" if student['average_score'] is not None else "N/A"
-        progress = f"{(student['completed_exercises'] / student['total_exercises'] * 100):.1f}" if student['total_exercises'] > 0 else "0.0"
-        
-        student_data.append([name, completed, avg_score, progress])
-    
-    # Créer le tableau
-    student_table = Table(student_data, colWidths=[150, 100, 100, 100])
-    student_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.beige, colors.white])
-    ]))
-    elements.append(student_table)
-    
-    # Construire le PDF
-    doc.build(elements)
-    
-    # Réinitialiser le pointeur du buffer
-    buffer.seek(0)
-    
-    return buffer
+        yield StudentStatsRow(
+            class_id=class_data['class'].id,
+            student_id=student['student'].id,
+            name=student['student'].name,
+            username=student['student'].username,
+            completed_exercises=student['completed_exercises'],
+            average_score=student['average_score']
+        )
+
+
+def _open_temporary(path):
+    """Ouvre un fichier temporaire et le détache du système de fichiers (POSIX)."""
+    f = open(path, 'rb')
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return f
@@ -3,7 +3,10 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 
-db = SQLAlchemy()
+from db_pool import RoutingSession
+
+# Lectures envoyées au réplica dans db_pool.read_replica()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 csrf = CSRFProtect()
 login_manager = LoginManager()
 migrate = None
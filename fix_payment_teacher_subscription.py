@@ -6,7 +6,7 @@ lorsqu'un enseignant tente de souscrire à un abonnement individuel.
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
-import stripe
+from payment_service import get_stripe
 import os
 from datetime import datetime
 import traceback
@@ -92,6 +92,7 @@ def create_checkout_session():
             return jsonify({'checkout_url': session.url})
         
         # Configurer Stripe avec la clé API
+        stripe = get_stripe()
         stripe.api_key = stripe_key
         
         # Créer la session de paiement
@@ -0,0 +1,74 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+
+from extensions import db
+from models import Class, Course, Exercise, student_class_association
+from bulk_grading import grade_batch, MAX_BATCH_SUBMISSIONS
+from exercise_graders import GradingError
+from exercise_access import exercise_in_course
+
+# Blueprint pour la correction par lot (évaluations en classe)
+grading_bp = Blueprint('grading', __name__)
+
+
+def get_teacher_student_ids(teacher_id, class_id=None):
+    """Identifiants des élèves inscrits dans les classes de l'enseignant (ou dans une classe)"""
+    sc = student_class_association
+    query = db.session.query(sc.c.student_id).join(
+        Class, Class.id == sc.c.class_id
+    ).filter(Class.teacher_id == teacher_id)
+    if class_id is not None:
+        query = query.filter(Class.id == class_id)
+    return {student_id for (student_id,) in query}
+
+
+@grading_bp.route('/exercise/<int:exercise_id>/grade-batch', methods=['POST'])
+@login_required
+def grade_exercise_batch(exercise_id):
+    """
+    Corrige un lot de soumissions pour un exercice.
+
+    Corps JSON attendu :
+        {"course_id": 3, "submissions": [{"student_id": 12, "answers": {"answer_0": "1"}}, ...]}
+    """
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Accès refusé. Vous devez être enseignant.'}), 403
+
+    exercise = db.session.get(Exercise, exercise_id)
+    if exercise is None:
+        return jsonify({'error': 'Exercice non trouvé.'}), 404
+
+    data = request.get_json(silent=True) or {}
+    submissions = data.get('submissions')
+    if not isinstance(submissions, list) or not submissions:
+        return jsonify({'error': 'Aucune soumission fournie.'}), 400
+    if len(submissions) > MAX_BATCH_SUBMISSIONS:
+        return jsonify({'error': f'Trop de soumissions (maximum {MAX_BATCH_SUBMISSIONS}).'}), 413
+
+    course_id = data.get('course_id')
+    class_id = None
+    if course_id is not None:
+        course = db.session.get(Course, course_id) if isinstance(course_id, int) else None
+        if course is None or course.class_obj is None or course.class_obj.teacher_id != current_user.id:
+            return jsonify({'error': 'Cours non trouvé.'}), 404
+        class_id = course.class_id
+
+    # L'exercice doit appartenir à l'enseignant ou faire partie du cours
+    if exercise.teacher_id != current_user.id and (course_id is None or not exercise_in_course(exercise.id, course_id)):
+        return jsonify({'error': 'Exercice non trouvé.'}), 404
+
+    try:
+        results = grade_batch(
+            exercise,
+            submissions,
+            course_id=course_id,
+            allowed_student_ids=get_teacher_student_ids(current_user.id, class_id)
+        )
+    except GradingError as e:
+        return jsonify({'error': str(e)}), 422
+
+    return jsonify({
+        'exercise_id': exercise.id,
+        'graded': sum(1 for result in results if 'error' not in result),
+        'results': results
+    })
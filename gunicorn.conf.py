@@ -0,0 +1,67 @@
+"""
+Configuration gunicorn (lue automatiquement depuis le dossier courant)
+
+    gunicorn app:app
+    GUNICORN_PROFILE=sync gunicorn app:app
+
+Profils et dimensionnement : voir gunicorn_profiles.py.
+"""
+
+import os
+
+import gunicorn_profiles
+
+_settings = gunicorn_profiles.worker_settings()
+if _settings['worker_class'] == 'gevent':
+    gunicorn_profiles.patch_gevent()
+
+# Importé après le patch gevent (db_pool charge SQLAlchemy)
+import db_pool
+
+# Délai des requêtes pour les workers web seulement, pas pour les commandes flask
+os.environ.setdefault('DB_STATEMENT_TIMEOUT_MS', str(db_pool.WEB_STATEMENT_TIMEOUT_MS))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Application importée une fois dans le maître, workers forkés ensuite
+preload_app = True
+
+worker_class = _settings['worker_class']
+workers = _settings['workers']
+threads = _settings['threads']
+worker_connections = _settings['worker_connections']
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recyclage des workers pour borner la croissance mémoire
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    # Initialisation ponctuelle dans le maître, avant le premier fork,
+    # si le déploiement n'exécute pas `flask --app app init-db`
+    if os.environ.get('GUNICORN_INIT_DB', '').lower() not in ('1', 'true', 'on'):
+        return
+    app = gunicorn_profiles.flask_app(server)
+    if app is None or 'sqlalchemy' not in app.extensions:
+        return
+    from app_factory import init_database
+    from extensions import db
+    try:
+        init_database(app)
+    except Exception as e:
+        server.log.error("Erreur lors de l'initialisation de la base: %s", e)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def pre_fork(server, worker):
+    gunicorn_profiles.before_fork()
+
+
+def post_fork(server, worker):
+    gunicorn_profiles.after_fork(gunicorn_profiles.flask_app(server))
@@ -0,0 +1,112 @@
+"""
+Profils de workers gunicorn
+
+gunicorn.conf.py lit le profil dans GUNICORN_PROFILE et dimensionne les
+workers d'après le nombre de processeurs :
+
+    sync     2 × CPU + 1 processus, une requête à la fois chacun
+    gthread  CPU + 1 processus × GUNICORN_THREADS threads (4) : le défaut,
+             l'application attend surtout la base et le disque
+    gevent   CPU + 1 processus × GUNICORN_WORKER_CONNECTIONS connexions (100),
+             nécessite gevent (et psycogreen avec PostgreSQL)
+
+GUNICORN_WORKERS, GUNICORN_THREADS et GUNICORN_WORKER_CONNECTIONS
+remplacent les valeurs calculées. load_test.py compare les profils.
+
+L'application est chargée une fois dans le maître (preload_app) : les
+workers sont forkés et partagent ses pages mémoire tant qu'ils ne les
+modifient pas. Les fonctions ci-dessous, appelées par les hooks de
+gunicorn.conf.py, gèlent le ramasse-miettes avant le fork (sinon il
+réécrit l'en-tête de chaque objet et duplique les pages) et abandonnent
+dans chaque worker les connexions à la base héritées du maître.
+"""
+
+import gc
+import os
+
+PROFILES = ('sync', 'gthread', 'gevent')
+DEFAULT_PROFILE = 'gthread'
+DEFAULT_THREADS = 4
+DEFAULT_WORKER_CONNECTIONS = 100
+
+
+def worker_settings(profile=None, cpu_count=None, environ=None):
+    """
+    Réglages gunicorn d'un profil.
+
+    Args:
+        profile (str, optional): 'sync', 'gthread' ou 'gevent' (défaut : GUNICORN_PROFILE)
+        cpu_count (int, optional): Processeurs disponibles (défaut : os.cpu_count())
+        environ (dict, optional): Variables d'environnement (défaut : os.environ)
+
+    Returns:
+        dict: worker_class, workers, threads, worker_connections et
+        concurrency (requêtes traitées simultanément, tous workers confondus)
+
+    Raises:
+        ValueError: Profil inconnu
+    """
+    environ = os.environ if environ is None else environ
+    profile = (profile or environ.get('GUNICORN_PROFILE') or DEFAULT_PROFILE).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Profil gunicorn inconnu : {profile} (attendu : {', '.join(PROFILES)})")
+    cpus = cpu_count or os.cpu_count() or 1
+
+    threads = 1
+    worker_connections = DEFAULT_WORKER_CONNECTIONS
+    if profile == 'sync':
+        workers = 2 * cpus + 1
+    elif profile == 'gthread':
+        workers = cpus + 1
+        threads = int(environ.get('GUNICORN_THREADS', DEFAULT_THREADS))
+    else:
+        workers = cpus + 1
+        worker_connections = int(environ.get('GUNICORN_WORKER_CONNECTIONS', DEFAULT_WORKER_CONNECTIONS))
+    workers = int(environ.get('GUNICORN_WORKERS', workers))
+
+    per_worker = worker_connections if profile == 'gevent' else threads
+    return {
+        'profile': profile,
+        'worker_class': profile,
+        'workers': workers,
+        'threads': threads,
+        'worker_connections': worker_connections,
+        'concurrency': workers * per_worker,
+    }
+
+
+def patch_gevent():
+    """Patch gevent à appliquer avant tout import de l'application."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise RuntimeError("Le profil gevent nécessite le paquet gevent (pip install gevent)")
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        pass
+    else:
+        patch_psycopg()
+
+
+def flask_app(server):
+    """Application Flask chargée par le maître gunicorn (preload_app)."""
+    application = server.app.wsgi()
+    return application if hasattr(application, 'app_context') else None
+
+
+def before_fork():
+    # Les objets déjà créés passent dans la génération permanente : le
+    # ramasse-miettes des workers ne les parcourt plus et ne touche pas leurs pages
+    gc.freeze()
+
+
+def after_fork(app):
+    """Abandonne les pools hérités du maître (base principale et réplica) sans fermer leurs sockets."""
+    if app is None or 'sqlalchemy' not in app.extensions:
+        return
+    from extensions import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
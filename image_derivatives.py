@@ -0,0 +1,303 @@
+"""
+Déclinaisons redimensionnées des images d'exercices
+
+Les images (options de QCM, cartes, fonds d'image_labeling, paires) étaient
+envoyées dans leur résolution d'origine, aussi bien dans les vignettes de
+la bibliothèque que dans la vue élève. Ce module produit, avec Pillow
+uniquement, des déclinaisons WebP et JPEG de largeur bornée :
+
+    thumb (320 px), card (640 px), full (1280 px)
+
+Une déclinaison est générée à la première demande
+(/derivatives/<variant>/<fmt>/<chemin sous static>) ou dès l'upload
+(IMAGE_DERIVATIVES_ON_UPLOAD, via la tâche image_derivatives), puis
+conservée dans un cache disque dont la taille est bornée
+(IMAGE_DERIVATIVE_CACHE_MAX_BYTES) : au-delà, les fichiers les moins
+récemment servis sont supprimés.
+
+Dans les templates :
+
+    {{ responsive_image(url, alt='...', sizes='(max-width: 600px) 100vw, 640px') }}
+    <img src="{{ url }}" srcset="{{ image_srcset(url) }}" sizes="100px">
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+import click
+from flask import Blueprint, abort, current_app, has_app_context, send_file
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# Déclinaison → largeur maximale (pixels)
+VARIANTS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1280,
+}
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Images décodables par Pillow (le SVG est servi tel quel)
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Après une éviction, le cache est ramené à cette fraction de sa taille maximale
+EVICTION_TARGET = 0.8
+
+derivatives_bp = Blueprint('image_derivatives', __name__)
+
+
+class DerivativeCache:
+    """
+    Générateur et cache disque des déclinaisons.
+
+    Args:
+        cache_folder (str, optional): Dossier du cache (par défaut instance/image_derivatives)
+        max_bytes (int): Taille maximale du cache
+    """
+
+    def __init__(self, cache_folder=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.generated = 0
+        self.hits = 0
+        self.evicted = 0
+
+    def init_app(self, app):
+        """Enregistre la route des déclinaisons, les helpers de template et la commande."""
+        app.config.setdefault('IMAGE_DERIVATIVE_CACHE_FOLDER', os.path.join(app.instance_path, 'image_derivatives'))
+        app.config.setdefault('IMAGE_DERIVATIVE_CACHE_MAX_BYTES', self.max_bytes)
+        app.config.setdefault('IMAGE_DERIVATIVE_MAX_AGE', 86400)
+        app.config.setdefault('IMAGE_DERIVATIVES_ON_UPLOAD', False)
+        self.cache_folder = app.config['IMAGE_DERIVATIVE_CACHE_FOLDER']
+        self.max_bytes = app.config['IMAGE_DERIVATIVE_CACHE_MAX_BYTES']
+        app.extensions['image_derivatives'] = self
+        app.register_blueprint(derivatives_bp)
+        app.jinja_env.globals.update(image_srcset=image_srcset, responsive_image=responsive_image)
+
+        @app.cli.command('image-derivatives')
+        @click.option('--purge', is_flag=True, help="Vider le cache des déclinaisons.")
+        def image_derivatives_command(purge):
+            """Affiche (ou vide) le cache des déclinaisons d'images."""
+            if purge:
+                removed = self.evict(0)
+                click.echo(f"{removed} déclinaisons supprimées.")
+            stats = self.stats()
+            click.echo(f"{stats['files']} déclinaisons, {stats['bytes']} octets (max {stats['max_bytes']}).")
+
+    def _static_folder(self):
+        return current_app.static_folder if has_app_context() else None
+
+    def source_path(self, web_path):
+        """Chemin disque d'une image sous static/, ou None si elle n'est pas déclinable"""
+        if not web_path:
+            return None
+        path = web_path.split('?', 1)[0].replace('\\', '/')
+        if not path.startswith('/static/') or not path.lower().endswith(RASTER_EXTENSIONS):
+            return None
+        relative = path[len('/static/'):]
+        if '..' in relative.split('/'):
+            return None
+        folder = self._static_folder()
+        if folder is None:
+            return None
+        return os.path.join(folder, *relative.split('/'))
+
+    def derivative_path(self, source, variant, fmt):
+        """Emplacement en cache d'une déclinaison (dépend du contenu courant de la source)"""
+        stat = os.stat(source)
+        key = hashlib.sha256(f'{source}:{stat.st_mtime_ns}:{stat.st_size}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_folder, key[:2], f'{key}-{variant}.{fmt}')
+
+    def get(self, web_path, variant, fmt):
+        """
+        Chemin disque de la déclinaison, générée au besoin.
+
+        Returns:
+            str: chemin de la déclinaison, ou None si l'image est absente ou illisible
+        """
+        if variant not in VARIANTS or fmt not in FORMATS:
+            return None
+        source = self.source_path(web_path)
+        if source is None or not os.path.isfile(source):
+            return None
+        target = self.derivative_path(source, variant, fmt)
+        if os.path.exists(target):
+            self.hits += 1
+            # La date de modification sert d'ordre LRU pour l'éviction
+            try:
+                os.utime(target)
+            except OSError:
+                pass
+            return target
+        try:
+            size = self._generate(source, target, VARIANTS[variant], fmt)
+        except Exception as e:
+            logger.warning(f"Déclinaison impossible pour {web_path} ({variant}, {fmt}): {e}")
+            return None
+        self._record(size)
+        return target
+
+    def _generate(self, source, target, width, fmt):
+        from PIL import Image, ImageOps
+
+        pil_format, _, options = FORMATS[fmt]
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((width, width * 4))
+            if pil_format == 'JPEG':
+                if image.mode in ('RGBA', 'LA', 'P'):
+                    image = image.convert('RGBA')
+                    background = Image.new('RGB', image.size, (255, 255, 255))
+                    background.paste(image, mask=image.getchannel('A'))
+                    image = background
+                elif image.mode != 'RGB':
+                    image = image.convert('RGB')
+            elif image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+
+            directory = os.path.dirname(target)
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, pil_format, **options)
+                os.replace(temp_path, target)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        self.generated += 1
+        return os.path.getsize(target)
+
+    def generate_all(self, web_path):
+        """Génère toutes les déclinaisons d'une image (après un upload)"""
+        return {
+            (variant, fmt): self.get(web_path, variant, fmt) is not None
+            for variant in VARIANTS for fmt in FORMATS
+        }
+
+    def _files(self):
+        if not self.cache_folder or not os.path.isdir(self.cache_folder):
+            return []
+        files = []
+        for current, _, filenames in os.walk(self.cache_folder):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(current, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, path))
+        return files
+
+    def _record(self, size):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._total_bytes += size
+            over = self.max_bytes and self._total_bytes > self.max_bytes
+        if over:
+            self.evict(int(self.max_bytes * EVICTION_TARGET))
+
+    def evict(self, target_bytes):
+        """Supprime les déclinaisons les moins récemment servies jusqu'à target_bytes"""
+        removed = 0
+        with self._lock:
+            files = sorted(self._files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= target_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._total_bytes = total
+            self.evicted += removed
+        return removed
+
+    def stats(self):
+        """Compteurs du cache"""
+        files = self._files()
+        return {
+            'files': len(files),
+            'bytes': sum(size for _, size, _ in files),
+            'max_bytes': self.max_bytes,
+            'generated': self.generated,
+            'hits': self.hits,
+            'evicted': self.evicted,
+        }
+
+
+derivative_cache = DerivativeCache()
+
+
+@derivatives_bp.route('/derivatives/<variant>/<fmt>/<path:filename>')
+def serve_derivative(variant, fmt, filename):
+    """Sert une déclinaison d'une image de static/ (générée au premier appel)"""
+    cache = current_app.extensions['image_derivatives']
+    path = cache.get(f'/static/{filename}', variant, fmt)
+    if path is None:
+        abort(404)
+    response = send_file(path, mimetype=FORMATS[fmt][1], conditional=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('IMAGE_DERIVATIVE_MAX_AGE', 86400)
+    return response
+
+
+def derivative_url(web_path, variant, fmt='webp'):
+    """URL d'une déclinaison, ou None si l'image n'est pas déclinable"""
+    path = (web_path or '').split('?', 1)[0]
+    if not path.startswith('/static/') or not path.lower().endswith(RASTER_EXTENSIONS):
+        return None
+    return f"/derivatives/{variant}/{fmt}/{path[len('/static/'):]}"
+
+
+def image_srcset(web_path, fmt='webp'):
+    """Valeur d'attribut srcset (toutes les déclinaisons), '' si l'image n'est pas déclinable"""
+    if derivative_url(web_path, 'thumb', fmt) is None:
+        return ''
+    return ', '.join(
+        f'{derivative_url(web_path, variant, fmt)} {width}w' for variant, width in VARIANTS.items()
+    )
+
+
+def responsive_image(web_path, alt='', sizes='100vw', **attrs):
+    """
+    Balise <picture> : déclinaisons WebP, repli JPEG, image d'origine en src.
+
+    Les attributs supplémentaires (class_, style, loading...) sont reportés
+    sur la balise <img>.
+    """
+    img_attrs = {'src': web_path or '', 'alt': alt, 'loading': 'lazy'}
+    img_attrs.update({key.rstrip('_'): value for key, value in attrs.items()})
+    if derivative_url(web_path, 'thumb') is None:
+        return Markup('<img {}>').format(_attributes(img_attrs))
+    img_attrs['srcset'] = image_srcset(web_path, 'jpeg')
+    img_attrs['sizes'] = sizes
+    return Markup('<picture><source type="image/webp" srcset="{}" sizes="{}"><img {}></picture>').format(
+        image_srcset(web_path, 'webp'), sizes, _attributes(img_attrs)
+    )
+
+
+def _attributes(attrs):
+    return Markup(' ').join(
+        Markup('{}="{}"').format(name, escape(value)) for name, value in attrs.items() if value is not None
+    )
@@ -5,6 +5,7 @@ Module pour gérer les images manquantes et fournir des images de remplacement
 import os
 import logging
 from flask import current_app
+from static_asset_index import static_asset_index
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
@@ -34,9 +35,9 @@ class ImageFallbackHandler:
         if not os.path.exists(default_image_dir):
             try:
                 os.makedirs(default_image_dir)
-                logger.info(f"Dossier créé pour l'image par défaut: {default_image_dir}")
+                logger.info("Dossier créé pour l'image par défaut: %s", default_image_dir)
             except Exception as e:
-                logger.error(f"Erreur lors de la création du dossier pour l'image par défaut: {str(e)}")
+                logger.error("Erreur lors de la création du dossier pour l'image par défaut: %s", e)
                 return False
         
         # Vérifier si l'image existe
@@ -61,10 +62,10 @@ class ImageFallbackHandler:
                 
                 # Sauvegarder l'image
                 img.save(default_image_path)
-                logger.info(f"Image par défaut créée: {default_image_path}")
+                logger.info('Image par défaut créée: %s', default_image_path)
                 return True
             except Exception as e:
-                logger.error(f"Erreur lors de la création de l'image par défaut: {str(e)}")
+                logger.error("Erreur lors de la création de l'image par défaut: %s", e)
                 return False
         
         return True
@@ -86,7 +87,7 @@ class ImageFallbackHandler:
         
         # Loguer l'utilisation de l'image par défaut
         if original_path:
-            logger.warning(f"Utilisation de l'image par défaut pour: {original_path} (type: {exercise_type})")
+            logger.warning("Utilisation de l'image par défaut pour: %s (type: %s)", original_path, exercise_type)
         
         return ImageFallbackHandler.DEFAULT_IMAGE_PATH
     
@@ -108,10 +109,9 @@ class ImageFallbackHandler:
         if image_path.startswith(('http://', 'https://')):
             return True
             
-        # Convertir le chemin web en chemin physique
+        # Les chemins web sont résolus dans l'index des fichiers statiques
         if image_path.startswith('/static/'):
-            physical_path = os.path.join(current_app.static_folder, image_path[8:])
-            return os.path.isfile(physical_path)
+            return static_asset_index.exists(image_path)
             
         return False
         
@@ -162,7 +162,7 @@ class ImageFallbackHandler:
         # Vérifier chaque chemin alternatif
         for alt_path in alternative_paths:
             if ImageFallbackHandler.image_exists(alt_path):
-                logger.info(f"Image trouvée dans un chemin alternatif: {alt_path} (original: {image_path})")
+                logger.info('Image trouvée dans un chemin alternatif: %s (original: %s)', alt_path, image_path)
                 return alt_path
                 
         return None
@@ -0,0 +1,425 @@
+"""
+Moteur de migration des chemins d'images des exercices
+
+Les scripts fix_*.py, organize_static_directories.py et
+synchronize_all_exercises chargeaient tous les exercices en mémoire
+(Exercise.query.all()) et appliquaient chacun leurs propres règles. Le
+moteur les remplace par un parcours unique :
+
+    - les exercices sont lus par lots en pagination par clé
+      (id > dernier id traité ORDER BY id LIMIT n), colonnes seules, sans
+      objets ORM : la mémoire reste bornée par la taille d'un lot ;
+    - chaque référence d'image (image_path et toute chaîne du contenu JSON
+      désignant une image) passe par les règles choisies, enregistrées
+      avec @register_rule ;
+    - chaque lot est validé (commit) séparément et le dernier id traité est
+      enregistré dans un fichier d'état : une migration interrompue reprend
+      où elle s'est arrêtée ;
+    - les règles sont idempotentes, une seconde exécution ne modifie rien ;
+    - en simulation (dry_run), rien n'est écrit et les différences sont
+      décrites dans un rapport (JSON Lines).
+
+    flask migrate-image-paths --dry-run --report diff.jsonl
+    flask migrate-image-paths --rule normalize --rule resolve
+"""
+
+import json
+import logging
+import os
+import tempfile
+from collections import namedtuple
+
+import click
+from flask import current_app
+from sqlalchemy import select
+
+from blob_store import blob_store
+from extensions import db
+from models import Exercise, ImagePathAlias
+from static_asset_index import static_asset_index
+from utils.image_path_handler import normalize_image_path, clean_duplicated_path_segments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+DEFAULT_RULES = ('normalize', 'resolve')
+
+# Extensions des chaînes du contenu JSON considérées comme des images
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')
+
+# Nombre de différences conservées en mémoire pour l'affichage
+SAMPLE_SIZE = 20
+
+# Registre des règles : nom -> fonction(path, batch) -> path
+PATH_RULES = {}
+
+Change = namedtuple('Change', ['exercise_id', 'field', 'old', 'new'])
+
+
+def register_rule(name):
+    """
+    Décorateur d'enregistrement d'une règle de réécriture.
+
+    La fonction reçoit un chemin (sans paramètres de requête) et le lot en
+    cours (MigrationBatch) et retourne le chemin réécrit, ou le même chemin.
+    Elle doit être idempotente.
+    """
+    def decorator(func):
+        PATH_RULES[name] = func
+        return func
+    return decorator
+
+
+@register_rule('normalize')
+def normalize_rule(path, batch):
+    """
+    Préfixe /static/, nom de fichier normalisé, segments dupliqués retirés.
+
+    Un fichier présent sur le disque sous son nom d'origine (accents,
+    espaces, apostrophe typographique) garde ce nom : le nom normalisé ne
+    désignerait aucun fichier.
+    """
+    new = clean_duplicated_path_segments(normalize_image_path(path))
+    if new == path or static_asset_index.exists(new):
+        return new
+    filename = os.path.basename(path.replace('\\', '/'))
+    kept = new[:len(new) - len(os.path.basename(new))] + filename
+    if static_asset_index.exists(kept):
+        return kept
+    if static_asset_index.exists(path):
+        return path
+    return new
+
+
+@register_rule('resolve')
+def resolve_rule(path, batch):
+    """Chemin absent du disque → blob (table d'alias) ou emplacement réel du fichier."""
+    if not path.startswith('/static/') or static_asset_index.exists(path):
+        return path
+    alias = batch.aliases.get(path)
+    if alias is not None:
+        return alias
+    return static_asset_index.lookup(os.path.basename(path)) or path
+
+
+@register_rule('blob')
+def blob_rule(path, batch):
+    """Chemin recensé dans la table d'alias → URL du blob (mise en cache immuable)."""
+    return batch.aliases.get(path, path)
+
+
+def is_image_reference(value):
+    """La chaîne désigne-t-elle une image locale ?"""
+    if not isinstance(value, str) or not value or len(value) > 500:
+        return False
+    if value.startswith(('http://', 'https://', 'data:')) or '\n' in value:
+        return False
+    return value.split('?', 1)[0].lower().endswith(IMAGE_EXTENSIONS)
+
+
+def iter_references(node, pointer=''):
+    """(pointeur JSON, chemin) de chaque référence d'image d'un contenu décodé"""
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        items = enumerate(node)
+    else:
+        return
+    for key, value in items:
+        child = f'{pointer}/{key}'
+        if is_image_reference(value):
+            yield child, value
+        else:
+            yield from iter_references(value, child)
+
+
+def rewrite_references(node, rewrite):
+    """Réécrit en place les références d'images ; retourne la liste (pointeur, ancien, nouveau)"""
+    changes = []
+
+    def walk(current, pointer):
+        keys = current.keys() if isinstance(current, dict) else range(len(current))
+        for key in list(keys):
+            value = current[key]
+            child = f'{pointer}/{key}'
+            if is_image_reference(value):
+                new = rewrite(value)
+                if new != value:
+                    current[key] = new
+                    changes.append((child, value, new))
+            elif isinstance(value, (dict, list)):
+                walk(value, child)
+
+    if isinstance(node, (dict, list)):
+        walk(node, '')
+    return changes
+
+
+class MigrationBatch:
+    """Lot d'exercices en cours : alias préchargés pour ses références"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.aliases = {}
+
+    def prefetch_aliases(self, paths):
+        """Charge en une requête les alias des chemins du lot"""
+        paths = [path for path in paths if path.startswith('/static/')]
+        if not paths:
+            return
+        query = select(ImagePathAlias.path, ImagePathAlias.sha256, ImagePathAlias.extension).where(
+            ImagePathAlias.path.in_(paths)
+        )
+        for path, sha256, extension in db.session.execute(query):
+            self.aliases[path] = blob_store.url(sha256, extension)
+
+
+class ImagePathMigration:
+    """
+    Migration des références d'images de tous les exercices.
+
+    Args:
+        rules (iterable): Noms des règles (voir PATH_RULES), appliquées dans l'ordre
+        batch_size (int): Nombre d'exercices par lot (et par commit)
+        dry_run (bool): Simulation, aucune écriture en base
+        sync_main_image (bool): Aligner image_path et content['image']
+        main_image_only (bool): Ne réécrire que image_path et content['image'],
+            pas les autres images du contenu (options, paires, cartes)
+        state_path (str, optional): Fichier d'état pour la reprise
+        report (file, optional): Flux recevant les différences (JSON Lines)
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, batch_size=DEFAULT_BATCH_SIZE, dry_run=False,
+                 sync_main_image=True, main_image_only=False, state_path=None, report=None):
+        unknown = [name for name in rules if name not in PATH_RULES]
+        if unknown:
+            raise ValueError(f"Règles inconnues: {', '.join(unknown)}")
+        self.rules = list(rules)
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.sync_main_image = sync_main_image
+        self.main_image_only = main_image_only
+        self.state_path = state_path
+        self.report = report
+        self.stats = {
+            'scanned': 0,
+            'modified': 0,
+            'references': 0,
+            'rewritten': 0,
+            'errors': 0,
+            'batches': 0,
+            'last_id': 0,
+            'resumed_from': 0,
+        }
+        self.sample = []
+        self.modified_rows = []
+
+    # ----- état de reprise -----
+
+    def _signature(self):
+        return {'rules': self.rules, 'sync_main_image': self.sync_main_image,
+                'main_image_only': self.main_image_only}
+
+    def load_state(self):
+        """Dernier id traité par une exécution interrompue des mêmes règles, ou 0"""
+        if self.dry_run or not self.state_path or not os.path.exists(self.state_path):
+            return 0
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if state.get('signature') != self._signature() or state.get('finished'):
+            return 0
+        return state.get('last_id', 0)
+
+    def save_state(self, finished=False):
+        if self.dry_run or not self.state_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({
+                'signature': self._signature(),
+                'last_id': self.stats['last_id'],
+                'finished': finished,
+                'stats': self.stats,
+            }, f)
+        os.replace(temp_path, self.state_path)
+
+    # ----- réécriture -----
+
+    def rewrite_path(self, path, batch):
+        """Applique les règles à un chemin en conservant ses paramètres de requête"""
+        base, separator, query = path.partition('?')
+        new = base
+        for name in self.rules:
+            new = PATH_RULES[name](new, batch) or new
+        return new + separator + query if new != base else path
+
+    def migrate_row(self, row, batch):
+        """
+        Réécrit les références d'un exercice.
+
+        Returns:
+            tuple: (valeurs à écrire, liste de Change)
+        """
+        exercise_id, title, image_path, raw_content = row
+        content = json.loads(raw_content) if raw_content else None
+        changes = []
+        values = {}
+
+        def rewrite(path):
+            self.stats['references'] += 1
+            return self.rewrite_path(path, batch)
+
+        new_image_path = rewrite(image_path) if is_image_reference(image_path) else image_path
+        if self.main_image_only:
+            content_changes = []
+            content_image = content.get('image') if isinstance(content, dict) else None
+            if is_image_reference(content_image):
+                new_content_image = rewrite(content_image)
+                if new_content_image != content_image:
+                    content['image'] = new_content_image
+                    content_changes.append(('/image', content_image, new_content_image))
+        else:
+            content_changes = rewrite_references(content, rewrite) if content is not None else []
+
+        if self.sync_main_image and isinstance(content, dict):
+            # image_path fait foi ; à défaut, l'image du contenu
+            content_image = content.get('image')
+            if new_image_path and content_image != new_image_path:
+                content['image'] = new_image_path
+                content_changes.append(('/image', content_image, new_image_path))
+            elif not new_image_path and is_image_reference(content_image):
+                new_image_path = content_image
+
+        if new_image_path != image_path:
+            values['image_path'] = new_image_path
+            changes.append(Change(exercise_id, 'image_path', image_path, new_image_path))
+        if content_changes:
+            values['content'] = json.dumps(content)
+            changes.extend(Change(exercise_id, f'content{pointer}', old, new)
+                           for pointer, old, new in content_changes)
+        return values, changes
+
+    def _record(self, changes):
+        for change in changes:
+            self.stats['rewritten'] += 1
+            if len(self.sample) < SAMPLE_SIZE:
+                self.sample.append(change)
+            if self.report is not None:
+                self.report.write(json.dumps(change._asdict(), ensure_ascii=False) + '\n')
+
+    def fetch_batch(self, last_id):
+        query = (
+            select(Exercise.id, Exercise.title, Exercise.image_path, Exercise.content)
+            .where(Exercise.id > last_id)
+            .order_by(Exercise.id)
+            .limit(self.batch_size)
+        )
+        return db.session.execute(query).all()
+
+    def run_batch(self, rows):
+        """Traite et valide un lot ; retourne le nombre d'exercices modifiés"""
+        batch = MigrationBatch(rows)
+        if 'resolve' in self.rules or 'blob' in self.rules:
+            paths = set()
+            for _, _, image_path, raw_content in rows:
+                if is_image_reference(image_path):
+                    paths.add(image_path.split('?', 1)[0])
+                try:
+                    content = json.loads(raw_content) if raw_content else None
+                except ValueError:
+                    continue
+                paths.update(path.split('?', 1)[0] for _, path in iter_references(content))
+            # Les alias portent sur les chemins normalisés comme sur les chemins d'origine
+            batch.prefetch_aliases(paths | {normalize_rule(path, batch) for path in paths})
+
+        modified = 0
+        table = Exercise.__table__
+        for row in rows:
+            try:
+                values, changes = self.migrate_row(row, batch)
+            except ValueError as e:
+                self.stats['errors'] += 1
+                logger.warning(f"[IMAGE_MIGRATION] Exercice {row[0]} ignoré: {e}")
+                continue
+            if not values:
+                continue
+            modified += 1
+            self._record(changes)
+            if len(self.modified_rows) < SAMPLE_SIZE:
+                self.modified_rows.append({'id': row[0], 'title': row[1],
+                                           'image_path': values.get('image_path', row[2])})
+            if not self.dry_run:
+                db.session.execute(table.update().where(table.c.id == row[0]).values(**values))
+        if not self.dry_run:
+            db.session.commit()
+        return modified
+
+    def run(self, restart=False):
+        """
+        Exécute (ou reprend) la migration.
+
+        Returns:
+            dict: compteurs (scanned, modified, references, rewritten, errors, batches, last_id)
+        """
+        last_id = 0 if restart else self.load_state()
+        self.stats['resumed_from'] = last_id
+        while True:
+            rows = self.fetch_batch(last_id)
+            if not rows:
+                break
+            try:
+                self.stats['modified'] += self.run_batch(rows)
+            except Exception:
+                db.session.rollback()
+                raise
+            last_id = rows[-1][0]
+            self.stats['scanned'] += len(rows)
+            self.stats['batches'] += 1
+            self.stats['last_id'] = last_id
+            self.save_state()
+            logger.info(f"[IMAGE_MIGRATION] Lot {self.stats['batches']} traité (id <= {last_id})")
+        self.save_state(finished=True)
+        return self.stats
+
+
+def default_state_path(app):
+    return os.path.join(app.instance_path, 'image_path_migration.json')
+
+
+def init_app(app):
+    """Enregistre la commande migrate-image-paths."""
+
+    @app.cli.command('migrate-image-paths')
+    @click.option('--dry-run', is_flag=True, help="Simuler sans écrire en base.")
+    @click.option('--rule', 'rules', multiple=True, type=click.Choice(sorted(PATH_RULES)),
+                  help="Règle à appliquer (option répétable, par défaut : normalize puis resolve).")
+    @click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True)
+    @click.option('--report', type=click.Path(dir_okay=False), help="Fichier des différences (JSON Lines).")
+    @click.option('--restart', is_flag=True, help="Ignorer l'état d'une exécution interrompue.")
+    def migrate_image_paths_command(dry_run, rules, batch_size, report, restart):
+        """Réécrit les chemins d'images des exercices, par lots."""
+        report_file = open(report, 'w', encoding='utf-8') if report else None
+        try:
+            migration = ImagePathMigration(
+                rules=rules or DEFAULT_RULES, batch_size=batch_size, dry_run=dry_run,
+                state_path=default_state_path(current_app), report=report_file,
+            )
+            stats = migration.run(restart=restart)
+        finally:
+            if report_file is not None:
+                report_file.close()
+        for change in migration.sample:
+            click.echo(f"#{change.exercise_id} {change.field}: {change.old} -> {change.new}")
+        if stats['resumed_from']:
+            click.echo(f"Reprise après l'exercice {stats['resumed_from']}.")
+        click.echo(
+            f"{stats['scanned']} exercices parcourus en {stats['batches']} lots, "
+            f"{stats['modified']} modifiés ({stats['rewritten']} références), {stats['errors']} erreurs"
+            + (" (simulation)" if dry_run else "")
+        )
@@ -0,0 +1,141 @@
+"""
+Cache des résolutions d'URLs d'images
+
+Les fonctions de résolution (image_url_service, unified_image_service,
+utils/image_path_handler) rejouent à chaque appel le même enchaînement
+nettoyage / normalisation / recherche, avec ses logs de debug, alors qu'une
+page appelle plusieurs dizaines de fois les mêmes chemins. Leurs résultats
+sont conservés dans un cache LRU borné, partagé par les trois modules :
+
+    - une image trouvée reste en cache jusqu'à son éviction ou une
+      invalidation ;
+    - une image introuvable (résultat par défaut) n'est conservée que
+      negative_ttl secondes, pour qu'un fichier ajouté à la main finisse
+      par être trouvé.
+
+Le cache est vidé quand cloud_storage_no_cloudinary.upload_file écrit un
+fichier et quand l'index des fichiers statiques est reconstruit.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from static_asset_index import static_asset_index
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_NEGATIVE_TTL = 30.0
+
+
+class ImageResolutionCache:
+    """
+    Cache LRU (thread-safe) des URLs d'images résolues.
+
+    Attributs:
+        max_entries: nombre maximal de résolutions conservées
+        negative_ttl: durée de vie (secondes) d'une résolution infructueuse
+        hits / misses / negative_hits: compteurs de consultation
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, negative_ttl=DEFAULT_NEGATIVE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_generation = None
+
+    def _check_index_generation(self):
+        # Un index reconstruit (fichiers ajoutés ou supprimés) périme toutes les entrées
+        generation = static_asset_index.rebuilds
+        if generation != self._index_generation:
+            self._entries.clear()
+            self._index_generation = generation
+
+    def get(self, key, resolve, fallbacks=()):
+        """
+        Retourne la résolution mise en cache pour la clé (calculée au premier appel).
+
+        Args:
+            key (tuple): Clé hashable (module, arguments)
+            resolve (callable): Résolution sans cache
+            fallbacks (tuple): Résultats signifiant « image introuvable »
+        """
+        now = self.clock()
+        with self._lock:
+            self._check_index_generation()
+            entry = self._entries.get(key)
+            if entry is not None:
+                url, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if expires_at is not None:
+                        self.negative_hits += 1
+                    return url
+                del self._entries[key]
+            self.misses += 1
+
+        url = resolve()
+        found = url is not None and url not in fallbacks and (
+            url.startswith(('http://', 'https://')) or static_asset_index.exists(url)
+        )
+        with self._lock:
+            self._entries[key] = (url, None if found else now + self.negative_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return url
+
+    def invalidate(self):
+        """Oublie toutes les résolutions (un fichier vient d'être écrit)."""
+        with self._lock:
+            self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.negative_hits = 0
+
+    def stats(self):
+        """Compteurs du cache"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+image_resolution_cache = ImageResolutionCache()
+
+
+def cached_resolution(namespace, fallbacks=()):
+    """
+    Décorateur plaçant une fonction de résolution d'image derrière le cache partagé.
+
+    Args:
+        namespace (str): Nom distinguant les fonctions qui partagent le cache
+        fallbacks (tuple): Résultats de la fonction signifiant « image introuvable »
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (namespace, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+            return image_resolution_cache.get(key, lambda: func(*args, **kwargs), fallbacks)
+        wrapper.uncached = func
+        return wrapper
+    return decorator
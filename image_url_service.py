@@ -6,7 +6,8 @@ Remplace la fonction get_cloudinary_url du module cloud_storage
 import os
 import logging
 import re
-from flask import current_app
+from static_asset_index import static_asset_index
+from image_resolution_cache import cached_resolution
 
 class ImageUrlService:
     """
@@ -90,6 +91,7 @@ class ImageUrlService:
         return os.path.basename(path)
     
     @staticmethod
+    @cached_resolution('image_url_service')
     def get_image_url(image_path):
         """
         Retourne une URL valide pour une image, en vérifiant que le fichier existe
@@ -109,33 +111,33 @@ class ImageUrlService:
         
         # Vérifier le type de chemin d'image
         if not isinstance(image_path, str):
-            logger.warning(f"Type de chemin d'image non valide: {type(image_path)}")
+            logger.warning("Type de chemin d'image non valide: %s", type(image_path))
             return None
         
-        logger.debug(f"get_image_url appelée avec image_path={image_path}")
+        logger.debug('get_image_url appelée avec image_path=%s', image_path)
         
         # Si c'est déjà une URL externe, la retourner telle quelle
         if image_path.startswith('http'):
-            logger.debug(f"URL externe détectée: {image_path}")
+            logger.debug('URL externe détectée: %s', image_path)
             return image_path
         
         # Nettoyer les chemins dupliqués
         cleaned_path = ImageUrlService.clean_duplicate_paths(image_path)
         if cleaned_path != image_path:
-            logger.debug(f"Chemin nettoyé: {cleaned_path} (original: {image_path})")
+            logger.debug('Chemin nettoyé: %s (original: %s)', cleaned_path, image_path)
             image_path = cleaned_path
         
         # Extraire le nom de fichier
         filename = ImageUrlService.extract_filename(image_path)
-        logger.debug(f"Nom de fichier extrait: {filename}")
+        logger.debug('Nom de fichier extrait: %s', filename)
         
         # Normaliser le nom de fichier pour gérer les caractères spéciaux
         normalized_filename = ImageUrlService.normalize_filename(filename)
         if normalized_filename != filename:
-            logger.debug(f"Nom de fichier normalisé: {normalized_filename} (original: {filename})")
+            logger.debug('Nom de fichier normalisé: %s (original: %s)', normalized_filename, filename)
             # Créer un chemin avec le nom de fichier normalisé
             normalized_filename_path = image_path.replace(filename, normalized_filename)
-            logger.debug(f"Chemin avec nom de fichier normalisé: {normalized_filename_path}")
+            logger.debug('Chemin avec nom de fichier normalisé: %s', normalized_filename_path)
         else:
             normalized_filename_path = image_path
         
@@ -143,26 +145,26 @@ class ImageUrlService:
         direct_path = image_path
         if direct_path.startswith('/'):
             direct_path = direct_path[1:]
-        direct_exists = os.path.exists(direct_path)
-        logger.debug(f"Le fichier existe directement avec le chemin original: {direct_exists}")
+        direct_exists = static_asset_index.exists(direct_path)
+        logger.debug('Le fichier existe directement avec le chemin original: %s', direct_exists)
         
         # Vérifier si le fichier existe avec le chemin normalisé (nom de fichier normalisé)
         normalized_direct_path = normalized_filename_path
         if normalized_direct_path.startswith('/'):
             normalized_direct_path = normalized_direct_path[1:]
-        normalized_direct_exists = os.path.exists(normalized_direct_path)
-        logger.debug(f"Le fichier existe avec le nom normalisé: {normalized_direct_exists}")
+        normalized_direct_exists = static_asset_index.exists(normalized_direct_path)
+        logger.debug('Le fichier existe avec le nom normalisé: %s', normalized_direct_exists)
         
         # Si le fichier existe avec le chemin original, l'utiliser
         if direct_exists:
             normalized_path = ImageUrlService.normalize_path(image_path if image_path.startswith('/') else f"/{image_path}")
-            logger.debug(f"Retour du chemin original: {normalized_path}")
+            logger.debug('Retour du chemin original: %s', normalized_path)
             return normalized_path
         
         # Si le fichier existe avec le nom normalisé, l'utiliser
         if normalized_direct_exists:
             normalized_path = ImageUrlService.normalize_path(normalized_filename_path if normalized_filename_path.startswith('/') else f"/{normalized_filename_path}")
-            logger.debug(f"Retour du chemin avec nom normalisé: {normalized_path}")
+            logger.debug('Retour du chemin avec nom normalisé: %s', normalized_path)
             return normalized_path
         
         # Si le chemin commence par /static/ ou static/, normaliser et vérifier
@@ -170,101 +172,40 @@ class ImageUrlService:
             normalized_path = ImageUrlService.normalize_path(image_path if image_path.startswith('/') else f"/{image_path}")
             
             # Vérifier si le fichier existe avec ce chemin normalisé
-            normalized_exists = os.path.exists(normalized_path[1:] if normalized_path.startswith('/') else normalized_path)
-            logger.debug(f"Le fichier existe avec le chemin normalisé: {normalized_exists}")
+            normalized_exists = static_asset_index.exists(normalized_path)
+            logger.debug('Le fichier existe avec le chemin normalisé: %s', normalized_exists)
             
             if normalized_exists:
                 # Remplacer les backslashes par des slashes pour la cohérence des URLs
                 normalized_path = normalized_path.replace('\\', '/')
-                logger.debug(f"Retour du chemin normalisé: {normalized_path}")
+                logger.debug('Retour du chemin normalisé: %s', normalized_path)
                 return normalized_path
         
-        # Vérifier les chemins possibles avec le nom de fichier original
-        possible_paths = [
-            os.path.join("static", "uploads", filename),
-            os.path.join("static", "uploads", "exercises", filename),
-            os.path.join("static", "uploads", "exercises", "qcm", filename),
-            os.path.join("static", "uploads", "exercises", "flashcards", filename),
-            os.path.join("static", "uploads", "exercises", "word_placement", filename),
-            os.path.join("static", "uploads", "exercises", "image_labeling", filename),
-            os.path.join("static", "uploads", "exercises", "legend", filename),
-            os.path.join("static", "uploads", "flashcards", filename),
-            os.path.join("static", "uploads", "general", filename),
-            os.path.join("static", "exercises", filename),
-            os.path.join("static", "exercises", "qcm", filename),
-            os.path.join("static", "exercises", "flashcards", filename),
-            os.path.join("static", "exercises", "word_placement", filename),
-            os.path.join("static", "exercises", "image_labeling", filename),
-            os.path.join("static", "exercises", "legend", filename),
-            os.path.join("static", "exercises", "general", filename)
-        ]
-        
-        # Chercher le fichier dans les chemins possibles avec le nom original
-        for path in possible_paths:
-            if os.path.exists(path):
-                # Remplacer les backslashes par des slashes pour la cohérence des URLs
-                web_path = f"/{path.replace('\\', '/')}"  
-                logger.debug(f"Fichier trouvé à: {path}, URL retournée: {web_path}")
-                return web_path
-                
+        # Chercher le fichier par son nom dans static/uploads et static/exercises
+        # (index en mémoire, dossiers parcourus dans l'ordre de priorité)
+        web_path = static_asset_index.lookup(filename)
+        if web_path:
+            logger.debug('Fichier trouvé à: %s', web_path)
+            return web_path
+
         # Si non trouvé, essayer avec le nom normalisé
-        normalized_possible_paths = [
-            path.replace(filename, normalized_filename) for path in possible_paths
-        ]
-        
-        # Chercher le fichier dans les chemins possibles avec le nom normalisé
-        for path in normalized_possible_paths:
-            if os.path.exists(path):
-                # Remplacer les backslashes par des slashes pour la cohérence des URLs
-                web_path = f"/{path.replace('\\', '/')}"  
-                logger.debug(f"Fichier trouvé avec nom normalisé à: {path}, URL retournée: {web_path}")
-                return web_path
+        web_path = static_asset_index.lookup(normalized_filename)
+        if web_path:
+            logger.debug('Fichier trouvé avec nom normalisé à: %s', web_path)
+            return web_path
         
         # Si le chemin commence par "uploads/", essayer avec "/static/uploads/"
         if image_path.startswith('uploads/'):
             corrected_path = f"/static/{image_path}"
             corrected_path = corrected_path.replace('\\', '/')
-            logger.debug(f"Correction du chemin uploads/: {corrected_path}")
+            logger.debug('Correction du chemin uploads/: %s', corrected_path)
             
             # Vérifier si le fichier existe avec ce chemin corrigé
-            corrected_exists = os.path.exists(corrected_path[1:] if corrected_path.startswith('/') else corrected_path)
+            corrected_exists = static_asset_index.exists(corrected_path)
             if corrected_exists:
-                logger.debug(f"Le fichier existe avec le chemin corrigé: {corrected_exists}")
+                logger.debug('Le fichier existe avec le chemin corrigé: %s', corrected_exists)
                 return corrected_path
         
-        # Si le fichier n'existe pas avec le nom original ou normalisé, essayer de le trouver dans d'autres répertoires
-        if current_app:
-            try:
-                # Essayer de trouver le fichier dans le répertoire static de l'application
-                app_static_paths = [
-                    os.path.join(current_app.root_path, "static", "uploads", filename),
-                    os.path.join(current_app.root_path, "static", "exercises", filename),
-                    os.path.join(current_app.root_path, "static", "uploads", "exercises", filename),
-                    os.path.join(current_app.root_path, "static", "exercises", "exercises", filename)
-                ]
-                
-                for app_path in app_static_paths:
-                    if os.path.exists(app_path):
-                        web_path = f"/{os.path.relpath(app_path, current_app.root_path).replace('\\', '/')}"  
-                        logger.debug(f"Fichier trouvé dans l'application à: {app_path}, URL retournée: {web_path}")
-                        return web_path
-                        
-                # Essayer avec le nom normalisé
-                app_static_normalized_paths = [
-                    os.path.join(current_app.root_path, "static", "uploads", normalized_filename),
-                    os.path.join(current_app.root_path, "static", "exercises", normalized_filename),
-                    os.path.join(current_app.root_path, "static", "uploads", "exercises", normalized_filename),
-                    os.path.join(current_app.root_path, "static", "exercises", "exercises", normalized_filename)
-                ]
-                
-                for app_path in app_static_normalized_paths:
-                    if os.path.exists(app_path):
-                        web_path = f"/{os.path.relpath(app_path, current_app.root_path).replace('\\', '/')}"  
-                        logger.debug(f"Fichier trouvé dans l'application avec nom normalisé à: {app_path}, URL retournée: {web_path}")
-                        return web_path
-            except Exception as e:
-                logger.error(f"Erreur lors de la recherche dans les répertoires de l'application: {str(e)}")
-        
         # Si aucun fichier n'a été trouvé, retourner le chemin original avec /static/ préfixé si nécessaire
         if not image_path.startswith('/'):
             if not image_path.startswith('static/'):
@@ -276,7 +217,7 @@ class ImageUrlService:
             final_path = image_path
         
         final_path = final_path.replace('\\', '/')
-        logger.warning(f"Aucun fichier trouvé, retour du chemin par défaut: {final_path}")
+        logger.warning('Aucun fichier trouvé, retour du chemin par défaut: %s', final_path)
         return final_path
 
 # Fonction de compatibilité pour remplacer cloud_storage.get_cloudinary_url
@@ -0,0 +1,353 @@
+"""
+File de tâches d'arrière-plan adossée à la base de données
+
+Les exports de classe, les calculs de statistiques et la maintenance des
+images sont exécutés hors du thread de la requête. Chaque tâche est une
+ligne BackgroundJob (identifiant, statut, résultat, artefact sur disque) :
+la requête HTTP retourne immédiatement l'identifiant et le client interroge
+ensuite /jobs/<id> puis télécharge l'artefact.
+
+Une tâche peut porter une clé de cache (cache_key) : si une tâche identique
+est déjà en cours ou terminée avec son artefact présent sur disque, elle est
+réutilisée au lieu d'être relancée. Les exports utilisent l'empreinte de la
+classe comme clé, un export d'une classe inchangée est donc servi depuis le
+cache.
+
+Une tâche restée en attente ou en cours au-delà de JOB_STALE_AFTER (processus
+redémarré ou interrompu) n'est plus réutilisée. `flask jobs-requeue` relance
+ces tâches et `flask jobs-purge` supprime les tâches terminées anciennes.
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+
+from db_pool import read_replica
+from extensions import db
+from models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Registre des tâches : job_type -> fonction(params, queue) -> dict
+JOB_HANDLERS = {}
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+def register_job(job_type):
+    """
+    Décorateur d'enregistrement d'une tâche.
+
+    La fonction reçoit les paramètres de la tâche et la file (pour obtenir
+    un chemin d'artefact) et retourne un dict pouvant contenir
+    'artifact_path' et 'result' (sérialisable en JSON).
+    """
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+class JobQueue:
+    """
+    File de tâches locale exécutée par un pool de threads.
+
+    Configuration (app.config) :
+        JOB_ARTIFACT_FOLDER: dossier des artefacts (instance/job_artifacts par défaut)
+        JOB_QUEUE_WORKERS: nombre de threads (2 par défaut)
+        JOB_QUEUE_SYNC: exécuter les tâches immédiatement (True en mode TESTING)
+        JOB_STALE_AFTER: délai (secondes) au-delà duquel une tâche en attente
+            ou en cours est considérée comme abandonnée (3600 par défaut)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.artifact_folder = None
+        self.synchronous = False
+        self.max_workers = 2
+        self.stale_after = timedelta(hours=1)
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.artifact_folder = app.config.setdefault(
+            'JOB_ARTIFACT_FOLDER', os.path.join(app.instance_path, 'job_artifacts')
+        )
+        self.synchronous = app.config.get('JOB_QUEUE_SYNC', app.testing)
+        self.max_workers = app.config.get('JOB_QUEUE_WORKERS', 2)
+        self.stale_after = timedelta(seconds=app.config.setdefault('JOB_STALE_AFTER', 3600))
+        app.extensions['job_queue'] = self
+
+        @app.cli.command('jobs-requeue')
+        def jobs_requeue_command():
+            """Exécute les tâches en attente et les tâches abandonnées en cours."""
+            count = self.requeue_pending(synchronous=True)
+            click.echo(f"{count} tâches relancées.")
+
+        @app.cli.command('jobs-purge')
+        @click.option('--days', type=float, default=1, show_default=True,
+                      help="Âge minimal des tâches terminées à supprimer (jours).")
+        def jobs_purge_command(days):
+            """Supprime les tâches terminées anciennes et leurs artefacts."""
+            count = self.purge(older_than=timedelta(days=days))
+            click.echo(f"{count} tâches supprimées.")
+
+    def _get_executor(self):
+        # Création paresseuse : aucun thread n'est démarré avant la première tâche
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='job-queue'
+                )
+            return self._executor
+
+    def artifact_path(self, filename):
+        """Chemin d'un artefact dans le dossier des artefacts (créé si nécessaire)."""
+        os.makedirs(self.artifact_folder, exist_ok=True)
+        return os.path.join(self.artifact_folder, filename)
+
+    def is_stale(self, job, now=None):
+        """Tâche en attente ou en cours depuis plus de stale_after (abandonnée)."""
+        if job.status not in ACTIVE_STATUSES:
+            return False
+        since = job.started_at or job.created_at
+        return since is not None and since < (now or datetime.utcnow()) - self.stale_after
+
+    def find_reusable(self, job_type, cache_key):
+        """
+        Cherche une tâche identique en cours ou terminée avec un artefact valide.
+
+        Une tâche active abandonnée (voir is_stale) n'est pas réutilisée.
+
+        Returns:
+            BackgroundJob ou None
+        """
+        job = BackgroundJob.query.filter(
+            BackgroundJob.job_type == job_type,
+            BackgroundJob.cache_key == cache_key,
+            BackgroundJob.status.in_(ACTIVE_STATUSES + ('done',))
+        ).order_by(BackgroundJob.created_at.desc()).first()
+
+        if job is None:
+            return None
+        if job.status == 'done' and job.artifact_path and not os.path.exists(job.artifact_path):
+            return None
+        if self.is_stale(job):
+            return None
+        return job
+
+    def enqueue(self, job_type, params=None, user_id=None, cache_key=None):
+        """
+        Ajoute une tâche à la file.
+
+        Args:
+            job_type (str): Type de tâche (voir JOB_HANDLERS)
+            params (dict, optional): Paramètres sérialisables en JSON
+            user_id (int, optional): Utilisateur propriétaire de la tâche
+            cache_key (str, optional): Clé permettant de réutiliser une tâche identique
+
+        Returns:
+            BackgroundJob: La tâche créée ou la tâche réutilisée
+        """
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Type de tâche inconnu: {job_type}")
+
+        if cache_key:
+            existing = self.find_reusable(job_type, cache_key)
+            if existing is not None:
+                logger.info("Tâche %s réutilisée pour la clé %s", existing.id, cache_key)
+                return existing
+
+        job = BackgroundJob(
+            id=uuid.uuid4().hex,
+            job_type=job_type,
+            params=json.dumps(params or {}),
+            status='pending',
+            cache_key=cache_key,
+            user_id=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        if self.synchronous:
+            self.run_job(job.id)
+        else:
+            self._get_executor().submit(self._run_in_app_context, job.id)
+        return job
+
+    def _run_in_app_context(self, job_id):
+        with self.app.app_context():
+            try:
+                self.run_job(job_id)
+            finally:
+                db.session.remove()
+
+    def run_job(self, job_id):
+        """Exécute une tâche (dans un contexte d'application) et enregistre son issue."""
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            outcome = JOB_HANDLERS[job.job_type](job.get_params(), self) or {}
+            job.artifact_path = outcome.get('artifact_path')
+            if 'result' in outcome:
+                job.result = json.dumps(outcome['result'])
+            job.status = 'done'
+        except Exception as e:
+            logger.exception("Échec de la tâche %s (%s)", job_id, job.job_type)
+            db.session.rollback()
+            job = db.session.get(BackgroundJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job
+
+    def requeue_pending(self, synchronous=None):
+        """
+        Relance les tâches restées en attente et les tâches en cours abandonnées
+        (par exemple après un redémarrage).
+
+        Args:
+            synchronous (bool, optional): Exécuter les tâches dans l'appel
+                (par défaut selon JOB_QUEUE_SYNC)
+
+        Returns:
+            int: Nombre de tâches relancées
+        """
+        if synchronous is None:
+            synchronous = self.synchronous
+        now = datetime.utcnow()
+        job_ids = []
+        for job in BackgroundJob.query.filter(BackgroundJob.status.in_(ACTIVE_STATUSES)):
+            if job.status == 'pending' or self.is_stale(job, now):
+                job.status = 'pending'
+                job_ids.append(job.id)
+        db.session.commit()
+        for job_id in job_ids:
+            if synchronous:
+                self.run_job(job_id)
+            else:
+                self._get_executor().submit(self._run_in_app_context, job_id)
+        return len(job_ids)
+
+    def purge(self, older_than=timedelta(days=1)):
+        """
+        Supprime les tâches terminées plus anciennes que older_than et leurs artefacts.
+
+        Returns:
+            int: Nombre de tâches supprimées
+        """
+        limit = datetime.utcnow() - older_than
+        jobs = BackgroundJob.query.filter(
+            BackgroundJob.status.in_(('done', 'failed')),
+            BackgroundJob.finished_at < limit
+        ).all()
+        for job in jobs:
+            if job.artifact_path and os.path.exists(job.artifact_path):
+                os.remove(job.artifact_path)
+            db.session.delete(job)
+        db.session.commit()
+        return len(jobs)
+
+
+def get_job_queue():
+    """Retourne la file de l'application courante."""
+    return current_app.extensions['job_queue']
+
+
+# ===== TÂCHES ENREGISTRÉES =====
+
+def _export_class(params, queue, extension, writer_name):
+    import export_utils
+    from models import Class
+    from statistics_service import get_exercise_counts, get_student_counts, iter_student_rows
+
+    # Lu sur la base principale : l'artefact est mis en cache sous l'empreinte
+    # calculée à l'instant de la demande, un réplica en retard le fausserait
+    class_obj = db.session.get(Class, params['class_id'])
+    if class_obj is None:
+        raise ValueError(f"Classe introuvable: {params['class_id']}")
+
+    writer = getattr(export_utils, writer_name)
+    path = queue.artifact_path(f"class_{class_obj.id}_{params['fingerprint']}{extension}")
+    writer(
+        class_obj.name,
+        iter_student_rows([class_obj.id]),
+        get_exercise_counts([class_obj.id]).get(class_obj.id, 0),
+        get_student_counts([class_obj.id]).get(class_obj.id, 0),
+        teacher_name=params.get('teacher_name'),
+        path=path
+    )
+    return {
+        'artifact_path': path,
+        'result': {'download_name': f"statistiques_{class_obj.name}{extension}"}
+    }
+
+
+@register_job('class_export_excel')
+def class_export_excel_job(params, queue):
+    """Export Excel des statistiques d'une classe."""
+    return _export_class(params, queue, '.xlsx', 'write_class_excel')
+
+
+@register_job('class_export_pdf')
+def class_export_pdf_job(params, queue):
+    """Export PDF des statistiques d'une classe."""
+    return _export_class(params, queue, '.pdf', 'write_class_pdf')
+
+
+@register_job('statistics_rollup')
+def statistics_rollup_job(params, queue):
+    """Synthèse des statistiques de toutes les classes d'un enseignant."""
+    from statistics_service import get_teacher_statistics
+
+    summary = []
+    # Lecture seule, sans cache : le réplica peut servir la synthèse
+    with read_replica():
+        for class_data in get_teacher_statistics(params['teacher_id']):
+            scores = [s['average_score'] for s in class_data['students'] if s['average_score'] is not None]
+            summary.append({
+                'class_id': class_data['class'].id,
+                'class_name': class_data['class'].name,
+                'students': len(class_data['students']),
+                'total_exercises': class_data['total_exercises'],
+                'average_score': sum(scores) / len(scores) if scores else None
+            })
+    return {'result': summary}
+
+
+@register_job('image_path_sync')
+def image_path_sync_job(params, queue):
+    """Synchronisation des chemins d'images de tous les exercices."""
+    from models import Exercise
+    from utils.image_path_synchronizer import synchronize_all_exercises
+
+    stats = synchronize_all_exercises(db, Exercise)
+    return {'result': {key: stats[key] for key in ('total', 'modified', 'errors')}}
+
+
+
+@register_job('image_derivatives')
+def image_derivatives_job(params, queue):
+    """Génération des déclinaisons redimensionnées d'une image envoyée."""
+    generated = current_app.extensions['image_derivatives'].generate_all(params['path'])
+    return {'result': {'path': params['path'], 'generated': sum(generated.values())}}
+
+job_queue = JobQueue()
@@ -0,0 +1,108 @@
+import os
+from flask import Blueprint, jsonify, url_for, abort, send_file
+from flask_login import login_required, current_user
+
+from extensions import db
+from models import BackgroundJob, Class
+from job_queue import get_job_queue
+from statistics_service import get_class_fingerprint
+
+# Blueprint pour les tâches d'arrière-plan (exports, statistiques, maintenance)
+jobs_bp = Blueprint('jobs', __name__)
+
+EXPORT_JOB_TYPES = {
+    'excel': 'class_export_excel',
+    'pdf': 'class_export_pdf'
+}
+
+
+def job_response(job, status_code=202):
+    """Réponse JSON décrivant une tâche et ses URLs de suivi"""
+    data = job.to_dict()
+    data['status_url'] = url_for('jobs.job_status', job_id=job.id)
+    if job.status == 'done' and job.artifact_path:
+        data['download_url'] = url_for('jobs.job_download', job_id=job.id)
+    return jsonify(data), status_code
+
+
+def get_owned_job(job_id):
+    """Récupère une tâche appartenant à l'utilisateur courant (ou 404)"""
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or (job.user_id != current_user.id and not current_user.is_admin):
+        abort(404)
+    return job
+
+
+@jobs_bp.route('/teacher/export/<fmt>/<int:class_id>/job', methods=['POST'])
+@login_required
+def enqueue_class_export(fmt, class_id):
+    """Lance l'export d'une classe en arrière-plan"""
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Accès refusé. Vous devez être enseignant.'}), 403
+    if fmt not in EXPORT_JOB_TYPES:
+        abort(404)
+
+    class_obj = Class.query.filter_by(id=class_id, teacher_id=current_user.id).first()
+    if not class_obj:
+        return jsonify({'error': 'Classe non trouvée.'}), 404
+
+    # L'empreinte de la classe sert de clé : un export inchangé est réutilisé
+    fingerprint = get_class_fingerprint(class_obj.id)
+    teacher_name = current_user.name or current_user.username
+    job = get_job_queue().enqueue(
+        EXPORT_JOB_TYPES[fmt],
+        params={'class_id': class_obj.id, 'fingerprint': fingerprint, 'teacher_name': teacher_name},
+        user_id=current_user.id,
+        cache_key=f'{class_obj.id}:{fingerprint}:{teacher_name}'
+    )
+    return job_response(job)
+
+
+@jobs_bp.route('/teacher/statistics/job', methods=['POST'])
+@login_required
+def enqueue_statistics_rollup():
+    """Lance le calcul de synthèse des statistiques de l'enseignant"""
+    if not current_user.is_teacher:
+        return jsonify({'error': 'Accès refusé. Vous devez être enseignant.'}), 403
+
+    job = get_job_queue().enqueue(
+        'statistics_rollup',
+        params={'teacher_id': current_user.id},
+        user_id=current_user.id
+    )
+    return job_response(job)
+
+
+@jobs_bp.route('/admin/jobs/image-path-sync', methods=['POST'])
+@login_required
+def enqueue_image_path_sync():
+    """Lance la synchronisation des chemins d'images (administrateurs)"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Accès non autorisé.'}), 403
+
+    job = get_job_queue().enqueue('image_path_sync', user_id=current_user.id)
+    return job_response(job)
+
+
+@jobs_bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """État d'une tâche"""
+    return job_response(get_owned_job(job_id), 200)
+
+
+@jobs_bp.route('/jobs/<job_id>/download')
+@login_required
+def job_download(job_id):
+    """Téléchargement de l'artefact produit par une tâche"""
+    job = get_owned_job(job_id)
+    if job.status != 'done' or not job.artifact_path:
+        return job_response(job, 409)
+
+    result = job.get_result() or {}
+    return send_file(
+        job.artifact_path,
+        as_attachment=True,
+        download_name=result.get('download_name') or os.path.basename(job.artifact_path),
+        conditional=True
+    )
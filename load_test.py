@@ -0,0 +1,233 @@
+"""
+Test de charge comparatif des profils de workers gunicorn
+
+Pour chaque profil (gunicorn_profiles.PROFILES), démarre gunicorn avec
+gunicorn.conf.py sur un port libre, envoie des requêtes depuis N clients
+concurrents (connexions HTTP persistantes) pendant une durée fixe, puis
+arrête le serveur. Le rapport donne le débit, les latences p50/p95/p99,
+les erreurs et la mémoire proportionnelle (PSS) du maître et des workers,
+qui montre le partage des pages obtenu par preload_app.
+
+    python load_test.py --paths /,/login --concurrency 32 --duration 20
+    python load_test.py --profiles sync,gthread --workers 2 --json
+
+Un profil dont le serveur ne démarre pas (gevent non installé...) est
+signalé sans interrompre les autres.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from gunicorn_profiles import PROFILES
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """
+    Résumé d'une série de requêtes.
+
+    Args:
+        latencies (list): Durées des requêtes réussies (secondes)
+        errors (int): Requêtes en erreur (exception ou statut >= 500)
+        elapsed (float): Durée de la série (secondes)
+    """
+    values = sorted(latencies)
+    return {
+        'requests': len(values) + errors,
+        'errors': errors,
+        'rps': round(len(values) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+    }
+
+
+def process_tree_pss(pid):
+    """PSS cumulée (Mo) d'un processus et de ses fils, None hors Linux."""
+    if not os.path.exists(f'/proc/{pid}/smaps_rollup'):
+        return None
+    pids = [pid]
+    total_kb = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # ppid : 2e champ après le nom entre parenthèses
+                if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                    pids.append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    for child in pids:
+        try:
+            with open(f'/proc/{child}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            # Worker recyclé entre-temps
+            continue
+    return round(total_kb / 1024, 1)
+
+
+def wait_until_ready(port, path, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', path)
+            connection.getresponse().read()
+            connection.close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def run_clients(port, paths, concurrency, duration):
+    """Clients concurrents : chacun parcourt `paths` en boucle jusqu'à l'échéance."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        local, failed = [], 0
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                try:
+                    connection.request('GET', path)
+                    response = connection.getresponse()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # Connexion persistante fermée par le serveur (worker recyclé) : on rouvre
+                    connection.close()
+                    connection.request('GET', path)
+                    response = connection.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                else:
+                    local.append(time.perf_counter() - start)
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.monotonic() - start)
+
+
+def run_profile(profile, app='app:app', paths=('/',), concurrency=16, duration=10.0,
+                workers=None, startup_timeout=60, env=None):
+    """
+    Démarre gunicorn avec un profil, le met en charge puis l'arrête.
+
+    Returns:
+        dict: Résumé (voir summarize) avec profile, workers et memory_pss_mb,
+        ou profile et error si le serveur n'a pas démarré
+    """
+    port = free_port()
+    environment = dict(os.environ, GUNICORN_PROFILE=profile, PORT=str(port))
+    if workers:
+        environment['GUNICORN_WORKERS'] = str(workers)
+    environment.update(env or {})
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT_PATH, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', app],
+        cwd=ROOT_PATH, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        if not wait_until_ready(port, paths[0], process, startup_timeout):
+            process.kill()
+            output = process.communicate()[1].strip().splitlines()
+            return {'profile': profile, 'error': output[-1] if output else 'le serveur ne répond pas'}
+        result = run_clients(port, list(paths), concurrency, duration)
+        result['memory_pss_mb'] = process_tree_pss(process.pid)
+    finally:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.communicate(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+    return dict(result, profile=profile, workers=workers)
+
+
+def format_results(results):
+    lines = [f"{'profil':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+             f"{'erreurs':>8} {'PSS Mo':>8}"]
+    for result in results:
+        if 'error' in result:
+            lines.append(f"{result['profile']:<10} indisponible : {result['error']}")
+            continue
+        memory = result['memory_pss_mb']
+        lines.append(
+            f"{result['profile']:<10} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['errors']:>8} {memory if memory is not None else '-':>8}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare les profils de workers gunicorn sous charge')
+    parser.add_argument('--app', default='app:app', help='Application WSGI (module:variable)')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--paths', default='/', help='Chemins demandés, séparés par des virgules')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='Secondes de charge par profil')
+    parser.add_argument('--workers', type=int, help='Nombre de workers imposé (défaut : calculé)')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = [
+        run_profile(profile.strip(), app=args.app, paths=args.paths.split(','),
+                    concurrency=args.concurrency, duration=args.duration, workers=args.workers)
+        for profile in args.profiles.split(',') if profile.strip()
+    ]
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Profils de chargement des relations pour les pages principales
+
+Les relations de models.py sont chargées paresseusement (lazy=True) : une
+page qui parcourt course.class_obj.students, class_obj.courses ou
+course.exercises dans des boucles émet une requête par objet. Chaque page
+dispose ici d'un profil nommé (options selectinload/joinedload) et d'un
+constructeur de requête qui l'applique, de sorte que le nombre de SELECT
+reste borné quelle que soit la taille de la classe.
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import Class, Course, Exercise
+
+# Profils enregistrés : {nom: fonction retournant les options de chargement}
+LOADING_PROFILES = {}
+
+
+def register_profile(name):
+    """Décorateur enregistrant un profil de chargement sous un nom de page"""
+    def decorator(func):
+        LOADING_PROFILES[name] = func
+        return func
+    return decorator
+
+
+def profile_options(name):
+    """
+    Options de chargement d'un profil.
+
+    Les options sont construites à l'appel : les relations définies par
+    backref (Course.class_obj, Class.teacher) n'existent qu'une fois les
+    mappers configurés.
+    """
+    return LOADING_PROFILES[name]()
+
+
+@register_profile('view_course')
+def _view_course_profile():
+    # Classe et élèves (statistiques enseignant), exercices et fichiers du cours
+    return [
+        joinedload(Course.class_obj).selectinload(Class.students),
+        selectinload(Course.exercises),
+        selectinload(Course.course_files),
+    ]
+
+
+@register_profile('view_class')
+def _view_class_profile():
+    # Enseignant, élèves, puis cours avec leurs fichiers et exercices
+    return [
+        joinedload(Class.teacher),
+        selectinload(Class.students),
+        selectinload(Class.courses).selectinload(Course.course_files),
+        selectinload(Class.courses).selectinload(Course.exercises),
+    ]
+
+
+@register_profile('teacher_dashboard')
+def _teacher_dashboard_profile():
+    # Effectif de chaque classe
+    return [selectinload(Class.students)]
+
+
+@register_profile('exercise_stats')
+def _exercise_stats_profile():
+    # Toutes les tentatives sont lues par Exercise.get_stats
+    return [selectinload(Exercise.attempts)]
+
+
+@register_profile('exercise_stats_course')
+def _exercise_stats_course_profile():
+    # Élèves de la classe du cours filtré
+    return [joinedload(Course.class_obj).selectinload(Class.students)]
+
+
+def course_page_query():
+    """Requête Course pour la page d'un cours (view_course)"""
+    return Course.query.options(*profile_options('view_course'))
+
+
+def class_page_query():
+    """Requête Class pour la page d'une classe (view_class)"""
+    return Class.query.options(*profile_options('view_class'))
+
+
+def teacher_classes_query(teacher_id):
+    """Classes d'un enseignant pour le tableau de bord (teacher_dashboard)"""
+    return Class.query.options(*profile_options('teacher_dashboard')).filter_by(teacher_id=teacher_id)
+
+
+def exercise_stats_query():
+    """Requête Exercise pour la page de statistiques (exercise_stats)"""
+    return Exercise.query.options(*profile_options('exercise_stats'))
+
+
+def stats_course_query():
+    """Requête Course pour le cours filtré de la page de statistiques"""
+    return Course.query.options(*profile_options('exercise_stats_course'))
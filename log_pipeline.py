@@ -0,0 +1,290 @@
+"""
+Journalisation asynchrone, par catégories et échantillonnée
+
+Le journal racine était configuré au niveau DEBUG avec un FileHandler
+synchrone : chaque requête écrivait sur disque ses en-têtes et son corps
+complet, et les traces de diagnostic ([SUBMIT_DEBUG], [EDIT_DEBUG]...)
+formataient leurs f-strings même lorsque personne ne les lisait.
+
+    configure_logging()  remplace logging.basicConfig : les enregistrements
+                         passent par une file (QueueHandler) vidée par un
+                         thread d'écriture (QueueListener) vers la console
+                         et flask_app.log.
+    category_log         journaux par catégorie de diagnostic :
+                             category_log.SUBMIT_DEBUG.debug('Exercice %s', exercise_id)
+                         écrit dans le journal « category.SUBMIT_DEBUG ».
+    init_app(app)        applique les niveaux par catégorie et l'échantillonnage
+                         de la configuration, et journalise les requêtes
+                         (corps et en-têtes seulement sur demande).
+
+Configuration (valeurs par défaut entre parenthèses) :
+    LOG_CATEGORY_LEVELS        {catégorie: niveau} ; la variable d'environnement
+                               LOG_CATEGORIES="SUBMIT_DEBUG=DEBUG,IMAGE_SYNC=INFO"
+                               s'y ajoute
+    LOG_DEBUG_CATEGORY_LEVEL   niveau des catégories de diagnostic (WARNING)
+    LOG_SAMPLING_RATE          enregistrements par seconde et par catégorie de
+                               diagnostic au-delà de la rafale (10)
+    LOG_SAMPLING_BURST         rafale autorisée (50)
+    LOG_REQUESTS               journaliser méthode et chemin de chaque requête (False)
+    LOG_REQUEST_HEADERS        y ajouter les en-têtes, cookies masqués (False)
+    LOG_REQUEST_BODY           y ajouter le corps, hors envois de fichiers (False)
+    LOG_REQUEST_BODY_LIMIT     taille au-delà de laquelle seule la taille du
+                               corps est journalisée (2048)
+"""
+
+import atexit
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import current_app, request
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_LOG_FILE = 'flask_app.log'
+
+CATEGORY_PREFIX = 'category'
+
+# Catégories de diagnostic : silencieuses par défaut, échantillonnées si activées
+DEBUG_CATEGORY_PATTERN = re.compile(r'DEBUG|DIAGNOSTIC')
+
+DEFAULT_DEBUG_CATEGORY_LEVEL = 'WARNING'
+DEFAULT_SAMPLING_RATE = 10
+DEFAULT_SAMPLING_BURST = 50
+DEFAULT_REQUEST_BODY_LIMIT = 2048
+
+# En-têtes jamais journalisés en clair
+REDACTED_HEADERS = ('Authorization', 'Cookie', 'Set-Cookie', 'X-Csrftoken')
+
+_listener = None
+_queue_handler = None
+
+
+def configure_logging(level='INFO', log_file=DEFAULT_LOG_FILE, stream=True, fmt=DEFAULT_FORMAT):
+    """
+    Installe le journal racine asynchrone.
+
+    Les gestionnaires (console, fichier) sont appelés par le thread du
+    QueueListener ; le thread de la requête ne fait que déposer
+    l'enregistrement dans la file. Un nouvel appel remplace la
+    configuration précédente ; après un fork (workers gunicorn), le
+    processus fils démarre son propre thread d'écriture.
+
+    Args:
+        level (str|int): Niveau du journal racine
+        log_file (str, optional): Fichier journal (None : pas de fichier)
+        stream (bool): Écrire aussi sur la console
+
+    Returns:
+        QueueListener: Le thread d'écriture démarré
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    formatter = logging.Formatter(fmt)
+    handlers = []
+    if stream:
+        handlers.append(logging.StreamHandler())
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    return _listener
+
+
+def shutdown_logging():
+    """Vide la file, arrête le thread d'écriture et ferme les fichiers."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _restart_after_fork():
+    # Le thread d'écriture n'existe pas dans un processus fils (worker
+    # gunicorn forké depuis le maître) : sans lui la file ne serait jamais vidée
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    log_queue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    root.addHandler(_queue_handler)
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Limite le débit d'un journal (seau à jetons).
+
+    Au plus `burst` enregistrements d'affilée, puis `rate` par seconde ;
+    les avertissements et erreurs passent toujours. Le premier
+    enregistrement retenu après une coupure indique combien ont été omis.
+    """
+
+    def __init__(self, rate=DEFAULT_SAMPLING_RATE, burst=DEFAULT_SAMPLING_BURST, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.dropped += 1
+                return False
+            self.tokens -= 1
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            record.msg = f'{record.msg} [{dropped} messages omis]'
+        return True
+
+
+class CategoryLoggers:
+    """
+    Accès aux journaux de catégorie : category_log.SUBMIT_DEBUG.
+
+    Chaque journal est créé une fois puis mis en cache comme attribut ;
+    le niveau et l'échantillonnage courants lui sont appliqués à la création.
+    """
+
+    def __init__(self):
+        self.levels = {}
+        self.debug_level = DEFAULT_DEBUG_CATEGORY_LEVEL
+        self.sampling = (DEFAULT_SAMPLING_RATE, DEFAULT_SAMPLING_BURST)
+
+    def __getattr__(self, category):
+        if not category.isupper():
+            raise AttributeError(category)
+        return self.get(category)
+
+    def get(self, category):
+        logger = self.__dict__.get(category)
+        if logger is None:
+            logger = logging.getLogger(f'{CATEGORY_PREFIX}.{category}')
+            self._apply(category, logger)
+            self.__dict__[category] = logger
+        return logger
+
+    def is_debug_category(self, category):
+        return bool(DEBUG_CATEGORY_PATTERN.search(category))
+
+    def configure(self, levels=None, debug_level=None, sampling=None):
+        """
+        Niveaux et échantillonnage des catégories, existantes et futures.
+
+        Args:
+            levels (dict): {catégorie: niveau} explicites
+            debug_level (str): Niveau des autres catégories de diagnostic
+            sampling (tuple): (débit, rafale) ; None ou débit 0 : pas d'échantillonnage
+        """
+        if levels is not None:
+            self.levels = {name.upper(): level for name, level in levels.items()}
+        if debug_level is not None:
+            self.debug_level = debug_level
+        self.sampling = sampling
+        for category in list(self.__dict__):
+            if category.isupper():
+                self._apply(category, self.__dict__[category])
+
+    def _apply(self, category, logger):
+        level = self.levels.get(category)
+        if level is None and self.is_debug_category(category):
+            level = self.debug_level
+        logger.setLevel(level.upper() if isinstance(level, str) else (level or logging.NOTSET))
+        for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+            logger.removeFilter(existing)
+        if self.sampling and self.sampling[0] and self.is_debug_category(category):
+            logger.addFilter(SamplingFilter(*self.sampling))
+
+
+category_log = CategoryLoggers()
+
+
+def parse_category_levels(value):
+    """'SUBMIT_DEBUG=DEBUG,IMAGE_SYNC=INFO' -> {'SUBMIT_DEBUG': 'DEBUG', 'IMAGE_SYNC': 'INFO'}"""
+    levels = {}
+    for item in (value or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip().upper()] = level.strip().upper()
+    return levels
+
+
+def _headers_for_log(headers):
+    return {
+        name: '***' if name.title() in REDACTED_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+def log_request():
+    """Journalise la requête courante dans la catégorie REQUEST (niveau DEBUG)."""
+    logger = category_log.REQUEST
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    config = current_app.config
+    logger.debug('%s %s', request.method, request.full_path if request.query_string else request.path)
+    if config['LOG_REQUEST_HEADERS']:
+        logger.debug('En-têtes : %s', _headers_for_log(request.headers))
+    if config['LOG_REQUEST_BODY'] and not request.mimetype.startswith('multipart/'):
+        limit = config['LOG_REQUEST_BODY_LIMIT']
+        if request.content_length and request.content_length > limit:
+            logger.debug('Corps : %d octets (non journalisé)', request.content_length)
+        else:
+            logger.debug('Corps : %r', request.get_data(cache=True))
+
+
+def init_app(app):
+    """Applique la configuration des catégories et installe le journal des requêtes."""
+    app.config.setdefault('LOG_CATEGORY_LEVELS', {})
+    app.config.setdefault('LOG_DEBUG_CATEGORY_LEVEL', DEFAULT_DEBUG_CATEGORY_LEVEL)
+    app.config.setdefault('LOG_SAMPLING_RATE', DEFAULT_SAMPLING_RATE)
+    app.config.setdefault('LOG_SAMPLING_BURST', DEFAULT_SAMPLING_BURST)
+    app.config.setdefault('LOG_REQUESTS', False)
+    app.config.setdefault('LOG_REQUEST_HEADERS', False)
+    app.config.setdefault('LOG_REQUEST_BODY', False)
+    app.config.setdefault('LOG_REQUEST_BODY_LIMIT', DEFAULT_REQUEST_BODY_LIMIT)
+
+    levels = dict(app.config['LOG_CATEGORY_LEVELS'])
+    levels.update(parse_category_levels(os.environ.get('LOG_CATEGORIES')))
+    levels.setdefault('REQUEST', 'DEBUG' if app.config['LOG_REQUESTS'] else 'WARNING')
+    category_log.configure(
+        levels=levels,
+        debug_level=app.config['LOG_DEBUG_CATEGORY_LEVEL'],
+        sampling=(app.config['LOG_SAMPLING_RATE'], app.config['LOG_SAMPLING_BURST']),
+    )
+    app.before_request(log_request)
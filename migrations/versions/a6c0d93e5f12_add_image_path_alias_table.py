@@ -0,0 +1,40 @@
+"""add_image_path_alias_table
+
+Revision ID: a6c0d93e5f12
+Revises: e19f4a7c2d58
+Create Date: 2026-10-18 16:40:12.274913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c0d93e5f12'
+down_revision = 'e19f4a7c2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Anciens chemins d'images → blobs SHA-256 (les copies existantes sont
+    # regroupées ensuite par "flask dedupe-images")
+    op.create_table('image_path_alias',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('extension', sa.String(length=10), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('path')
+    )
+    with op.batch_alter_table('image_path_alias', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_image_path_alias_sha256'), ['sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('image_path_alias', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_image_path_alias_sha256'))
+
+    op.drop_table('image_path_alias')
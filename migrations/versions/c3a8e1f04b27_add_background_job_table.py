@@ -0,0 +1,45 @@
+"""add_background_job_table
+
+Revision ID: c3a8e1f04b27
+Revises: f7755682b0ec
+Create Date: 2026-10-18 09:12:41.108532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a8e1f04b27'
+down_revision = 'f7755682b0ec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Table des tâches d'arrière-plan (exports, statistiques, maintenance des images)
+    op.create_table('background_job',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('job_type', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('cache_key', sa.String(length=128), nullable=True),
+    sa.Column('artifact_path', sa.String(length=255), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_background_job_user'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('background_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_background_job_cache_key'), ['cache_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('background_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_background_job_cache_key'))
+
+    op.drop_table('background_job')
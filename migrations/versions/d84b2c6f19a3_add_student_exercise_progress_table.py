@@ -0,0 +1,63 @@
+"""add_student_exercise_progress_table
+
+Revision ID: d84b2c6f19a3
+Revises: c3a8e1f04b27
+Create Date: 2026-10-18 11:03:27.540219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd84b2c6f19a3'
+down_revision = 'c3a8e1f04b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Synthèse des tentatives par (étudiant, exercice, cours)
+    op.create_table('student_exercise_progress',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=True),
+    sa.Column('attempts_count', sa.Integer(), nullable=False),
+    sa.Column('best_score', sa.Float(), nullable=True),
+    sa.Column('last_score', sa.Float(), nullable=True),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['user.id'], name='fk_progress_student', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercise.id'], name='fk_progress_exercise', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['course_id'], ['course.id'], name='fk_progress_course', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', 'exercise_id', 'course_id', name='uq_student_exercise_progress')
+    )
+    with op.batch_alter_table('student_exercise_progress', schema=None) as batch_op:
+        batch_op.create_index('ix_student_exercise_progress_exercise_student', ['exercise_id', 'student_id'], unique=False)
+
+    # Remplissage initial depuis les tentatives existantes (équivalent de "flask backfill-progress")
+    op.execute("""
+        INSERT INTO student_exercise_progress
+            (student_id, exercise_id, course_id, attempts_count, best_score, last_score, last_attempt_at, status)
+        SELECT g.student_id, g.exercise_id, g.course_id, g.attempts_count, g.best_score,
+               last_attempt.score, last_attempt.created_at,
+               CASE WHEN g.best_score >= 70 THEN 'completed'
+                    WHEN g.best_score > 0 THEN 'in_progress'
+                    ELSE 'not_started' END
+        FROM (
+            SELECT student_id, exercise_id, course_id,
+                   COUNT(id) AS attempts_count, MAX(score) AS best_score, MAX(id) AS last_id
+            FROM exercise_attempt
+            GROUP BY student_id, exercise_id, course_id
+        ) AS g
+        JOIN exercise_attempt AS last_attempt ON last_attempt.id = g.last_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('student_exercise_progress', schema=None) as batch_op:
+        batch_op.drop_index('ix_student_exercise_progress_exercise_student')
+
+    op.drop_table('student_exercise_progress')
@@ -0,0 +1,52 @@
+"""add_hot_query_composite_indexes
+
+Revision ID: e19f4a7c2d58
+Revises: d84b2c6f19a3
+Create Date: 2026-10-18 14:22:08.913406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e19f4a7c2d58'
+down_revision = 'd84b2c6f19a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lectures par (exercice, étudiant), (étudiant, exercices), (cours, étudiant)
+    # et historique d'un exercice trié par date
+    with op.batch_alter_table('exercise_attempt', schema=None) as batch_op:
+        batch_op.create_index('ix_exercise_attempt_exercise_student', ['exercise_id', 'student_id'], unique=False)
+        batch_op.create_index('ix_exercise_attempt_student_exercise', ['student_id', 'exercise_id'], unique=False)
+        batch_op.create_index('ix_exercise_attempt_course_student', ['course_id', 'student_id'], unique=False)
+        batch_op.create_index('ix_exercise_attempt_exercise_created', ['exercise_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('course_exercise', schema=None) as batch_op:
+        batch_op.create_index('ix_course_exercise_exercise_course', ['exercise_id', 'course_id'], unique=False)
+
+    with op.batch_alter_table('student_class', schema=None) as batch_op:
+        batch_op.create_index('ix_student_class_class_student', ['class_id', 'student_id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_subscription_school', ['subscription_status', 'subscription_type', 'school_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_subscription_school')
+
+    with op.batch_alter_table('student_class', schema=None) as batch_op:
+        batch_op.drop_index('ix_student_class_class_student')
+
+    with op.batch_alter_table('course_exercise', schema=None) as batch_op:
+        batch_op.drop_index('ix_course_exercise_exercise_course')
+
+    with op.batch_alter_table('exercise_attempt', schema=None) as batch_op:
+        batch_op.drop_index('ix_exercise_attempt_exercise_created')
+        batch_op.drop_index('ix_exercise_attempt_course_student')
+        batch_op.drop_index('ix_exercise_attempt_student_exercise')
+        batch_op.drop_index('ix_exercise_attempt_exercise_student')
@@ -1,24 +1,35 @@
 from datetime import datetime
+from collections import namedtuple
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
 
+from sqlalchemy import event
+
 from extensions import db
 
 # Table d'association pour les étudiants et les classes
 student_class_association = db.Table('student_class',
     db.Column('student_id', db.Integer, db.ForeignKey('user.id', name='fk_student_class'), primary_key=True),
-    db.Column('class_id', db.Integer, db.ForeignKey('class.id', name='fk_class_student'), primary_key=True)
+    db.Column('class_id', db.Integer, db.ForeignKey('class.id', name='fk_class_student'), primary_key=True),
+    # La clé primaire (student_id, class_id) ne sert pas les recherches par classe
+    db.Index('ix_student_class_class_student', 'class_id', 'student_id')
 )
 
 # Table d'association entre Course et Exercise
 course_exercise = db.Table('course_exercise',
     db.Column('course_id', db.Integer, db.ForeignKey('course.id'), primary_key=True),
-    db.Column('exercise_id', db.Integer, db.ForeignKey('exercise.id'), primary_key=True)
+    db.Column('exercise_id', db.Integer, db.ForeignKey('exercise.id'), primary_key=True),
+    # Cours contenant un exercice (la clé primaire commence par course_id)
+    db.Index('ix_course_exercise_exercise_course', 'exercise_id', 'course_id')
 )
 
 class User(UserMixin, db.Model):
     __tablename__ = 'user'
+    __table_args__ = (
+        # Recherche des écoles abonnées (statut, type, puis regroupement par école)
+        db.Index('ix_user_subscription_school', 'subscription_status', 'subscription_type', 'school_name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -378,40 +389,12 @@ class Exercise(db.Model):
         self.content = json.dumps(content)
     
     def get_student_progress(self, student_id):
-        """Récupère la progression d'un étudiant sur cet exercice"""
-        attempts = ExerciseAttempt.query.filter_by(
+        """Récupère la progression d'un étudiant sur cet exercice (table student_exercise_progress)"""
+        rows = StudentExerciseProgress.query.filter_by(
             exercise_id=self.id,
             student_id=student_id
-        ).order_by(ExerciseAttempt.created_at.desc()).all()
-        
-        if not attempts:
-            return {
-                'attempts_count': 0,
-                'remaining_attempts': self.max_attempts if self.max_attempts else None,
-                'best_score': 0,
-                'last_attempt': None,
-                'status': 'not_started'
-            }
-        
-        # Calculer le meilleur score
-        scores = [attempt.score for attempt in attempts if attempt.score is not None]
-        best_score = max(scores) if scores else 0
-        
-        # Déterminer le statut
-        if best_score >= 70:
-            status = 'completed'
-        elif best_score > 0:
-            status = 'in_progress'
-        else:
-            status = 'not_started'
-            
-        return {
-            'attempts_count': len(attempts),
-            'remaining_attempts': self.max_attempts - len(attempts) if self.max_attempts else None,
-            'best_score': best_score,
-            'last_attempt': attempts[0],
-            'status': status
-        }
+        ).all()
+        return StudentExerciseProgress.summarize(rows, self.max_attempts)
     
     def get_stats(self, course_id=None):
         """Récupère les statistiques globales de l'exercice."""
@@ -436,12 +419,13 @@ class Exercise(db.Model):
         average_score = sum(scores) / len(scores) if scores else 0
         
         # Calculer le taux de complétion (pourcentage d'étudiants ayant fait au moins une tentative)
-        students_query = User.query.filter_by(role='student')
+        total_students = None
         if course_id:
             course = Course.query.get(course_id)
             if course:
-                students_query = course.class_obj.students
-        total_students = students_query.count()
+                total_students = len(course.class_obj.students)
+        if total_students is None:
+            total_students = User.query.filter_by(role='student').count()
         completion_rate = (unique_students / total_students * 100) if total_students > 0 else 0
         
         # Calculer le taux de réussite (pourcentage de tentatives avec un score >= 70%)
@@ -463,6 +447,12 @@ class Exercise(db.Model):
 
 class ExerciseAttempt(db.Model):
     __tablename__ = 'exercise_attempt'
+    __table_args__ = (
+        db.Index('ix_exercise_attempt_exercise_student', 'exercise_id', 'student_id'),
+        db.Index('ix_exercise_attempt_student_exercise', 'student_id', 'exercise_id'),
+        db.Index('ix_exercise_attempt_course_student', 'course_id', 'student_id'),
+        db.Index('ix_exercise_attempt_exercise_created', 'exercise_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -514,3 +504,212 @@ class CourseFile(db.Model):
     file_size = db.Column(db.Integer)  # Taille en bytes
     course_id = db.Column(db.Integer, db.ForeignKey('course.id', name='fk_file_course'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BackgroundJob(db.Model):
+    """Tâche exécutée en arrière-plan (exports, calculs de statistiques, maintenance des images)"""
+    __tablename__ = 'background_job'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hexadécimal
+    job_type = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text)  # Stocké en JSON
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'running', 'done', 'failed'
+    cache_key = db.Column(db.String(128), index=True)  # Clé de réutilisation d'un artefact déjà produit
+    artifact_path = db.Column(db.String(255))  # Fichier produit par la tâche
+    result = db.Column(db.Text)  # Stocké en JSON
+    error = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_background_job_user'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.job_type} {self.status}>'
+    
+    def get_params(self):
+        """Récupère les paramètres de la tâche"""
+        try:
+            return json.loads(self.params) if self.params else {}
+        except json.JSONDecodeError:
+            return {}
+    
+    def get_result(self):
+        """Récupère le résultat de la tâche"""
+        try:
+            return json.loads(self.result) if self.result else None
+        except json.JSONDecodeError:
+            return None
+    
+    def to_dict(self):
+        """Représentation JSON de l'état de la tâche"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'has_artifact': bool(self.artifact_path),
+            'result': self.get_result(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+# Dernière tentative résumée (remplace l'objet ExerciseAttempt dans get_student_progress)
+LastAttempt = namedtuple('LastAttempt', ['created_at', 'score'])
+
+
+def progress_status(best_score):
+    """Statut de progression à partir du meilleur score"""
+    if best_score is not None and best_score >= 70:
+        return 'completed'
+    if best_score is not None and best_score > 0:
+        return 'in_progress'
+    return 'not_started'
+
+
+class StudentExerciseProgress(db.Model):
+    """
+    Synthèse des tentatives d'un étudiant sur un exercice (par cours).
+
+    Mise à jour dans la même transaction que chaque nouvelle ExerciseAttempt
+    (voir record_attempt_progress) ; reconstruite par la commande
+    "flask backfill-progress".
+    """
+    __tablename__ = 'student_exercise_progress'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'exercise_id', 'course_id', name='uq_student_exercise_progress'),
+        db.Index('ix_student_exercise_progress_exercise_student', 'exercise_id', 'student_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_progress_student', ondelete='CASCADE'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id', name='fk_progress_exercise', ondelete='CASCADE'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', name='fk_progress_course', ondelete='CASCADE'))
+    attempts_count = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Float)
+    last_score = db.Column(db.Float)
+    last_attempt_at = db.Column(db.DateTime)
+    status = db.Column(db.String(20), nullable=False, default='not_started')  # 'not_started', 'in_progress', 'completed'
+    
+    def __repr__(self):
+        return f'<StudentExerciseProgress student={self.student_id} exercise={self.exercise_id} course={self.course_id}>'
+    
+    @staticmethod
+    def summarize(rows, max_attempts=None):
+        """
+        Progression d'un étudiant sur un exercice, tous cours confondus.
+        
+        Args:
+            rows (list): Lignes StudentExerciseProgress de l'étudiant pour l'exercice
+            max_attempts (int, optional): Nombre maximal de tentatives de l'exercice
+        
+        Returns:
+            dict: attempts_count, remaining_attempts, best_score, last_attempt, status
+        """
+        attempts_count = sum(row.attempts_count for row in rows)
+        if not attempts_count:
+            return {
+                'attempts_count': 0,
+                'remaining_attempts': max_attempts if max_attempts else None,
+                'best_score': 0,
+                'last_attempt': None,
+                'status': 'not_started'
+            }
+        
+        scores = [row.best_score for row in rows if row.best_score is not None]
+        best_score = max(scores) if scores else 0
+        latest = max(rows, key=lambda row: row.last_attempt_at or datetime.min)
+        return {
+            'attempts_count': attempts_count,
+            'remaining_attempts': max_attempts - attempts_count if max_attempts else None,
+            'best_score': best_score,
+            'last_attempt': LastAttempt(latest.last_attempt_at, latest.last_score),
+            'status': progress_status(best_score)
+        }
+
+
+class ImagePathAlias(db.Model):
+    """
+    Chemin historique d'une image → blob du magasin adressé par contenu.
+
+    Chaque fichier recensé par "flask dedupe-images" (ou réécrit vers le
+    magasin) garde ici son ancien chemin web, ce qui permet de retrouver le
+    blob SHA-256 correspondant (règle 'blob' de image_path_migration).
+    """
+    __tablename__ = 'image_path_alias'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), unique=True, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    extension = db.Column(db.String(10), nullable=False, default='')
+    size = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ImagePathAlias {self.path} -> {self.sha256[:12]}>'
+
+
+def record_attempt_progress(connection, student_id, exercise_id, course_id, score, attempted_at):
+    """
+    Répercute une nouvelle tentative sur student_exercise_progress.
+    
+    Exécuté sur la connexion de la transaction en cours : la synthèse est
+    validée ou annulée avec la tentative elle-même.
+    """
+    table = StudentExerciseProgress.__table__
+    if course_id is None:
+        course_filter = table.c.course_id.is_(None)
+    else:
+        course_filter = table.c.course_id == course_id
+    
+    if score is None:
+        new_best = table.c.best_score
+    else:
+        score_value = db.literal(score, type_=db.Float)
+        new_best = db.case(
+            (db.or_(table.c.best_score.is_(None), table.c.best_score < score_value), score_value),
+            else_=table.c.best_score
+        )
+    
+    result = connection.execute(
+        table.update().where(
+            table.c.student_id == student_id,
+            table.c.exercise_id == exercise_id,
+            course_filter
+        ).values(
+            attempts_count=table.c.attempts_count + 1,
+            best_score=new_best,
+            last_score=score,
+            last_attempt_at=attempted_at,
+            status=db.case(
+                (new_best >= 70, 'completed'),
+                (new_best > 0, 'in_progress'),
+                else_='not_started'
+            )
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(
+            student_id=student_id,
+            exercise_id=exercise_id,
+            course_id=course_id,
+            attempts_count=1,
+            best_score=score,
+            last_score=score,
+            last_attempt_at=attempted_at,
+            status=progress_status(score)
+        ))
+
+
+@event.listens_for(ExerciseAttempt, 'after_insert')
+def _update_progress_after_attempt(mapper, connection, target):
+    # Certaines routes affectent directement la valeur du formulaire ('' ou '3')
+    course_id = int(target.course_id) if target.course_id not in (None, '') else None
+    record_attempt_progress(
+        connection,
+        target.student_id,
+        target.exercise_id,
+        course_id,
+        float(target.score) if target.score is not None else None,
+        target.created_at or datetime.utcnow()
+    )
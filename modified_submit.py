@@ -1,5 +1,4 @@
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, current_app, session
-from traceback import format_exc as exc_info
 from flask_login import login_required, current_user
 import cloud_storage_no_cloudinary as cloud_storage
 from models import db, Exercise, ExerciseAttempt, User
@@ -13,6 +12,11 @@ import os
 import time
 from utils.image_utils_no_normalize import normalize_image_path
 from normalize_pairs_exercise_paths import normalize_pairs_exercise_content
+from exercise_graders import grade_exercise, GradingError
+from progress_service import get_progress_grid, get_exercise_student_ids
+from loading_profiles import exercise_stats_query, stats_course_query
+from exercise_access import can_view_exercise_stats
+from log_pipeline import category_log
 
 bp = Blueprint('exercise', __name__)
 
@@ -48,7 +52,7 @@ def create_exercise():
         
         try:
             # Log sécurisé sans caractères Unicode problématiques
-            current_app.logger.info('Donnees recues pour creation exercice')
+            category_log.CREATE_EXERCISE_DEBUG.info('Donnees recues pour creation exercice')
             title = form.title.data
             description = form.description.data
             exercise_type = form.exercise_type.data
@@ -58,11 +62,11 @@ def create_exercise():
             course_id = request.form.get('course_id')
             subject = request.form.get('subject', '').strip()
 
-            current_app.logger.info(f'Titre: {title}')
-            current_app.logger.info(f'Type: {exercise_type}')
-            current_app.logger.info(f'Tentatives: {max_attempts}')
-            current_app.logger.info(f'Cours ID: {course_id}')
-            current_app.logger.info(f'Matiere: {subject}')
+            category_log.CREATE_EXERCISE_DEBUG.info('Titre: %s', title)
+            category_log.CREATE_EXERCISE_DEBUG.info('Type: %s', exercise_type)
+            category_log.CREATE_EXERCISE_DEBUG.info('Tentatives: %s', max_attempts)
+            category_log.CREATE_EXERCISE_DEBUG.info('Cours ID: %s', course_id)
+            category_log.CREATE_EXERCISE_DEBUG.info('Matiere: %s', subject)
 
             if not all([title, exercise_type]):
                 flash('Le titre et le type d\'exercice sont obligatoires.', 'error')
@@ -83,8 +87,8 @@ def create_exercise():
             exercise_image_path = None
             
             if exercise_type == 'qcm':
-                current_app.logger.debug('Traitement d\'un exercice QCM')
-                current_app.logger.debug(f'Données du formulaire: {dict(request.form)}')
+                category_log.CREATE_EXERCISE_DEBUG.debug("Traitement d'un exercice QCM")
+                category_log.CREATE_EXERCISE_DEBUG.debug('Données du formulaire: %s', request.form)
                 
                 # Récupérer les questions et leurs options
                 questions_data = []
@@ -104,9 +108,9 @@ def create_exercise():
                     
                     correct_answer = request.form.get(f'correct_{question_index}')
                     
-                    current_app.logger.debug(f'Question {question_index}: {question_text}')
-                    current_app.logger.debug(f'Options {question_index}: {options}')
-                    current_app.logger.debug(f'Correct {question_index}: {correct_answer}')
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Question %s: %s', question_index, question_text)
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Options %s: %s', question_index, options)
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Correct %s: %s', question_index, correct_answer)
                     
                     if question_text and question_text.strip() and options and len(options) >= 2:
                         questions_data.append({
@@ -145,11 +149,11 @@ def create_exercise():
                         content['image'] = normalized_path
                         # Stocker également dans exercise_image_path pour cohérence
                         exercise_image_path = normalized_path
-                        current_app.logger.debug(f'Image QCM sauvegardée: {content["image"]}')
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Image QCM sauvegardée: %s', content['image'])
 
             elif exercise_type == 'qcm_multichoix':
-                current_app.logger.debug('Traitement d\'un exercice QCM Multichoix')
-                current_app.logger.debug(f'Données du formulaire: {dict(request.form)}')
+                category_log.CREATE_EXERCISE_DEBUG.debug("Traitement d'un exercice QCM Multichoix")
+                category_log.CREATE_EXERCISE_DEBUG.debug('Données du formulaire: %s', request.form)
                 
                 # Récupérer les questions et leurs options
                 questions_data = []
@@ -175,9 +179,9 @@ def create_exercise():
                     except (ValueError, TypeError):
                         correct_indices = []
                     
-                    current_app.logger.debug(f'Question {question_index}: {question_text}')
-                    current_app.logger.debug(f'Options {question_index}: {options}')
-                    current_app.logger.debug(f'Correct indices {question_index}: {correct_indices}')
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Question %s: %s', question_index, question_text)
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Options %s: %s', question_index, options)
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Correct indices %s: %s', question_index, correct_indices)
                     
                     # Filtrer les options vides
                     filtered_options = [opt.strip() for opt in options if opt and opt.strip()]
@@ -217,14 +221,14 @@ def create_exercise():
                         content['image'] = normalized_path
                         # Stocker également dans exercise_image_path pour cohérence
                         exercise_image_path = normalized_path
-                        current_app.logger.debug(f'Image QCM Multichoix sauvegardée: {content["image"]}')
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Image QCM Multichoix sauvegardée: %s', content['image'])
 
             elif exercise_type == 'word_search':
-                print(f'[WORD_SEARCH_CREATE_DEBUG] Form data: {dict(request.form)}')
+                category_log.WORD_SEARCH_CREATE_DEBUG.debug('Form data: %s', request.form)
                 
                 # Récupérer les mots depuis les champs word_search_words[]
                 words_from_fields = request.form.getlist('word_search_words[]')
-                print(f'[WORD_SEARCH_CREATE_DEBUG] Words from fields: {words_from_fields}')
+                category_log.WORD_SEARCH_CREATE_DEBUG.debug('Words from fields: %s', words_from_fields)
                 
                 # Traiter chaque champ (peut contenir des mots séparés par des virgules)
                 all_words = []
@@ -238,7 +242,7 @@ def create_exercise():
                             # Sinon, ajouter le mot unique
                             all_words.append(field_value.strip().upper())
                 
-                print(f'[WORD_SEARCH_CREATE_DEBUG] All words processed: {all_words}')
+                category_log.WORD_SEARCH_CREATE_DEBUG.debug('All words processed: %s', all_words)
                 
                 # Supprimer les doublons tout en préservant l'ordre
                 unique_words = []
@@ -246,7 +250,7 @@ def create_exercise():
                     if word not in unique_words:
                         unique_words.append(word)
                 
-                print(f'[WORD_SEARCH_CREATE_DEBUG] Final unique words: {unique_words}')
+                category_log.WORD_SEARCH_CREATE_DEBUG.debug('Final unique words: %s', unique_words)
                 words = unique_words
                 
                 if not words:
@@ -262,13 +266,13 @@ def create_exercise():
                 content['grid_height'] = grid_height
                 
             elif exercise_type == 'dictation':
-                print(f'[DICTATION_CREATE_DEBUG] Form data: {dict(request.form)}')
+                category_log.DICTATION_CREATE_DEBUG.debug('Form data: %s', request.form)
                 
                 # Récupérer les phrases de dictée
                 sentences = request.form.getlist('dictation_sentences[]')
                 sentences = [sentence.strip() for sentence in sentences if sentence.strip()]
                 
-                print(f'[DICTATION_CREATE_DEBUG] Sentences: {sentences}')
+                category_log.DICTATION_CREATE_DEBUG.debug('Sentences: %s', sentences)
                 
                 if not sentences:
                     flash('Veuillez entrer au moins une phrase pour la dictée.', 'error')
@@ -289,7 +293,7 @@ def create_exercise():
                         
                         audio_file.save(audio_path)
                         audio_files.append(f'/static/uploads/audio/{filename}')
-                        print(f'[DICTATION_CREATE_DEBUG] Audio saved: {audio_path}')
+                        category_log.DICTATION_CREATE_DEBUG.debug('Audio saved: %s', audio_path)
                     else:
                         audio_files.append(None)  # Pas de fichier audio pour cette phrase
                 
@@ -297,7 +301,7 @@ def create_exercise():
                 content['audio_files'] = audio_files
                 content['instructions'] = request.form.get('dictation_instructions', 'Écoute et écris sans faute. Ne mets pas de majuscule.')
                 
-                print(f'[DICTATION_CREATE_DEBUG] Final content: {content}')
+                category_log.DICTATION_CREATE_DEBUG.debug('Final content: %s', content)
                 
             elif exercise_type == 'fill_in_blanks':
                 sentences = request.form.getlist('fill_in_blanks_sentences[]')
@@ -349,7 +353,7 @@ def create_exercise():
                         content['image'] = normalized_path
                         # Stocker également dans exercise_image_path pour cohérence
                         exercise_image_path = normalized_path
-                        current_app.logger.debug(f'Image Texte à trous sauvegardée: {content["image"]}')
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Image Texte à trous sauvegardée: %s', content['image'])
                 
             elif exercise_type == 'drag_and_drop':
                 # Traitement pour glisser-déposer
@@ -565,10 +569,10 @@ def create_exercise():
                         
                         # Ajouter le chemin de l'image au contenu (pour compatibilité)
                         content['image'] = exercise_image_path
-                        current_app.logger.debug(f'Image Souligner les mots sauvegardée: {exercise_image_path}')
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Image Souligner les mots sauvegardée: %s', exercise_image_path)
 
             elif exercise_type == 'image_labeling':
-                current_app.logger.debug('Traitement d\'un exercice d\'étiquetage d\'image')
+                category_log.CREATE_EXERCISE_DEBUG.debug("Traitement d'un exercice d'étiquetage d'image")
                 
                 # Récupérer l'image principale (obligatoire)
                 main_image_path = None
@@ -587,7 +591,7 @@ def create_exercise():
                         image_file.save(image_path)
                         
                         main_image_path = f'/static/uploads/{unique_filename}'  # Ajout du slash initial pour cohérence
-                        current_app.logger.debug(f'Image principale étiquetage sauvegardée: {unique_filename}')
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Image principale étiquetage sauvegardée: %s', unique_filename)
                 
                 if not main_image_path:
                     flash('Une image principale est obligatoire pour un exercice d\'étiquetage d\'image.', 'error')
@@ -596,7 +600,7 @@ def create_exercise():
                 # Récupérer les étiquettes (compatible avec les deux formats)
                 labels = request.form.getlist('labels[]') or request.form.getlist('image_labels[]')
                 labels = [label.strip() for label in labels if label.strip()]
-                current_app.logger.debug(f'Étiquettes reçues: {labels}')
+                category_log.CREATE_EXERCISE_DEBUG.debug('Étiquettes reçues: %s', labels)
                 
                 if not labels:
                     flash('Veuillez ajouter au moins une étiquette.', 'error')
@@ -620,7 +624,7 @@ def create_exercise():
                                 'label': label
                             })
                     except (ValueError, TypeError):
-                        current_app.logger.warning(f'Zone {zone_index} invalide, ignorée')
+                        category_log.CREATE_EXERCISE_DEBUG.warning('Zone %s invalide, ignorée', zone_index)
                     
                     zone_index += 1
                 
@@ -630,9 +634,9 @@ def create_exercise():
                     zone_y_list = request.form.getlist('zone_y[]')
                     zone_label_list = request.form.getlist('zone_label[]')
                     
-                    current_app.logger.debug(f'Zones X: {zone_x_list}')
-                    current_app.logger.debug(f'Zones Y: {zone_y_list}')
-                    current_app.logger.debug(f'Zones Labels: {zone_label_list}')
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Zones X: %s', zone_x_list)
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Zones Y: %s', zone_y_list)
+                    category_log.CREATE_EXERCISE_DEBUG.debug('Zones Labels: %s', zone_label_list)
                     
                     for i in range(min(len(zone_x_list), len(zone_y_list), len(zone_label_list))):
                         try:
@@ -647,9 +651,9 @@ def create_exercise():
                                     'label': label
                                 })
                         except (ValueError, TypeError, IndexError):
-                            current_app.logger.warning(f'Zone {i} invalide, ignorée')
+                            category_log.CREATE_EXERCISE_DEBUG.warning('Zone %s invalide, ignorée', i)
                 
-                current_app.logger.debug(f'Zones finales: {zones}')
+                category_log.CREATE_EXERCISE_DEBUG.debug('Zones finales: %s', zones)
                 
                 if not zones:
                     flash('Veuillez définir au moins une zone de placement sur l\'image.', 'error')
@@ -669,10 +673,10 @@ def create_exercise():
                 content['main_image'] = main_image_path
                 content['labels'] = labels
                 content['zones'] = zones
-                current_app.logger.debug(f'Exercice étiquetage d\'image créé avec {len(labels)} étiquettes et {len(zones)} zones')
+                category_log.CREATE_EXERCISE_DEBUG.debug("Exercice étiquetage d'image créé avec %s étiquettes et %s zones", len(labels), len(zones))
 
             elif exercise_type == 'flashcards':
-                current_app.logger.debug('Traitement d\'un exercice de cartes mémoire (flashcards)')
+                category_log.CREATE_EXERCISE_DEBUG.debug("Traitement d'un exercice de cartes mémoire (flashcards)")
                 
                 # Récupérer les questions et réponses
                 questions = request.form.getlist('card_questions[]')
@@ -720,31 +724,31 @@ def create_exercise():
                             image_file.save(image_path)
                             
                             card_data['image'] = f'uploads/{unique_filename}'
-                            current_app.logger.debug(f'Image carte {i+1} sauvegardée: {unique_filename}')
+                            category_log.CREATE_EXERCISE_DEBUG.debug('Image carte %s sauvegardée: %s', i + 1, unique_filename)
                     
                     cards_data.append(card_data)
                 
                 content['cards'] = cards_data
-                current_app.logger.debug(f'Exercice flashcards créé avec {len(cards_data)} cartes')
+                category_log.CREATE_EXERCISE_DEBUG.debug('Exercice flashcards créé avec %s cartes', len(cards_data))
 
             elif exercise_type == 'word_placement':
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Traitement exercice Mots à placer')
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Données formulaire: {dict(request.form)}')
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Traitement exercice Mots à placer')
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Données formulaire: %s', request.form)
                 
                 # Récupérer les phrases depuis les champs sentences[]
                 sentences = request.form.getlist('sentences[]')
                 # Récupérer les mots depuis les champs words[]
                 words = request.form.getlist('words[]')
                 
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Phrases reçues: {sentences}')
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Mots reçus: {words}')
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Phrases reçues: %s', sentences)
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Mots reçus: %s', words)
                 
                 # Nettoyer et filtrer les phrases vides
                 sentences = [s.strip() for s in sentences if s.strip()]
                 words = [w.strip() for w in words if w.strip()]
                 
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Phrases nettoyées: {sentences}')
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Mots nettoyés: {words}')
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Phrases nettoyées: %s', sentences)
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Mots nettoyés: %s', words)
                 
                 # Validation
                 if not sentences:
@@ -794,11 +798,11 @@ def create_exercise():
                         # Ajouter le chemin de l'image au contenu JSON
                         content['image'] = normalized_path
                         
-                        print(f'[WORD_PLACEMENT_CREATE_DEBUG] Image sauvegardée: {normalized_path}')
-                        current_app.logger.debug(f'Image Word Placement sauvegardée: {normalized_path}')
+                        category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Image sauvegardée: %s', normalized_path)
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Image Word Placement sauvegardée: %s', normalized_path)
                 
-                print(f'[WORD_PLACEMENT_CREATE_DEBUG] Contenu JSON généré: {content}')
-                current_app.logger.debug(f'Exercice Mots à placer créé avec {len(sentences)} phrases et {len(words)} mots')
+                category_log.WORD_PLACEMENT_CREATE_DEBUG.debug('Contenu JSON généré: %s', content)
+                category_log.CREATE_EXERCISE_DEBUG.debug('Exercice Mots à placer créé avec %s phrases et %s mots', len(sentences), len(words))
 
             # Gestion de l'image de l'exercice (pour tous les types d'exercices)
             # exercise_image_path déjà initialisé plus haut pour underline_words
@@ -821,7 +825,7 @@ def create_exercise():
                     
                     # Stocker le chemin normalisé pour la base de données
                     exercise_image_path = normalized_path
-                    current_app.logger.info(f'Image exercice sauvegardée: {exercise_image_path}')
+                    category_log.CREATE_EXERCISE_DEBUG.info('Image exercice sauvegardée: %s', exercise_image_path)
 
             # Créer l'exercice
             exercise = Exercise(
@@ -866,15 +870,15 @@ def create_exercise():
                         if exercise not in course.exercises:
                             course.exercises.append(exercise)
                             db.session.commit()
-                            print(f'Exercice associé au cours: {course.title}')
+                            category_log.CREATE_EXERCISE_DEBUG.debug('Exercice associé au cours: %s', course.title)
                         else:
-                            print(f'Exercice déjà associé au cours: {course.title}')
+                            category_log.CREATE_EXERCISE_DEBUG.debug('Exercice déjà associé au cours: %s', course.title)
                     else:
-                        print('Cours non trouvé ou accès non autorisé')
+                        category_log.CREATE_EXERCISE_DEBUG.debug('Cours non trouvé ou accès non autorisé')
                 except (ValueError, TypeError) as e:
-                    print(f'Erreur lors de l\'association au cours: {e}')
+                    category_log.CREATE_EXERCISE_ERROR.error("Erreur lors de l'association au cours: %s", e)
                 except Exception as e:
-                    print(f'Erreur d\'association (contrainte unique): {e}')
+                    category_log.CREATE_EXERCISE_ERROR.error("Erreur d'association (contrainte unique): %s", e)
                     # L'exercice est créé, l'association échoue mais ce n'est pas grave
 
             flash('Exercice créé avec succès !', 'success')
@@ -882,34 +886,33 @@ def create_exercise():
 
         except Exception as e:
             # Logs sécurisés sans caractères Unicode problématiques
-            current_app.logger.error("=== ERREUR CREATION EXERCICE ===")
-            current_app.logger.error(f"Type d'erreur: {type(e).__name__}")
-            current_app.logger.error(f"Message: {str(e)}")
-            current_app.logger.error(f"Traceback complet: {exc_info()}")
+            category_log.CREATE_EXERCISE_ERROR.error('=== ERREUR CREATION EXERCICE ===')
+            category_log.CREATE_EXERCISE_ERROR.error("Type d'erreur: %s", type(e).__name__)
+            category_log.CREATE_EXERCISE_ERROR.error('Message: %s', e)
+            category_log.CREATE_EXERCISE_ERROR.error('Traceback complet:', exc_info=True)
             try:
-                current_app.logger.error(f"Form data recue: {dict(request.form)}")
+                category_log.CREATE_EXERCISE_ERROR.error('Form data recue: %s', request.form)
             except UnicodeEncodeError:
-                current_app.logger.error("Form data recue: [Unicode encoding error]")
-            current_app.logger.error(f"Files recus: {list(request.files.keys())}")
-            current_app.logger.error("=== FIN ERREUR ===")
+                category_log.CREATE_EXERCISE_ERROR.error('Form data recue: [Unicode encoding error]')
+            category_log.CREATE_EXERCISE_ERROR.error('Files recus: %s', request.files)
+            category_log.CREATE_EXERCISE_ERROR.error('=== FIN ERREUR ===')
             
             # En cas d'erreur, rediriger vers la bibliothèque d'exercices
             flash('Une erreur est survenue lors de la création de l\'exercice.', 'error')
             return redirect(url_for('exercise.exercise_library'))
 
         if request.method == 'POST':
-            print(f"[EDIT_POST_DEBUG] POST request received for exercise {exercise_id}")
-            print(f"[EDIT_POST_DEBUG] Form data keys: {list(request.form.keys())}")
-            print(f"[EDIT_POST_DEBUG] Form data: {dict(request.form)}")
+            category_log.EDIT_POST_DEBUG.debug('POST request received for exercise %s', exercise_id)
+            category_log.EDIT_POST_DEBUG.debug('Form data: %s', request.form)
             
             # Vérifier les champs requis
             title = request.form.get('title', '').strip()
             subject = request.form.get('subject', '').strip()
             description = request.form.get('description', '').strip()
             
-            print(f"[EDIT_POST_DEBUG] Title: '{title}'")
-            print(f"[EDIT_POST_DEBUG] Subject: '{subject}'")
-            print(f"[EDIT_POST_DEBUG] Description: '{description}'")
+            category_log.EDIT_POST_DEBUG.debug("Title: '%s'", title)
+            category_log.EDIT_POST_DEBUG.debug("Subject: '%s'", subject)
+            category_log.EDIT_POST_DEBUG.debug("Description: '%s'", description)
             
             if not title:
                 flash('Le titre est requis.', 'error')
@@ -923,18 +926,18 @@ def create_exercise():
             # Traiter le contenu selon le type d'exercice
             content = {}
             if exercise.exercise_type == 'qcm':
-                print(f"[QCM_EDIT_DEBUG] Processing QCM edit...")
-                print(f'[QCM_EDIT_DEBUG] Tous les champs du formulaire: {list(request.form.keys())}')
+                category_log.QCM_EDIT_DEBUG.debug('Processing QCM edit...')
+                category_log.QCM_EDIT_DEBUG.debug('Tous les champs du formulaire: %s', request.form)
                 
                 # CORRECTION : Le template utilise questions[] (format tableau HTML)
                 questions_list = request.form.getlist('questions[]')
-                print(f'[QCM_EDIT_DEBUG] Questions trouvées: {questions_list}')
+                category_log.QCM_EDIT_DEBUG.debug('Questions trouvées: %s', questions_list)
                 
                 questions = []
                 
                 for question_index, question_text in enumerate(questions_list):
                     question_text = question_text.strip()
-                    print(f"[QCM_EDIT_DEBUG] Question {question_index}: '{question_text}'")
+                    category_log.QCM_EDIT_DEBUG.debug("Question %s: '%s'", question_index, question_text)
                     
                     if question_text:  # Si la question n'est pas vide
                         # Récupérer les options pour cette question
@@ -947,11 +950,11 @@ def create_exercise():
                                 options.append(option_text)
                             option_index += 1
                         
-                        print(f"[QCM_EDIT_DEBUG] Options for Q{question_index}: {options}")
+                        category_log.QCM_EDIT_DEBUG.debug('Options for Q%s: %s', question_index, options)
                         
                         # Récupérer la réponse correcte
                         correct = request.form.get(f'correct_{question_index}')
-                        print(f"[QCM_EDIT_DEBUG] Correct answer for Q{question_index}: '{correct}'")
+                        category_log.QCM_EDIT_DEBUG.debug("Correct answer for Q%s: '%s'", question_index, correct)
                         
                         if options:  # Si au moins une option existe
                             try:
@@ -965,11 +968,11 @@ def create_exercise():
                                 'correct_answer': correct_answer
                             })
                         else:
-                            print(f'[QCM_EDIT_DEBUG] Question {question_index} ignorée (pas d\'options)')
+                            category_log.QCM_EDIT_DEBUG.debug("Question %s ignorée (pas d'options)", question_index)
                     else:
-                        print(f'[QCM_EDIT_DEBUG] Question {question_index} ignorée (texte vide)')
+                        category_log.QCM_EDIT_DEBUG.debug('Question %s ignorée (texte vide)', question_index)
                 
-                print(f"[QCM_EDIT_DEBUG] Total questions found: {len(questions)}")
+                category_log.QCM_EDIT_DEBUG.debug('Total questions found: %s', len(questions))
                 
                 if not questions:
                     flash('Veuillez ajouter au moins une question.', 'error')
@@ -1009,15 +1012,15 @@ def create_exercise():
                 
             elif exercise.exercise_type == 'word_search':
                 # Traitement pour mots mêlés (édition)
-                print(f"[WORD_SEARCH_EDIT_DEBUG] Processing word_search edit...")
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Processing word_search edit...')
                 
                 # Récupérer les mots à trouver
                 words = request.form.getlist('words[]')
                 # Filtrer les mots vides
                 filtered_words = [word.strip().upper() for word in words if word.strip()]
                 
-                print(f"[WORD_SEARCH_EDIT_DEBUG] Words received: {words}")
-                print(f"[WORD_SEARCH_EDIT_DEBUG] Filtered words: {filtered_words}")
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Words received: %s', words)
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Filtered words: %s', filtered_words)
                 
                 # Récupérer la taille de grille
                 grid_size_value = request.form.get('grid_size', '8')
@@ -1028,7 +1031,7 @@ def create_exercise():
                 except (ValueError, TypeError):
                     grid_size = 12  # Valeur par défaut
                 
-                print(f"[WORD_SEARCH_EDIT_DEBUG] Grid size: {grid_size}")
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Grid size: %s', grid_size)
                 
                 # Validation
                 if not filtered_words:
@@ -1046,7 +1049,7 @@ def create_exercise():
                 content['grid_size'] = {'width': grid_size, 'height': grid_size}
                 content['instructions'] = 'Trouvez tous les mots cachés dans la grille ci-dessous.'
                 
-                print(f"[WORD_SEARCH_EDIT_DEBUG] Final content: {content}")
+                category_log.WORD_SEARCH_EDIT_DEBUG.debug('Final content: %s', content)
                 
             elif exercise.exercise_type == 'drag_and_drop':
                 # Traitement pour glisser-déposer (édition)
@@ -1151,7 +1154,7 @@ def create_exercise():
             
             elif exercise.exercise_type == 'dictation':
                 # Traitement pour les exercices de dictée (édition)
-                print(f"[DICTATION_EDIT_DEBUG] Processing dictation edit...")
+                category_log.DICTATION_EDIT_DEBUG.debug('Processing dictation edit...')
                 
                 # Récupérer les instructions
                 instructions = request.form.get('dictation_instructions', '').strip()
@@ -1162,8 +1165,8 @@ def create_exercise():
                 sentences = request.form.getlist('dictation_sentences[]')
                 sentences = [s.strip() for s in sentences if s.strip()]
                 
-                print(f"[DICTATION_EDIT_DEBUG] Instructions: {instructions}")
-                print(f"[DICTATION_EDIT_DEBUG] Sentences: {sentences}")
+                category_log.DICTATION_EDIT_DEBUG.debug('Instructions: %s', instructions)
+                category_log.DICTATION_EDIT_DEBUG.debug('Sentences: %s', sentences)
                 
                 # Validation
                 if not sentences:
@@ -1191,7 +1194,7 @@ def create_exercise():
                                 file_path = os.path.join(audio_folder, unique_filename)
                                 file.save(file_path)
                                 audio_file = f'/static/exercises/audio/{unique_filename}'
-                                print(f"[DICTATION_EDIT_DEBUG] Audio file {i} saved: {audio_file}")
+                                category_log.DICTATION_EDIT_DEBUG.debug('Audio file %s saved: %s', i, audio_file)
                             else:
                                 flash(f'Le fichier audio {i+1} doit être au format MP3, WAV, OGG ou M4A.', 'error')
                                 return render_template('exercise_types/dictation_edit.html', exercise=exercise, content=exercise.get_content())
@@ -1205,7 +1208,7 @@ def create_exercise():
                     
                     audio_files.append(audio_file)
                 
-                print(f"[DICTATION_EDIT_DEBUG] Audio files: {audio_files}")
+                category_log.DICTATION_EDIT_DEBUG.debug('Audio files: %s', audio_files)
                 
                 # Construire le contenu
                 content = {
@@ -1214,7 +1217,7 @@ def create_exercise():
                     'audio_files': audio_files
                 }
                 
-                print(f"[DICTATION_EDIT_DEBUG] Final content: {content}")
+                category_log.DICTATION_EDIT_DEBUG.debug('Final content: %s', content)
             
             # Type d'exercice legend supprimé du projet
             
@@ -1226,24 +1229,24 @@ def create_exercise():
             return redirect(url_for('exercise.exercise_library'))
         
         # Méthode GET : afficher le formulaire d'édition
-        print(f"[EDIT_DEBUG] Exercise ID: {exercise_id}")
-        print(f"[EDIT_DEBUG] Exercise type: '{exercise.exercise_type}'")
-        print(f"[EDIT_DEBUG] Exercise title: '{exercise.title}'")
+        category_log.EDIT_DEBUG.debug('Exercise ID: %s', exercise_id)
+        category_log.EDIT_DEBUG.debug("Exercise type: '%s'", exercise.exercise_type)
+        category_log.EDIT_DEBUG.debug("Exercise title: '%s'", exercise.title)
         
         template_path = f'exercise_types/{exercise.exercise_type}_edit.html'
-        print(f"[EDIT_DEBUG] Template path: '{template_path}'")
+        category_log.EDIT_DEBUG.debug("Template path: '%s'", template_path)
         
         content = exercise.get_content()
-        print(f"[EDIT_DEBUG] Content type: {type(content)}")
-        print(f"[EDIT_DEBUG] Content keys: {list(content.keys()) if isinstance(content, dict) else 'Not a dict'}")
+        category_log.EDIT_DEBUG.debug('Content type: %s', type(content))
+        category_log.EDIT_DEBUG.debug('Content keys: %s', list(content.keys()) if isinstance(content, dict) else 'Not a dict')
         
         attempts_count = ExerciseAttempt.query.filter_by(exercise_id=exercise_id).count()
-        print(f"[EDIT_DEBUG] Attempts count: {attempts_count}")
+        category_log.EDIT_DEBUG.debug('Attempts count: %s', attempts_count)
         
         try:
             return render_template(template_path, exercise=exercise, content=content, attempts_count=attempts_count)
         except Exception as template_error:
-            print(f"[EDIT_DEBUG] Template error: {str(template_error)}")
+            category_log.EDIT_DEBUG.debug('Template error: %s', template_error)
             flash(f'Une erreur est survenue : le template de modification pour ce type d\'exercice est manquant.', 'error')
             return redirect(url_for('exercise.exercise_library'))
 
@@ -1299,281 +1302,27 @@ def exercise_library():
 def submit_answer(exercise_id):
     try:
         exercise = db.get_or_404(Exercise, exercise_id)
-        content = exercise.get_content()
         
         # Vérifier si le type d'exercice est supporté
         supported_types = [t[0] for t in Exercise.EXERCISE_TYPES]  # Utilise la liste des types du modèle Exercise
         if exercise.exercise_type not in supported_types:
-            print(f'Type d\'exercice non supporté: {exercise.exercise_type}')
+            category_log.SUBMIT_DEBUG.warning("Type d'exercice non supporté: %s", exercise.exercise_type)
             flash(f'Le type d\'exercice {exercise.exercise_type} n\'est pas pris en charge.', 'error')
             return render_template('exercise_not_found.html'), 404
             
-        # Vérifier la structure du contenu
-        if not content:
-            print('Contenu invalide: contenu vide ou None')
+        # Contenu brut : le décodage est fait une seule fois par le cache des corrigés
+        if not exercise.content:
+            category_log.SUBMIT_DEBUG.warning('Contenu invalide: contenu vide ou None')
             flash('Erreur: Le contenu de l\'exercice est invalide.', 'error')
             return render_template('exercise_not_found.html'), 404
             
-        if exercise.exercise_type == 'qcm':
-            # Vérifier la structure du contenu
-            if not content or 'questions' not in content:
-                print('Contenu QCM invalide: clé "questions" manquante')
-                flash('Erreur: Le contenu de l\'exercice est invalide.', 'error')
-                return render_template('exercise_not_found.html'), 404
-            
-            # Récupérer les réponses de l'utilisateur
-            user_answers = []
-            for i in range(len(content['questions'])):
-                answer = request.form.get(f'answer_{i}')
-                if answer is not None:
-                    try:
-                        user_answers.append(int(answer))
-                    except ValueError:
-                        user_answers.append(-1)  # -1 pour une réponse invalide
-                else:
-                    user_answers.append(-1)  # -1 pour une absence de réponse
-            
-            # Vérifier que toutes les questions ont une réponse
-            if -1 in user_answers:
-                flash('Veuillez répondre à toutes les questions.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            # Calculer le score
-            correct_count = 0
-            total_questions = len(content['questions'])
-            feedback = []
-            
-            for i, (question, user_answer) in enumerate(zip(content['questions'], user_answers)):
-                is_correct = user_answer == question['correct_answer']
-                if is_correct:
-                    correct_count += 1
-                
-                feedback.append({
-                    'question': question['text'],
-                    'student_answer': question['options'][user_answer] if user_answer >= 0 else 'Pas de réponse',
-                    'correct_answer': question['options'][question['correct_answer']],
-                    'is_correct': is_correct
-                })
-            
-            score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
-            
-        elif exercise.exercise_type == 'pairs':
-            # Vérifier la structure du contenu
-            if not content or 'pairs' not in content:
-                print('Contenu Paires invalide: clé "pairs" manquante')
-                flash('Erreur: Le contenu de l\'exercice est invalide.', 'error')
-                return render_template('exercise_not_found.html'), 404
-            
-            # Récupérer les paires soumises par l'utilisateur
-            submitted_pairs = []
-            for key, value in request.form.items():
-                if key.startswith('pair_'):
-                    try:
-                        pair_index = int(key.split('_')[1])
-                        right_index = int(value)
-                        submitted_pairs.append((pair_index, right_index))
-                    except (ValueError, TypeError):
-                        continue
-            
-            # Vérifier que toutes les paires ont été associées
-            if len(submitted_pairs) != len(content['pairs']):
-                flash('Veuillez associer toutes les paires.', 'error')
-                return redirect(url_for('view_exercise', exercise_id=exercise_id))
-            
-            # Trier les paires par index
-            submitted_pairs.sort()
-            
-            # Vérifier les correspondances
-            correct_count = 0
-            total_pairs = len(content['pairs'])
-            feedback = []
-            
-            for left_idx, right_idx in submitted_pairs:
-                is_correct = left_idx == right_idx
-                if is_correct:
-                    correct_count += 1
-                
-                feedback.append({
-                    'left': content['pairs'][left_idx]['left'],
-                    'right': content['pairs'][right_idx]['right'],
-                    'correct_right': content['pairs'][left_idx]['right'],
-                    'is_correct': is_correct
-                })
-            
-            score = (correct_count / total_pairs) * 100 if total_pairs > 0 else 0
-            
-        elif exercise.exercise_type == 'word_search':
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Processing word_search exercise {exercise_id}')
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Form data: {dict(request.form)}')
-            
-            # Récupérer les mots trouvés par l'utilisateur depuis les champs word_0, word_1, etc.
-            found_words = []
-            for key, value in request.form.items():
-                if key.startswith('word_') and value:
-                    word = value.strip().upper()
-                    if word and word != 'UNDEFINED':  # Éviter les valeurs vides ou non définies
-                        found_words.append(word)
-            
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Found words by user: {found_words}')
-            
-            target_words = content.get('words', [])
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Target words: {target_words}')
-            
-            if not target_words:
-                print('Contenu Mots mêlés invalide: liste de mots vide')
-                flash('Erreur: Le contenu de l\'exercice est invalide.', 'error')
-                return render_template('exercise_not_found.html'), 404
-            
-            # Calculer le score
-            correct_words = [word for word in found_words if word in target_words]
-            incorrect_words = [word for word in found_words if word not in target_words]
-            missed_words = [word for word in target_words if word not in found_words]
-            
-            correct_count = len(correct_words)
-            total_words = len(target_words)
-            score = (correct_count / total_words) * 100 if total_words > 0 else 0
-            
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Correct words: {correct_words}')
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Incorrect words: {incorrect_words}')
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Missed words: {missed_words}')
-            print(f'[WORD_SEARCH_SUBMIT_DEBUG] Score: {correct_count}/{total_words} = {score}%')
-            
-            feedback = {
-                'correct_words': correct_words,
-                'incorrect_words': incorrect_words,
-                'missed_words': missed_words,
-                'total_found': len(found_words),
-                'total_correct': correct_count,
-                'total_words': total_words
-            }
-            
-        elif exercise.exercise_type == 'fill_in_blanks':
-            # Log du contenu de l'exercice
-            current_app.logger.info(f'Contenu de l\'exercice: {json.dumps(content, indent=2)}')
-            current_app.logger.info(f'Données du formulaire: {json.dumps(dict(request.form), indent=2)}')
-            
-            # Récupérer les réponses
-            answers = {}
-            for key, value in request.form.items():
-                if key.startswith('answer_'):
-                    try:
-                        blank_index = int(key.split('_')[1])
-                        answers[blank_index] = value.strip()
-                        current_app.logger.info(f'Réponse trouvée: index={blank_index}, valeur={value}')
-                    except (ValueError, TypeError) as e:
-                        current_app.logger.error(f'Erreur de parsing pour {key}: {str(e)}')
-                        continue
-            
-            if not content.get('sentences') or not content.get('words'):
-                current_app.logger.error('Contenu Texte à trous invalide: clés "sentences" ou "words" manquantes')
-                current_app.logger.error(f'Contenu disponible: {json.dumps(content, indent=2)}')
-                flash('Erreur: Le contenu de l\'exercice est invalide.', 'error')
-                return render_template('exercise_not_found.html'), 404
-            
-            correct_count = 0
-            total_blanks = 0
-            feedback = []
-            
-            # Pour chaque phrase
-            for i, sentence in enumerate(content['sentences']):
-                current_app.logger.info(f'Traitement de la phrase {i}: {sentence}')
-                
-                # Extraire le texte de la phrase selon sa structure
-                if isinstance(sentence, dict) and 'text' in sentence:
-                    sentence_text = sentence['text']
-                else:
-                    sentence_text = sentence
-                current_app.logger.info(f'Texte de la phrase: {sentence_text}')
-                
-                # Trouver tous les trous dans la phrase
-                blanks = sentence_text.count('___')
-                total_blanks += blanks
-                current_app.logger.info(f'Nombre de trous trouvés: {blanks}')
-
-                # Séparer la phrase en parties
-                parts = sentence_text.split('___')
-                current_app.logger.info(f'Parties de la phrase: {parts}')
-                
-                # Vérifier si la réponse est correcte pour cette position
-                student_answer = answers.get(i, '')
-                current_app.logger.info(f'Réponse de l\'étudiant: {student_answer}')
-                
-                if student_answer in content['words']:
-                    current_app.logger.info(f'Réponse {student_answer} trouvée dans les mots disponibles')
-                    # Reconstruire la phrase avec la réponse
-                    reconstructed = parts[0]
-                    for j in range(1, len(parts)):
-                        reconstructed += student_answer + parts[j]
-                    
-                    current_app.logger.info(f'Phrase reconstruite: {reconstructed}')
-                    current_app.logger.info(f'Phrase attendue: {sentence_text.replace("___", student_answer)}')
-                    
-                    # Vérifier si la réponse est correcte à cette position
-                    if reconstructed.strip() == sentence_text.replace('___', student_answer).strip():
-                        correct_count += 1
-                        current_app.logger.info('Réponse correcte !')
-                    else:
-                        current_app.logger.info('Réponse incorrecte')
-                else:
-                    current_app.logger.info(f'Réponse {student_answer} non trouvée dans les mots disponibles: {content["words"]}')
-
-                feedback.append({
-                    'sentence': sentence_text,
-                    'student_answer': student_answer,
-                    'is_correct': student_answer in content['words'] and \
-                                 reconstructed.strip() == sentence_text.replace('___', student_answer).strip()
-                })
-            
-            score = (correct_count / total_blanks) * 100 if total_blanks > 0 else 0
-            
-        elif exercise.exercise_type == 'word_placement':
-            print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Processing word_placement exercise {exercise_id}')
-            print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Form data: {dict(request.form)}')
-            print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Content: {content}')
-            
-            # Vérifier la structure du contenu
-            if not content or 'sentences' not in content or 'answers' not in content:
-                print('Contenu Word Placement invalide: clés "sentences" ou "answers" manquantes')
-                flash('Erreur: Le contenu de l\'exercice est invalide.', 'error')
-                return render_template('exercise_not_found.html'), 404
-
-            sentences = content['sentences']
-            correct_answers = content['answers']
-            total_blanks = len(correct_answers)
-            correct_count = 0
-            feedback = []
-            
-            print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Total blanks: {total_blanks}')
-            print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Expected answers: {correct_answers}')
-
-            # Vérifier chaque réponse
-            for i in range(total_blanks):
-                student_answer = request.form.get(f'answer_{i}')
-                expected_answer = correct_answers[i] if i < len(correct_answers) else ''
-                
-                print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Blank {i}:')
-                print(f'  - Réponse étudiant (answer_{i}): {student_answer}')
-                print(f'  - Réponse attendue: {expected_answer}')
-                
-                is_correct = False
-                if student_answer and expected_answer:
-                    is_correct = student_answer.strip().lower() == expected_answer.strip().lower()
-                    if is_correct:
-                        correct_count += 1
-                
-                feedback.append({
-                    'blank_index': i,
-                    'student_answer': student_answer or '',
-                    'correct_answer': expected_answer,
-                    'is_correct': is_correct
-                })
-
-            score = (correct_count / total_blanks) * 100 if total_blanks > 0 else 0
-            print(f'[WORD_PLACEMENT_SUBMIT_DEBUG] Score final: {score}% ({correct_count}/{total_blanks})')
-            
-        else:
-            flash(f'Le type d\'exercice {exercise.exercise_type} n\'est pas pris en charge.', 'error')
+        # Correction via le registre des correcteurs (corrigé compilé mis en cache)
+        try:
+            result = grade_exercise(exercise, request.form, validate=True)
+        except GradingError as e:
+            flash(str(e), 'error')
             return redirect(url_for('view_exercise', exercise_id=exercise_id))
+        score, feedback = result.score, result.feedback
         
         # Récupérer le course_id s'il est présent dans la requête
         course_id = request.args.get('course_id', type=int)
@@ -1584,6 +1333,7 @@ def submit_answer(exercise_id):
             student_id=current_user.id,
             course_id=course_id,  # Peut être None si pas de cours associé
             score=score,
+            answers=json.dumps(result.answers),
             feedback=json.dumps(feedback),
             completed=True
         )
@@ -1595,30 +1345,29 @@ def submit_answer(exercise_id):
             
     except Exception as e:
         # Log détaillé de l'erreur
-        current_app.logger.error('='*50)
-        current_app.logger.error('ERREUR DE SOUMISSION')
-        current_app.logger.error(f'Exercise ID: {exercise_id}')
-        current_app.logger.error(f'Type d\'erreur: {type(e).__name__}')
-        current_app.logger.error(f'Message d\'erreur: {str(e)}')
-        current_app.logger.error('Traceback complet:')
-        current_app.logger.error(exc_info())
+        category_log.SUBMIT_ERROR.error('=' * 50)
+        category_log.SUBMIT_ERROR.error('ERREUR DE SOUMISSION')
+        category_log.SUBMIT_ERROR.error('Exercise ID: %s', exercise_id)
+        category_log.SUBMIT_ERROR.error("Type d'erreur: %s", type(e).__name__)
+        category_log.SUBMIT_ERROR.error("Message d'erreur: %s", e)
+        category_log.SUBMIT_ERROR.error('Traceback complet:', exc_info=True)
         
         # Log des données de la requête
-        current_app.logger.error('\nDonnées de la requête:')
-        current_app.logger.error(f'Method: {request.method}')
-        current_app.logger.error(f'Form data: {dict(request.form)}')
-        current_app.logger.error(f'Args: {dict(request.args)}')
+        category_log.SUBMIT_ERROR.error('\nDonnées de la requête:')
+        category_log.SUBMIT_ERROR.error('Method: %s', request.method)
+        category_log.SUBMIT_ERROR.error('Form data: %s', request.form)
+        category_log.SUBMIT_ERROR.error('Args: %s', request.args)
         
         # Log du contenu de l'exercice
         try:
             exercise = db.get_or_404(Exercise, exercise_id)
-            current_app.logger.error('\nDonnées de l\'exercice:')
-            current_app.logger.error(f'Type: {exercise.exercise_type}')
-            current_app.logger.error(f'Content: {exercise.content}')
+            category_log.SUBMIT_ERROR.error("\nDonnées de l'exercice:")
+            category_log.SUBMIT_ERROR.error('Type: %s', exercise.exercise_type)
+            category_log.SUBMIT_ERROR.error('Content: %s', exercise.content)
         except Exception as ex:
-            current_app.logger.error(f'\nErreur lors de la récupération de l\'exercice: {str(ex)}')
+            category_log.SUBMIT_ERROR.error("\nErreur lors de la récupération de l'exercice: %s", ex)
         
-        current_app.logger.error('='*50)
+        category_log.SUBMIT_ERROR.error('=' * 50)
         
         flash('Une erreur est survenue lors de la soumission de l\'exercice.', 'error')
         return redirect(url_for('view_exercise', exercise_id=exercise_id))
@@ -1654,7 +1403,7 @@ def delete_exercise(exercise_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f'Erreur lors de la suppression de l\'exercice {exercise_id}: {str(e)}\n{exc_info()}')
+        category_log.EXERCISE_ERROR.error("Erreur lors de la suppression de l'exercice %s: %s", exercise_id, e, exc_info=True)
         flash('Une erreur est survenue lors de la suppression de l\'exercice.', 'error')
         return redirect(url_for('exercise.exercise_library'))
 
@@ -1700,7 +1449,7 @@ def preview_exercise(exercise_id):
             return redirect(url_for('exercise.exercise_library'))
             
     except Exception as e:
-        current_app.logger.error(f'Erreur lors de la prévisualisation de l\'exercice: {str(e)}\n{exc_info()}')
+        category_log.EXERCISE_ERROR.error("Erreur lors de la prévisualisation de l'exercice: %s", e, exc_info=True)
         flash('Une erreur est survenue lors de la prévisualisation de l\'exercice.', 'error')
         return redirect(url_for('exercise.exercise_library'))
 
@@ -1744,43 +1493,28 @@ def view_feedback(exercise_id, attempt_id):
         )
         
     except Exception as e:
-        current_app.logger.error(f'Erreur lors de l\'affichage du feedback: {str(e)}\n{exc_info()}')
+        category_log.EXERCISE_ERROR.error("Erreur lors de l'affichage du feedback: %s", e, exc_info=True)
         flash('Une erreur est survenue lors de l\'affichage du feedback.', 'error')
         return redirect(url_for('exercise.exercise_library'))
 
 @bp.route('/stats/<int:exercise_id>')
 @login_required
 def exercise_stats(exercise_id):
-    exercise = Exercise.query.get_or_404(exercise_id)
+    exercise = exercise_stats_query().filter_by(id=exercise_id).first_or_404()
     course_id = request.args.get('course_id', type=int)
     
     # Vérifier que l'enseignant a le droit d'accéder à ces statistiques
-    has_access = False
-    
-    # Vérifier si l'enseignant est le créateur de l'exercice
-    if exercise.teacher_id == current_user.id:
-        has_access = True
-    else:
-        # Vérifier si l'exercice est utilisé dans l'une des classes de l'enseignant
-        teacher_classes = Class.query.filter_by(teacher_id=current_user.id).all()
-        for class_obj in teacher_classes:
-            for course in class_obj.courses:
-                if exercise in course.exercises:
-                    has_access = True
-                    break
-            if has_access:
-                break
-    
-    if not has_access:
+    # (auteur de l'exercice ou exercice utilisé dans l'une de ses classes)
+    if not can_view_exercise_stats(current_user, exercise.id):
         flash("Vous n'avez pas l'autorisation de voir ces statistiques.", "error")
         return redirect(url_for('index'))
     
+    # Récupérer les informations du cours si spécifié (avant get_stats, qui le relit)
+    course = stats_course_query().filter_by(id=course_id).first() if course_id else None
+    
     # Récupérer les statistiques
     stats = exercise.get_stats(course_id)
     
-    # Récupérer les informations du cours si spécifié
-    course = Course.query.get(course_id) if course_id else None
-    
     # Ajouter les informations de progression pour chaque étudiant
     student_progress = []
     
@@ -1789,17 +1523,15 @@ def exercise_stats(exercise_id):
         students_to_show = course.class_obj.students
     else:
         # Sans cours spécifié, montrer tous les étudiants qui ont déjà fait l'exercice
-        attempts = ExerciseAttempt.query.filter_by(exercise_id=exercise.id).all()
-        student_ids = list(set([a.student_id for a in attempts]))  # Utiliser set() pour éliminer les doublons
+        student_ids = get_exercise_student_ids(exercise.id)
         students_to_show = User.query.filter(User.id.in_(student_ids), User.role=='student').all()
     
+    progress_grid = get_progress_grid([exercise], [student.id for student in students_to_show])
     for student in students_to_show:
-        progress = exercise.get_student_progress(student.id)
-        if progress:
-            student_progress.append({
-                'student': student,
-                'progress': progress
-            })
+        student_progress.append({
+            'student': student,
+            'progress': progress_grid[(student.id, exercise.id)]
+        })
     
     return render_template('exercise_stats.html',
                          exercise=exercise,
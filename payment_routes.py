@@ -2,7 +2,6 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from payment_service import PaymentService
 from models import User, db
-import stripe
 import os
 from datetime import datetime
 
@@ -1,14 +1,21 @@
-import stripe
 import os
 from flask import current_app, url_for
 from models import User, db
 import logging
 
+
+def get_stripe():
+    """Module stripe, importé au premier paiement plutôt qu'au démarrage de chaque worker"""
+    import stripe
+    if stripe.api_key is None:
+        stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
+    return stripe
+
+
 class PaymentService:
     """Service de gestion des paiements Stripe"""
     
     def __init__(self):
-        stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
         self.webhook_secret = os.environ.get('STRIPE_WEBHOOK_SECRET')
     
     @staticmethod
@@ -48,7 +55,7 @@ class PaymentService:
                 }
             
             # Créer la session de paiement
-            session = stripe.checkout.Session.create(
+            session = get_stripe().checkout.Session.create(
                 payment_method_types=['card'],
                 line_items=[{
                     'price_data': {
@@ -114,7 +121,7 @@ class PaymentService:
     def verify_payment(self, session_id):
         """Vérifier le statut d'un paiement"""
         try:
-            session = stripe.checkout.Session.retrieve(session_id)
+            session = get_stripe().checkout.Session.retrieve(session_id)
             return session
         except Exception as e:
             current_app.logger.error(f"Erreur vérification paiement: {str(e)}")
@@ -149,6 +156,7 @@ class PaymentService:
     
     def handle_webhook(self, payload, sig_header):
         """Traiter les webhooks Stripe"""
+        stripe = get_stripe()
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, self.webhook_secret
@@ -0,0 +1,187 @@
+"""
+Service de progression des étudiants (table student_exercise_progress)
+
+La table est une synthèse des tentatives (nombre, meilleur score, dernier
+score, date de la dernière tentative, statut) par (étudiant, exercice, cours).
+Elle est tenue à jour à chaque nouvelle ExerciseAttempt (voir
+models.record_attempt_progress) ; les pages de cours et de statistiques
+lisent une grille classe × exercices en une seule requête indexée.
+"""
+
+import click
+from sqlalchemy import func
+
+from extensions import db
+from models import ExerciseAttempt, StudentExerciseProgress, record_attempt_progress
+
+
+def get_progress_grid(exercises, student_ids):
+    """
+    Progression de plusieurs étudiants sur plusieurs exercices (une requête).
+
+    Args:
+        exercises (list): Objets Exercise
+        student_ids (list): Identifiants des étudiants
+
+    Returns:
+        dict: {(student_id, exercise_id): progression} pour toutes les combinaisons,
+            au format de Exercise.get_student_progress
+    """
+    exercise_ids = [exercise.id for exercise in exercises]
+    rows_by_key = {}
+    if exercise_ids and student_ids:
+        rows = StudentExerciseProgress.query.filter(
+            StudentExerciseProgress.exercise_id.in_(exercise_ids),
+            StudentExerciseProgress.student_id.in_(student_ids)
+        ).all()
+        for row in rows:
+            rows_by_key.setdefault((row.student_id, row.exercise_id), []).append(row)
+
+    return {
+        (student_id, exercise.id): StudentExerciseProgress.summarize(
+            rows_by_key.get((student_id, exercise.id), []), exercise.max_attempts
+        )
+        for exercise in exercises
+        for student_id in student_ids
+    }
+
+
+def get_course_stats_grid(courses, student_ids):
+    """
+    Statistiques de plusieurs étudiants sur plusieurs cours (une requête).
+
+    Args:
+        courses (list): Objets Course (course.exercises doit être chargé)
+        student_ids (list): Identifiants des étudiants
+
+    Returns:
+        dict: {(student_id, course_id): statistiques} pour toutes les combinaisons,
+            avec les clés numériques de Course.get_student_stats
+            (exercises_attempted, exercises_completed, total_exercises, average_score)
+    """
+    course_ids = [course.id for course in courses]
+    best_scores = {}
+    if course_ids and student_ids:
+        rows = db.session.query(
+            StudentExerciseProgress.student_id,
+            StudentExerciseProgress.course_id,
+            StudentExerciseProgress.best_score
+        ).filter(
+            StudentExerciseProgress.course_id.in_(course_ids),
+            StudentExerciseProgress.student_id.in_(student_ids)
+        )
+        # Une ligne par exercice tenté dans le cours
+        for student_id, course_id, best_score in rows:
+            best_scores.setdefault((student_id, course_id), []).append(best_score)
+
+    grid = {}
+    for course in courses:
+        total_exercises = len(course.exercises)
+        for student_id in student_ids:
+            attempted = best_scores.get((student_id, course.id), [])
+            scores = [score for score in attempted if score is not None]
+            grid[(student_id, course.id)] = {
+                'exercises_attempted': len(attempted),
+                'exercises_completed': sum(1 for score in scores if score >= 70),
+                'total_exercises': total_exercises,
+                'average_score': sum(scores) / len(scores) if scores else 0
+            }
+    return grid
+
+
+def get_exercise_student_ids(exercise_id):
+    """Identifiants des étudiants ayant au moins une tentative sur l'exercice"""
+    rows = db.session.query(StudentExerciseProgress.student_id).filter(
+        StudentExerciseProgress.exercise_id == exercise_id
+    ).distinct()
+    return [student_id for (student_id,) in rows]
+
+
+def record_attempts(rows):
+    """
+    Répercute des tentatives insérées en masse (bulk_insert_mappings ne
+    déclenche pas les événements du modèle) dans la transaction en cours.
+
+    Args:
+        rows (list): Dicts de colonnes ExerciseAttempt (student_id, exercise_id, course_id, score, created_at)
+    """
+    connection = db.session.connection()
+    for row in rows:
+        record_attempt_progress(
+            connection,
+            row['student_id'],
+            row['exercise_id'],
+            row.get('course_id'),
+            row.get('score'),
+            row['created_at']
+        )
+
+
+def backfill_progress(exercise_ids=None):
+    """
+    Reconstruit student_exercise_progress à partir de exercise_attempt.
+
+    Args:
+        exercise_ids (list, optional): Limiter la reconstruction à ces exercices
+
+    Returns:
+        int: Nombre de lignes de synthèse créées
+    """
+    table = StudentExerciseProgress.__table__
+    attempts = ExerciseAttempt.__table__
+
+    delete = table.delete()
+    groups = db.select(
+        attempts.c.student_id,
+        attempts.c.exercise_id,
+        attempts.c.course_id,
+        func.count(attempts.c.id).label('attempts_count'),
+        func.max(attempts.c.score).label('best_score'),
+        func.max(attempts.c.id).label('last_id')
+    ).group_by(attempts.c.student_id, attempts.c.exercise_id, attempts.c.course_id)
+    if exercise_ids is not None:
+        delete = delete.where(table.c.exercise_id.in_(exercise_ids))
+        groups = groups.where(attempts.c.exercise_id.in_(exercise_ids))
+    groups = groups.subquery()
+
+    # La dernière tentative de chaque groupe fournit last_score et last_attempt_at
+    last = attempts.alias('last_attempt')
+    source = db.select(
+        groups.c.student_id,
+        groups.c.exercise_id,
+        groups.c.course_id,
+        groups.c.attempts_count,
+        groups.c.best_score,
+        last.c.score,
+        last.c.created_at,
+        db.case(
+            (groups.c.best_score >= 70, 'completed'),
+            (groups.c.best_score > 0, 'in_progress'),
+            else_='not_started'
+        )
+    ).join(last, last.c.id == groups.c.last_id)
+
+    try:
+        db.session.execute(delete)
+        result = db.session.execute(table.insert().from_select(
+            ['student_id', 'exercise_id', 'course_id', 'attempts_count', 'best_score',
+             'last_score', 'last_attempt_at', 'status'],
+            source
+        ))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result.rowcount
+
+
+def init_app(app):
+    """Enregistre la commande de reconstruction de la table de progression."""
+
+    @app.cli.command('backfill-progress')
+    @click.option('--exercise-id', 'exercise_ids', type=int, multiple=True,
+                  help="Limiter la reconstruction à un exercice (option répétable).")
+    def backfill_progress_command(exercise_ids):
+        """Reconstruit la table student_exercise_progress depuis les tentatives."""
+        count = backfill_progress(list(exercise_ids) or None)
+        click.echo(f"{count} lignes de progression reconstruites.")
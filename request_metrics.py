@@ -0,0 +1,623 @@
+"""
+Mesures de performance par route
+
+Aucune mesure n'existait : ni durée par route, ni nombre de requêtes SQL,
+ni temps de rendu des templates. Ce module mesure chaque requête :
+
+    wall       durée totale (before_request → after_request)
+    db         temps passé dans les requêtes SQL (événements du moteur SQLAlchemy)
+    queries    nombre de requêtes SQL
+    template   temps de rendu des templates (signaux before_render_template /
+               template_rendered)
+    bytes      taille de la réponse
+    pool_wait  attente d'une connexion du pool (db_pool.InstrumentedQueuePool)
+
+Les mesures sont agrégées par endpoint dans des histogrammes à seaux fixes,
+rangés dans un anneau de tranches de temps (REQUEST_METRICS_SLOTS tranches
+de REQUEST_METRICS_SLOT_SECONDS secondes, une heure par défaut) : la mémoire
+occupée est bornée et les anciennes tranches sont recyclées. Les requêtes
+les plus lentes (au-delà de REQUEST_METRICS_SLOW_MS) sont conservées à part.
+
+    /admin/metrics          rapport HTML (administrateurs)
+    /admin/metrics.json     même rapport en JSON (?window=300 : 5 dernières minutes)
+    /admin/metrics/export   (POST) écrit l'instantané du processus dans
+                            REQUEST_METRICS_EXPORT_FOLDER/<pid>.json
+
+Avec REQUEST_METRICS_EXPORT_INTERVAL (secondes), chaque processus exporte
+aussi son instantané périodiquement ; flask request-metrics fusionne les
+fichiers de tous les workers et affiche les routes les plus coûteuses.
+
+Chaque pool de connexions instrumenté (db_pool) est aussi suivi pour tout
+le processus : nombre de connexions servies, attente, délais dépassés et
+pic de connexions simultanées rapporté à la capacité (saturation).
+"""
+
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+import click
+from flask import Blueprint, current_app, g, has_app_context, has_request_context, jsonify, render_template, request
+from flask.signals import before_render_template, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import db_pool
+
+logger = logging.getLogger(__name__)
+
+# Bornes supérieures des seaux des histogrammes de durée (millisecondes)
+DURATION_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Bornes supérieures des seaux du nombre de requêtes SQL
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Colonnes du rapport utilisables pour le tri
+SORT_KEYS = ('total_ms', 'p95_ms', 'p99_ms', 'max_ms', 'requests', 'errors', 'queries_mean', 'db_mean_ms',
+             'template_mean_ms', 'bytes_mean', 'pool_wait_mean_ms')
+
+DEFAULT_SLOTS = 60
+DEFAULT_SLOT_SECONDS = 60
+DEFAULT_SLOW_MS = 500
+DEFAULT_SLOW_KEPT = 50
+
+metrics_bp = Blueprint('request_metrics', __name__)
+
+
+class Histogram:
+    """Histogramme à seaux fixes (le dernier seau reçoit les valeurs au-delà de la dernière borne)"""
+
+    __slots__ = ('bounds', 'counts', 'total', 'max')
+
+    def __init__(self, bounds=DURATION_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def mean(self):
+        count = self.count
+        return self.total / count if count else 0.0
+
+    def percentile(self, p):
+        """Borne supérieure du seau contenant le p-ième centile (au plus le maximum observé)"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = p / 100 * count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {'bounds': list(self.bounds), 'counts': list(self.counts), 'total': self.total, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(tuple(data['bounds']))
+        histogram.counts = list(data['counts'])
+        histogram.total = data['total']
+        histogram.max = data['max']
+        return histogram
+
+
+class RouteStats:
+    """Mesures cumulées d'un endpoint"""
+
+    __slots__ = ('wall', 'db', 'template', 'queries', 'pool_wait', 'bytes', 'errors')
+
+    HISTOGRAMS = ('wall', 'db', 'template', 'queries', 'pool_wait')
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.db = Histogram()
+        self.template = Histogram()
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.pool_wait = Histogram()
+        self.bytes = 0
+        self.errors = 0
+
+    def add(self, wall_ms, db_ms, template_ms, queries, size, status, pool_wait_ms=0.0):
+        self.wall.add(wall_ms)
+        self.db.add(db_ms)
+        self.template.add(template_ms)
+        self.queries.add(queries)
+        self.pool_wait.add(pool_wait_ms)
+        self.bytes += size
+        if status >= 500:
+            self.errors += 1
+
+    def merge(self, other):
+        for name in self.HISTOGRAMS:
+            getattr(self, name).merge(getattr(other, name))
+        self.bytes += other.bytes
+        self.errors += other.errors
+
+    def summary(self):
+        count = self.wall.count
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'total_ms': round(self.wall.total, 1),
+            'mean_ms': round(self.wall.mean(), 2),
+            'p50_ms': self.wall.percentile(50),
+            'p95_ms': self.wall.percentile(95),
+            'p99_ms': self.wall.percentile(99),
+            'max_ms': round(self.wall.max, 2),
+            'db_mean_ms': round(self.db.mean(), 2),
+            'db_share': round(self.db.total / self.wall.total, 3) if self.wall.total else 0.0,
+            'queries_mean': round(self.queries.mean(), 2),
+            'queries_max': int(self.queries.max),
+            'template_mean_ms': round(self.template.mean(), 2),
+            'pool_wait_mean_ms': round(self.pool_wait.mean(), 2),
+            'pool_wait_max_ms': round(self.pool_wait.max, 2),
+            'bytes_mean': round(self.bytes / count) if count else 0,
+        }
+
+    def to_dict(self):
+        data = {name: getattr(self, name).to_dict() for name in self.HISTOGRAMS}
+        data.update(bytes=self.bytes, errors=self.errors)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for name in cls.HISTOGRAMS:
+            # Les exports antérieurs à la mesure du pool n'ont pas pool_wait
+            if name in data:
+                setattr(stats, name, Histogram.from_dict(data[name]))
+        stats.bytes = data['bytes']
+        stats.errors = data['errors']
+        return stats
+
+
+class PoolStats:
+    """Mesures cumulées d'un pool de connexions pour le processus"""
+
+    __slots__ = ('wait', 'checkouts', 'timeouts', 'peak_in_use', 'capacity', 'in_use', 'processes')
+
+    def __init__(self, capacity=None):
+        self.wait = Histogram()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.capacity = capacity
+        self.in_use = 0
+        self.processes = 1
+
+    def add(self, wait_ms, in_use, timed_out=False):
+        self.wait.add(wait_ms)
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.checkouts += 1
+        self.in_use = in_use
+        self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def merge(self, other):
+        """Fusion entre processus : compteurs additionnés, pic et capacité par processus"""
+        self.wait.merge(other.wait)
+        self.checkouts += other.checkouts
+        self.timeouts += other.timeouts
+        self.in_use += other.in_use
+        self.peak_in_use = max(self.peak_in_use, other.peak_in_use)
+        self.capacity = max(filter(None, (self.capacity, other.capacity)), default=None)
+        self.processes += other.processes
+
+    def summary(self):
+        return {
+            'processes': self.processes,
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_mean_ms': round(self.wait.mean(), 2),
+            'wait_p95_ms': self.wait.percentile(95),
+            'wait_max_ms': round(self.wait.max, 2),
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+            'capacity': self.capacity,
+            'saturation': round(self.peak_in_use / self.capacity, 2) if self.capacity else None,
+        }
+
+    def to_dict(self):
+        return {'wait': self.wait.to_dict(), 'checkouts': self.checkouts, 'timeouts': self.timeouts,
+                'peak_in_use': self.peak_in_use, 'capacity': self.capacity, 'in_use': self.in_use}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['capacity'])
+        stats.wait = Histogram.from_dict(data['wait'])
+        stats.checkouts = data['checkouts']
+        stats.timeouts = data['timeouts']
+        stats.peak_in_use = data['peak_in_use']
+        stats.in_use = data['in_use']
+        return stats
+
+
+class RequestTimer:
+    """Compteurs de la requête en cours (rangés dans flask.g)"""
+
+    __slots__ = ('started', 'db_time', 'queries', 'template_time', 'template_started', 'pool_wait')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.template_started = []
+        self.pool_wait = 0.0
+
+
+def current_timer():
+    if has_request_context():
+        return g.get('_request_timer')
+    return None
+
+
+# ----- événements SQLAlchemy et signaux de templates -----
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timer() is not None:
+        conn.info.setdefault('_request_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timer = current_timer()
+    started = conn.info.get('_request_metrics_started')
+    if timer is not None and started:
+        timer.db_time += time.perf_counter() - started.pop()
+        timer.queries += 1
+
+
+def _before_render(sender, template, context, **extra):
+    timer = current_timer()
+    if timer is not None:
+        timer.template_started.append(time.perf_counter())
+
+
+def _template_rendered(sender, template, context, **extra):
+    timer = current_timer()
+    if timer is not None and timer.template_started:
+        started = timer.template_started.pop()
+        # Un template rendu depuis un autre n'est compté qu'une fois
+        if not timer.template_started:
+            timer.template_time += time.perf_counter() - started
+
+
+def _pool_checkout(pool, seconds, timed_out):
+    timer = current_timer()
+    if timer is not None:
+        timer.pool_wait += seconds
+    if has_app_context():
+        metrics = current_app.extensions.get('request_metrics')
+        if metrics is not None:
+            metrics.record_pool(pool.name, seconds * 1000, pool.checkedout(), pool.capacity, timed_out)
+
+
+_engine_events_installed = False
+
+
+def install_engine_events():
+    """Écoute les requêtes SQL et les pools de tous les moteurs (une seule fois par processus)."""
+    global _engine_events_installed
+    if not _engine_events_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        db_pool.add_checkout_observer(_pool_checkout)
+        _engine_events_installed = True
+
+
+class RequestMetrics:
+    """
+    Anneau de tranches de temps contenant les mesures par endpoint.
+
+    Args:
+        app: Application Flask (optionnel, voir init_app)
+        slots (int): Nombre de tranches conservées
+        slot_seconds (int): Durée d'une tranche
+    """
+
+    def __init__(self, app=None, slots=DEFAULT_SLOTS, slot_seconds=DEFAULT_SLOT_SECONDS, clock=time.time):
+        self.slots = slots
+        self.slot_seconds = slot_seconds
+        self.clock = clock
+        self.slow_ms = DEFAULT_SLOW_MS
+        self.export_folder = None
+        self.export_interval = 0
+        self.last_export = clock()
+        self.started = clock()
+        self._lock = threading.Lock()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REQUEST_METRICS_ENABLED', True)
+        app.config.setdefault('REQUEST_METRICS_SLOTS', self.slots)
+        app.config.setdefault('REQUEST_METRICS_SLOT_SECONDS', self.slot_seconds)
+        app.config.setdefault('REQUEST_METRICS_SLOW_MS', DEFAULT_SLOW_MS)
+        app.config.setdefault('REQUEST_METRICS_EXPORT_FOLDER', os.path.join(app.instance_path, 'request_metrics'))
+        app.config.setdefault('REQUEST_METRICS_EXPORT_INTERVAL', 0)
+        app.extensions['request_metrics'] = self
+        if 'request_metrics' not in app.blueprints:
+            app.register_blueprint(metrics_bp)
+        self._register_cli(app)
+        if not app.config['REQUEST_METRICS_ENABLED']:
+            return
+
+        self.slots = app.config['REQUEST_METRICS_SLOTS']
+        self.slot_seconds = app.config['REQUEST_METRICS_SLOT_SECONDS']
+        self.slow_ms = app.config['REQUEST_METRICS_SLOW_MS']
+        self.export_folder = app.config['REQUEST_METRICS_EXPORT_FOLDER']
+        self.export_interval = app.config['REQUEST_METRICS_EXPORT_INTERVAL']
+        self.reset()
+
+        install_engine_events()
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_template_rendered, app)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def reset(self):
+        with self._lock:
+            # Chaque tranche : [numéro de tranche, {endpoint: RouteStats}]
+            self.ring = [[None, {}] for _ in range(self.slots)]
+            self.slow = deque(maxlen=DEFAULT_SLOW_KEPT)
+            self.pools = {}
+
+    # ----- enregistrement -----
+
+    def _start_request(self):
+        g._request_timer = RequestTimer()
+
+    def _finish_request(self, response):
+        timer = g.pop('_request_timer', None)
+        if timer is None:
+            return response
+        wall_ms = (time.perf_counter() - timer.started) * 1000
+        size = response.calculate_content_length() or 0
+        self.record(
+            request.endpoint or '<non routé>',
+            wall_ms, timer.db_time * 1000, timer.template_time * 1000,
+            timer.queries, size, response.status_code,
+            path=request.path, method=request.method, pool_wait_ms=timer.pool_wait * 1000,
+        )
+        if self.export_interval and self.clock() - self.last_export >= self.export_interval:
+            try:
+                self.export()
+            except OSError as e:
+                logger.warning("Export des mesures impossible: %s", e)
+        return response
+
+    def record(self, endpoint, wall_ms, db_ms=0.0, template_ms=0.0, queries=0, size=0, status=200,
+               path=None, method=None, pool_wait_ms=0.0):
+        now = self.clock()
+        number = int(now // self.slot_seconds)
+        with self._lock:
+            slot = self.ring[number % self.slots]
+            if slot[0] != number:
+                slot[0] = number
+                slot[1] = {}
+            stats = slot[1].get(endpoint)
+            if stats is None:
+                stats = slot[1][endpoint] = RouteStats()
+            stats.add(wall_ms, db_ms, template_ms, queries, size, status, pool_wait_ms)
+            if wall_ms >= self.slow_ms:
+                self.slow.append({
+                    'at': round(now, 3), 'endpoint': endpoint, 'method': method, 'path': path,
+                    'status': status, 'wall_ms': round(wall_ms, 2), 'db_ms': round(db_ms, 2),
+                    'queries': queries, 'template_ms': round(template_ms, 2), 'bytes': size,
+                })
+
+    def record_pool(self, name, wait_ms, in_use, capacity=None, timed_out=False):
+        """Enregistre une demande de connexion au pool `name`"""
+        with self._lock:
+            stats = self.pools.get(name)
+            if stats is None:
+                stats = self.pools[name] = PoolStats(capacity)
+            stats.add(wait_ms, in_use, timed_out)
+
+    # ----- lecture -----
+
+    def aggregate(self, window=None):
+        """Mesures fusionnées par endpoint sur les `window` dernières secondes (toutes par défaut)"""
+        current = int(self.clock() // self.slot_seconds)
+        oldest = current - self.slots + 1
+        if window:
+            oldest = max(oldest, current - int(window // self.slot_seconds))
+        merged = {}
+        with self._lock:
+            for number, routes in self.ring:
+                if number is None or number < oldest:
+                    continue
+                for endpoint, stats in routes.items():
+                    merged.setdefault(endpoint, RouteStats()).merge(stats)
+        return merged
+
+    def snapshot(self, window=None):
+        """Instantané sérialisable (histogrammes complets), fusionnable entre processus"""
+        with self._lock:
+            slow = list(self.slow)
+            pools = {name: stats.to_dict() for name, stats in self.pools.items()}
+        return {
+            'pid': os.getpid(),
+            'generated_at': round(self.clock(), 3),
+            'started_at': round(self.started, 3),
+            'window': window or self.slots * self.slot_seconds,
+            'routes': {endpoint: stats.to_dict() for endpoint, stats in self.aggregate(window).items()},
+            'slow': slow,
+            'pools': pools,
+        }
+
+    def export(self, folder=None):
+        """Écrit l'instantané du processus dans <folder>/<pid>.json ; renvoie le chemin"""
+        folder = folder or self.export_folder
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'{os.getpid()}.json')
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, path)
+        self.last_export = self.clock()
+        return path
+
+    def _register_cli(self, app):
+        @app.cli.command('request-metrics')
+        @click.option('--folder', type=click.Path(file_okay=False), help="Dossier des exports (par défaut REQUEST_METRICS_EXPORT_FOLDER).")
+        @click.option('--sort', default='total_ms', show_default=True,
+                      type=click.Choice(SORT_KEYS))
+        @click.option('--limit', default=30, show_default=True)
+        @click.option('--json', 'as_json', is_flag=True, help="Rapport complet en JSON.")
+        def request_metrics_command(folder, sort, limit, as_json):
+            """Routes les plus coûteuses, d'après les exports des workers."""
+            snapshots = load_exports(folder or current_app.config['REQUEST_METRICS_EXPORT_FOLDER'])
+            report = build_report(merge_snapshots(snapshots), sort=sort)
+            if as_json:
+                click.echo(json.dumps(report, indent=2))
+                return
+            click.echo(f"{len(snapshots)} export(s)")
+            click.echo(format_report(report, limit))
+
+
+# ----- rapports -----
+
+def merge_snapshots(snapshots):
+    """
+    Fusionne les instantanés de plusieurs processus :
+    {'routes': {endpoint: RouteStats}, 'slow': [...], 'pools': {nom: PoolStats}}
+    """
+    routes = {}
+    slow = []
+    pools = {}
+    for snapshot in snapshots:
+        for endpoint, data in snapshot.get('routes', {}).items():
+            routes.setdefault(endpoint, RouteStats()).merge(RouteStats.from_dict(data))
+        slow.extend(dict(item, pid=snapshot.get('pid')) for item in snapshot.get('slow', []))
+        for name, data in snapshot.get('pools', {}).items():
+            stats = PoolStats.from_dict(data)
+            if name in pools:
+                pools[name].merge(stats)
+            else:
+                pools[name] = stats
+    return {'routes': routes, 'slow': slow, 'pools': pools}
+
+
+def build_report(merged, sort='total_ms'):
+    """Rapport trié (par défaut par temps total cumulé : les routes qui coûtent réellement)"""
+    routes = [dict(stats.summary(), endpoint=endpoint) for endpoint, stats in merged['routes'].items()]
+    routes.sort(key=lambda item: item[sort], reverse=True)
+    return {
+        'routes': routes,
+        'slow': sorted(merged['slow'], key=lambda item: item['wall_ms'], reverse=True),
+        'pools': [dict(stats.summary(), name=name) for name, stats in sorted(merged.get('pools', {}).items())],
+        'requests': sum(item['requests'] for item in routes),
+    }
+
+
+def load_exports(folder):
+    snapshots = []
+    if not os.path.isdir(folder):
+        return snapshots
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(folder, name), encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("Export illisible %s: %s", name, e)
+    return snapshots
+
+
+def format_report(report, limit=30):
+    lines = [
+        f"{'endpoint':<40} {'req':>6} {'total ms':>10} {'p50':>6} {'p95':>6} {'max':>8} "
+        f"{'sql':>5} {'sql ms':>7} {'tpl ms':>7} {'octets':>8}"
+    ]
+    for item in report['routes'][:limit]:
+        lines.append(
+            f"{item['endpoint'][:40]:<40} {item['requests']:>6} {item['total_ms']:>10} {item['p50_ms']:>6} "
+            f"{item['p95_ms']:>6} {item['max_ms']:>8} {item['queries_mean']:>5} {item['db_mean_ms']:>7} "
+            f"{item['template_mean_ms']:>7} {item['bytes_mean']:>8}"
+        )
+    for pool in report.get('pools', []):
+        lines.append(
+            f"pool {pool['name']} : {pool['checkouts']} connexions servies, attente moyenne "
+            f"{pool['wait_mean_ms']} ms (max {pool['wait_max_ms']}), {pool['timeouts']} délai(s) dépassé(s), "
+            f"pic {pool['peak_in_use']}/{pool['capacity'] or '∞'} par processus"
+        )
+    return '\n'.join(lines)
+
+
+# ----- vues d'administration -----
+
+def _forbidden():
+    if not current_user.is_authenticated or not current_user.is_admin:
+        return jsonify({'error': 'Accès non autorisé.'}), 403
+    return None
+
+
+def _current_report():
+    metrics = current_app.extensions['request_metrics']
+    window = request.args.get('window', type=int)
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in SORT_KEYS:
+        sort = 'total_ms'
+    report = build_report(merge_snapshots([metrics.snapshot(window)]), sort=sort)
+    report['window'] = window or metrics.slots * metrics.slot_seconds
+    return report
+
+
+@metrics_bp.route('/admin/metrics.json')
+def metrics_json():
+    """Rapport des mesures du processus courant (JSON)"""
+    denied = _forbidden()
+    if denied:
+        return denied
+    return jsonify(_current_report())
+
+
+@metrics_bp.route('/admin/metrics')
+def metrics_page():
+    """Rapport des mesures du processus courant (HTML)"""
+    denied = _forbidden()
+    if denied:
+        return denied
+    return render_template('admin/request_metrics.html', report=_current_report())
+
+
+@metrics_bp.route('/admin/metrics/export', methods=['POST'])
+def metrics_export():
+    """Écrit l'instantané du processus courant dans le dossier d'export"""
+    denied = _forbidden()
+    if denied:
+        return denied
+    path = current_app.extensions['request_metrics'].export()
+    return jsonify({'path': path})
+
+
+request_metrics = RequestMetrics()
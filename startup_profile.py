@@ -0,0 +1,184 @@
+"""
+Profil du temps d'import au démarrage
+
+Chaque worker gunicorn importe app.py et tout ce qu'il entraîne avant de
+servir sa première requête. Ce module lance un interpréteur neuf avec
+`python -X importtime -c "import <module>"` et rapporte le temps propre et
+cumulé de chaque module importé, ou regroupé par paquet de premier niveau.
+
+    flask import-profile                    # app, 30 modules les plus coûteux
+    flask import-profile --by package
+    python startup_profile.py payment_routes --limit 10
+
+Les dépendances lourdes et facultatives (stripe, numpy, reportlab,
+openpyxl, Pillow) doivent être importées à la première utilisation ;
+DEFERRED_MODULES les liste et test_startup_profile vérifie qu'aucune
+n'est chargée au démarrage, ainsi que le budget de temps d'import.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+import click
+
+# Dépendances qui ne doivent pas être importées au démarrage
+DEFERRED_MODULES = ('stripe', 'numpy', 'reportlab', 'openpyxl', 'PIL')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+class ImportProfile:
+    """
+    Résultat d'un import profilé.
+
+    Attributes:
+        entries (list): dicts module, self_us, cumulative_us, depth (ordre d'import)
+        returncode (int): Code de sortie de l'interpréteur (non nul : l'import a échoué)
+        error (str): Dernière ligne d'erreur en cas d'échec
+    """
+
+    def __init__(self, entries, returncode=0, error=None):
+        self.entries = entries
+        self.returncode = returncode
+        self.error = error
+
+    @property
+    def modules(self):
+        return {entry['module'] for entry in self.entries}
+
+    @property
+    def total_us(self):
+        """Durée totale : somme des imports de premier niveau"""
+        return sum(entry['cumulative_us'] for entry in self.entries if entry['depth'] == 0)
+
+    def loaded(self, names):
+        """Modules de `names` (ou leurs sous-modules) effectivement importés"""
+        roots = {module.split('.')[0] for module in self.modules}
+        return [name for name in names if name in roots]
+
+    def by_module(self, limit=None):
+        entries = sorted(self.entries, key=lambda entry: entry['cumulative_us'], reverse=True)
+        return entries[:limit] if limit else entries
+
+    def by_package(self, limit=None):
+        """Temps propre cumulé par paquet de premier niveau"""
+        totals = defaultdict(lambda: {'self_us': 0, 'modules': 0})
+        for entry in self.entries:
+            package = totals[entry['module'].split('.')[0]]
+            package['self_us'] += entry['self_us']
+            package['modules'] += 1
+        packages = [dict(values, package=name) for name, values in totals.items()]
+        packages.sort(key=lambda item: item['self_us'], reverse=True)
+        return packages[:limit] if limit else packages
+
+    def to_dict(self):
+        return {
+            'total_us': self.total_us,
+            'returncode': self.returncode,
+            'error': self.error,
+            'entries': self.entries,
+        }
+
+
+def parse_importtime(output):
+    """Analyse la sortie de -X importtime (stderr)"""
+    entries = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append({
+                'module': match.group(4),
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2)),
+                'depth': (len(match.group(3)) - 1) // 2,
+            })
+    return entries
+
+
+def profile_imports(module='app', cwd=None, env=None, python=None):
+    """
+    Importe `module` dans un interpréteur neuf et mesure chaque import.
+
+    Args:
+        module (str): Module à importer
+        cwd (str): Répertoire de travail (par défaut celui de ce fichier)
+        env (dict): Variables d'environnement ajoutées
+
+    Returns:
+        ImportProfile
+    """
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    environment = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    environment.pop('PYTHONPROFILEIMPORTTIME', None)
+    environment.update(env or {})
+    completed = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=environment, capture_output=True, text=True,
+    )
+    error = None
+    if completed.returncode:
+        lines = [line for line in completed.stderr.splitlines() if line and not line.startswith('import time:')]
+        error = lines[-1] if lines else f'code {completed.returncode}'
+    return ImportProfile(parse_importtime(completed.stderr), completed.returncode, error)
+
+
+def format_profile(profile, by='module', limit=30):
+    lines = []
+    if by == 'package':
+        lines.append(f"{'paquet':<40} {'propre (ms)':>12} {'modules':>8}")
+        for item in profile.by_package(limit):
+            lines.append(f"{item['package']:<40} {item['self_us'] / 1000:>12.1f} {item['modules']:>8}")
+    else:
+        lines.append(f"{'module':<50} {'propre (ms)':>12} {'cumulé (ms)':>12}")
+        for entry in profile.by_module(limit):
+            name = '  ' * entry['depth'] + entry['module']
+            lines.append(f"{name[:50]:<50} {entry['self_us'] / 1000:>12.1f} {entry['cumulative_us'] / 1000:>12.1f}")
+    lines.append(f"Total : {profile.total_us / 1000:.1f} ms, {len(profile.entries)} modules")
+    loaded = profile.loaded(DEFERRED_MODULES)
+    if loaded:
+        lines.append(f"Dépendances différables importées au démarrage : {', '.join(loaded)}")
+    if profile.returncode:
+        lines.append(f"Import interrompu : {profile.error}")
+    return '\n'.join(lines)
+
+
+def init_app(app):
+    """Enregistre la commande import-profile."""
+
+    @app.cli.command('import-profile')
+    @click.option('--module', default='app', show_default=True, help="Module dont l'import est mesuré.")
+    @click.option('--by', type=click.Choice(['module', 'package']), default='module', show_default=True)
+    @click.option('--limit', default=30, show_default=True)
+    @click.option('--json', 'as_json', is_flag=True)
+    def import_profile_command(module, by, limit, as_json):
+        """Mesure le temps d'import de chaque module au démarrage."""
+        profile = profile_imports(module, cwd=app.root_path)
+        if as_json:
+            click.echo(json.dumps(profile.to_dict(), indent=2))
+        else:
+            click.echo(format_profile(profile, by, limit))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Temps d'import au démarrage")
+    parser.add_argument('module', nargs='?', default='app')
+    parser.add_argument('--by', choices=('module', 'package'), default='module')
+    parser.add_argument('--limit', type=int, default=30)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    profile = profile_imports(args.module)
+    if args.json:
+        print(json.dumps(profile.to_dict(), indent=2))
+    else:
+        print(format_profile(profile, args.by, args.limit))
+    return 1 if profile.returncode else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Index en mémoire des fichiers statiques
+
+La résolution des URLs d'images (image_url_service, unified_image_service,
+utils/image_path_handler) testait jusqu'à une quarantaine de chemins
+candidats avec os.path.exists pour chaque image de chaque page. L'index
+recense une fois l'arborescence static/ et répond par des recherches dans
+des dictionnaires :
+
+    - exists('/static/uploads/qcm/chat.png') : le fichier existe-t-il ?
+    - lookup('chat.png') : URL canonique du fichier portant ce nom
+      (dossiers d'images parcourus dans l'ordre de priorité historique)
+
+L'index est construit au démarrage (init_app) et tenu à jour par
+scrutation des dates de modification des dossiers, au plus une fois
+toutes les poll_interval secondes ; les uploads l'alimentent directement
+via add().
+"""
+
+import logging
+import os
+import threading
+import time
+
+import click
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Dossiers d'images (relatifs à static/) dans l'ordre où ils étaient sondés
+PRIORITY_DIRS = [
+    'uploads',
+    'uploads/exercises',
+    'uploads/exercises/qcm',
+    'uploads/exercises/flashcards',
+    'uploads/exercises/word_placement',
+    'uploads/exercises/image_labeling',
+    'uploads/exercises/legend',
+    'uploads/flashcards',
+    'uploads/general',
+    'exercises',
+    'exercises/qcm',
+    'exercises/flashcards',
+    'exercises/word_placement',
+    'exercises/image_labeling',
+    'exercises/legend',
+    'exercises/general',
+]
+
+# Racines dont les fichiers sont recherchés par nom (les autres dossiers de
+# static/, comme css/ ou les sauvegardes, ne servent que pour exists())
+LOOKUP_ROOTS = ('uploads', 'exercises')
+
+
+def _dir_rank(directory):
+    """Clé de tri d'un dossier pour la recherche par nom"""
+    if directory in PRIORITY_DIRS:
+        return (0, PRIORITY_DIRS.index(directory), directory)
+    return (1, 0, directory)
+
+
+class StaticAssetIndex:
+    """
+    Index nom de fichier → URL de l'arborescence static/.
+
+    Args:
+        static_folder (str, optional): Dossier static (par défaut celui de l'application)
+        poll_interval (float): Délai minimal entre deux vérifications des dossiers
+    """
+
+    def __init__(self, static_folder=None, poll_interval=5.0):
+        self.static_folder = static_folder
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._paths = None
+        self._by_name = {}
+        self._dir_mtimes = {}
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        # Incrémenté à chaque modification de l'index (reconstruction ou ajout)
+        self.version = 0
+
+    def init_app(self, app):
+        """Construit l'index au démarrage et enregistre la commande static-index."""
+        app.config.setdefault('STATIC_INDEX_POLL_INTERVAL', self.poll_interval)
+        self.poll_interval = app.config['STATIC_INDEX_POLL_INTERVAL']
+        if self.static_folder is None:
+            self.static_folder = app.static_folder
+        app.extensions['static_asset_index'] = self
+        self.build()
+
+        @app.cli.command('static-index')
+        def static_index_command():
+            """Reconstruit l'index des fichiers statiques et affiche ses compteurs."""
+            self.build()
+            stats = self.stats()
+            click.echo(f"{stats['files']} fichiers indexés dans {stats['directories']} dossiers.")
+
+    def _folder(self):
+        if self.static_folder is None and has_app_context():
+            self.static_folder = current_app.static_folder
+        return self.static_folder
+
+    def build(self):
+        """(Re)construit l'index en parcourant le dossier static."""
+        folder = self._folder()
+        if folder is None:
+            return
+        paths = set()
+        dir_mtimes = {}
+        named = {}
+        for current, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            try:
+                dir_mtimes[current] = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            directory = os.path.relpath(current, folder).replace('\\', '/')
+            directory = '' if directory == '.' else directory
+            searchable = directory.split('/')[0] in LOOKUP_ROOTS
+            for filename in filenames:
+                relative = f'{directory}/{filename}' if directory else filename
+                paths.add(relative)
+                if searchable:
+                    named.setdefault(filename, []).append(directory)
+
+        by_name = {
+            filename: f"/static/{min(directories, key=_dir_rank)}/{filename}"
+            for filename, directories in named.items()
+        }
+        with self._lock:
+            self._paths = paths
+            self._by_name = by_name
+            self._dir_mtimes = dir_mtimes
+            self._checked_at = time.monotonic()
+            self.rebuilds += 1
+            self.version += 1
+        logger.debug(f"Index statique construit : {len(paths)} fichiers")
+
+    def _changed(self):
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _ensure_fresh(self):
+        if self._paths is None:
+            self.build()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_interval:
+            return
+        self._checked_at = now
+        if self._changed():
+            self.build()
+
+    @staticmethod
+    def _relative(web_path):
+        """Chemin relatif à static/ pour '/static/x' ou 'static/x', None sinon"""
+        path = web_path.replace('\\', '/').split('?', 1)[0]
+        if path.startswith('/'):
+            path = path[1:]
+        if path.startswith('static/'):
+            return path[len('static/'):]
+        return None
+
+    def _count(self, found):
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def exists(self, web_path):
+        """
+        Le fichier désigné par un chemin web existe-t-il ?
+
+        Seuls les chemins sous static/ peuvent être servis : les autres sont
+        considérés comme absents. Sans dossier static connu (hors
+        application), le disque est consulté directement.
+        """
+        if not web_path:
+            return False
+        self._ensure_fresh()
+        if self._paths is None:
+            return os.path.exists(web_path.lstrip('/'))
+        relative = self._relative(web_path)
+        return self._count(relative is not None and relative in self._paths)
+
+    def lookup(self, filename):
+        """URL canonique du fichier portant ce nom dans uploads/ ou exercises/, ou None"""
+        if not filename:
+            return None
+        self._ensure_fresh()
+        url = self._by_name.get(filename)
+        self._count(url is not None)
+        return url
+
+    def canonical_urls(self):
+        """Table nom de fichier → URL canonique (uploads/ et exercises/), à ne pas modifier"""
+        self._ensure_fresh()
+        return self._by_name
+
+    def add(self, web_path):
+        """Ajoute un fichier qui vient d'être écrit (upload) sans attendre la scrutation."""
+        relative = self._relative(web_path)
+        if relative is None or self._paths is None:
+            return
+        directory, _, filename = relative.rpartition('/')
+        with self._lock:
+            self._paths.add(relative)
+            self.version += 1
+            if directory.split('/')[0] in LOOKUP_ROOTS:
+                current = self._by_name.get(filename)
+                if current is None or _dir_rank(directory) < _dir_rank(current[len('/static/'):].rpartition('/')[0]):
+                    self._by_name[filename] = f"/static/{relative}"
+            # Le dossier a changé à cause de cet ajout : inutile de tout reconstruire
+            absolute = os.path.join(self.static_folder, directory) if directory else self.static_folder
+            if absolute in self._dir_mtimes:
+                try:
+                    self._dir_mtimes[absolute] = os.stat(absolute).st_mtime_ns
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Compteurs de l'index"""
+        total = self.hits + self.misses
+        return {
+            'files': len(self._paths or ()),
+            'directories': len(self._dir_mtimes),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total * 100) if total else 0,
+            'rebuilds': self.rebuilds,
+        }
+
+
+# Instance partagée par les services d'images
+static_asset_index = StaticAssetIndex()
@@ -0,0 +1,244 @@
+"""
+Service de calcul des statistiques des classes pour les enseignants
+
+Toutes les statistiques d'un enseignant (nombre d'exercices par classe,
+tentatives et score moyen par élève) sont calculées avec deux agrégats SQL
+groupés, quel que soit le nombre de classes ou d'élèves. Le résultat est
+partagé par la page /teacher/statistics et par les exports PDF/Excel.
+"""
+
+import hashlib
+from collections import namedtuple
+
+from sqlalchemy import func
+
+from extensions import db
+from models import Class, Course, ExerciseAttempt, User, course_exercise, student_class_association
+
+# Ligne élève "à plat" (compatible avec les templates qui utilisent .name / .username)
+StudentRow = namedtuple('StudentRow', ['id', 'name', 'username'])
+
+# Ligne d'agrégat retournée par iter_student_rows
+StudentStatsRow = namedtuple('StudentStatsRow', [
+    'class_id', 'student_id', 'name', 'username', 'completed_exercises', 'average_score'
+])
+
+
+def get_exercise_counts(class_ids):
+    """
+    Compte les exercices rattachés aux cours de chaque classe.
+
+    Un exercice présent dans deux cours d'une même classe est compté deux fois,
+    comme le faisait l'ancien calcul basé sur course.exercises.
+
+    Args:
+        class_ids (list): Identifiants des classes
+
+    Returns:
+        dict: {class_id: nombre d'exercices}
+    """
+    if not class_ids:
+        return {}
+
+    rows = db.session.query(
+        Course.class_id,
+        func.count(course_exercise.c.exercise_id)
+    ).join(
+        course_exercise, course_exercise.c.course_id == Course.id
+    ).filter(
+        Course.class_id.in_(class_ids)
+    ).group_by(Course.class_id).all()
+
+    return {class_id: count for class_id, count in rows}
+
+
+def get_student_counts(class_ids):
+    """
+    Compte les élèves inscrits dans chaque classe.
+
+    Args:
+        class_ids (list): Identifiants des classes
+
+    Returns:
+        dict: {class_id: nombre d'élèves}
+    """
+    if not class_ids:
+        return {}
+
+    sc = student_class_association
+    rows = db.session.query(
+        sc.c.class_id,
+        func.count(sc.c.student_id)
+    ).filter(
+        sc.c.class_id.in_(class_ids)
+    ).group_by(sc.c.class_id).all()
+
+    return {class_id: count for class_id, count in rows}
+
+
+def _class_exercises_query(class_ids):
+    """Paires distinctes (classe, exercice) pour les classes demandées."""
+    return db.session.query(
+        Course.class_id.label('class_id'),
+        course_exercise.c.exercise_id.label('exercise_id')
+    ).join(
+        course_exercise, course_exercise.c.course_id == Course.id
+    ).filter(
+        Course.class_id.in_(class_ids)
+    ).distinct()
+
+
+def get_class_fingerprint(class_id):
+    """
+    Empreinte des données d'une classe utilisées par les exports.
+
+    L'empreinte change dès qu'un élève est inscrit ou retiré, qu'un exercice
+    est ajouté à un cours de la classe ou qu'une nouvelle tentative est
+    enregistrée. Elle est calculée en une seule requête et sert de clé de
+    cache pour les artefacts d'export.
+
+    Args:
+        class_id (int): Identifiant de la classe
+
+    Returns:
+        str: Empreinte hexadécimale (sha1)
+    """
+    sc = student_class_association
+    student_ids = db.session.query(sc.c.student_id).filter(sc.c.class_id == class_id)
+    exercise_ids = db.session.query(course_exercise.c.exercise_id).join(
+        Course, Course.id == course_exercise.c.course_id
+    ).filter(Course.class_id == class_id)
+
+    class_attempts = db.session.query(ExerciseAttempt.id).filter(
+        ExerciseAttempt.student_id.in_(student_ids),
+        ExerciseAttempt.exercise_id.in_(exercise_ids)
+    ).subquery()
+
+    row = db.session.query(
+        db.session.query(Class.name).filter(Class.id == class_id).scalar_subquery(),
+        # Nombre et somme des identifiants : détecte aussi un échange d'élève
+        db.session.query(func.count(student_ids.subquery().c.student_id)).scalar_subquery(),
+        db.session.query(func.coalesce(func.sum(sc.c.student_id), 0)).filter(
+            sc.c.class_id == class_id
+        ).scalar_subquery(),
+        db.session.query(func.count(exercise_ids.subquery().c.exercise_id)).scalar_subquery(),
+        db.session.query(func.count(class_attempts.c.id)).scalar_subquery(),
+        db.session.query(func.max(class_attempts.c.id)).scalar_subquery()
+    ).one()
+
+    return hashlib.sha1(repr(tuple(row)).encode('utf-8')).hexdigest()
+
+
+def _student_stats_query(class_ids):
+    """Construit l'agrégat (classe, élève) -> nombre de tentatives et score moyen."""
+    sc = student_class_association
+    class_exercises = _class_exercises_query(class_ids).subquery()
+
+    return db.session.query(
+        sc.c.class_id,
+        sc.c.student_id,
+        User.name,
+        User.username,
+        func.count(ExerciseAttempt.id),
+        func.avg(func.coalesce(ExerciseAttempt.score, 0))
+    ).select_from(sc).join(
+        User, User.id == sc.c.student_id
+    ).outerjoin(
+        class_exercises, class_exercises.c.class_id == sc.c.class_id
+    ).outerjoin(
+        ExerciseAttempt,
+        db.and_(
+            ExerciseAttempt.student_id == sc.c.student_id,
+            ExerciseAttempt.exercise_id == class_exercises.c.exercise_id
+        )
+    ).filter(
+        sc.c.class_id.in_(class_ids)
+    ).group_by(
+        sc.c.class_id, sc.c.student_id, User.name, User.username
+    ).order_by(sc.c.class_id, sc.c.student_id)
+
+
+def iter_student_rows(class_ids, batch_size=500):
+    """
+    Itère sur les statistiques (classe, élève) sans charger d'objets ORM.
+
+    Les lignes sont lues par lots via yield_per, ce qui permet aux exports
+    de traiter une école entière à mémoire constante.
+
+    Args:
+        class_ids (list): Identifiants des classes
+        batch_size (int): Taille des lots lus depuis le curseur
+
+    Yields:
+        StudentStatsRow
+    """
+    if not class_ids:
+        return
+
+    for row in _student_stats_query(class_ids).yield_per(batch_size):
+        class_id, student_id, name, username, attempts_count, average_score = row
+        yield StudentStatsRow(
+            class_id=class_id,
+            student_id=student_id,
+            name=name,
+            username=username,
+            completed_exercises=attempts_count,
+            average_score=float(average_score) if attempts_count else None
+        )
+
+
+def build_classes_stats(classes):
+    """
+    Construit la structure classes_stats attendue par teacher/statistics.html.
+
+    Args:
+        classes (list): Objets Class (déjà chargés)
+
+    Returns:
+        list: [{'class': Class, 'students': [...], 'total_exercises': int}, ...]
+    """
+    class_ids = [class_obj.id for class_obj in classes]
+    exercise_counts = get_exercise_counts(class_ids)
+
+    students_by_class = {class_id: [] for class_id in class_ids}
+    for row in iter_student_rows(class_ids):
+        total_exercises = exercise_counts.get(row.class_id, 0)
+        students_by_class[row.class_id].append({
+            'student': StudentRow(row.student_id, row.name, row.username),
+            'completed_exercises': row.completed_exercises,
+            'total_exercises': total_exercises,
+            'average_score': row.average_score
+        })
+
+    return [{
+        'class': class_obj,
+        'students': students_by_class[class_obj.id],
+        'total_exercises': exercise_counts.get(class_obj.id, 0)
+    } for class_obj in classes]
+
+
+def get_teacher_statistics(teacher_id):
+    """
+    Statistiques de toutes les classes d'un enseignant (3 requêtes au total).
+
+    Args:
+        teacher_id (int): Identifiant de l'enseignant
+
+    Returns:
+        list: Structure classes_stats (voir build_classes_stats)
+    """
+    classes = Class.query.filter_by(teacher_id=teacher_id).order_by(Class.id).all()
+    return build_classes_stats(classes)
+
+
+def get_class_statistics(class_obj):
+    """
+    Statistiques d'une seule classe, au format attendu par export_utils.
+
+    Args:
+        class_obj (Class): La classe
+
+    Returns:
+        dict: {'class': Class, 'students': [...], 'total_exercises': int}
+    """
+    return build_classes_stats([class_obj])[0]
@@ -0,0 +1,153 @@
+"""
+Tests du cache des corrigés compilés (answer_key_cache)
+"""
+
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from flask import Flask, g
+from werkzeug.datastructures import MultiDict
+
+from extensions import db, login_manager
+from models import User, Exercise, ExerciseAttempt
+from answer_key_cache import AnswerKeyCache, answer_key_cache
+from exercise_graders import GradingError, grade_exercise
+from modified_submit import bp as exercise_bp
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test'
+    db.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(exercise_bp, url_prefix='/exercise')
+    # Page de l'exercice (app.py) vers laquelle la soumission redirige
+    app.add_url_rule('/exercise/<int:exercise_id>', 'view_exercise', lambda exercise_id: '')
+    return app
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+
+FILL_IN_BLANKS = {'sentences': ['Le ___ dort.', 'La ___ court.'], 'words': ['chat', 'souris']}
+
+
+class TestAnswerKeyCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        answer_key_cache.clear()
+
+        teacher = User(username='teacher', email='teacher@test.com', role='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        self.exercise = Exercise(
+            title='Texte à trous', exercise_type='fill_in_blanks', teacher_id=teacher.id,
+            content=json.dumps(FILL_IN_BLANKS)
+        )
+        db.session.add(self.exercise)
+        db.session.commit()
+
+    def tearDown(self):
+        answer_key_cache.clear()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_key_is_compiled_once(self):
+        form = MultiDict({'answer_0': 'chat', 'answer_1': 'chien'})
+        first = grade_exercise(self.exercise, form)
+        second = grade_exercise(self.exercise, form)
+        self.assertEqual(first, second)
+        self.assertEqual(first.score, 50)
+        self.assertEqual((answer_key_cache.misses, answer_key_cache.hits), (1, 1))
+
+    def test_submit_view_uses_cached_key(self):
+        client = self.app.test_client()
+        g.pop('_login_user', None)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.exercise.teacher_id)
+            session['_fresh'] = True
+
+        url = f'/exercise/exercise/{self.exercise.id}/submit'
+        # Le contenu n'est décodé que par le cache des corrigés
+        with patch.object(Exercise, 'get_content', side_effect=AssertionError('get_content appelé')):
+            for _ in range(2):
+                response = client.post(url, data={'answer_0': 'chat', 'answer_1': 'souris'})
+                self.assertEqual(response.status_code, 302)
+        self.assertEqual((answer_key_cache.misses, answer_key_cache.hits), (1, 1))
+        self.assertEqual([a.score for a in ExerciseAttempt.query.all()], [100, 100])
+
+    def test_submit_view_rejects_incomplete_form(self):
+        client = self.app.test_client()
+        g.pop('_login_user', None)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.exercise.teacher_id)
+            session['_fresh'] = True
+        qcm = Exercise(title='QCM', exercise_type='qcm', teacher_id=self.exercise.teacher_id,
+                       content=json.dumps({'questions': [{'text': 'Q1', 'options': ['a', 'b'], 'correct': 1},
+                                                         {'text': 'Q2', 'options': ['c', 'd'], 'correct': 0}]}))
+        db.session.add(qcm)
+        db.session.commit()
+
+        response = client.post(f'/exercise/exercise/{qcm.id}/submit', data={'answer_0': '1'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ExerciseAttempt.query.count(), 0)
+        with client.session_transaction() as session:
+            self.assertIn(('error', 'Veuillez répondre à toutes les questions.'), session['_flashes'])
+
+    def test_edit_invalidates_key(self):
+        grade_exercise(self.exercise, MultiDict())
+        self.assertEqual(len(answer_key_cache), 1)
+
+        content = dict(FILL_IN_BLANKS, words=['chien', 'souris'])
+        self.exercise.content = json.dumps(content)
+        db.session.commit()
+        self.assertEqual(len(answer_key_cache), 0)
+
+        result = grade_exercise(self.exercise, MultiDict({'answer_0': 'chien', 'answer_1': 'souris'}))
+        self.assertEqual(result.score, 100)
+
+    def test_content_hash_protects_against_stale_entries(self):
+        # Modification non encore enregistrée : la clé change quand même
+        grade_exercise(self.exercise, MultiDict())
+        self.exercise.content = json.dumps(dict(FILL_IN_BLANKS, words=['loup', 'souris']))
+        result = grade_exercise(self.exercise, MultiDict({'answer_0': 'loup'}))
+        self.assertEqual(result.score_count, 1)
+
+    def test_invalid_content_is_not_cached(self):
+        self.exercise.content = json.dumps({'sentences': []})
+        with self.assertRaises(GradingError):
+            grade_exercise(self.exercise, MultiDict())
+        self.assertEqual(len(answer_key_cache), 0)
+
+    def test_lru_eviction(self):
+        cache = AnswerKeyCache(max_entries=2)
+        exercises = [
+            SimpleNamespace(id=i, exercise_type='word_search', content=json.dumps({'words': [f'MOT{i}']}))
+            for i in range(3)
+        ]
+        cache.get(exercises[0])
+        cache.get(exercises[1])
+        cache.get(exercises[0])
+        cache.get(exercises[2])
+        self.assertEqual(len(cache), 2)
+
+        # exercises[1] était le moins récemment utilisé
+        cache.get(exercises[0])
+        self.assertEqual(cache.hits, 2)
+        cache.get(exercises[1])
+        self.assertEqual(cache.misses, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests de la fabrique d'application (app_factory)
+"""
+
+import importlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import inspect
+
+from app_factory import create_app, get_config_class
+from config import DevelopmentConfig, ProductionConfig, TestingConfig
+from extensions import db
+from models import User
+
+
+def create_test_app(root, **config):
+    return create_app('testing', overrides=dict({'UPLOAD_FOLDER': os.path.join(root, 'uploads')}, **config))
+
+
+class TestAppFactory(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_config_selection(self):
+        self.assertIs(get_config_class('testing'), TestingConfig)
+        self.assertIs(get_config_class(ProductionConfig), ProductionConfig)
+        with patch.dict(os.environ, {'FLASK_ENV': 'production'}):
+            self.assertIs(get_config_class(), ProductionConfig)
+        with patch.dict(os.environ, {'FLASK_ENV': 'production', 'FLASK_CONFIG': 'development'}):
+            self.assertIs(get_config_class(), DevelopmentConfig)
+        with patch.dict(os.environ, {'FLASK_ENV': 'inconnu'}):
+            self.assertIs(get_config_class(), DevelopmentConfig)
+
+    def test_create_app_has_no_side_effects(self):
+        app = create_test_app(self.root)
+        self.assertTrue(app.testing)
+        self.assertEqual(app.name, 'app')
+        for blueprint in ('exercise', 'payment', 'jobs', 'grading', 'request_metrics'):
+            self.assertIn(blueprint, app.blueprints)
+        self.assertNotIn('diagnostic', app.blueprints)
+        self.assertFalse(os.path.exists(app.config['UPLOAD_FOLDER']))
+        with app.app_context():
+            self.assertEqual(inspect(db.engine).get_table_names(), [])
+
+    def test_debug_routes_are_opt_in(self):
+        app = create_test_app(self.root, ENABLE_DEBUG_ROUTES=True)
+        self.assertIn('diagnostic', app.blueprints)
+
+    def test_init_db_command_is_idempotent(self):
+        app = create_test_app(self.root)
+        runner = app.test_cli_runner()
+        for _ in range(2):
+            result = runner.invoke(args=['init-db'])
+            self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(os.path.isdir(app.config['UPLOAD_FOLDER']))
+        with app.app_context():
+            self.assertIn('user', inspect(db.engine).get_table_names())
+            self.assertEqual(User.query.filter_by(role='admin').count(), 1)
+            db.drop_all()
+
+    def test_procfile_entry_point_imports(self):
+        # Point d'entrée de gunicorn et de l'étape release (Procfile) : app:app
+        with patch.dict(os.environ, {'FLASK_CONFIG': 'testing'}):
+            module = importlib.import_module('app')
+        app = module.app
+        for blueprint in ('exercise', 'payment', 'jobs', 'fix_payment_select_school'):
+            self.assertIn(blueprint, app.blueprints)
+        self.assertIn('init-db', app.cli.commands)
+        self.assertIn('index', app.view_functions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests de l'inventaire des fichiers orphelins, manquants et dupliqués (asset_scanner)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from extensions import db
+from models import User, Class, Course, CourseFile, Exercise
+import asset_scanner
+from asset_scanner import AssetScanner, reference_path
+
+
+def create_test_app(root):
+    app = Flask(__name__, root_path=root, instance_path=os.path.join(root, 'instance'))
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    asset_scanner.init_app(app)
+    return app
+
+
+class TestAssetScanner(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        self.write('exercises/general/chat.png', b'chat')
+        self.write('uploads/qcm/chat_copie.png', b'chat')
+        self.write('uploads/ete_2024.png', b'ete')
+        self.write('uploads/orphelin.png', b'orphelin')
+        self.write('uploads/cours.pdf', b'%PDF-')
+        self.write('uploads/.gitkeep', b'')
+        self.write('css/style.css', b'body {}')
+
+        self.app = create_test_app(self.root)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        teacher = User(username='prof', email='prof@test.com', role='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        self.exercise = Exercise(
+            title='Paires', exercise_type='pairs', teacher_id=teacher.id,
+            image_path='/static/exercises/general/chat.png',
+            content=json.dumps({'left_items': [
+                {'type': 'image', 'content': '/static/uploads/qcm/chat_copie.png?v=2'},
+                {'type': 'image', 'content': '/static/uploads/pairs/été 2024.png'},
+                {'type': 'image', 'content': 'absente.png'},
+                {'type': 'image', 'content': 'https://example.com/distante.png'},
+            ]}),
+        )
+        course = Course(title='Cours', class_obj=Class(name='Classe', teacher_id=teacher.id, access_code='ABC123'))
+        db.session.add_all([self.exercise, course])
+        db.session.flush()
+        db.session.add(CourseFile(filename='cours.pdf', original_filename='cours.pdf', course_id=course.id))
+        db.session.commit()
+        self.state_path = os.path.join(self.root, 'instance', 'scan.json')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def write(self, relative, content):
+        path = os.path.join(self.root, 'static', *relative.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def scan(self, **kwargs):
+        return AssetScanner(self.static_folder, self.state_path).run(**kwargs)
+
+    def test_reference_path(self):
+        self.assertEqual(reference_path('/static/uploads/static/uploads/a.png'), 'uploads/a.png')
+        self.assertEqual(reference_path('a.png'), 'uploads/a.png')
+        self.assertEqual(reference_path('exercises/a.png?v=1'), 'exercises/a.png')
+        self.assertIsNone(reference_path('https://example.com/a.png'))
+
+    def test_report(self):
+        report = self.scan()
+        self.assertEqual(report['missing'], [{'path': 'uploads/absente.png', 'owners': [f'exercise:{self.exercise.id}']}])
+        self.assertEqual([(item['path'], item['found']) for item in report['misplaced']],
+                         [('uploads/pairs/été 2024.png', 'uploads/ete_2024.png')])
+        self.assertEqual([item['path'] for item in report['orphans']], ['uploads/orphelin.png'])
+        self.assertEqual(len(report['duplicates']), 1)
+        self.assertEqual(report['duplicates'][0]['paths'], ['exercises/general/chat.png', 'uploads/qcm/chat_copie.png'])
+        self.assertEqual(report['stats']['duplicate_bytes'], 4)
+
+    def test_hardlinked_copies_are_not_duplicates(self):
+        copy = os.path.join(self.static_folder, 'uploads', 'qcm', 'chat_copie.png')
+        os.remove(copy)
+        os.link(os.path.join(self.static_folder, 'exercises', 'general', 'chat.png'), copy)
+        self.assertEqual(self.scan()['duplicates'], [])
+
+    def test_rerun_only_examines_changes(self):
+        first = self.scan()
+        self.assertEqual((first['stats']['hashed'], first['stats']['parsed']), (5, 1))
+
+        with patch('asset_scanner.hash_file', side_effect=AssertionError('rehachage')):
+            second = self.scan()
+        self.assertEqual((second['stats']['hashed'], second['stats']['parsed']), (0, 0))
+        self.assertEqual(second['missing'], first['missing'])
+
+        # Un fichier et un exercice modifiés sont seuls réexaminés
+        self.write('uploads/orphelin.png', b'modifie')
+        self.write('uploads/absente.png', b'ajoutee')
+        self.exercise.image_path = '/static/uploads/orphelin.png'
+        db.session.commit()
+        third = self.scan()
+        self.assertEqual((third['stats']['hashed'], third['stats']['parsed']), (2, 1))
+        self.assertEqual(third['missing'], [])
+        self.assertEqual([item['path'] for item in third['orphans']], ['exercises/general/chat.png'])
+
+        full = self.scan(full=True)
+        self.assertEqual(full['stats']['hashed'], 6)
+
+    def test_cli(self):
+        result = self.app.test_cli_runner().invoke(args=['scan-assets', '--json', os.path.join(self.root, 'r.json')])
+        self.assertIn('MANQUANT  uploads/absente.png', result.output)
+        self.assertIn('ORPHELIN  uploads/orphelin.png', result.output)
+        self.assertIn('1 manquants, 1 déplacés, 1 orphelins, 1 groupes de doublons', result.output)
+        with open(os.path.join(self.root, 'r.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['stats']['orphans'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'instance', 'asset_scan_state.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
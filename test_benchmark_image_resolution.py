@@ -0,0 +1,97 @@
+"""
+Tests du banc d'essai de la résolution des chemins d'images (benchmark_image_resolution)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+import benchmark_image_resolution
+from benchmark_image_resolution import (
+    RESOLVERS, build_corpus, build_tree, compare, format_results, run_benchmark,
+)
+
+
+def create_test_app(root):
+    app = Flask(__name__, root_path=root)
+    app.config['TESTING'] = True
+    benchmark_image_resolution.init_app(app)
+    return app
+
+
+class TestBenchmarkImageResolution(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        self.tree = build_tree(self.static_folder, files=60)
+        self.app = create_test_app(self.root)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def test_tree_and_corpus(self):
+        self.assertEqual(len(self.tree), 60)
+        for relative, _ in self.tree:
+            self.assertTrue(os.path.exists(os.path.join(self.static_folder, *relative.split('/'))))
+        # Les noms accentués sont enregistrés sous leur forme normalisée
+        self.assertTrue(any(original != relative.rsplit('/', 1)[-1] for relative, original in self.tree))
+
+        corpus = build_corpus(self.tree, size=200)
+        self.assertEqual(len(corpus), 200)
+        paths = [path for path, _ in corpus]
+        self.assertTrue(any('\\' in path for path in paths))
+        self.assertTrue(any('/static/uploads/static/uploads/' in path for path in paths))
+        self.assertTrue(any(path.startswith('https://') for path in paths))
+        self.assertEqual(build_corpus(self.tree, size=200), corpus)
+
+    def test_run_benchmark(self):
+        corpus = build_corpus(self.tree, size=40)
+        previous_cwd = os.getcwd()
+        results = run_benchmark(self.static_folder, corpus, min_time=0.01)
+        self.assertEqual(os.getcwd(), previous_cwd)
+        self.assertEqual(set(results), set(RESOLVERS))
+        for metrics in results.values():
+            self.assertGreater(metrics['ops_per_sec'], 0)
+            self.assertGreaterEqual(metrics['syscalls_per_call'], 0)
+        # L'index en mémoire ne touche jamais au disque
+        self.assertEqual(results['static_asset_index']['syscalls_per_call'], 0)
+        self.assertGreater(results['static_asset_index']['found_pct'], 50)
+        self.assertIn('static_asset_index', format_results(results))
+
+    def test_compare(self):
+        baseline = {'a': {'ops_per_sec': 1000, 'syscalls_per_call': 0.0},
+                    'b': {'ops_per_sec': 1000, 'syscalls_per_call': 1.0}}
+        results = {'a': {'ops_per_sec': 850, 'syscalls_per_call': 0.0},
+                   'b': {'ops_per_sec': 700, 'syscalls_per_call': 2.0},
+                   'c': {'ops_per_sec': 1, 'syscalls_per_call': 9.0}}
+        regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(regression.startswith('b:') for regression in regressions))
+
+    def test_cli_baseline(self):
+        output = os.path.join(self.root, 'resultats.json')
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['bench-images', '--files', '30', '--corpus', '20', '--min-time', '0.01',
+                                     '--resolver', 'static_asset_index', '--json', output])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('30 fichiers, 20 chemins', result.output)
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual(list(json.load(f)), ['static_asset_index'])
+
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'static_asset_index': {'ops_per_sec': 1e12, 'syscalls_per_call': 0.0}}, f)
+        result = runner.invoke(args=['bench-images', '--files', '30', '--corpus', '20', '--min-time', '0.01',
+                                     '--resolver', 'static_asset_index', '--baseline', output])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('RÉGRESSION static_asset_index', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests du magasin de fichiers adressé par contenu (blob_store)
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+from extensions import db
+from models import ImagePathAlias
+from blob_store import BlobStore, blob_store
+from static_asset_index import static_asset_index
+import cloud_storage_no_cloudinary
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+def create_test_app(root):
+    app = Flask(__name__, root_path=root)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    blob_store.init_app(app)
+    return app
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        os.makedirs(self.static_folder)
+        self.app = create_test_app(self.root)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.previous = (static_asset_index.static_folder, static_asset_index.poll_interval)
+        static_asset_index.static_folder = self.static_folder
+        static_asset_index.poll_interval = 3600
+        static_asset_index.build()
+
+    def tearDown(self):
+        static_asset_index.static_folder, static_asset_index.poll_interval = self.previous
+        static_asset_index._paths = None
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def write(self, relative, content):
+        path = os.path.join(self.static_folder, *relative.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_put_bytes_is_content_addressed(self):
+        sha256 = hashlib.sha256(b'chat').hexdigest()
+        blob = blob_store.put_bytes(b'chat', 'Chat.PNG')
+        self.assertTrue(blob.created)
+        self.assertEqual(blob.url, f'/static/uploads/blobs/{sha256[:2]}/{sha256}.png')
+        with open(blob_store.path(sha256, '.png'), 'rb') as f:
+            self.assertEqual(f.read(), b'chat')
+
+        again = blob_store.put_bytes(b'chat', '.png')
+        self.assertFalse(again.created)
+        self.assertEqual(again.url, blob.url)
+
+    def test_duplicate_upload_writes_nothing(self):
+        first = cloud_storage_no_cloudinary.upload_file(
+            FileStorage(stream=io.BytesIO(PNG_HEADER + b'renard'), filename='renard.png'))
+        path = os.path.join(self.root, first.lstrip('/'))
+        mtime = os.stat(path).st_mtime_ns
+        second = cloud_storage_no_cloudinary.upload_file(
+            FileStorage(stream=io.BytesIO(PNG_HEADER + b'renard'), filename='autre nom.PNG'))
+        self.assertEqual(first, second)
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertTrue(static_asset_index.exists(first))
+
+    def test_collapse_duplicates(self):
+        first = self.write('uploads/qcm/chat.png', b'chat')
+        second = self.write('exercises/general/chat.png', b'chat')
+        self.write('uploads/audio/dictee.mp3', b'audio')
+        self.write('css/style.css', b'body {}')
+
+        report = blob_store.collapse_duplicates(dry_run=True)
+        self.assertEqual(report['files'], 3)
+        self.assertEqual(report['blobs'], 2)
+        self.assertEqual(report['duplicates'], 1)
+        self.assertEqual(report['bytes_reclaimed'], 4)
+        self.assertFalse(os.path.exists(os.path.join(self.static_folder, 'uploads', 'blobs')))
+        self.assertEqual(ImagePathAlias.query.count(), 0)
+
+        report = blob_store.collapse_duplicates()
+        self.assertEqual(report['aliases'], 3)
+        self.assertTrue(os.path.samefile(first, second))
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), b'chat')
+
+        sha256 = hashlib.sha256(b'chat').hexdigest()
+        alias = ImagePathAlias.query.filter_by(path='/static/exercises/general/chat.png').one()
+        self.assertEqual((alias.sha256, alias.extension), (sha256, '.png'))
+
+        # Une seconde passe ne trouve plus rien à récupérer
+        report = blob_store.collapse_duplicates()
+        self.assertEqual(report['bytes_reclaimed'], 0)
+        self.assertEqual(report['aliases'], 0)
+        self.assertEqual(ImagePathAlias.query.count(), 3)
+
+    def test_dedupe_command(self):
+        self.write('uploads/a.png', b'x')
+        self.write('uploads/b.png', b'x')
+        result = self.app.test_cli_runner().invoke(args=['dedupe-images', '--dry-run'])
+        self.assertIn('2 fichiers, 1 contenus distincts, 1 copies', result.output)
+
+    def test_explicit_folder(self):
+        store = BlobStore(static_folder=os.path.join(self.root, 'autre'))
+        blob = store.put_bytes(b'son', 'dictee.ogg')
+        self.assertTrue(os.path.exists(store.path(blob.sha256, '.ogg')))
+
+
+if __name__ == '__main__':
+    unittest.main()
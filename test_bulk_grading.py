@@ -0,0 +1,230 @@
+"""
+Tests de la correction par lot (bulk_grading / grading_routes)
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, g
+from sqlalchemy import event
+from werkzeug.datastructures import MultiDict
+
+from extensions import db, login_manager
+from models import User, Class, Course, Exercise, ExerciseAttempt, StudentExerciseProgress
+from answer_key_cache import answer_key_cache
+from exercise_graders import compile_answer_key, grade_batch_with_key, GRADERS, BATCH_GRADERS
+from grading_routes import grading_bp
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SECRET_KEY'] = 'test'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(grading_bp)
+    return app
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+
+QCM = {'questions': [
+    {'text': 'Q1', 'options': ['a', 'b', 'c'], 'correct': 1},
+    {'text': 'Q2', 'options': ['d', 'e'], 'correct': 0},
+]}
+
+
+class TestBatchGraders(unittest.TestCase):
+    def assert_batch_matches_single(self, exercise_type, content, forms):
+        key = compile_answer_key(exercise_type, content)
+        batch = grade_batch_with_key(exercise_type, key, forms)
+        single = [GRADERS[exercise_type](key, form) for form in forms]
+        self.assertEqual(batch, single)
+        return batch
+
+    def test_qcm_batch(self):
+        forms = [
+            MultiDict({'answer_0': '1', 'answer_1': '0'}),
+            MultiDict({'answer_0': '1'}),
+            MultiDict({'answer_0': '2'})
+        ]
+        results = self.assert_batch_matches_single('qcm', QCM, forms)
+        self.assertEqual([result.score for result in results], [100, 50, 0])
+
+    def test_pairs_batch(self):
+        content = {'pairs': [{'left': 'a', 'right': '1'}, {'left': 'b', 'right': '2'}]}
+        forms = [MultiDict({'left_0': '0', 'left_1': '1'}), MultiDict({'left_0': '1', 'left_1': '0'})]
+        results = self.assert_batch_matches_single('pairs', content, forms)
+        self.assertEqual([result.score_count for result in results], [2, 0])
+
+    def test_drag_and_drop_batch(self):
+        content = {'draggable_items': ['a', 'b'], 'correct_order': [1, 0]}
+        forms = [MultiDict({'answer_0': '1', 'answer_1': '0'}), MultiDict({'answer_0': '1'})]
+        results = self.assert_batch_matches_single('drag_and_drop', content, forms)
+        self.assertEqual([result.score for result in results], [100, 50])
+
+    def test_types_without_batch_grader(self):
+        content = {'words': ['CHAT', 'LION']}
+        forms = [MultiDict({'word_0': 'chat'}), MultiDict({'found_words': 'CHAT,LION'})]
+        results = self.assert_batch_matches_single('word_search', content, forms)
+        self.assertEqual([result.score for result in results], [50, 100])
+
+
+class TestBulkGradingRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        answer_key_cache.clear()
+
+        teacher = User(username='teacher', email='teacher@test.com', role='teacher')
+        other_teacher = User(username='other', email='other@test.com', role='teacher')
+        db.session.add_all([teacher, other_teacher])
+        db.session.flush()
+        class_obj = Class(name='Classe A', teacher_id=teacher.id, access_code='ABC123')
+        course = Course(title='Cours', class_obj=class_obj)
+        exercise = Exercise(title='QCM', exercise_type='qcm', teacher_id=teacher.id, content=json.dumps(QCM))
+        course.exercises.append(exercise)
+        students = [User(username=f'eleve{i}', email=f'eleve{i}@test.com', role='student') for i in range(30)]
+        class_obj.students.extend(students)
+        outsider = User(username='outsider', email='outsider@test.com', role='student')
+        db.session.add_all([class_obj, course, outsider])
+        db.session.commit()
+
+        self.teacher_id = teacher.id
+        self.other_teacher_id = other_teacher.id
+        self.course_id = course.id
+        self.exercise_id = exercise.id
+        self.student_ids = [student.id for student in students]
+        self.outsider_id = outsider.id
+
+    def tearDown(self):
+        answer_key_cache.clear()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, client, user_id):
+        # Le contexte d'application est partagé : oublier l'utilisateur mis en cache
+        g.pop('_login_user', None)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+    def post_batch(self, client, submissions, course_id=None, exercise_id=None):
+        return client.post(f'/exercise/{exercise_id or self.exercise_id}/grade-batch', json={
+            'course_id': course_id,
+            'submissions': submissions
+        })
+
+    def test_batch_is_inserted_in_one_statement(self):
+        client = self.app.test_client()
+        self.login(client, self.teacher_id)
+
+        submissions = [{'student_id': student_id, 'answers': {'answer_0': '1', 'answer_1': str(i % 2)}}
+                       for i, student_id in enumerate(self.student_ids)]
+        submissions.append({'student_id': self.outsider_id, 'answers': {'answer_0': '1'}})
+        submissions.append({'answers': {}})
+
+        inserts = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO exercise_attempt'):
+                inserts.append(executemany)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.post_batch(client, submissions, self.course_id)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['graded'], 30)
+        self.assertEqual(data['results'][0]['score'], 100)
+        self.assertEqual(data['results'][1]['score'], 50)
+        self.assertIn('error', data['results'][30])
+        self.assertIn('error', data['results'][31])
+
+        self.assertEqual(inserts, [True])
+        attempts = ExerciseAttempt.query.filter_by(exercise_id=self.exercise_id).all()
+        self.assertEqual(len(attempts), 30)
+        self.assertTrue(all(attempt.course_id == self.course_id for attempt in attempts))
+        self.assertEqual(len(json.loads(attempts[0].feedback)), 2)
+
+        # La table de progression est mise à jour dans la même transaction
+        progress = StudentExerciseProgress.query.filter_by(exercise_id=self.exercise_id).all()
+        self.assertEqual(len(progress), 30)
+        self.assertEqual(sum(row.status == 'completed' for row in progress), 15)
+
+    def test_non_string_answers_are_graded(self):
+        client = self.app.test_client()
+        self.login(client, self.teacher_id)
+        blanks = Exercise(title='Trous', exercise_type='fill_in_blanks', teacher_id=self.teacher_id,
+                          content=json.dumps({'sentences': ['1 + 0 = ___'], 'words': ['1']}))
+        multichoix = Exercise(title='Multi', exercise_type='qcm_multichoix', teacher_id=self.teacher_id,
+                              content=json.dumps({'questions': [
+                                  {'question': 'Q', 'options': ['a', 'b', 'c'], 'correct_options': [0, 2]}]}))
+        db.session.add_all([blanks, multichoix])
+        db.session.commit()
+
+        response = self.post_batch(client, [{'student_id': self.student_ids[0], 'answers': {'answer_0': 1}}],
+                                   exercise_id=blanks.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['results'][0]['score'], 100)
+
+        response = self.post_batch(client, [
+            {'student_id': self.student_ids[0], 'answers': {'question_0[]': [0, 2]}},
+            {'student_id': self.student_ids[1], 'answers': {'question_0[]': [0]}},
+        ], exercise_id=multichoix.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['score'] for result in response.get_json()['results']], [100, 0])
+
+    def test_failing_submission_is_reported_alone(self):
+        client = self.app.test_client()
+        self.login(client, self.teacher_id)
+        batch_grader = BATCH_GRADERS['qcm']
+
+        def fragile_batch_grader(key, forms):
+            if any(form.get('answer_0') == 'x' for form in forms):
+                raise ValueError('réponse illisible')
+            return batch_grader(key, forms)
+
+        with patch.dict(BATCH_GRADERS, {'qcm': fragile_batch_grader}):
+            response = self.post_batch(client, [
+                {'student_id': self.student_ids[0], 'answers': {'answer_0': '1', 'answer_1': '0'}},
+                {'student_id': self.student_ids[1], 'answers': {'answer_0': 'x'}},
+            ])
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['graded'], 1)
+        self.assertEqual(data['results'][0]['score'], 100)
+        self.assertIn('error', data['results'][1])
+        self.assertEqual(ExerciseAttempt.query.filter_by(exercise_id=self.exercise_id).count(), 1)
+
+    def test_requires_exercise_owner(self):
+        client = self.app.test_client()
+        self.login(client, self.other_teacher_id)
+        response = self.post_batch(client, [{'student_id': self.student_ids[0], 'answers': {}}])
+        self.assertEqual(response.status_code, 404)
+
+        self.login(client, self.student_ids[0])
+        response = self.post_batch(client, [{'student_id': self.student_ids[0], 'answers': {}}])
+        self.assertEqual(response.status_code, 403)
+
+    def test_rejects_empty_batch(self):
+        client = self.app.test_client()
+        self.login(client, self.teacher_id)
+        self.assertEqual(self.post_batch(client, []).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
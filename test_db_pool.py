@@ -0,0 +1,178 @@
+"""
+Tests des pools de connexions, du journal WAL et du réplica (db_pool)
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app_factory import create_app
+from db_pool import InstrumentedQueuePool, engine_options, pool_settings, read_replica
+from extensions import db
+from gunicorn_profiles import worker_settings
+from models import User
+from request_metrics import RequestMetrics, build_report, merge_snapshots
+
+
+def create_test_app(root, environ=None, **config):
+    uri = f"sqlite:///{os.path.join(root, 'app.db')}"
+    environ = dict({'DB_POOL_SIZE': '3', 'DB_MAX_OVERFLOW': '1'}, **(environ or {}))
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(uri, worker_settings('sync', 1, {}), environ),
+        'UPLOAD_FOLDER': os.path.join(root, 'uploads'),
+    }
+    overrides.update(config)
+    return create_app('testing', overrides=overrides)
+
+
+class TestPoolSettings(unittest.TestCase):
+    def test_profiles(self):
+        sync = pool_settings(worker_settings('sync', 4, {}), {})
+        self.assertEqual((sync['pool_size'], sync['max_overflow'], sync['total']), (1, 2, 27))
+
+        gthread = pool_settings(worker_settings('gthread', 4, {'GUNICORN_THREADS': '8'}), {})
+        self.assertEqual((gthread['pool_size'], gthread['per_process'], gthread['total']), (8, 10, 50))
+
+        gevent = pool_settings(worker_settings('gevent', 2, {}), {'DB_MAX_OVERFLOW': '0'})
+        self.assertEqual((gevent['pool_size'], gevent['total']), (10, 30))
+        self.assertTrue(gevent['pool_pre_ping'])
+
+    def test_postgresql_options(self):
+        worker = worker_settings('gthread', 2, {})
+        direct = engine_options('postgresql://u:p@db/app', worker, {'DB_STATEMENT_TIMEOUT_MS': '5000'})
+        self.assertIs(direct['poolclass'], InstrumentedQueuePool)
+        self.assertEqual(direct['connect_args'], {'options': '-c statement_timeout=5000'})
+        self.assertEqual(direct['pool_recycle'], 1800)
+        # Sans la variable (commandes flask) : aucun délai
+        self.assertNotIn('connect_args', engine_options('postgresql://u:p@db/app', worker, {}))
+
+        pgbouncer = engine_options('postgresql://u:p@pgbouncer/app', worker, {'DB_PGBOUNCER': 'true'})
+        self.assertNotIn('connect_args', pgbouncer)
+        psycopg = engine_options('postgresql+psycopg://u:p@pgbouncer/app', worker, {'DB_PGBOUNCER': '1'})
+        self.assertEqual(psycopg['connect_args'], {'prepare_threshold': None})
+
+        self.assertEqual(engine_options('sqlite:///:memory:', worker, {}), {})
+
+
+class TestSQLiteWAL(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_concurrent_readers_and_writers(self):
+        app = create_test_app(self.root)
+        metrics = RequestMetrics()
+        metrics.init_app(app)
+        with app.app_context():
+            db.create_all()
+            self.assertEqual(db.session.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+            db.session.remove()
+
+        errors = []
+        barrier = threading.Barrier(8)
+
+        def worker(n):
+            try:
+                with app.app_context():
+                    barrier.wait()
+                    for i in range(10):
+                        if n % 2:
+                            db.session.add(User(username=f'u{n}-{i}', email=f'u{n}-{i}@test.com'))
+                            db.session.commit()
+                        else:
+                            User.query.count()
+                            db.session.commit()
+                    db.session.remove()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with app.app_context():
+            self.assertEqual(User.query.count(), 40)
+            db.session.remove()
+
+        # 8 threads pour 4 connexions : le pool a été saturé et des threads ont attendu
+        pool = build_report(merge_snapshots([metrics.snapshot()]))['pools'][0]
+        self.assertEqual(pool['name'], 'primary')
+        self.assertEqual(pool['capacity'], 4)
+        self.assertEqual(pool['peak_in_use'], 4)
+        self.assertEqual(pool['saturation'], 1.0)
+        self.assertGreaterEqual(pool['checkouts'], 80)
+        self.assertEqual(pool['timeouts'], 0)
+
+    def test_pool_timeout_is_recorded(self):
+        app = create_test_app(self.root, environ={'DB_POOL_SIZE': '1', 'DB_MAX_OVERFLOW': '0', 'DB_POOL_TIMEOUT': '0'})
+        metrics = RequestMetrics()
+        metrics.init_app(app)
+        with app.app_context():
+            held = db.engine.connect()
+            with self.assertRaises(PoolTimeoutError):
+                db.engine.connect()
+            held.close()
+            pool = build_report(merge_snapshots([metrics.snapshot()]))['pools'][0]
+        self.assertEqual((pool['checkouts'], pool['timeouts']), (1, 1))
+
+    def test_request_pool_wait_is_reported(self):
+        app = create_test_app(self.root)
+        metrics = RequestMetrics()
+        metrics.init_app(app)
+
+        @app.route('/users')
+        def users():
+            return str(User.query.count())
+
+        with app.app_context():
+            db.create_all()
+        app.test_client().get('/users')
+        summary = metrics.aggregate()['users'].summary()
+        self.assertGreater(summary['pool_wait_mean_ms'], 0)
+
+
+class TestReadReplica(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        # Le bind 'replica' est enregistré sur l'instance db partagée par tous les tests
+        db.metadatas.pop('replica', None)
+        shutil.rmtree(self.root)
+
+    def test_reads_are_routed_and_writes_stay_on_primary(self):
+        replica_uri = f"sqlite:///{os.path.join(self.root, 'replica.db')}"
+        app = self.app = create_test_app(self.root, SQLALCHEMY_BINDS={'replica': replica_uri})
+        with app.app_context():
+            db.create_all()
+            with db.engines['replica'].begin() as connection:
+                User.__table__.create(connection)
+                connection.execute(User.__table__.insert(), {'username': 'replica', 'email': 'r@test.com'})
+            db.session.add(User(username='primary', email='p@test.com'))
+            db.session.commit()
+
+            self.assertEqual([u.username for u in User.query.all()], ['primary'])
+            with read_replica():
+                self.assertEqual([u.username for u in User.query.all()], ['replica'])
+                db.session.add(User(username='written', email='w@test.com'))
+                db.session.commit()
+            self.assertEqual(User.query.count(), 2)
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests du service d'autorisation d'accès aux exercices (exercise_access)
+"""
+
+import unittest
+
+from flask import Flask, g
+from flask_login import AnonymousUserMixin
+from sqlalchemy import event
+
+from extensions import db
+from models import User, Class, Course, Exercise
+from exercise_access import (
+    can_view_exercise_stats, can_view_exercise_attempts, exercise_in_course, clear_access_memo
+)
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+class TestExerciseAccess(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.author = User(username='auteur', email='auteur@test.com', role='teacher')
+        self.teacher = User(username='prof', email='prof@test.com', role='teacher')
+        self.stranger = User(username='autre', email='autre@test.com', role='teacher')
+        self.student = User(username='eleve', email='eleve@test.com', role='student')
+        self.outsider = User(username='dehors', email='dehors@test.com', role='student')
+        db.session.add_all([self.author, self.teacher, self.stranger, self.student, self.outsider])
+        db.session.flush()
+
+        self.exercise = Exercise(title='Partagé', exercise_type='qcm', teacher_id=self.author.id)
+        self.private = Exercise(title='Privé', exercise_type='qcm', teacher_id=self.author.id)
+        class_obj = Class(name='Classe', teacher_id=self.teacher.id, access_code='ABC123')
+        class_obj.students.append(self.student)
+        self.course = Course(title='Cours', class_obj=class_obj)
+        self.course.exercises.append(self.exercise)
+        db.session.add_all([self.private, class_obj, self.course])
+        db.session.commit()
+
+    def tearDown(self):
+        clear_access_memo()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_queries(self, func):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = func()
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        return result, statements
+
+    def test_stats_access(self):
+        self.assertTrue(can_view_exercise_stats(self.author, self.exercise.id))
+        self.assertTrue(can_view_exercise_stats(self.author, self.private.id))
+        self.assertTrue(can_view_exercise_stats(self.teacher, self.exercise.id))
+        self.assertFalse(can_view_exercise_stats(self.teacher, self.private.id))
+        self.assertFalse(can_view_exercise_stats(self.stranger, self.exercise.id))
+        self.assertFalse(can_view_exercise_stats(self.student, self.exercise.id))
+        self.assertFalse(can_view_exercise_stats(AnonymousUserMixin(), self.exercise.id))
+
+    def test_attempts_access(self):
+        self.assertTrue(can_view_exercise_attempts(self.student, self.exercise.id))
+        self.assertFalse(can_view_exercise_attempts(self.student, self.private.id))
+        self.assertFalse(can_view_exercise_attempts(self.outsider, self.exercise.id))
+        self.assertTrue(can_view_exercise_attempts(self.teacher, self.exercise.id))
+
+    def test_exercise_in_course(self):
+        self.assertTrue(exercise_in_course(self.exercise.id, self.course.id))
+        self.assertFalse(exercise_in_course(self.private.id, self.course.id))
+
+    def test_one_query_then_memoized(self):
+        teacher_id, exercise_id = self.teacher.id, self.exercise.id
+        db.session.refresh(self.teacher)
+
+        result, statements = self.count_queries(lambda: can_view_exercise_stats(self.teacher, exercise_id))
+        self.assertTrue(result)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('EXISTS', statements[0])
+
+        result, statements = self.count_queries(lambda: [
+            can_view_exercise_stats(self.teacher, exercise_id) for _ in range(10)
+        ])
+        self.assertEqual(statements, [])
+        self.assertEqual(g._exercise_access[('stats', teacher_id, exercise_id)], True)
+
+    def test_memo_lasts_until_cleared(self):
+        with self.app.test_request_context():
+            self.assertFalse(can_view_exercise_stats(self.teacher, self.private.id))
+            self.course.exercises.append(self.private)
+            db.session.commit()
+            # Réponse mémorisée jusqu'à la fin de la requête (ou clear_access_memo)
+            self.assertFalse(can_view_exercise_stats(self.teacher, self.private.id))
+            clear_access_memo()
+            self.assertTrue(can_view_exercise_stats(self.teacher, self.private.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
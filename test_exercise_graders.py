@@ -0,0 +1,187 @@
+"""
+Tests des correcteurs d'exercices (exercise_graders)
+
+Les correcteurs sont des fonctions pures : ils sont testés sans application
+Flask ni base de données, avec un MultiDict comme formulaire.
+"""
+
+import json
+import timeit
+import unittest
+
+from werkzeug.datastructures import MultiDict
+
+from exercise_graders import (
+    GRADERS, GradingError, GradingResult, grade_submission, parse_content, blank_sentence_map,
+    compile_answer_key, validate_submission
+)
+
+
+class TestGraderRegistry(unittest.TestCase):
+    def test_all_types_registered(self):
+        expected = {
+            'qcm', 'qcm_multichoix', 'pairs', 'fill_in_blanks', 'word_placement', 'underline_words',
+            'drag_and_drop', 'word_search', 'dictation', 'image_labeling', 'flashcards'
+        }
+        self.assertTrue(expected.issubset(GRADERS))
+
+    def test_unknown_type(self):
+        with self.assertRaises(GradingError):
+            grade_submission('unknown', {}, MultiDict())
+
+    def test_parse_content(self):
+        self.assertEqual(parse_content('{"a": 1}'), {'a': 1})
+        self.assertEqual(parse_content(None), {})
+        self.assertEqual(parse_content('not json'), {})
+        self.assertEqual(parse_content({'a': 1}), {'a': 1})
+
+    def test_blank_sentence_map(self):
+        self.assertEqual(blank_sentence_map(['a ___ b ___', 'c', '___']), [0, 0, 2])
+
+
+class TestGraders(unittest.TestCase):
+    def test_qcm(self):
+        content = {'questions': [
+            {'text': 'Q1', 'options': ['a', 'b'], 'correct': 1},
+            {'text': 'Q2', 'choices': ['c', 'd'], 'correct_answer': 0},
+        ]}
+        result = grade_submission('qcm', content, MultiDict({'answer_0': '1', 'answer_1': '1'}))
+        self.assertIsInstance(result, GradingResult)
+        self.assertEqual(result.score, 50)
+        self.assertEqual(result.answers, [1, 1])
+        self.assertEqual(result.feedback[1]['correct_answer'], 'c')
+        self.assertEqual(result.feedback[1]['student_answer'], 'd')
+
+    def test_qcm_invalid_content(self):
+        with self.assertRaises(GradingError):
+            grade_submission('qcm', {}, MultiDict())
+
+    def test_qcm_multichoix(self):
+        content = {'questions': [
+            {'question': 'Q', 'options': ['a', 'b', 'c'], 'correct_options': [0, 2]},
+            {'question': 'R', 'options': ['a', 'b'], 'correct_options': [1]},
+        ]}
+        form = MultiDict([('question_0[]', '2'), ('question_0[]', '0'), ('question_1[]', '0')])
+        result = grade_submission('qcm_multichoix', content, form)
+        self.assertEqual(result.score, 50)
+        self.assertEqual(result.feedback['correct_questions'], 1)
+
+    def test_pairs(self):
+        content = {'pairs': [{'left': 'chat', 'right': 'cat'}, {'left': 'chien', 'right': 'dog'}]}
+        result = grade_submission('pairs', content, MultiDict({'left_0': '0', 'left_1': '0'}))
+        self.assertEqual(result.score_count, 1)
+        self.assertEqual(result.feedback['details'][1]['given_right'], 'cat')
+
+        # Ancien nom de champ pair_i
+        result = grade_submission('pairs', content, MultiDict({'pair_0': '0', 'pair_1': '1'}))
+        self.assertEqual(result.score, 100)
+
+    def test_fill_in_blanks(self):
+        content = {
+            'sentences': ['Le ___ mange la ___.', {'text': 'Il fait ___.'}],
+            'words': ['chat', 'souris', 'beau']
+        }
+        form = MultiDict({'answer_0': 'Chat', 'answer_1': 'souris', 'answer_2': 'froid'})
+        result = grade_submission('fill_in_blanks', content, form)
+        self.assertEqual(result.score_count, 2)
+        self.assertEqual(result.max_score, 3)
+        self.assertEqual(result.feedback['details'][2]['sentence_index'], 1)
+        self.assertFalse(result.feedback['details'][2]['is_correct'])
+
+    def test_fill_in_blanks_text_content(self):
+        content = {'text': 'Un ___ et un ___', 'available_words': ['a', 'b']}
+        result = grade_submission('fill_in_blanks', content, MultiDict({'answer_0': 'a', 'answer_1': 'b'}))
+        self.assertEqual(result.score, 100)
+
+    def test_word_placement(self):
+        content = {'sentences': ['Le ___ dort.', 'La ___ court.'], 'answers': ['chat', 'souris']}
+        result = grade_submission('word_placement', content, MultiDict({'answer_0': 'chat'}))
+        self.assertEqual(result.score, 50)
+        self.assertEqual(result.feedback['details'][1]['user_answer'], '')
+
+    def test_incomplete_submissions_are_rejected(self):
+        cases = [
+            ('qcm', {'questions': [{'text': 'Q1', 'options': ['a', 'b'], 'correct': 1},
+                                   {'text': 'Q2', 'options': ['c', 'd'], 'correct': 0}]},
+             {'answer_0': '1', 'answer_1': '0'}, {'answer_0': '1'},
+             'Veuillez répondre à toutes les questions.'),
+            ('pairs', {'pairs': [{'left': 'chat', 'right': 'cat'}, {'left': 'chien', 'right': 'dog'}]},
+             {'left_0': '0', 'left_1': '1'}, {'left_0': '0', 'left_1': ''},
+             'Veuillez associer toutes les paires.'),
+            ('word_placement', {'sentences': ['Le ___ dort.', 'La ___ court.'], 'answers': ['chat', 'souris']},
+             {'answer_0': 'chat', 'answer_1': ''}, {'answer_0': 'chat'},
+             'Nombre de réponses incorrect.'),
+        ]
+        for exercise_type, content, complete, incomplete, message in cases:
+            with self.subTest(exercise_type=exercise_type):
+                key = compile_answer_key(exercise_type, content)
+                validate_submission(exercise_type, key, MultiDict(complete))
+                with self.assertRaises(GradingError) as raised:
+                    validate_submission(exercise_type, key, MultiDict(incomplete))
+                self.assertEqual(str(raised.exception), message)
+
+        # Types sans contrôle : toujours acceptés
+        validate_submission('fill_in_blanks', compile_answer_key('fill_in_blanks', {'text': '___', 'words': ['a']}),
+                            MultiDict())
+
+    def test_underline_words(self):
+        content = {'words': [
+            {'text': "L'enfant mange.", 'words_to_underline': ['enfant']},
+            {'text': 'Il court vite.', 'words_to_underline': ['court', 'vite']},
+        ]}
+        form = MultiDict({'selected_words_0': "L'enfant", 'selected_words_1': 'court'})
+        result = grade_submission('underline_words', content, form)
+        self.assertEqual(result.score, 50)
+        self.assertEqual(result.feedback['details'][1]['missing_words'], ['vite'])
+
+    def test_drag_and_drop(self):
+        content = {'draggable_items': ['a', 'b', 'c'], 'correct_order': [2, 0, 1]}
+        result = grade_submission('drag_and_drop', content, MultiDict({'answer_0': '2', 'answer_1': '1'}))
+        self.assertEqual(result.score_count, 1)
+        self.assertEqual(result.score, 33)
+        self.assertEqual(result.answers['answer_2'], '-1')
+
+    def test_word_search(self):
+        content = {'words': ['CHAT', 'CHIEN', 'LION']}
+        result = grade_submission('word_search', content, MultiDict({'word_0': 'chat', 'word_1': 'loup'}))
+        self.assertEqual(result.feedback['correct_words'], ['CHAT'])
+        self.assertEqual(result.feedback['incorrect_words'], ['LOUP'])
+        self.assertEqual(result.feedback['missed_words'], ['CHIEN', 'LION'])
+
+        result = grade_submission('word_search', content, MultiDict({'found_words': 'CHAT,LION'}))
+        self.assertEqual(result.score_count, 2)
+
+    def test_dictation(self):
+        content = {'sentences': ['Le chat dort.', 'Il pleut beaucoup.']}
+        form = MultiDict({'dictation_answer_0': 'le chat dort', 'dictation_answer_1': 'Il pleut'})
+        result = grade_submission('dictation', content, form)
+        self.assertEqual(result.score, 50)
+        self.assertEqual(result.feedback['details'][1]['similarity'], 66.7)
+
+    def test_image_labeling(self):
+        content = {'zones': [{'label': 'Tête'}, {'label': 'Queue'}]}
+        form = MultiDict({'user_answers': json.dumps({'1': 'tête', '2': 'patte'})})
+        result = grade_submission('image_labeling', content, form)
+        self.assertEqual(result.score, 50)
+        self.assertEqual(result.answers, {'1': 'tête', '2': 'patte'})
+
+    def test_flashcards(self):
+        content = {'cards': [{'question': '1+1', 'answer': '2'}]}
+        form = MultiDict({
+            'final_score': '100', 'correct_answers': '1', 'total_answers': '1',
+            'card_0_answer': '2', 'card_0_correct': 'true'
+        })
+        result = grade_submission('flashcards', content, form)
+        self.assertEqual(result.score, 100.0)
+        self.assertTrue(result.answers['card_0']['correct'])
+
+    def test_graders_can_be_benchmarked(self):
+        # Les correcteurs n'ont besoin que du contenu et du formulaire
+        content = {'sentences': ['Le ___ dort.'] * 50, 'words': ['chat'] * 50}
+        form = MultiDict({f'answer_{i}': 'chat' for i in range(50)})
+        duration = timeit.timeit(lambda: grade_submission('fill_in_blanks', content, form), number=20)
+        self.assertLess(duration, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
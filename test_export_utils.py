@@ -0,0 +1,110 @@
+"""
+Tests des exports Excel/PDF en flux (export_utils)
+"""
+
+import os
+import unittest
+import tracemalloc
+
+from flask import Flask
+from openpyxl import load_workbook
+
+from export_utils import (write_class_excel, write_class_pdf, stream_export_file, format_student_row,
+                          EXCEL_MIMETYPE, PDF_MIMETYPE)
+from statistics_service import StudentStatsRow
+
+
+def generate_rows(count):
+    for i in range(count):
+        yield StudentStatsRow(
+            class_id=1,
+            student_id=i,
+            name=f'Élève {i}' if i % 5 else None,
+            username=f'eleve_{i}',
+            completed_exercises=i % 7,
+            average_score=62.5 if i % 3 else None
+        )
+
+
+class TestExportUtils(unittest.TestCase):
+    def setUp(self):
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def measure_peak(self, writer, count):
+        tracemalloc.start()
+        try:
+            path = writer('Classe Test', generate_rows(count), 10, count)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.paths.append(path)
+        return path, peak
+
+    def test_excel_content(self):
+        path = write_class_excel('Classe Test', generate_rows(12), 10, 12, teacher_name='M. Test')
+        self.paths.append(path)
+
+        ws = load_workbook(path, read_only=True).active
+        rows = list(ws.values)
+        self.assertEqual(rows[0][0], 'Statistiques de la classe : Classe Test')
+        self.assertEqual(rows[4][0], "Nombre d'élèves : 12")
+        self.assertEqual(rows[7][:4], ('Élève', 'Exercices complétés', 'Score moyen (%)', 'Progression'))
+        # Première ligne élève : pas de nom -> username, pas de score -> '-'
+        self.assertEqual(rows[8][:4], ('eleve_0', 0, '-', '0/10'))
+        self.assertEqual(rows[9][:4], ('Élève 1', 1, '62.5', '1/10'))
+        self.assertEqual(len(rows), 8 + 12)
+
+        # Données centrées comme les en-têtes
+        ws = load_workbook(path).active
+        self.assertEqual(ws.cell(row=9, column=1).alignment.horizontal, 'center')
+        self.assertEqual(ws.cell(row=20, column=4).alignment.horizontal, 'center')
+
+    def test_pdf_score_has_percent_suffix(self):
+        rows = list(generate_rows(2))
+        self.assertEqual(format_student_row(rows[1], 10, score_suffix='%')[2], '62.5%')
+        self.assertEqual(format_student_row(rows[0], 10, score_suffix='%')[2], '-')
+
+    def test_pdf_is_written(self):
+        path = write_class_pdf('Classe Test', generate_rows(120), 10, 120)
+        self.paths.append(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.startswith(b'%PDF'))
+        # 120 lignes ne tiennent pas sur une seule page
+        self.assertGreater(data.count(b'/Type /Page\n'), 1)
+
+    def test_memory_does_not_grow_with_rows(self):
+        # Le premier appel paie les imports et le chargement des polices
+        self.measure_peak(write_class_excel, 10)
+        self.measure_peak(write_class_pdf, 10)
+
+        for writer in (write_class_excel, write_class_pdf):
+            _, peak_small = self.measure_peak(writer, 200)
+            _, peak_large = self.measure_peak(writer, 2000)
+            self.assertLess(peak_large, 4 * 1024 * 1024, writer.__name__)
+            self.assertLess(peak_large, peak_small + 3 * 1024 * 1024, writer.__name__)
+
+    def test_stream_export_file(self):
+        app = Flask(__name__)
+        for writer, download_name, mimetype in ((write_class_excel, 'stats.xlsx', EXCEL_MIMETYPE),
+                                                (write_class_pdf, 'stats.pdf', PDF_MIMETYPE)):
+            path = writer('Classe Test', generate_rows(50), 10, 50)
+            size = os.path.getsize(path)
+            with app.test_request_context():
+                response = stream_export_file(path, download_name, mimetype)
+                self.assertTrue(response.is_streamed)
+                self.assertEqual(response.mimetype, mimetype)
+                self.assertEqual(response.headers['Content-Length'], str(size))
+                self.assertIn(download_name, response.headers['Content-Disposition'])
+                body = b''.join(response.response)
+            self.assertEqual(len(body), size)
+            # Le fichier temporaire est supprimé après l'envoi
+            self.assertFalse(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
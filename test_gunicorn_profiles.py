@@ -0,0 +1,70 @@
+"""
+Tests des profils de workers gunicorn et du test de charge
+"""
+
+import importlib.util
+import unittest
+
+from app_factory import create_app
+from extensions import db
+from gunicorn_profiles import after_fork, worker_settings
+from load_test import run_profile, summarize
+
+
+class TestWorkerSettings(unittest.TestCase):
+    def test_profiles_are_sized_from_cpu_count(self):
+        sync = worker_settings('sync', cpu_count=4, environ={})
+        self.assertEqual((sync['worker_class'], sync['workers'], sync['threads']), ('sync', 9, 1))
+        self.assertEqual(sync['concurrency'], 9)
+
+        gthread = worker_settings(cpu_count=4, environ={})
+        self.assertEqual((gthread['worker_class'], gthread['workers'], gthread['threads']), ('gthread', 5, 4))
+        self.assertEqual(gthread['concurrency'], 20)
+
+        gevent = worker_settings('gevent', cpu_count=4, environ={'GUNICORN_WORKER_CONNECTIONS': '50'})
+        self.assertEqual((gevent['workers'], gevent['concurrency']), (5, 250))
+
+    def test_environment_overrides(self):
+        settings = worker_settings(cpu_count=8, environ={
+            'GUNICORN_PROFILE': 'GTHREAD', 'GUNICORN_WORKERS': '2', 'GUNICORN_THREADS': '8',
+        })
+        self.assertEqual((settings['workers'], settings['threads'], settings['concurrency']), (2, 8, 16))
+        with self.assertRaises(ValueError):
+            worker_settings('eventlet', environ={})
+
+
+class TestForkHooks(unittest.TestCase):
+    def tearDown(self):
+        db.metadatas.pop('replica', None)
+
+    def test_after_fork_drops_every_inherited_pool(self):
+        app = create_app('testing', overrides={'SQLALCHEMY_BINDS': {'replica': 'sqlite://'}})
+        with app.app_context():
+            pools = {key: engine.pool for key, engine in db.engines.items()}
+        after_fork(app)
+        with app.app_context():
+            self.assertEqual(set(pools), {None, 'replica'})
+            for key, engine in db.engines.items():
+                self.assertIsNot(engine.pool, pools[key])
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_summarize(self):
+        summary = summarize([0.001 * i for i in range(1, 101)], errors=2, elapsed=2.0)
+        self.assertEqual(summary['requests'], 102)
+        self.assertEqual(summary['rps'], 50.0)
+        self.assertEqual(summary['p50_ms'], 51.0)
+        self.assertEqual(summary['p99_ms'], 99.0)
+
+    @unittest.skipIf(importlib.util.find_spec('gunicorn') is None, 'gunicorn non installé')
+    def test_profiles_under_load(self):
+        for profile in ('sync', 'gthread'):
+            result = run_profile(profile, app='app_railway_minimal:app', paths=('/', '/health'),
+                                 concurrency=4, duration=0.5, workers=1)
+            self.assertNotIn('error', result)
+            self.assertGreater(result['requests'], 0)
+            self.assertEqual(result['errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Tests des déclinaisons redimensionnées des images (image_derivatives)
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask, render_template_string
+from PIL import Image
+
+from app_factory import create_app as create_full_app
+from image_derivatives import DerivativeCache, derivative_url, image_srcset
+
+# Templates dont les images passent par les déclinaisons
+RESPONSIVE_TEMPLATES = (
+    'exercise_types/qcm_multichoix.html', 'exercise_types/pairs_edit.html',
+    'exercise_types/flashcards.html', 'exercise_types/flashcards_edit.html',
+    'exercise_types/image_labeling.html', 'exercise_types/image_labeling_edit.html',
+    'exercise_types/file_edit.html', 'exercise_types/text_edit.html',
+)
+
+
+def create_test_app(root, max_bytes=10 * 1024 * 1024):
+    app = Flask(__name__, root_path=root)
+    app.config['TESTING'] = True
+    app.config['IMAGE_DERIVATIVE_CACHE_FOLDER'] = os.path.join(root, 'cache')
+    app.config['IMAGE_DERIVATIVE_CACHE_MAX_BYTES'] = max_bytes
+    cache = DerivativeCache()
+    cache.init_app(app)
+    return app, cache
+
+
+class TestImageDerivatives(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'static', 'uploads'))
+        self.save_image('uploads/grande.png', (2000, 1000), 'RGBA')
+        self.save_image('uploads/petite.jpg', (200, 100), 'RGB')
+        self.app, self.cache = create_test_app(self.root)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def save_image(self, relative, size, mode):
+        image = Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30))
+        image.save(os.path.join(self.root, 'static', *relative.split('/')))
+
+    def test_variants_are_resized(self):
+        for variant, width in (('thumb', 320), ('card', 640), ('full', 1280)):
+            path = self.cache.get('/static/uploads/grande.png', variant, 'webp')
+            with Image.open(path) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.size, (width, width // 2))
+
+        path = self.cache.get('/static/uploads/grande.png', 'card', 'jpeg')
+        with Image.open(path) as image:
+            self.assertEqual((image.format, image.mode), ('JPEG', 'RGB'))
+
+    def test_small_images_are_not_upscaled(self):
+        path = self.cache.get('/static/uploads/petite.jpg', 'full', 'webp')
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (200, 100))
+
+    def test_second_request_is_served_from_cache(self):
+        self.cache.get('/static/uploads/grande.png', 'thumb', 'webp')
+        self.cache.get('/static/uploads/grande.png', 'thumb', 'webp')
+        self.assertEqual((self.cache.generated, self.cache.hits), (1, 1))
+
+    def test_modified_source_is_regenerated(self):
+        first = self.cache.get('/static/uploads/petite.jpg', 'thumb', 'webp')
+        self.save_image('uploads/petite.jpg', (300, 100), 'RGB')
+        os.utime(os.path.join(self.root, 'static', 'uploads', 'petite.jpg'), ns=(1, 1))
+        self.assertNotEqual(self.cache.get('/static/uploads/petite.jpg', 'thumb', 'webp'), first)
+
+    def test_invalid_requests(self):
+        self.assertIsNone(self.cache.get('/static/uploads/absente.png', 'thumb', 'webp'))
+        self.assertIsNone(self.cache.get('/static/uploads/grande.png', 'geante', 'webp'))
+        self.assertIsNone(self.cache.get('/static/uploads/grande.png', 'thumb', 'bmp'))
+        self.assertIsNone(self.cache.get('/static/../app.py', 'thumb', 'webp'))
+        with open(os.path.join(self.root, 'static', 'uploads', 'cassee.png'), 'wb') as f:
+            f.write(b'pas une image')
+        self.assertIsNone(self.cache.get('/static/uploads/cassee.png', 'thumb', 'webp'))
+
+    def test_size_based_eviction(self):
+        self.cache.get('/static/uploads/grande.png', 'full', 'webp')
+        self.cache.max_bytes = self.cache.stats()['bytes'] + 1
+        self.cache.get('/static/uploads/petite.jpg', 'thumb', 'webp')
+        self.cache.get('/static/uploads/petite.jpg', 'card', 'webp')
+        stats = self.cache.stats()
+        self.assertLessEqual(stats['bytes'], self.cache.max_bytes)
+        self.assertGreaterEqual(self.cache.evicted, 1)
+        # La déclinaison la plus ancienne est partie la première
+        source = self.cache.source_path('/static/uploads/grande.png')
+        self.assertFalse(os.path.exists(self.cache.derivative_path(source, 'full', 'webp')))
+
+    def test_route(self):
+        client = self.app.test_client()
+        response = client.get('/derivatives/thumb/webp/uploads/grande.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/webp')
+        self.assertIn('max-age=86400', response.headers['Cache-Control'])
+        with Image.open(io.BytesIO(response.data)) as image:
+            self.assertEqual(image.width, 320)
+        response.close()
+        self.assertEqual(client.get('/derivatives/thumb/webp/uploads/absente.png').status_code, 404)
+
+    def test_template_helpers(self):
+        self.assertEqual(derivative_url('/static/uploads/a.png', 'card'), '/derivatives/card/webp/uploads/a.png')
+        self.assertEqual(image_srcset('https://example.com/a.png'), '')
+        self.assertEqual(image_srcset('/static/uploads/a.svg'), '')
+        self.assertEqual(
+            image_srcset('/static/uploads/a.png?v=2', 'jpeg'),
+            '/derivatives/thumb/jpeg/uploads/a.png 320w, /derivatives/card/jpeg/uploads/a.png 640w, '
+            '/derivatives/full/jpeg/uploads/a.png 1280w'
+        )
+
+        html = render_template_string(
+            "{{ responsive_image('/static/uploads/a.png', alt='L\\'image', class_='img-fluid', sizes='640px') }}"
+        )
+        self.assertTrue(html.startswith('<picture><source type="image/webp" srcset="/derivatives/thumb/webp/'))
+        self.assertIn('class="img-fluid"', html)
+        self.assertIn('alt="L&#39;image"', html)
+        self.assertIn('srcset="/derivatives/thumb/jpeg/uploads/a.png 320w', html)
+
+        html = render_template_string("{{ responsive_image('/static/uploads/a.svg', alt='x') }}")
+        self.assertEqual(html, '<img src="/static/uploads/a.svg" alt="x" loading="lazy">')
+
+    def test_exercise_templates_use_derivatives(self):
+        env = create_full_app('testing').jinja_env
+        for name in RESPONSIVE_TEMPLATES:
+            with self.subTest(template=name):
+                source = env.loader.get_source(env, name)[0]
+                self.assertRegex(source, r'image_srcset\(|responsive_image\(')
+                env.get_template(name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests du middleware de repli des images (utils/image_fallback_middleware)
+"""
+
+import importlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from static_asset_index import static_asset_index
+from utils.image_fallback_middleware import ImageFallbackMiddleware
+
+
+class TestImageFallbackMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        for relative in ('exercises/general/chat.png', 'uploads/ete_2024.png'):
+            path = os.path.join(self.static_folder, *relative.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'image')
+
+        self.app = Flask(__name__, root_path=self.root)
+        self.app.config['TESTING'] = True
+        self.previous = (static_asset_index.static_folder, static_asset_index.poll_interval)
+        static_asset_index.static_folder = self.static_folder
+        static_asset_index.poll_interval = 3600
+        static_asset_index.build()
+        self.middleware = ImageFallbackMiddleware(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        static_asset_index.static_folder, static_asset_index.poll_interval = self.previous
+        static_asset_index._paths = None
+        shutil.rmtree(self.root)
+
+    def test_hit_does_not_touch_fallback(self):
+        with patch.object(self.middleware, 'fallback_response', side_effect=AssertionError('repli appelé')):
+            response = self.client.get('/static/exercises/general/chat.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'image')
+        response.close()
+
+    def test_miss_is_redirected_to_canonical_url(self):
+        response = self.client.get('/static/uploads/qcm_multichoix/chat.png')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers['Location'], '/static/exercises/general/chat.png')
+        self.assertIn('max-age=3600', response.headers['Cache-Control'])
+        # Aucun fichier n'est copié à l'emplacement demandé
+        self.assertFalse(os.path.exists(os.path.join(self.static_folder, 'uploads', 'qcm_multichoix')))
+
+    def test_normalized_filename_alias(self):
+        response = self.client.get('/static/exercises/%C3%A9t%C3%A9%202024.png')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers['Location'], '/static/uploads/ete_2024.png')
+
+    def test_resolution_is_cached(self):
+        self.client.get('/static/uploads/qcm_multichoix/chat.png')
+        with patch('utils.image_fallback_middleware.normalize_filename', side_effect=AssertionError('recalcul')):
+            response = self.client.get('/static/uploads/qcm_multichoix/chat.png')
+        self.assertEqual(response.status_code, 302)
+
+    def test_sendfile_and_accel_modes(self):
+        self.app.config['IMAGE_FALLBACK_MODE'] = 'sendfile'
+        response = self.client.get('/static/uploads/chat.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Sendfile'],
+                         os.path.join(self.static_folder, 'exercises', 'general', 'chat.png'))
+        self.assertEqual(response.mimetype, 'image/png')
+
+        self.app.config['IMAGE_FALLBACK_MODE'] = 'accel'
+        response = self.client.get('/static/uploads/chat.png')
+        self.assertEqual(response.headers['X-Accel-Redirect'], '/protected-static/exercises/general/chat.png')
+
+    def test_unknown_image_stays_404(self):
+        self.assertEqual(self.client.get('/static/uploads/absent.png').status_code, 404)
+        self.assertEqual(self.client.get('/static/css/absent.css').status_code, 404)
+
+
+class TestUploadedFileFallback(unittest.TestCase):
+    """/static/uploads/ est servi par la vue uploaded_file de app.py, pas par 'static'"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        os.makedirs(os.path.join(self.static_folder, 'exercises', 'general'))
+        with open(os.path.join(self.static_folder, 'exercises', 'general', 'repli_chat.png'), 'wb') as f:
+            f.write(b'image')
+
+        with patch.dict(os.environ, {'FLASK_CONFIG': 'testing'}):
+            self.app = importlib.import_module('app').app
+        self.previous = (static_asset_index.static_folder, static_asset_index.poll_interval)
+        static_asset_index.static_folder = self.static_folder
+        static_asset_index.poll_interval = 3600
+        static_asset_index.build()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        static_asset_index.static_folder, static_asset_index.poll_interval = self.previous
+        static_asset_index._paths = None
+        shutil.rmtree(self.root)
+
+    def test_upload_miss_is_redirected(self):
+        response = self.client.get('/static/uploads/qcm_multichoix/repli_chat.png')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers['Location'], '/static/exercises/general/repli_chat.png')
+
+    def test_unknown_upload_stays_404(self):
+        self.assertEqual(self.client.get('/static/uploads/qcm_multichoix/absent_repli.png').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
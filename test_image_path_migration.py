@@ -0,0 +1,210 @@
+"""
+Tests du moteur de migration des chemins d'images (image_path_migration)
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from extensions import db
+from models import User, Exercise, ImagePathAlias
+from static_asset_index import static_asset_index
+import image_path_migration
+from image_path_migration import ImagePathMigration, is_image_reference
+
+
+def create_test_app(root):
+    app = Flask(__name__, root_path=root, instance_path=os.path.join(root, 'instance'))
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    image_path_migration.init_app(app)
+    return app
+
+
+class TestImagePathMigration(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        for relative in ('exercises/general/chat.png', 'uploads/pairs/lion.png', 'uploads/qcm/legacy.png'):
+            path = os.path.join(self.static_folder, *relative.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(relative.encode())
+
+        self.app = create_test_app(self.root)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.previous = (static_asset_index.static_folder, static_asset_index.poll_interval)
+        static_asset_index.static_folder = self.static_folder
+        static_asset_index.poll_interval = 3600
+        static_asset_index.build()
+
+        self.teacher = User(username='prof', email='prof@test.com', role='teacher')
+        db.session.add(self.teacher)
+        db.session.commit()
+        self.state_path = os.path.join(self.root, 'instance', 'state.json')
+
+    def tearDown(self):
+        static_asset_index.static_folder, static_asset_index.poll_interval = self.previous
+        static_asset_index._paths = None
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def add_exercise(self, image_path=None, content=None, raw_content=None):
+        exercise = Exercise(title='Exercice', exercise_type='pairs', teacher_id=self.teacher.id,
+                            image_path=image_path,
+                            content=raw_content if raw_content is not None else json.dumps(content or {}))
+        db.session.add(exercise)
+        db.session.commit()
+        return exercise.id
+
+    def reload(self, exercise_id):
+        db.session.expire_all()
+        exercise = db.session.get(Exercise, exercise_id)
+        return exercise.image_path, json.loads(exercise.content)
+
+    def test_is_image_reference(self):
+        self.assertTrue(is_image_reference('/static/uploads/a.PNG?v=2'))
+        self.assertTrue(is_image_reference('chat.jpg'))
+        self.assertFalse(is_image_reference('https://res.cloudinary.com/a.png'))
+        self.assertFalse(is_image_reference('Le chat mange.'))
+        self.assertFalse(is_image_reference(3))
+
+    def test_rewrites_nested_references(self):
+        exercise_id = self.add_exercise(
+            image_path='static/uploads/static/uploads/qcm/chat.png',
+            content={
+                'image': '/static/old/chat.png',
+                'left_items': [{'type': 'image', 'content': '/static/uploads/lion.png?v=3'},
+                               {'type': 'text', 'content': 'lion'}],
+                'cards': [{'image': 'https://example.com/ours.png'}],
+            },
+        )
+        stats = ImagePathMigration(state_path=self.state_path).run()
+        self.assertEqual((stats['scanned'], stats['modified'], stats['errors']), (1, 1, 0))
+
+        image_path, content = self.reload(exercise_id)
+        self.assertEqual(image_path, '/static/exercises/general/chat.png')
+        self.assertEqual(content['image'], image_path)
+        self.assertEqual(content['left_items'][0]['content'], '/static/uploads/pairs/lion.png?v=3')
+        self.assertEqual(content['left_items'][1]['content'], 'lion')
+        self.assertEqual(content['cards'][0]['image'], 'https://example.com/ours.png')
+
+        # Idempotente : une seconde exécution ne modifie rien
+        stats = ImagePathMigration(state_path=self.state_path).run()
+        self.assertEqual((stats['modified'], stats['rewritten']), (0, 0))
+
+    def test_keeps_existing_accented_filename(self):
+        filename = 'Capture d’écran 2025-08-19 222549.png'
+        with open(os.path.join(self.static_folder, 'exercises', filename), 'wb') as f:
+            f.write(b'png')
+        static_asset_index.build()
+        original = '/static/exercises/' + filename
+        exercise_id = self.add_exercise(image_path=original, content={'image': original})
+
+        stats = ImagePathMigration(state_path=self.state_path).run()
+        self.assertEqual((stats['modified'], stats['errors']), (0, 0))
+        image_path, content = self.reload(exercise_id)
+        self.assertEqual(image_path, original)
+        self.assertEqual(content['image'], original)
+        self.assertTrue(static_asset_index.exists(image_path))
+
+    def test_synchronize_all_exercises_only_touches_main_image(self):
+        from utils.image_path_synchronizer import synchronize_all_exercises
+
+        exercise_id = self.add_exercise(
+            image_path='static/uploads/static/uploads/qcm/chat.png',
+            content={'image': '/static/old/chat.png',
+                     'left_items': [{'type': 'image', 'content': 'static/uploads/lion.png'}]},
+        )
+        stats = synchronize_all_exercises(db, Exercise)
+        self.assertEqual((stats['modified'], stats['errors']), (1, 0))
+
+        image_path, content = self.reload(exercise_id)
+        self.assertEqual(image_path, '/static/uploads/qcm/chat.png')
+        self.assertEqual(content['image'], image_path)
+        self.assertEqual(content['left_items'][0]['content'], 'static/uploads/lion.png')
+
+    def test_blob_rule_uses_alias_table(self):
+        db.session.add(ImagePathAlias(path='/static/uploads/qcm/legacy.png', sha256='ab' * 32, extension='.png'))
+        db.session.commit()
+        exercise_id = self.add_exercise(image_path='/static/uploads/qcm/legacy.png')
+        ImagePathMigration(rules=('normalize', 'resolve')).run()
+        self.assertEqual(self.reload(exercise_id)[0], '/static/uploads/qcm/legacy.png')
+
+        ImagePathMigration(rules=('blob',)).run()
+        self.assertEqual(self.reload(exercise_id)[0], f"/static/uploads/blobs/ab/{'ab' * 32}.png")
+
+    def test_dry_run_writes_a_diff_report(self):
+        exercise_id = self.add_exercise(image_path='uploads/qcm/chat.png')
+        report = io.StringIO()
+        migration = ImagePathMigration(dry_run=True, report=report, state_path=self.state_path)
+        stats = migration.run()
+
+        self.assertEqual(stats['modified'], 1)
+        self.assertEqual(self.reload(exercise_id)[0], 'uploads/qcm/chat.png')
+        self.assertFalse(os.path.exists(self.state_path))
+        lines = [json.loads(line) for line in report.getvalue().splitlines()]
+        self.assertEqual(lines[0], {'exercise_id': exercise_id, 'field': 'image_path',
+                                    'old': 'uploads/qcm/chat.png', 'new': '/static/exercises/general/chat.png'})
+        self.assertEqual(lines[1]['field'], 'content/image')
+
+    def test_keyset_batches_are_committed_separately(self):
+        ids = [self.add_exercise(image_path='chat.png') for _ in range(5)]
+        migration = ImagePathMigration(batch_size=2)
+        with patch.object(db.session, 'commit', wraps=db.session.commit) as commit:
+            stats = migration.run()
+        self.assertEqual((stats['batches'], stats['scanned'], stats['last_id']), (3, 5, ids[-1]))
+        self.assertEqual(commit.call_count, 3)
+
+    def test_interrupted_run_resumes(self):
+        ids = [self.add_exercise(image_path='chat.png') for _ in range(5)]
+        migration = ImagePathMigration(batch_size=2, state_path=self.state_path)
+        original = migration.run_batch
+        calls = []
+
+        def failing_batch(rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError('coupure')
+            return original(rows)
+
+        with patch.object(migration, 'run_batch', side_effect=failing_batch):
+            with self.assertRaises(RuntimeError):
+                migration.run()
+        self.assertEqual(self.reload(ids[2])[0], 'chat.png')
+
+        stats = ImagePathMigration(batch_size=2, state_path=self.state_path).run()
+        self.assertEqual(stats['resumed_from'], ids[1])
+        self.assertEqual((stats['scanned'], stats['modified']), (3, 3))
+        self.assertTrue(all(self.reload(i)[0] == '/static/exercises/general/chat.png' for i in ids))
+
+        # Exécution terminée : la suivante repart du début
+        self.assertEqual(ImagePathMigration(batch_size=2, state_path=self.state_path).run()['resumed_from'], 0)
+
+    def test_invalid_content_is_counted(self):
+        self.add_exercise(image_path='chat.png', raw_content='{pas du json')
+        stats = ImagePathMigration().run()
+        self.assertEqual((stats['errors'], stats['modified']), (1, 0))
+
+    def test_cli_dry_run(self):
+        self.add_exercise(image_path='chat.png')
+        result = self.app.test_cli_runner().invoke(args=['migrate-image-paths', '--dry-run'])
+        self.assertIn('chat.png -> /static/exercises/general/chat.png', result.output)
+        self.assertIn('1 exercices parcourus en 1 lots, 1 modifiés', result.output)
+        self.assertIn('(simulation)', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests du cache des résolutions d'URLs d'images (image_resolution_cache)
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+from static_asset_index import static_asset_index
+from image_resolution_cache import ImageResolutionCache, image_resolution_cache, cached_resolution
+from image_url_service import ImageUrlService
+from unified_image_service import UnifiedImageService
+from utils import image_path_handler
+import cloud_storage_no_cloudinary
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestImageResolutionCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ImageResolutionCache(max_entries=3, negative_ttl=10, clock=self.clock)
+        self.calls = []
+
+    def resolver(self, url):
+        def resolve():
+            self.calls.append(url)
+            return url
+        return resolve
+
+    def test_found_entries_are_kept(self):
+        with patch.object(static_asset_index, 'exists', return_value=True):
+            self.cache.get(('a',), self.resolver('/static/uploads/a.png'))
+            self.clock.now += 3600
+            self.assertEqual(self.cache.get(('a',), self.resolver('/static/uploads/a.png')), '/static/uploads/a.png')
+        self.assertEqual(self.calls, ['/static/uploads/a.png'])
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_missing_entries_expire(self):
+        with patch.object(static_asset_index, 'exists', return_value=False):
+            self.cache.get(('b',), self.resolver('/static/uploads/b.png'))
+            self.clock.now += 5
+            self.cache.get(('b',), self.resolver('/static/uploads/b.png'))
+            self.assertEqual(len(self.calls), 1)
+            self.assertEqual(self.cache.negative_hits, 1)
+            self.clock.now += 6
+            self.cache.get(('b',), self.resolver('/static/uploads/b.png'))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_fallback_result_is_negative(self):
+        with patch.object(static_asset_index, 'exists', return_value=True):
+            self.cache.get(('c',), self.resolver('/static/images/placeholder-image.png'),
+                           fallbacks=('/static/images/placeholder-image.png',))
+            self.clock.now += 11
+            self.cache.get(('c',), self.resolver('/static/images/placeholder-image.png'),
+                           fallbacks=('/static/images/placeholder-image.png',))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_lru_is_bounded(self):
+        with patch.object(static_asset_index, 'exists', return_value=True):
+            for name in 'abcd':
+                self.cache.get((name,), self.resolver(f'/static/{name}.png'))
+            self.assertEqual(len(self.cache), 3)
+            self.cache.get(('a',), self.resolver('/static/a.png'))
+        self.assertEqual(self.calls.count('/static/a.png'), 2)
+
+    def test_unhashable_arguments_bypass_cache(self):
+        @cached_resolution('test')
+        def resolve(path):
+            self.calls.append(path)
+            return None
+
+        resolve(['liste'])
+        resolve(['liste'])
+        self.assertEqual(len(self.calls), 2)
+
+
+class TestSharedResolutionCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static_folder = os.path.join(self.root, 'static')
+        os.makedirs(os.path.join(self.static_folder, 'uploads'))
+        with open(os.path.join(self.static_folder, 'uploads', 'chat.png'), 'wb') as f:
+            f.write(b'image')
+        self.app = Flask(__name__, root_path=self.root)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.previous = (static_asset_index.static_folder, static_asset_index.poll_interval)
+        static_asset_index.static_folder = self.static_folder
+        static_asset_index.poll_interval = 3600
+        static_asset_index.build()
+        image_resolution_cache.clear()
+
+    def tearDown(self):
+        image_resolution_cache.clear()
+        static_asset_index.static_folder, static_asset_index.poll_interval = self.previous
+        static_asset_index._paths = None
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def test_resolvers_share_one_cache(self):
+        ImageUrlService.get_image_url('/static/uploads/chat.png')
+        UnifiedImageService.get_image_url('/static/uploads/chat.png')
+        image_path_handler.get_image_url('/static/uploads/chat.png')
+        self.assertEqual(len(image_resolution_cache), 3)
+
+        with patch.object(ImageUrlService, 'clean_duplicate_paths', side_effect=AssertionError('recalcul')):
+            self.assertEqual(ImageUrlService.get_image_url('/static/uploads/chat.png'), '/static/uploads/chat.png')
+        self.assertEqual(image_resolution_cache.hits, 1)
+
+    def test_upload_invalidates_cache(self):
+        self.assertEqual(ImageUrlService.get_image_url('/static/uploads/renard.png'), '/static/uploads/renard.png')
+        self.assertEqual(image_resolution_cache.stats()['entries'], 1)
+
+        upload = FileStorage(stream=io.BytesIO(PNG_HEADER + b'renard'), filename='renard.png', content_type='image/png')
+        web_path = cloud_storage_no_cloudinary.upload_file(upload)
+        self.assertTrue(web_path.startswith('/static/uploads/blobs/'))
+        self.assertEqual(len(image_resolution_cache), 0)
+        self.assertEqual(ImageUrlService.get_image_url(web_path), web_path)
+
+    def test_index_rebuild_invalidates_cache(self):
+        ImageUrlService.get_image_url('/static/uploads/chat.png')
+        static_asset_index.build()
+        ImageUrlService.get_image_url('/static/uploads/chat.png')
+        self.assertEqual(image_resolution_cache.misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
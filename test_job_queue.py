@@ -0,0 +1,190 @@
+"""
+Tests de la file de tâches d'arrière-plan (job_queue / job_routes)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from flask import Flask, g
+
+from extensions import db, login_manager
+from models import User, Class, Course, Exercise, ExerciseAttempt, BackgroundJob
+from job_queue import JobQueue, register_job
+from job_routes import jobs_bp
+
+
+def create_test_app(database_uri, artifact_folder, synchronous=True):
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SECRET_KEY'] = 'test'
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JOB_ARTIFACT_FOLDER'] = artifact_folder
+    app.config['JOB_QUEUE_SYNC'] = synchronous
+    db.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(jobs_bp)
+    queue = JobQueue(app)
+    return app, queue
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+
+@register_job('test_failure')
+def failing_job(params, queue):
+    raise RuntimeError('échec volontaire')
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.app, self.queue = create_test_app(
+            'sqlite:///' + os.path.join(self.tmpdir, 'jobs.db'),
+            os.path.join(self.tmpdir, 'artifacts')
+        )
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def create_test_data(self):
+        teacher = User(username='teacher', email='teacher@test.com', name='M. Test', role='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        class_obj = Class(name='Classe A', teacher_id=teacher.id, access_code='ABC123')
+        course = Course(title='Cours', class_obj=class_obj)
+        exercise = Exercise(title='Ex', exercise_type='qcm', teacher_id=teacher.id)
+        course.exercises.append(exercise)
+        student = User(username='student', email='student@test.com', role='student')
+        class_obj.students.append(student)
+        db.session.add_all([class_obj, course])
+        db.session.commit()
+        self.teacher_id = teacher.id
+        self.class_id = class_obj.id
+        self.student_id = student.id
+        self.exercise_id = exercise.id
+
+    def login(self, client, user_id):
+        # Le contexte d'application est partagé : oublier l'utilisateur mis en cache
+        g.pop('_login_user', None)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+    def test_export_job_is_cached_until_class_changes(self):
+        client = self.app.test_client()
+        self.login(client, self.teacher_id)
+
+        response = client.post(f'/teacher/export/excel/{self.class_id}/job')
+        self.assertEqual(response.status_code, 202)
+        first = response.get_json()
+        self.assertEqual(first['status'], 'done')
+        self.assertIn('download_url', first)
+
+        download = client.get(first['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(download.data.startswith(b'PK'))
+        download.close()
+
+        # Classe inchangée : même tâche, même artefact
+        second = client.post(f'/teacher/export/excel/{self.class_id}/job').get_json()
+        self.assertEqual(first['id'], second['id'])
+
+        # Nouvelle tentative : l'empreinte change, une nouvelle tâche est créée
+        db.session.add(ExerciseAttempt(student_id=self.student_id, exercise_id=self.exercise_id, score=80))
+        db.session.commit()
+        third = client.post(f'/teacher/export/excel/{self.class_id}/job').get_json()
+        self.assertNotEqual(first['id'], third['id'])
+
+        status = client.get(third['status_url']).get_json()
+        self.assertEqual(status['status'], 'done')
+
+    def test_jobs_are_private(self):
+        client = self.app.test_client()
+        self.login(client, self.teacher_id)
+        job_id = client.post(f'/teacher/export/pdf/{self.class_id}/job').get_json()['id']
+
+        self.login(client, self.student_id)
+        self.assertEqual(client.get(f'/jobs/{job_id}').status_code, 404)
+        self.assertEqual(client.post(f'/teacher/export/pdf/{self.class_id}/job').status_code, 403)
+
+    def test_failed_job_records_error(self):
+        job = self.queue.enqueue('test_failure')
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('échec volontaire', job.error)
+
+    def test_unknown_job_type(self):
+        with self.assertRaises(ValueError):
+            self.queue.enqueue('does_not_exist')
+
+    def test_statistics_rollup(self):
+        job = self.queue.enqueue('statistics_rollup', params={'teacher_id': self.teacher_id})
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.get_result()[0]['students'], 1)
+
+    def test_background_execution(self):
+        self.queue.synchronous = False
+        job = self.queue.enqueue('class_export_pdf', params={
+            'class_id': self.class_id, 'fingerprint': 'abc', 'teacher_name': 'M. Test'
+        })
+        job_id = job.id
+        self.queue._get_executor().shutdown(wait=True)
+
+        db.session.expire_all()
+        job = db.session.get(BackgroundJob, job_id)
+        self.assertEqual(job.status, 'done')
+        self.assertTrue(os.path.exists(job.artifact_path))
+
+        # purge supprime les tâches terminées et leurs artefacts
+        self.assertEqual(self.queue.purge(older_than=timedelta(seconds=-1)), 1)
+        self.assertFalse(os.path.exists(job.artifact_path))
+
+    def add_job(self, status, created_at, started_at=None):
+        job = BackgroundJob(id=f'{status}-{created_at:%H%M%S%f}', job_type='statistics_rollup',
+                            params='{"teacher_id": %d}' % self.teacher_id, status=status,
+                            cache_key='rollup', created_at=created_at, started_at=started_at)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+    def test_stale_active_job_is_not_reused(self):
+        now = datetime.utcnow()
+        self.add_job('running', now - timedelta(hours=3), started_at=now - timedelta(hours=2))
+        self.assertIsNone(self.queue.find_reusable('statistics_rollup', 'rollup'))
+
+        recent_id = self.add_job('pending', now)
+        self.assertEqual(self.queue.find_reusable('statistics_rollup', 'rollup').id, recent_id)
+
+    def test_requeue_and_purge_commands(self):
+        now = datetime.utcnow()
+        pending_id = self.add_job('pending', now - timedelta(minutes=1))
+        stale_id = self.add_job('running', now - timedelta(hours=3), started_at=now - timedelta(hours=2))
+        running_id = self.add_job('running', now - timedelta(minutes=2), started_at=now - timedelta(minutes=1))
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['jobs-requeue'])
+        self.assertIn('2 tâches relancées', result.output)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(BackgroundJob, pending_id).status, 'done')
+        self.assertEqual(db.session.get(BackgroundJob, stale_id).status, 'done')
+        self.assertEqual(db.session.get(BackgroundJob, running_id).status, 'running')
+
+        result = runner.invoke(args=['jobs-purge', '--days', '-1'])
+        self.assertIn('2 tâches supprimées', result.output)
+        self.assertEqual(BackgroundJob.query.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Tests des profils de chargement (loading_profiles)
+
+Chaque test appelle la vraie page avec le client de test (vue et template)
+et vérifie, avec le nombre de requêtes SQL mesuré par request_metrics, qu'il
+est borné et indépendant de la taille de la classe.
+"""
+
+import importlib
+import json
+import os
+import unittest
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from flask import g
+from sqlalchemy import event
+
+from extensions import db
+from models import User, Class, Course, Exercise, ExerciseAttempt, CourseFile
+from loading_profiles import LOADING_PROFILES, class_page_query
+from progress_service import get_course_stats_grid
+from request_metrics import request_metrics
+
+
+def load_app():
+    """Application complète (routes de app.py), en configuration de test"""
+    with patch.dict(os.environ, {'FLASK_CONFIG': 'testing'}):
+        return importlib.import_module('app').app
+
+
+@contextmanager
+def count_selects():
+    """Garde de requêtes : compte les SELECT émis dans le bloc"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+class TestLoadingProfiles(unittest.TestCase):
+    # Nombre maximal de requêtes SQL par page (chargement de l'utilisateur connecté
+    # compris), quelle que soit la taille de la classe
+    MAX_QUERIES = {
+        'view_course': 7,
+        'view_class': 7,
+        'teacher_dashboard': 3,
+        'exercise_stats': 7,
+    }
+
+    def setUp(self):
+        self.app = load_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_class(self, name, student_count, course_count=2, exercise_count=3):
+        """Classe avec ses élèves, ses cours (exercices, fichiers) et une tentative par élève et exercice"""
+        teacher = User(username=f'prof_{name}', email=f'prof_{name}@test.com', role='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        class_obj = Class(name=name, teacher_id=teacher.id, access_code=name[:6])
+        students = [User(username=f'{name}_eleve{i}', email=f'{name}_eleve{i}@test.com', role='student')
+                    for i in range(student_count)]
+        class_obj.students.extend(students)
+        for c in range(course_count):
+            course = Course(title=f'Cours {c}', class_obj=class_obj)
+            course.exercises.extend(
+                Exercise(title=f'Ex {c}.{e}', exercise_type='qcm', teacher_id=teacher.id, content=json.dumps({}))
+                for e in range(exercise_count)
+            )
+            course.course_files.append(CourseFile(filename=f'f{c}.pdf', original_filename=f'f{c}.pdf'))
+            db.session.add(course)
+        db.session.add(class_obj)
+        db.session.flush()
+        for course in class_obj.courses:
+            for exercise in course.exercises:
+                for i, student in enumerate(students):
+                    db.session.add(ExerciseAttempt(student_id=student.id, exercise_id=exercise.id,
+                                                   course_id=course.id, score=(i * 37) % 101))
+        db.session.commit()
+        ids = {
+            'teacher_id': teacher.id,
+            'class_id': class_obj.id,
+            'course_id': class_obj.courses[0].id,
+            'exercise_id': class_obj.courses[0].exercises[0].id,
+        }
+        # Repartir d'une session vide, comme au début d'une requête
+        db.session.expunge_all()
+        return ids
+
+    def login(self, client, user_id):
+        # Le contexte d'application est partagé : oublier l'utilisateur mis en cache
+        g.pop('_login_user', None)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+    def request_queries(self, ids, endpoint, url):
+        """Nombre de requêtes SQL de la vue, mesuré par request_metrics (RequestTimer.queries)"""
+        client = self.app.test_client()
+        self.login(client, ids['teacher_id'])
+        request_metrics.reset()
+        response = client.get(url.format(**ids))
+        self.assertEqual(response.status_code, 200)
+        db.session.expunge_all()
+        return request_metrics.aggregate()[endpoint].summary()['queries_max']
+
+    def assert_bounded(self, page, endpoint, url):
+        small = self.create_class('petite', student_count=3, course_count=1, exercise_count=2)
+        large = self.create_class('grande', student_count=40, course_count=4, exercise_count=6)
+
+        small_queries = self.request_queries(small, endpoint, url)
+        large_queries = self.request_queries(large, endpoint, url)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, self.MAX_QUERIES[page])
+
+    def test_profiles_are_registered(self):
+        for name in ('view_course', 'view_class', 'teacher_dashboard', 'exercise_stats', 'exercise_stats_course'):
+            self.assertIn(name, LOADING_PROFILES)
+
+    def test_view_course_is_bounded(self):
+        self.assert_bounded('view_course', 'view_course', '/course/{course_id}')
+
+    def test_view_class_is_bounded(self):
+        self.assert_bounded('view_class', 'view_class', '/class/{class_id}/view')
+
+    def test_teacher_dashboard_is_bounded(self):
+        self.assert_bounded('teacher_dashboard', 'teacher_dashboard', '/teacher_dashboard')
+
+    def test_exercise_stats_is_bounded(self):
+        self.assert_bounded('exercise_stats', 'exercise.exercise_stats',
+                            '/exercise/stats/{exercise_id}?course_id={course_id}')
+
+    def test_lazy_loading_is_detected(self):
+        # Sans profil, la même page grandit avec le nombre de cours
+        small = self.create_class('petite', student_count=3, course_count=1)
+        large = self.create_class('grande', student_count=3, course_count=5)
+
+        def walk(ids):
+            class_obj = db.session.get(Class, ids['class_id'])
+            return [(course.title, len(course.exercises)) for course in class_obj.courses]
+
+        with count_selects() as small_selects:
+            walk(small)
+        with count_selects() as large_selects:
+            walk(large)
+        self.assertGreater(len(large_selects), len(small_selects))
+
+    def test_course_stats_grid_matches_course_stats(self):
+        ids = self.create_class('classe', student_count=5, course_count=2, exercise_count=3)
+        class_obj = class_page_query().filter_by(id=ids['class_id']).first()
+        grid = get_course_stats_grid(class_obj.courses, [student.id for student in class_obj.students])
+        for course in class_obj.courses:
+            for student in class_obj.students:
+                expected = course.get_student_stats(student.id)
+                stats = grid[(student.id, course.id)]
+                for key in ('exercises_attempted', 'exercises_completed', 'average_score'):
+                    self.assertAlmostEqual(stats[key], expected[key])
+                self.assertEqual(stats['total_exercises'], len(course.exercises))
+
+
+if __name__ == '__main__':
+    unittest.main()
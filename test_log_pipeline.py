@@ -0,0 +1,172 @@
+"""
+Tests de la journalisation asynchrone par catégories (log_pipeline)
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+import log_pipeline
+from log_pipeline import (
+    SamplingFilter, category_log, configure_logging, parse_category_levels, shutdown_logging,
+)
+
+
+def create_test_app(**config):
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config.update(config)
+    log_pipeline.init_app(app)
+
+    @app.route('/submit', methods=['POST'])
+    def submit():
+        return 'ok'
+
+    return app
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.add(threading.current_thread().name)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLogPipeline(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.previous_level = logging.getLogger().level
+        self.handler = RecordingHandler()
+        logging.getLogger(log_pipeline.CATEGORY_PREFIX).addHandler(self.handler)
+
+    def tearDown(self):
+        logging.getLogger(log_pipeline.CATEGORY_PREFIX).removeHandler(self.handler)
+        shutdown_logging()
+        logging.getLogger().setLevel(self.previous_level)
+        category_log.configure(levels={}, debug_level=log_pipeline.DEFAULT_DEBUG_CATEGORY_LEVEL,
+                               sampling=(log_pipeline.DEFAULT_SAMPLING_RATE, log_pipeline.DEFAULT_SAMPLING_BURST))
+        shutil.rmtree(self.root)
+
+    def messages(self):
+        return [record.getMessage() for record in self.handler.records]
+
+    def test_records_are_written_by_the_listener_thread(self):
+        log_file = os.path.join(self.root, 'app.log')
+        listener = configure_logging('INFO', log_file=log_file, stream=False)
+        writer = RecordingHandler()
+        listener.handlers = listener.handlers + (writer,)
+
+        logging.getLogger('test_log_pipeline').info('Exercice %s soumis', 42)
+        logging.getLogger('test_log_pipeline').debug('ignoré')
+        shutdown_logging()
+
+        with open(log_file, encoding='utf-8') as f:
+            content = f.read()
+        self.assertIn('test_log_pipeline - INFO - Exercice 42 soumis', content)
+        self.assertNotIn('ignoré', content)
+        self.assertNotIn(threading.current_thread().name, writer.threads)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'fork indisponible')
+    def test_listener_is_restarted_in_forked_worker(self):
+        log_file = os.path.join(self.root, 'app.log')
+        configure_logging('INFO', log_file=log_file, stream=False)
+        pid = os.fork()
+        if pid == 0:
+            logging.getLogger('test_log_pipeline').info('Worker %s', 'forké')
+            shutdown_logging()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        shutdown_logging()
+        with open(log_file, encoding='utf-8') as f:
+            self.assertIn('Worker forké', f.read())
+
+    def test_debug_categories_are_silent_by_default(self):
+        create_test_app()
+        category_log.SUBMIT_DEBUG.info('Exercice %s', 1)
+        category_log.IMAGE_SYNC.warning('Synchronisation %s', 'échouée')
+        self.assertEqual(self.messages(), ['Synchronisation échouée'])
+        self.assertEqual(category_log.SUBMIT_DEBUG.name, 'category.SUBMIT_DEBUG')
+
+    def test_message_arguments_are_not_formatted_when_disabled(self):
+        create_test_app()
+        argument = MagicMock()
+        category_log.SUBMIT_DEBUG.debug('Formulaire : %s', argument)
+        argument.__str__.assert_not_called()
+
+    def test_category_levels_from_config_and_environment(self):
+        with patch.dict(os.environ, {'LOG_CATEGORIES': 'word_search_debug=DEBUG, IMAGE_SYNC=ERROR'}):
+            create_test_app(LOG_CATEGORY_LEVELS={'SUBMIT_DEBUG': 'INFO'})
+        category_log.SUBMIT_DEBUG.info('soumission')
+        category_log.SUBMIT_DEBUG.debug('détail')
+        category_log.WORD_SEARCH_DEBUG.debug('grille')
+        category_log.IMAGE_SYNC.warning('ignoré')
+        self.assertEqual(self.messages(), ['soumission', 'grille'])
+        self.assertEqual(parse_category_levels('A=debug,,B='), {'A': 'DEBUG'})
+
+    def test_sampling_filter(self):
+        clock = FakeClock()
+        sampling = SamplingFilter(rate=2, burst=3, clock=clock)
+        logger = logging.getLogger('category.SAMPLING_TEST')
+        logger.setLevel(logging.DEBUG)
+        logger.addFilter(sampling)
+        try:
+            for i in range(10):
+                logger.debug('trace %d', i)
+            logger.error('erreur')
+            clock.now = 1.0
+            for i in range(10, 15):
+                logger.debug('trace %d', i)
+        finally:
+            logger.removeFilter(sampling)
+        self.assertEqual(self.messages(), ['trace 0', 'trace 1', 'trace 2', 'erreur',
+                                           'trace 10 [7 messages omis]', 'trace 11'])
+
+    def test_debug_categories_are_sampled_when_enabled(self):
+        create_test_app(LOG_CATEGORY_LEVELS={'EDIT_DEBUG': 'DEBUG'}, LOG_SAMPLING_BURST=5)
+        for i in range(100):
+            category_log.EDIT_DEBUG.debug('champ %d', i)
+        self.assertLess(len(self.handler.records), 10)
+
+    def test_requests_are_not_logged_by_default(self):
+        app = create_test_app()
+        app.test_client().post('/submit', data={'answer': 'secret'})
+        self.assertEqual(self.handler.records, [])
+
+    def test_request_body_is_opt_in(self):
+        app = create_test_app(LOG_REQUESTS=True, LOG_REQUEST_HEADERS=True)
+        client = app.test_client()
+        client.set_cookie('session', 'abc')
+        client.post('/submit?x=1', data={'answer': 'secret'})
+        messages = self.messages()
+        self.assertEqual(messages[0], 'POST /submit?x=1')
+        self.assertIn("'Cookie': '***'", messages[1])
+        self.assertFalse(any('secret' in message for message in messages))
+
+        app = create_test_app(LOG_REQUESTS=True, LOG_REQUEST_BODY=True, LOG_REQUEST_BODY_LIMIT=20)
+        self.handler.records.clear()
+        app.test_client().post('/submit', data={'answer': 'secret'})
+        app.test_client().post('/submit', data={'answer': 'x' * 30})
+        self.assertEqual(self.messages(), ['POST /submit', "Corps : b'answer=secret'",
+                                           'POST /submit', 'Corps : 37 octets (non journalisé)'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Tests de la table de progression (student_exercise_progress / progress_service)
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event
+
+from extensions import db
+from models import User, Class, Course, Exercise, ExerciseAttempt, StudentExerciseProgress
+from progress_service import get_progress_grid, backfill_progress, get_exercise_student_ids
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+class TestProgressService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        teacher = User(username='teacher', email='teacher@test.com', role='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        class_obj = Class(name='Classe A', teacher_id=teacher.id, access_code='ABC123')
+        course = Course(title='Cours', class_obj=class_obj)
+        self.exercises = [
+            Exercise(title=f'Ex {i}', exercise_type='qcm', teacher_id=teacher.id, max_attempts=3)
+            for i in range(3)
+        ]
+        course.exercises.extend(self.exercises)
+        self.students = [User(username=f'eleve{i}', email=f'eleve{i}@test.com', role='student') for i in range(4)]
+        class_obj.students.extend(self.students)
+        db.session.add_all([class_obj, course])
+        db.session.commit()
+        self.course_id = course.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_attempt(self, student, exercise, score, course_id=None, minutes=0):
+        db.session.add(ExerciseAttempt(
+            student_id=student.id, exercise_id=exercise.id, course_id=course_id, score=score,
+            created_at=datetime(2026, 1, 1) + timedelta(minutes=minutes)
+        ))
+        db.session.commit()
+
+    def progress_rows(self):
+        return sorted((
+            (row.student_id, row.exercise_id, row.course_id, row.attempts_count,
+             row.best_score, row.last_score, row.last_attempt_at, row.status)
+            for row in StudentExerciseProgress.query.all()
+        ), key=lambda row: (row[0], row[1], row[2] or 0))
+
+    def test_progress_is_updated_on_each_attempt(self):
+        student, exercise = self.students[0], self.exercises[0]
+        self.add_attempt(student, exercise, 40, self.course_id, minutes=1)
+        self.add_attempt(student, exercise, 90, self.course_id, minutes=2)
+        self.add_attempt(student, exercise, 60, self.course_id, minutes=3)
+
+        row = StudentExerciseProgress.query.one()
+        self.assertEqual(row.attempts_count, 3)
+        self.assertEqual(row.best_score, 90)
+        self.assertEqual(row.last_score, 60)
+        self.assertEqual(row.last_attempt_at, datetime(2026, 1, 1, 0, 3))
+        self.assertEqual(row.status, 'completed')
+
+        progress = exercise.get_student_progress(student.id)
+        self.assertEqual(progress['attempts_count'], 3)
+        self.assertEqual(progress['remaining_attempts'], 0)
+        self.assertEqual(progress['last_attempt'].score, 60)
+
+    def test_progress_follows_attempt_transaction(self):
+        db.session.add(ExerciseAttempt(student_id=self.students[0].id, exercise_id=self.exercises[0].id, score=50))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(StudentExerciseProgress.query.count(), 0)
+
+    def test_progress_without_attempts(self):
+        progress = self.exercises[0].get_student_progress(self.students[0].id)
+        self.assertEqual(progress['attempts_count'], 0)
+        self.assertEqual(progress['remaining_attempts'], 3)
+        self.assertEqual(progress['status'], 'not_started')
+
+    def test_progress_is_summed_across_courses(self):
+        student, exercise = self.students[1], self.exercises[1]
+        self.add_attempt(student, exercise, 30, self.course_id, minutes=1)
+        self.add_attempt(student, exercise, 50, None, minutes=2)
+
+        progress = exercise.get_student_progress(student.id)
+        self.assertEqual(progress['attempts_count'], 2)
+        self.assertEqual(progress['best_score'], 50)
+        self.assertEqual(progress['status'], 'in_progress')
+        self.assertEqual(get_exercise_student_ids(exercise.id), [student.id])
+
+    def test_backfill_matches_incremental_updates(self):
+        for minutes, (student, exercise, score) in enumerate([
+            (self.students[0], self.exercises[0], 20),
+            (self.students[0], self.exercises[0], 80),
+            (self.students[1], self.exercises[0], None),
+            (self.students[1], self.exercises[2], 0),
+            (self.students[2], self.exercises[1], 65),
+        ]):
+            self.add_attempt(student, exercise, score, self.course_id, minutes=minutes)
+        self.add_attempt(self.students[2], self.exercises[1], 75, None, minutes=10)
+
+        incremental = self.progress_rows()
+        self.assertEqual(backfill_progress(), len(incremental))
+        self.assertEqual(self.progress_rows(), incremental)
+
+        backfill_progress([self.exercises[0].id])
+        self.assertEqual(self.progress_rows(), incremental)
+
+    def test_grid_is_read_in_one_query(self):
+        self.add_attempt(self.students[0], self.exercises[0], 100, self.course_id)
+        self.add_attempt(self.students[3], self.exercises[2], 10, self.course_id)
+
+        student_ids = [student.id for student in self.students]
+        for exercise in self.exercises:
+            db.session.refresh(exercise)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            grid = get_progress_grid(self.exercises, student_ids)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(len(grid), 12)
+        self.assertEqual(grid[(self.students[0].id, self.exercises[0].id)]['status'], 'completed')
+        self.assertEqual(grid[(self.students[3].id, self.exercises[2].id)]['best_score'], 10)
+        self.assertEqual(grid[(self.students[1].id, self.exercises[1].id)]['attempts_count'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
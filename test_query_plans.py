@@ -0,0 +1,164 @@
+"""
+Tests des plans d'exécution des requêtes fréquentes
+
+Chaque requête chaude est passée à EXPLAIN : le test échoue si l'une d'elles
+retombe sur un parcours complet de table (index supprimé ou requête modifiée).
+Les plans SQLite sont toujours vérifiés ; les plans PostgreSQL le sont si
+TEST_POSTGRES_URL pointe vers une base de test jetable.
+"""
+
+import json
+import os
+import re
+import unittest
+
+from flask import Flask
+from sqlalchemy import func, text
+
+from extensions import db
+from models import User, ExerciseAttempt, StudentExerciseProgress, course_exercise, student_class_association
+
+
+def create_test_app(database_uri='sqlite:///:memory:'):
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def hot_queries():
+    """Requêtes fréquentes de l'application : {nom: (requête, ordre attendu sans tri)}"""
+    attempt = ExerciseAttempt
+    return {
+        # Tentatives d'un étudiant sur un exercice (Exercise.get_student_progress, pages d'exercice)
+        'attempts_by_exercise_student': (
+            db.select(attempt.id, attempt.score).where(attempt.exercise_id == 1, attempt.student_id == 2),
+            False
+        ),
+        # Tentatives d'un étudiant sur les exercices d'un cours
+        'attempts_by_student_exercises': (
+            db.select(attempt.id, attempt.score).where(attempt.student_id == 2, attempt.exercise_id.in_([1, 3, 5])),
+            False
+        ),
+        # Tentatives d'un étudiant dans un cours
+        'attempts_by_course_student': (
+            db.select(attempt.id, attempt.score).where(attempt.course_id == 4, attempt.student_id == 2),
+            False
+        ),
+        # Historique d'un exercice, du plus récent au plus ancien (statistiques)
+        'attempts_by_exercise_recent': (
+            db.select(attempt.id, attempt.score).where(attempt.exercise_id == 1).order_by(attempt.created_at.desc()),
+            True
+        ),
+        # Cours contenant un exercice
+        'courses_by_exercise': (
+            db.select(course_exercise.c.course_id).where(course_exercise.c.exercise_id == 1),
+            False
+        ),
+        # Élèves d'une classe
+        'students_by_class': (
+            db.select(student_class_association.c.student_id).where(student_class_association.c.class_id == 7),
+            False
+        ),
+        # Écoles ayant un abonnement approuvé (sélection de l'école au paiement)
+        'approved_schools': (
+            db.select(User.school_name, func.count(User.id)).where(
+                User.subscription_status == 'approved',
+                User.subscription_type == 'school',
+                User.school_name.isnot(None)
+            ).group_by(User.school_name),
+            True
+        ),
+        # Grille de progression classe × exercices
+        'progress_grid': (
+            db.select(StudentExerciseProgress.id).where(
+                StudentExerciseProgress.exercise_id.in_([1, 3]),
+                StudentExerciseProgress.student_id.in_([2, 4])
+            ),
+            False
+        ),
+    }
+
+
+def render(statement):
+    """Requête SQL littérale pour le dialecte de la base courante"""
+    return str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+class TestSQLiteQueryPlans(unittest.TestCase):
+    FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def plan(self, statement):
+        rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + render(statement))).fetchall()
+        return [row[-1] for row in rows]
+
+    def test_hot_queries_use_indexes(self):
+        for name, (statement, ordered) in hot_queries().items():
+            with self.subTest(query=name):
+                plan = self.plan(statement)
+                scans = [detail for detail in plan if self.FULL_SCAN.match(detail)]
+                self.assertEqual(scans, [], f"{name} : parcours complet {plan}")
+                if ordered:
+                    sorts = [detail for detail in plan if 'TEMP B-TREE' in detail]
+                    self.assertEqual(sorts, [], f"{name} : tri sans index {plan}")
+
+    def test_regression_is_detected(self):
+        # Sans index sur exercise_id, la même vérification doit échouer
+        for index in ('ix_exercise_attempt_exercise_student', 'ix_exercise_attempt_exercise_created'):
+            db.session.execute(text(f'DROP INDEX {index}'))
+        statement, _ = hot_queries()['attempts_by_exercise_recent']
+        plan = self.plan(statement)
+        self.assertTrue(any(self.FULL_SCAN.match(detail) for detail in plan), plan)
+
+
+@unittest.skipUnless(os.environ.get('TEST_POSTGRES_URL'), 'TEST_POSTGRES_URL non défini')
+class TestPostgresQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app(os.environ['TEST_POSTGRES_URL'])
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def plan_nodes(self, statement):
+        # Tables vides : on interdit le parcours séquentiel pour voir si un index est utilisable
+        db.session.execute(text('SET enable_seqscan = off'))
+        (plan,), = db.session.execute(text('EXPLAIN (FORMAT JSON) ' + render(statement))).fetchall()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes, pending = [], [plan[0]['Plan']]
+        while pending:
+            node = pending.pop()
+            nodes.append(node)
+            pending.extend(node.get('Plans', []))
+        return nodes
+
+    def test_hot_queries_use_indexes(self):
+        for name, (statement, ordered) in hot_queries().items():
+            with self.subTest(query=name):
+                nodes = self.plan_nodes(statement)
+                scans = [node.get('Relation Name') for node in nodes if node['Node Type'] == 'Seq Scan']
+                self.assertEqual(scans, [], f"{name} : parcours séquentiel")
+                if ordered:
+                    self.assertNotIn('Sort', [node['Node Type'] for node in nodes], f"{name} : tri sans index")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Tests des mesures de performance par route (request_metrics)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask, g, render_template_string
+
+from extensions import db, login_manager
+from models import User, Exercise
+from request_metrics import Histogram, RequestMetrics, build_report, load_exports, merge_snapshots
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def create_test_app(root, clock=None):
+    app = Flask(__name__, root_path=os.path.dirname(os.path.abspath(__file__)),
+                instance_path=os.path.join(root, 'instance'))
+    app.config['TESTING'] = True
+    app.config['SECRET_KEY'] = 'test'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['REQUEST_METRICS_SLOW_MS'] = 0
+    db.init_app(app)
+    login_manager.init_app(app)
+    metrics = RequestMetrics(clock=clock or FakeClock())
+    metrics.init_app(app)
+
+    @app.route('/exercises')
+    def exercises():
+        count = Exercise.query.count()
+        Exercise.query.all()
+        return render_template_string('{% for i in range(n) %}<p>{{ i }}</p>{% endfor %}', n=count + 3)
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    return app, metrics
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_and_merge(self):
+        histogram = Histogram((10, 100, 1000))
+        for value in [1, 2, 3, 4, 5, 6, 7, 8, 50, 5000]:
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 10)
+        self.assertEqual(histogram.percentile(90), 100)
+        self.assertEqual(histogram.percentile(100), 5000)
+
+        other = Histogram.from_dict(histogram.to_dict())
+        other.merge(histogram)
+        self.assertEqual(other.count, 20)
+        self.assertEqual(other.max, 5000)
+        self.assertAlmostEqual(other.mean(), histogram.mean())
+
+
+class TestRequestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.app, self.metrics = create_test_app(self.root, self.clock)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        teacher = User(username='prof', email='prof@test.com', role='teacher')
+        admin = User(username='admin', email='admin@test.com', role='admin')
+        db.session.add_all([teacher, admin])
+        db.session.flush()
+        db.session.add(Exercise(title='Ex', exercise_type='qcm', teacher_id=teacher.id))
+        db.session.commit()
+        self.teacher_id, self.admin_id = teacher.id, admin.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def login(self, client, user_id):
+        g.pop('_login_user', None)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+    def test_records_per_endpoint(self):
+        client = self.app.test_client()
+        for _ in range(3):
+            client.get('/exercises')
+        client.get('/ping')
+
+        routes = self.metrics.aggregate()
+        exercises = routes['exercises'].summary()
+        self.assertEqual(exercises['requests'], 3)
+        self.assertEqual(exercises['queries_mean'], 2)
+        self.assertGreater(exercises['db_mean_ms'], 0)
+        self.assertGreater(exercises['template_mean_ms'], 0)
+        self.assertEqual(exercises['bytes_mean'], len(''.join(f'<p>{i}</p>' for i in range(4))))
+        self.assertEqual(routes['ping'].summary()['queries_mean'], 0)
+        self.assertEqual(len(self.metrics.slow), 4)
+
+    def test_ring_recycles_old_slots(self):
+        self.metrics.record('ancienne', 10)
+        self.clock.now += 30 * 60
+        self.metrics.record('recente', 10)
+        self.assertEqual(set(self.metrics.aggregate()), {'ancienne', 'recente'})
+        self.assertEqual(set(self.metrics.aggregate(window=600)), {'recente'})
+
+        self.clock.now += 60 * 60
+        self.metrics.record('actuelle', 10)
+        self.assertEqual(set(self.metrics.aggregate()), {'actuelle'})
+
+    def test_admin_views(self):
+        client = self.app.test_client()
+        client.get('/exercises')
+        self.assertEqual(client.get('/admin/metrics.json').status_code, 403)
+        self.login(client, self.teacher_id)
+        self.assertEqual(client.get('/admin/metrics.json').status_code, 403)
+
+        self.login(client, self.admin_id)
+        report = client.get('/admin/metrics.json?sort=queries_mean').get_json()
+        self.assertEqual(report['routes'][0]['endpoint'], 'exercises')
+        self.assertEqual(report['window'], 3600)
+        page = client.get('/admin/metrics')
+        self.assertEqual(page.status_code, 200)
+        self.assertIn('<code>exercises</code>', page.get_data(as_text=True))
+
+    def test_export_and_cli_merge_workers(self):
+        client = self.app.test_client()
+        client.get('/exercises')
+        self.login(client, self.admin_id)
+        path = client.post('/admin/metrics/export').get_json()['path']
+        self.assertEqual(os.path.basename(path), f'{os.getpid()}.json')
+
+        # Export d'un second worker
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        snapshot['pid'] = 1
+        with open(os.path.join(os.path.dirname(path), '1.json'), 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+
+        report = build_report(merge_snapshots(load_exports(os.path.dirname(path))))
+        exercises = next(item for item in report['routes'] if item['endpoint'] == 'exercises')
+        self.assertEqual(exercises['requests'], 2)
+
+        result = self.app.test_cli_runner().invoke(args=['request-metrics', '--sort', 'requests'])
+        self.assertIn('2 export(s)', result.output)
+        self.assertIn('exercises', result.output)
+
+    def test_periodic_export(self):
+        self.metrics.export_interval = 60
+        client = self.app.test_client()
+        client.get('/ping')
+        folder = self.app.config['REQUEST_METRICS_EXPORT_FOLDER']
+        self.assertFalse(os.path.exists(folder))
+        self.clock.now += 61
+        client.get('/ping')
+        self.assertEqual(os.listdir(folder), [f'{os.getpid()}.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
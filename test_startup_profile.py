@@ -0,0 +1,67 @@
+"""
+Tests du temps d'import au démarrage (startup_profile)
+"""
+
+import os
+import unittest
+
+from flask import Flask
+
+import startup_profile
+from startup_profile import DEFERRED_MODULES, ImportProfile, parse_importtime, profile_imports
+
+# Modules du cœur de l'application, importables sans app.py
+CORE_MODULES = ('payment_routes', 'modified_submit', 'job_routes', 'grading_routes', 'utils.image_path_handler')
+
+# Budget de temps d'import à froid en millisecondes (large : dépend de la machine)
+IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 3000))
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 |   flask
+import time:       600 |        600 |     werkzeug.routing
+import time:        50 |       1000 | app
+import time:        10 |         10 | json
+"""
+
+
+class TestParsing(unittest.TestCase):
+    def test_parse_importtime(self):
+        entries = parse_importtime(SAMPLE + 'Traceback (most recent call last):\n')
+        self.assertEqual([entry['module'] for entry in entries], ['_io', 'flask', 'werkzeug.routing', 'app', 'json'])
+        self.assertEqual([entry['depth'] for entry in entries], [1, 1, 2, 0, 0])
+
+        profile = ImportProfile(entries)
+        self.assertEqual(profile.total_us, 1010)
+        self.assertEqual(profile.by_module(1)[0]['module'], 'app')
+        packages = {item['package']: item['self_us'] for item in profile.by_package()}
+        self.assertEqual(packages['werkzeug'], 600)
+        self.assertEqual(profile.loaded(('werkzeug', 'numpy')), ['werkzeug'])
+
+    def test_cli_command(self):
+        app = Flask(__name__, root_path=os.path.dirname(os.path.abspath(__file__)))
+        startup_profile.init_app(app)
+        result = app.test_cli_runner().invoke(args=['import-profile', '--module', 'json', '--by', 'package'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('json', result.output)
+
+
+class TestStartupBudget(unittest.TestCase):
+    def test_core_modules_import_within_budget(self):
+        profile = profile_imports('; import '.join(CORE_MODULES))
+        self.assertEqual(profile.returncode, 0, profile.error)
+        self.assertLess(profile.total_us / 1000, IMPORT_BUDGET_MS)
+        self.assertEqual(profile.loaded(DEFERRED_MODULES), [])
+
+    def test_app_does_not_import_deferred_modules(self):
+        profile = profile_imports('app')
+        if profile.returncode:
+            self.skipTest(f"app.py n'est pas importable ici : {profile.error}")
+        self.assertLess(profile.total_us / 1000, IMPORT_BUDGET_MS)
+        self.assertEqual(profile.loaded(DEFERRED_MODULES), [])
+        self.assertNotIn('diagnostic_routes', profile.modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests de l'index des fichiers statiques (static_asset_index)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from static_asset_index import StaticAssetIndex, static_asset_index
+from image_url_service import ImageUrlService
+from image_fallback_handler import ImageFallbackHandler
+from utils.image_path_handler import find_image_file, get_image_url
+
+
+def touch(folder, relative):
+    path = os.path.join(folder, *relative.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'image')
+    return path
+
+
+class TestStaticAssetIndex(unittest.TestCase):
+    def setUp(self):
+        self.static_folder = tempfile.mkdtemp()
+        touch(self.static_folder, 'exercises/qcm/chat.png')
+        touch(self.static_folder, 'uploads/chat.png')
+        touch(self.static_folder, 'uploads/pairs/lion.png')
+        touch(self.static_folder, 'exercises/general/ete_2024.png')
+        touch(self.static_folder, 'css/style.css')
+        self.index = StaticAssetIndex(self.static_folder, poll_interval=0)
+        self.index.build()
+
+    def tearDown(self):
+        shutil.rmtree(self.static_folder)
+
+    def test_exists(self):
+        self.assertTrue(self.index.exists('/static/uploads/pairs/lion.png'))
+        self.assertTrue(self.index.exists('static/css/style.css'))
+        self.assertFalse(self.index.exists('/static/uploads/lion.png'))
+
+    def test_lookup_follows_priority_order(self):
+        self.assertEqual(self.index.lookup('chat.png'), '/static/uploads/chat.png')
+        self.assertEqual(self.index.lookup('lion.png'), '/static/uploads/pairs/lion.png')
+        self.assertIsNone(self.index.lookup('style.css'))
+        self.assertIsNone(self.index.lookup('absent.png'))
+
+    def test_hit_and_miss_counters(self):
+        self.index.lookup('chat.png')
+        self.index.exists('/static/uploads/absent.png')
+        stats = self.index.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['files'], 5)
+
+    def test_polling_picks_up_new_files(self):
+        self.assertIsNone(self.index.lookup('tigre.png'))
+        path = touch(self.static_folder, 'uploads/qcm/tigre.png')
+        # Garantir un changement de date même sur un système de fichiers à faible résolution
+        stat = os.stat(os.path.dirname(path))
+        os.utime(os.path.dirname(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.index.lookup('tigre.png'), '/static/uploads/qcm/tigre.png')
+
+    def test_polling_is_throttled(self):
+        index = StaticAssetIndex(self.static_folder, poll_interval=3600)
+        index.build()
+        touch(self.static_folder, 'uploads/zebre.png')
+        with patch('static_asset_index.os.stat') as stat:
+            self.assertIsNone(index.lookup('zebre.png'))
+            stat.assert_not_called()
+
+    def test_add_without_rebuild(self):
+        touch(self.static_folder, 'exercises/renard.png')
+        self.index.add('/static/exercises/renard.png')
+        rebuilds = self.index.rebuilds
+        self.assertEqual(self.index.lookup('renard.png'), '/static/exercises/renard.png')
+        self.assertEqual(self.index.rebuilds, rebuilds)
+
+
+class TestImageResolutionUsesIndex(unittest.TestCase):
+    def setUp(self):
+        self.static_folder = tempfile.mkdtemp()
+        touch(self.static_folder, 'exercises/qcm/chat.png')
+        touch(self.static_folder, 'uploads/ete_2024.png')
+        self.app = Flask(__name__, static_folder=self.static_folder)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.previous = (static_asset_index.static_folder, static_asset_index.poll_interval)
+        static_asset_index.static_folder = self.static_folder
+        static_asset_index.poll_interval = 3600
+        static_asset_index.build()
+
+    def tearDown(self):
+        static_asset_index.static_folder, static_asset_index.poll_interval = self.previous
+        static_asset_index._paths = None
+        self.app_context.pop()
+        shutil.rmtree(self.static_folder)
+
+    def test_resolution_does_not_probe_the_filesystem(self):
+        with patch('os.path.exists', side_effect=AssertionError('os.path.exists appelé')):
+            self.assertEqual(ImageUrlService.get_image_url('/static/exercises/qcm/chat.png'),
+                             '/static/exercises/qcm/chat.png')
+            self.assertEqual(ImageUrlService.get_image_url('/static/uploads/chat.png'),
+                             '/static/exercises/qcm/chat.png')
+            self.assertEqual(ImageUrlService.get_image_url("été 2024.png"), '/static/uploads/ete_2024.png')
+            self.assertEqual(find_image_file('/static/uploads/chat.png'), '/static/exercises/qcm/chat.png')
+            self.assertEqual(get_image_url('/static/uploads/qcm/chat.png'), '/static/exercises/qcm/chat.png')
+            self.assertTrue(ImageFallbackHandler.image_exists('/static/uploads/ete_2024.png'))
+
+    def test_missing_image_keeps_default_path(self):
+        self.assertEqual(ImageUrlService.get_image_url('absent.png'), '/static/uploads/absent.png')
+
+
+if __name__ == '__main__':
+    unittest.main()
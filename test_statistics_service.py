@@ -0,0 +1,121 @@
+"""
+Tests du service de statistiques (agrégats SQL groupés pour /teacher/statistics)
+"""
+
+import unittest
+from flask import Flask
+from sqlalchemy import event
+
+from extensions import db
+from models import User, Class, Course, Exercise, ExerciseAttempt
+from statistics_service import get_teacher_statistics, get_class_statistics
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+class TestStatisticsService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_test_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self, classes_count=3, students_per_class=10):
+        teacher = User(username='teacher', email='teacher@test.com', role='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        self.teacher_id = teacher.id
+
+        for c in range(classes_count):
+            class_obj = Class(name=f'Classe {c}', teacher_id=teacher.id, access_code=f'CODE{c:02d}')
+            db.session.add(class_obj)
+            course = Course(title=f'Cours {c}', class_obj=class_obj)
+            db.session.add(course)
+            exercises = [Exercise(title=f'Ex {c}-{i}', exercise_type='qcm', teacher_id=teacher.id)
+                         for i in range(2)]
+            course.exercises.extend(exercises)
+            db.session.flush()
+
+            for s in range(students_per_class):
+                student = User(username=f'student_{c}_{s}', email=f's{c}_{s}@test.com',
+                               name=f'Élève {c}-{s}', role='student')
+                class_obj.students.append(student)
+                db.session.flush()
+                # Les élèves pairs ont deux tentatives (50 et 100), les impairs aucune
+                if s % 2 == 0:
+                    db.session.add(ExerciseAttempt(student_id=student.id, exercise_id=exercises[0].id, score=50))
+                    db.session.add(ExerciseAttempt(student_id=student.id, exercise_id=exercises[1].id, score=100))
+        # Tentative sur un exercice hors classe : ne doit pas être comptée
+        other = Exercise(title='Hors classe', exercise_type='qcm', teacher_id=teacher.id)
+        db.session.add(other)
+        db.session.flush()
+        first_student = User.query.filter_by(username='student_0_0').first()
+        db.session.add(ExerciseAttempt(student_id=first_student.id, exercise_id=other.id, score=0))
+        db.session.commit()
+
+    def count_queries(self, func, *args):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = func(*args)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        return result, len(statements)
+
+    def test_teacher_statistics_values(self):
+        classes_stats = get_teacher_statistics(self.teacher_id)
+        self.assertEqual(len(classes_stats), 3)
+        for class_data in classes_stats:
+            self.assertEqual(class_data['total_exercises'], 2)
+            self.assertEqual(len(class_data['students']), 10)
+            for index, student_data in enumerate(class_data['students']):
+                if index % 2 == 0:
+                    self.assertEqual(student_data['completed_exercises'], 2)
+                    self.assertAlmostEqual(student_data['average_score'], 75.0)
+                else:
+                    self.assertEqual(student_data['completed_exercises'], 0)
+                    self.assertIsNone(student_data['average_score'])
+                self.assertTrue(student_data['student'].name.startswith('Élève'))
+
+    def test_query_count_is_constant(self):
+        db.session.expire_all()
+        _, queries = self.count_queries(get_teacher_statistics, self.teacher_id)
+        self.assertLessEqual(queries, 3)
+
+        # Doubler le nombre de classes ne change pas le nombre de requêtes
+        for c in range(3, 6):
+            class_obj = Class(name=f'Classe {c}', teacher_id=self.teacher_id, access_code=f'CODE{c:02d}')
+            db.session.add(class_obj)
+        db.session.commit()
+        db.session.expire_all()
+        _, queries_after = self.count_queries(get_teacher_statistics, self.teacher_id)
+        self.assertEqual(queries, queries_after)
+
+    def test_class_statistics(self):
+        class_obj = Class.query.filter_by(name='Classe 1').first()
+        class_data = get_class_statistics(class_obj)
+        self.assertIs(class_data['class'], class_obj)
+        self.assertEqual(class_data['total_exercises'], 2)
+        self.assertEqual(len(class_data['students']), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
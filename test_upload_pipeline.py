@@ -0,0 +1,111 @@
+"""
+Tests de l'enregistrement des uploads en flux (upload_pipeline)
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+import upload_pipeline
+from upload_pipeline import CHUNK_SIZE, UploadRejected, save_upload, sniff_type, stream_to_temp
+from blob_store import BlobStore
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+class RecordingStream(io.BytesIO):
+    """Flux qui mémorise la taille des lectures demandées"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+class TestUploadPipeline(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.app = Flask(__name__, root_path=self.root)
+        self.app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+        shutil.rmtree(self.root)
+
+    def upload(self, data, filename):
+        return FileStorage(stream=RecordingStream(data), filename=filename)
+
+    def test_sniff_type(self):
+        self.assertEqual(sniff_type(PNG_HEADER), 'png')
+        self.assertEqual(sniff_type(b'\xff\xd8\xff\xe0'), 'jpeg')
+        self.assertEqual(sniff_type(b'RIFF\x00\x00\x00\x00WAVEfmt '), 'wav')
+        self.assertEqual(sniff_type(b'RIFF\x00\x00\x00\x00WEBPVP8 '), 'webp')
+        self.assertEqual(sniff_type(b'ID3\x04'), 'mp3')
+        self.assertEqual(sniff_type(b'\x00\x00\x00\x20ftypM4A '), 'm4a')
+        self.assertEqual(sniff_type(b'OggS\x00'), 'ogg')
+        self.assertEqual(sniff_type(b'\xef\xbb\xbf<?xml version="1.0"?><svg>'), 'svg')
+        self.assertIsNone(sniff_type(b'<html><script>'))
+
+    def test_streams_in_fixed_chunks(self):
+        data = b'ID3' + os.urandom(5 * CHUNK_SIZE + 17)
+        file = self.upload(data, 'dictee.MP3')
+        target = os.path.join(self.root, 'dictee.mp3')
+        upload = save_upload(file, target)
+
+        self.assertEqual(upload.sha256, hashlib.sha256(data).hexdigest())
+        self.assertEqual(upload.size, len(data))
+        self.assertEqual(upload.content_type, 'mp3')
+        self.assertTrue(all(size == CHUNK_SIZE for size in file.stream.reads))
+        with open(target, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        # Aucun fichier temporaire ne reste dans le dossier
+        self.assertEqual(os.listdir(self.root), ['dictee.mp3'])
+
+    def test_mismatched_content_is_rejected(self):
+        target = os.path.join(self.root, 'image.png')
+        with self.assertRaises(UploadRejected):
+            save_upload(self.upload(b'<?php echo 1; ?>', 'image.png'), target)
+        with self.assertRaises(UploadRejected):
+            save_upload(self.upload(PNG_HEADER, 'script.exe'), target)
+        with self.assertRaises(UploadRejected):
+            save_upload(self.upload(b'', 'vide.png'), target)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_size_limit_stops_reading(self):
+        self.app.config['UPLOAD_SIZE_LIMITS'] = {'image': 2 * CHUNK_SIZE}
+        file = self.upload(PNG_HEADER + bytes(10 * CHUNK_SIZE), 'grande.png')
+        with self.assertRaises(UploadRejected):
+            stream_to_temp(file, self.root)
+        self.assertLessEqual(len(file.stream.reads), 3)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_limits_are_capped_by_max_content_length(self):
+        self.app.config['MAX_CONTENT_LENGTH'] = 1024
+        self.assertEqual(upload_pipeline.size_limit('audio'), 1024)
+
+    def test_existing_blob_is_not_rewritten(self):
+        store = BlobStore(static_folder=os.path.join(self.root, 'static'))
+        data = b'OggS' + bytes(3 * CHUNK_SIZE)
+        first = store.put_stream(self.upload(data, 'a.ogg'))
+        second = store.put_stream(self.upload(data, 'b.ogg'))
+        self.assertTrue(first.created)
+        self.assertFalse(second.created)
+        self.assertEqual(first.url, second.url)
+        blob_dir = os.path.dirname(store.path(first.sha256, '.ogg'))
+        self.assertEqual(os.listdir(blob_dir), [f'{first.sha256}.ogg'])
+        self.assertEqual([name for name in os.listdir(os.path.dirname(blob_dir)) if name.endswith('.upload')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
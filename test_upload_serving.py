@@ -0,0 +1,116 @@
+"""
+Tests du service des uploads avec requêtes conditionnelles (upload_serving)
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+from upload_serving import clear_hash_memo, send_upload
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(2048)
+AUDIO = b'ID3' + bytes(range(256)) * 40
+
+
+def create_test_app(upload_folder):
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = upload_folder
+
+    @app.route('/static/uploads/<path:filename>')
+    def uploaded_file(filename):
+        try:
+            return send_upload(app.config['UPLOAD_FOLDER'], filename)
+        except NotFound:
+            return "Fichier non trouvé", 404
+
+    return app
+
+
+class TestUploadServing(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.sha256 = hashlib.sha256(PNG).hexdigest()
+        self.blob = f'blobs/{self.sha256[:2]}/{self.sha256}.png'
+        for relative, content in ((self.blob, PNG), ('qcm/chat.png', PNG), ('dictee.mp3', AUDIO)):
+            path = os.path.join(self.root, *relative.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+        self.client = create_test_app(self.root).test_client()
+        clear_hash_memo()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_blob_is_immutable_with_content_etag(self):
+        response = self.client.get(f'/static/uploads/{self.blob}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['ETag'], f'"{self.sha256}"')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        response.close()
+
+    def test_legacy_name_is_revalidated(self):
+        response = self.client.get('/static/uploads/qcm/chat.png')
+        self.assertEqual(response.headers['ETag'], f'"{self.sha256}"')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+        response.close()
+
+    def test_repeat_view_transfers_zero_bytes(self):
+        transferred = 0
+        etags = {}
+        for _ in range(3):
+            for url in (f'/static/uploads/{self.blob}', '/static/uploads/qcm/chat.png'):
+                headers = {'If-None-Match': etags[url]} if url in etags else {}
+                response = self.client.get(url, headers=headers)
+                etags[url] = response.headers['ETag']
+                transferred += len(response.get_data())
+                response.close()
+        # Seul le premier affichage transfère les images
+        self.assertEqual(transferred, 2 * len(PNG))
+
+        response = self.client.get('/static/uploads/qcm/chat.png', headers={'If-None-Match': etags[url]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+    def test_modified_file_changes_etag(self):
+        first = self.client.get('/static/uploads/qcm/chat.png').headers['ETag']
+        path = os.path.join(self.root, 'qcm', 'chat.png')
+        with open(path, 'wb') as f:
+            f.write(PNG + b'modifie')
+        response = self.client.get('/static/uploads/qcm/chat.png', headers={'If-None-Match': first})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], first)
+        response.close()
+
+    def test_audio_range_requests(self):
+        response = self.client.get('/static/uploads/dictee.mp3', headers={'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.get_data(), AUDIO[100:200])
+        self.assertEqual(response.headers['Content-Range'], f'bytes 100-199/{len(AUDIO)}')
+        etag = response.headers['ETag']
+        response.close()
+
+        # If-Range avec l'ETag courant : la plage est servie
+        response = self.client.get('/static/uploads/dictee.mp3', headers={'Range': 'bytes=0-9', 'If-Range': etag})
+        self.assertEqual(response.status_code, 206)
+        response.close()
+        # ETag périmé : le fichier complet est renvoyé
+        response = self.client.get('/static/uploads/dictee.mp3', headers={'Range': 'bytes=0-9', 'If-Range': '"ancien"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_data()), len(AUDIO))
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get('/static/uploads/absent.png').status_code, 404)
+        self.assertEqual(self.client.get('/static/uploads/../secret.txt').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,7 @@ from urllib.parse import urlparse
 from flask import current_app
 from utils.image_path_manager import ImagePathManager
 from image_fallback_handler import ImageFallbackHandler
+from image_resolution_cache import cached_resolution
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
@@ -21,6 +22,7 @@ class UnifiedImageService:
     """
     
     @staticmethod
+    @cached_resolution('unified_image_service', fallbacks=(ImageFallbackHandler.DEFAULT_IMAGE_PATH,))
     def get_image_url(image_path, exercise_type=None):
         """
         Obtient l'URL d'une image en tenant compte du type d'exercice
@@ -55,13 +57,13 @@ class UnifiedImageService:
                 # Essayer de trouver l'image dans des chemins alternatifs
                 alternative_path = ImageFallbackHandler.find_image_in_alternative_paths(web_path, exercise_type)
                 if alternative_path:
-                    logger.info(f"Image trouvée dans un chemin alternatif: {alternative_path}")
+                    logger.info('Image trouvée dans un chemin alternatif: %s', alternative_path)
                     return alternative_path
                     
-                logger.warning(f"Image non trouvée: {web_path}, utilisation de l'image par défaut")
+                logger.warning("Image non trouvée: %s, utilisation de l'image par défaut", web_path)
                 return ImageFallbackHandler.get_fallback_image_url(web_path, exercise_type)
         except Exception as e:
-            logger.error(f"Erreur lors de la vérification de l'existence de l'image: {str(e)}")
+            logger.error("Erreur lors de la vérification de l'existence de l'image: %s", e)
             # En cas d'erreur, utiliser l'image par défaut
             return ImageFallbackHandler.get_fallback_image_url(web_path, exercise_type)
         
@@ -0,0 +1,244 @@
+"""
+Enregistrement des fichiers envoyés en flux
+
+Les uploads (images des exercices, audio des dictées jusqu'à
+MAX_CONTENT_LENGTH) étaient lus entièrement en mémoire avec file.read(),
+écrits, puis relus sur disque pour en vérifier la taille. Ici le
+FileStorage de werkzeug est recopié par blocs de CHUNK_SIZE octets dans un
+fichier temporaire du dossier de destination ; l'empreinte SHA-256 et la
+taille sont calculées au passage, le type réel est reconnu à partir des
+premiers octets (signature) et le fichier n'est renommé à sa place
+(os.replace, atomique) qu'une fois validé. La mémoire utilisée par un
+upload reste celle d'un bloc.
+
+    upload = stream_to_temp(file, directory)   # UploadRejected si invalide
+    upload.commit(path)                        # renommage atomique
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Nombre d'octets conservés pour reconnaître le type du fichier
+SNIFF_SIZE = 512
+
+# Extension → type de contenu attendu
+EXTENSION_TYPES = {
+    '.png': 'png',
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.gif': 'gif',
+    '.webp': 'webp',
+    '.svg': 'svg',
+    '.mp3': 'mp3',
+    '.wav': 'wav',
+    '.ogg': 'ogg',
+    '.m4a': 'm4a',
+    '.pdf': 'pdf',
+    '.doc': 'doc',
+    '.docx': 'docx',
+}
+
+# Type de contenu → catégorie (limites de taille)
+TYPE_CATEGORIES = {
+    'png': 'image', 'jpeg': 'image', 'gif': 'image', 'webp': 'image', 'svg': 'image',
+    'mp3': 'audio', 'wav': 'audio', 'ogg': 'audio', 'm4a': 'audio',
+    'pdf': 'document', 'doc': 'document', 'docx': 'document',
+}
+
+# Tailles maximales par catégorie (surchargeables par UPLOAD_SIZE_LIMITS),
+# toujours plafonnées par MAX_CONTENT_LENGTH
+DEFAULT_SIZE_LIMITS = {
+    'image': 20 * 1024 * 1024,
+    'audio': 100 * 1024 * 1024,
+    'document': 50 * 1024 * 1024,
+}
+
+
+class UploadRejected(ValueError):
+    """Fichier envoyé refusé (vide, trop volumineux ou de type inattendu)"""
+
+
+def sniff_type(head):
+    """
+    Type de contenu reconnu à partir des premiers octets d'un fichier.
+
+    Returns:
+        str: une valeur de EXTENSION_TYPES, ou None si le contenu est inconnu
+    """
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'webp'
+    if head.startswith(b'RIFF') and head[8:12] == b'WAVE':
+        return 'wav'
+    if head.startswith(b'OggS'):
+        return 'ogg'
+    if head.startswith(b'ID3') or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    if head[4:8] == b'ftyp':
+        return 'm4a'
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return 'doc'
+    if head.startswith(b'PK\x03\x04'):
+        return 'docx'
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(b'<') and b'<svg' in text:
+        return 'svg'
+    return None
+
+
+def size_limit(category):
+    """Taille maximale d'un upload de la catégorie, selon la configuration"""
+    limits = dict(DEFAULT_SIZE_LIMITS)
+    max_content_length = None
+    if has_app_context():
+        limits.update(current_app.config.get('UPLOAD_SIZE_LIMITS') or {})
+        max_content_length = current_app.config.get('MAX_CONTENT_LENGTH')
+    limit = limits.get(category)
+    if max_content_length:
+        limit = min(limit, max_content_length) if limit else max_content_length
+    return limit
+
+
+class StreamedUpload:
+    """
+    Fichier envoyé recopié dans un fichier temporaire.
+
+    Attributs:
+        temp_path: fichier temporaire (supprimé par commit() ou discard())
+        sha256 / size: empreinte et taille calculées pendant la copie
+        content_type: type reconnu (voir EXTENSION_TYPES)
+        extension: extension normalisée du nom d'origine ('.png')
+    """
+
+    def __init__(self, temp_path, sha256, size, content_type, extension):
+        self.temp_path = temp_path
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.extension = extension
+
+    def commit(self, path):
+        """Renomme atomiquement le fichier à sa place définitive"""
+        os.replace(self.temp_path, path)
+        self.temp_path = None
+        return path
+
+    def discard(self):
+        """Supprime le fichier temporaire (contenu déjà présent, erreur...)"""
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.discard()
+
+
+def stream_to_temp(file, directory, filename=None, max_size=None):
+    """
+    Recopie un FileStorage par blocs dans un fichier temporaire de directory.
+
+    Le type est vérifié dès le premier bloc et la taille à chaque bloc : un
+    fichier refusé n'est jamais lu en entier.
+
+    Args:
+        file: FileStorage (ou tout objet ayant stream/read)
+        directory (str): Dossier du fichier temporaire (celui de la
+            destination, pour que le renommage reste atomique)
+        filename (str, optional): Nom d'origine (par défaut file.filename)
+        max_size (int, optional): Taille maximale (par défaut selon la catégorie)
+
+    Returns:
+        StreamedUpload
+
+    Raises:
+        UploadRejected: fichier vide, trop volumineux ou de type inattendu
+    """
+    filename = filename or getattr(file, 'filename', None) or ''
+    extension = os.path.splitext(filename)[1].lower()
+    expected = EXTENSION_TYPES.get(extension)
+    if expected is None:
+        raise UploadRejected(f"Extension non autorisée: {filename!r}")
+    if max_size is None:
+        max_size = size_limit(TYPE_CATEGORIES[expected])
+
+    stream = getattr(file, 'stream', file)
+    if hasattr(stream, 'seek'):
+        try:
+            stream.seek(0)
+        except (OSError, ValueError):
+            pass
+
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.upload')
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if len(head) < SNIFF_SIZE:
+                    head += chunk[:SNIFF_SIZE - len(head)]
+                    if len(head) >= SNIFF_SIZE:
+                        _check_type(head, expected, filename)
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise UploadRejected(f"Fichier trop volumineux: {filename!r} (> {max_size} octets)")
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise UploadRejected(f"Fichier vide: {filename!r}")
+        if len(head) < SNIFF_SIZE:
+            _check_type(head, expected, filename)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return StreamedUpload(temp_path, digest.hexdigest(), size, expected, extension)
+
+
+def _check_type(head, expected, filename):
+    detected = sniff_type(head)
+    if detected != expected:
+        raise UploadRejected(
+            f"Contenu de {filename!r} non conforme à son extension "
+            f"(attendu: {expected}, reconnu: {detected or 'inconnu'})"
+        )
+
+
+def save_upload(file, path, max_size=None):
+    """
+    Enregistre un FileStorage à l'emplacement path, en flux.
+
+    Returns:
+        StreamedUpload: fichier enregistré (empreinte, taille, type)
+
+    Raises:
+        UploadRejected: fichier refusé (rien n'est écrit à l'emplacement path)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    upload = stream_to_temp(file, directory, max_size=max_size)
+    try:
+        upload.commit(path)
+    finally:
+        upload.discard()
+    return upload
@@ -0,0 +1,98 @@
+"""
+Service des fichiers envoyés (/static/uploads) avec requêtes conditionnelles
+
+send_from_directory répondait avec les en-têtes par défaut : chaque
+affichage d'un exercice revalidait ou retéléchargeait toutes ses images.
+send_upload ajoute :
+
+    - un ETag fort dérivé de l'empreinte SHA-256 du contenu (lue dans le
+      nom des blobs, calculée et mémorisée pour les autres fichiers) ;
+    - Cache-Control « immutable » d'un an pour les noms adressés par
+      contenu (uploads/blobs/...), revalidation systématique sinon ;
+    - la réponse 304 aux requêtes If-None-Match / If-Modified-Since ;
+    - les requêtes partielles (Range / If-Range), utilisées par les
+      lecteurs audio des dictées pour se déplacer dans le fichier.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from flask import current_app, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import safe_join
+
+from blob_store import hash_file
+
+# Nom d'un blob : uploads/blobs/<aa>/<sha256><ext>
+BLOB_NAME = re.compile(r'^blobs/([0-9a-f]{2})/(\1[0-9a-f]{62})(\.[a-z0-9]+)?$')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Nombre maximal d'empreintes mémorisées pour les fichiers hors magasin
+MAX_HASHED_FILES = 4096
+
+_hash_lock = threading.Lock()
+_hashes = OrderedDict()
+
+
+def content_hash(path, relative):
+    """
+    Empreinte SHA-256 du fichier servi.
+
+    Pour un blob, l'empreinte est son nom ; pour les autres fichiers, elle
+    est calculée une fois par version (date de modification, taille).
+    """
+    match = BLOB_NAME.match(relative)
+    if match:
+        return match.group(2), True
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        sha256 = _hashes.get(key)
+        if sha256 is not None:
+            _hashes.move_to_end(key)
+            return sha256, False
+    sha256, _ = hash_file(path)
+    with _hash_lock:
+        _hashes[key] = sha256
+        while len(_hashes) > MAX_HASHED_FILES:
+            _hashes.popitem(last=False)
+    return sha256, False
+
+
+def send_upload(directory, filename):
+    """
+    Réponse servant un fichier de directory (dossier des uploads).
+
+    Args:
+        directory (str): Dossier racine (UPLOAD_FOLDER)
+        filename (str): Chemin relatif demandé
+
+    Raises:
+        NotFound: fichier absent ou chemin hors du dossier
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    relative = filename.replace('\\', '/')
+    sha256, immutable = content_hash(path, relative)
+
+    response = send_file(path, conditional=True, etag=sha256)
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = current_app.config.get('UPLOAD_CACHE_MAX_AGE', 0)
+        response.cache_control.no_cache = True
+    response.accept_ranges = 'bytes'
+    return response
+
+
+def clear_hash_memo():
+    """Oublie les empreintes mémorisées"""
+    with _hash_lock:
+        _hashes.clear()
+
@@ -1,21 +1,48 @@
-from flask import request, current_app, send_from_directory
+from flask import request, current_app, redirect
+import mimetypes
 import os
-import re
-from functools import wraps
+import threading
 import logging
-from .image_path_handler import normalize_qcm_multichoix_image_path
+from werkzeug.exceptions import NotFound
+from static_asset_index import static_asset_index
+from .image_path_handler import normalize_filename
+
+# Extensions concernées par la résolution des images manquantes
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')
+
+# Nombre maximal de chemins demandés dont la résolution est mémorisée
+MAX_RESOLVED_PATHS = 4096
 
 class ImageFallbackMiddleware:
     """
-    Middleware pour intercepter les requêtes d'images et rediriger vers des chemins alternatifs
-    si l'image n'est pas trouvée au chemin demandé.
+    Middleware qui sert les images manquantes depuis leur emplacement réel.
+    
+    Une image demandée à un ancien emplacement (par exemple
+    /static/uploads/qcm_multichoix/x.png alors que le fichier est dans
+    /static/exercises/general/) est résolue par une table d'alias
+    nom de fichier → URL canonique, précalculée depuis l'index des fichiers
+    statiques, puis servie par une redirection (mise en cache) ou par un
+    en-tête X-Sendfile / X-Accel-Redirect.
     
-    Particulièrement utile pour les images QCM Multichoix qui peuvent être dans différents répertoires.
+    Seule la vue 'static' est enveloppée : une image présente est servie
+    sans aucun appel système supplémentaire, et aucun fichier n'est copié
+    pendant la requête. Les vues qui servent elles-mêmes une partie de
+    /static/ (uploaded_file pour /static/uploads/) appellent
+    app.extensions['image_fallback'].fallback_response() sur leur 404.
+    
+    Configuration :
+        IMAGE_FALLBACK_MODE: 'redirect' (défaut), 'sendfile' ou 'accel'
+        IMAGE_FALLBACK_REDIRECT_MAX_AGE: durée de cache de la redirection (secondes)
+        IMAGE_FALLBACK_ACCEL_PREFIX: emplacement interne nginx pour X-Accel-Redirect
     """
     
     def __init__(self, app=None):
         self.app = app
         self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._aliases = {}
+        self._alias_generation = None
+        self._resolved = {}
         
         if app is not None:
             self.init_app(app)
@@ -23,33 +50,23 @@ class ImageFallbackMiddleware:
     def init_app(self, app):
         """Initialise le middleware avec l'application Flask"""
         self.app = app
+        app.config.setdefault('IMAGE_FALLBACK_MODE', 'redirect')
+        app.config.setdefault('IMAGE_FALLBACK_REDIRECT_MAX_AGE', 3600)
+        app.config.setdefault('IMAGE_FALLBACK_ACCEL_PREFIX', '/protected-static/')
+        app.extensions['image_fallback'] = self
         
-        # Enregistrer une fonction pour intercepter les requêtes d'images
-        @app.before_request
-        def handle_image_request():
-            # Vérifier si c'est une requête pour une image
-            if not request.path.startswith('/static/'):
-                return None
-                
-            # Vérifier si c'est une image QCM Multichoix
-            if 'qcm_multichoix' in request.path and request.path.endswith(('.png', '.jpg', '.jpeg', '.gif')):
-                # Extraire le chemin du fichier demandé
-                file_path = request.path.lstrip('/')
-                
-                # Vérifier si le fichier existe
-                if not os.path.exists(os.path.join(current_app.root_path, file_path)):
-                    self.logger.warning(f"Image QCM Multichoix non trouvée: {file_path}")
-                    
-                    # Chercher l'image dans des chemins alternatifs
-                    alt_path = self.find_image_in_alternative_paths(file_path)
-                    if alt_path:
-                        self.logger.info(f"Image trouvée dans un chemin alternatif: {alt_path}")
-                        
-                        # Rediriger vers le chemin alternatif
-                        return send_from_directory(
-                            os.path.dirname(os.path.join(current_app.root_path, alt_path)),
-                            os.path.basename(alt_path)
-                        )
+        # Envelopper la vue des fichiers statiques : seul un 404 déclenche la résolution
+        static_view = app.view_functions.get('static')
+        if static_view is not None:
+            def static_with_fallback(filename):
+                try:
+                    return static_view(filename=filename)
+                except NotFound:
+                    response = self.fallback_response(request.path)
+                    if response is None:
+                        raise
+                    return response
+            app.view_functions['static'] = static_with_fallback
         
         # Ajouter une route pour vérifier les images QCM Multichoix
         @app.route('/admin/verify-qcm-multichoix-images')
@@ -77,52 +94,70 @@ class ImageFallbackMiddleware:
                 'issues': issues
             })
     
+    def _alias_map(self):
+        """Table nom de fichier (original ou normalisé) → URL canonique"""
+        canonical_urls = static_asset_index.canonical_urls()
+        generation = static_asset_index.version
+        if generation != self._alias_generation:
+            with self._lock:
+                aliases = {}
+                for filename, url in canonical_urls.items():
+                    aliases.setdefault(filename, url)
+                    aliases.setdefault(normalize_filename(filename), url)
+                self._aliases = aliases
+                self._resolved = {}
+                self._alias_generation = generation
+        return self._aliases
+    
     def find_image_in_alternative_paths(self, image_path):
         """
-        Cherche une image dans des chemins alternatifs
+        Cherche l'emplacement réel d'une image manquante
         
         Args:
-            image_path (str): Le chemin de l'image demandée
+            image_path (str): Le chemin web de l'image demandée
             
         Returns:
-            str: Le chemin alternatif trouvé ou None
+            str: L'URL de l'image trouvée ou None
         """
-        # Extraire le nom du fichier
-        filename = os.path.basename(image_path)
-        
-        # Chemins alternatifs à vérifier
-        alt_paths = [
-            os.path.join('static', 'exercises', 'general', filename),
-            os.path.join('static', 'exercises', 'qcm', filename),
-            os.path.join('static', 'uploads', filename),
-            os.path.join('static', 'exercises', filename)
-        ]
+        if not image_path.lower().endswith(IMAGE_EXTENSIONS):
+            return None
+        aliases = self._alias_map()
+        if image_path not in self._resolved:
+            if len(self._resolved) >= MAX_RESOLVED_PATHS:
+                self._resolved = {}
+            filename = os.path.basename(image_path)
+            target = aliases.get(filename) or aliases.get(normalize_filename(filename))
+            # Ne jamais rediriger une URL vers elle-même
+            self._resolved[image_path] = target if target != image_path else None
+        return self._resolved[image_path]
+    
+    def fallback_response(self, image_path):
+        """
+        Réponse pour une image absente de son emplacement demandé, ou None
         
-        # Vérifier chaque chemin alternatif
-        for alt_path in alt_paths:
-            if os.path.exists(os.path.join(current_app.root_path, alt_path)):
-                # Copier l'image vers le chemin demandé pour les futures requêtes
-                try:
-                    import shutil
-                    target_dir = os.path.dirname(os.path.join(current_app.root_path, image_path))
-                    
-                    # Créer le répertoire cible s'il n'existe pas
-                    if not os.path.exists(target_dir):
-                        os.makedirs(target_dir)
-                        self.logger.info(f"Répertoire créé: {target_dir}")
-                    
-                    # Copier l'image
-                    shutil.copy2(
-                        os.path.join(current_app.root_path, alt_path),
-                        os.path.join(current_app.root_path, image_path)
-                    )
-                    self.logger.info(f"Image copiée: {alt_path} -> {image_path}")
-                except Exception as e:
-                    self.logger.error(f"Erreur lors de la copie de l'image: {str(e)}")
-                
-                return alt_path
+        Args:
+            image_path (str): Le chemin web demandé (/static/...)
+        """
+        target = self.find_image_in_alternative_paths(image_path)
+        if target is None:
+            return None
+        self.logger.debug(f"Image servie depuis un chemin alternatif: {image_path} -> {target}")
         
-        return None
+        config = current_app.config
+        mode = config['IMAGE_FALLBACK_MODE']
+        relative = target[len('/static/'):]
+        if mode == 'accel':
+            response = current_app.response_class()
+            response.headers['X-Accel-Redirect'] = config['IMAGE_FALLBACK_ACCEL_PREFIX'].rstrip('/') + '/' + relative
+            return response
+        if mode == 'sendfile':
+            response = current_app.response_class(mimetype=mimetypes.guess_type(target)[0])
+            response.headers['X-Sendfile'] = os.path.join(current_app.static_folder, *relative.split('/'))
+            return response
+        response = redirect(target, code=302)
+        response.cache_control.public = True
+        response.cache_control.max_age = config['IMAGE_FALLBACK_REDIRECT_MAX_AGE']
+        return response
 
 def register_image_fallback_middleware(app):
     """
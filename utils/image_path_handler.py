@@ -4,6 +4,8 @@ import json
 import re
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
+from static_asset_index import static_asset_index
+from image_resolution_cache import cached_resolution
 
 def normalize_filename(filename):
     """
@@ -158,7 +160,7 @@ def fix_exercise_image_path(exercise):
             if normalized_path != exercise.image_path:
                 exercise.image_path = normalized_path
                 modified = True
-                current_app.logger.info(f"Normalized exercise.image_path: {normalized_path}")
+                current_app.logger.info('Normalized exercise.image_path: %s', normalized_path)
         
         # Normaliser content.image
         if exercise.content:
@@ -169,17 +171,17 @@ def fix_exercise_image_path(exercise):
                     content['image'] = normalized_content_path
                     exercise.content = json.dumps(content)
                     modified = True
-                    current_app.logger.info(f"Normalized content.image: {normalized_content_path}")
+                    current_app.logger.info('Normalized content.image: %s', normalized_content_path)
             
             # Synchroniser content.image et exercise.image_path
             if 'image' in content and exercise.image_path and content['image'] != exercise.image_path:
                 # Privilégier content.image car c'est ce qui est utilisé dans les templates
                 exercise.image_path = content['image']
                 modified = True
-                current_app.logger.info(f"Synchronized paths: {content['image']}")
+                current_app.logger.info('Synchronized paths: %s', content['image'])
     
     except Exception as e:
-        current_app.logger.error(f"Error fixing image path for exercise {exercise.id}: {str(e)}")
+        current_app.logger.error('Error fixing image path for exercise %s: %s', exercise.id, e)
     
     return modified
 
@@ -199,47 +201,15 @@ def find_image_file(path):
     # Extraire le nom du fichier
     filename = os.path.basename(path)
     
-    # Essayer avec le nom normalisé également
-    normalized_filename = normalize_filename(filename)
-    
-    # Chemins possibles
-    possible_paths = [
-        os.path.join(current_app.root_path, "static", "uploads", filename),
-        os.path.join(current_app.root_path, "static", "uploads", "exercises", filename),
-        os.path.join(current_app.root_path, "static", "uploads", "exercises", "qcm", filename),
-        os.path.join(current_app.root_path, "static", "uploads", "exercises", "flashcards", filename),
-        os.path.join(current_app.root_path, "static", "uploads", "exercises", "word_placement", filename),
-        os.path.join(current_app.root_path, "static", "uploads", "exercises", "image_labeling", filename),
-        os.path.join(current_app.root_path, "static", "uploads", "exercises", "legend", filename),
-        os.path.join(current_app.root_path, "static", "exercises", filename),
-        os.path.join(current_app.root_path, "static", "exercises", "qcm", filename),
-        os.path.join(current_app.root_path, "static", "exercises", "flashcards", filename),
-        os.path.join(current_app.root_path, "static", "exercises", "word_placement", filename),
-        os.path.join(current_app.root_path, "static", "exercises", "image_labeling", filename),
-        os.path.join(current_app.root_path, "static", "exercises", "legend", filename)
-    ]
-    
-    # Chercher le fichier avec le nom original
-    for possible_path in possible_paths:
-        if os.path.exists(possible_path):
-            # Normaliser le chemin pour le web
-            web_path = f"/{os.path.relpath(possible_path, current_app.root_path).replace('\\', '/')}"
-            return web_path
+    # Recherche par nom dans l'index des fichiers statiques (uploads/ puis exercises/)
+    found = static_asset_index.lookup(filename)
+    if found:
+        return found
     
     # Si non trouvé, essayer avec le nom normalisé
-    normalized_possible_paths = [
-        p.replace(filename, normalized_filename) for p in possible_paths
-    ]
-    
-    # Chercher le fichier avec le nom normalisé
-    for possible_path in normalized_possible_paths:
-        if os.path.exists(possible_path):
-            # Normaliser le chemin pour le web
-            web_path = f"/{os.path.relpath(possible_path, current_app.root_path).replace('\\', '/')}"
-            return web_path
-    
-    return None
+    return static_asset_index.lookup(normalize_filename(filename))
 
+@cached_resolution('image_path_handler')
 def get_image_url(path):
     """
     Retourne une URL valide pour un chemin d'image, en gérant les
@@ -262,9 +232,8 @@ def get_image_url(path):
     normalized_path = normalize_image_path(path)
     
     # Vérifier si le fichier existe dans le chemin normalisé
-    physical_path = os.path.join(current_app.root_path, normalized_path.lstrip('/'))
-    if os.path.exists(physical_path):
-        current_app.logger.debug(f"Image trouvée avec le chemin normalisé: {normalized_path}")
+    if static_asset_index.exists(normalized_path):
+        current_app.logger.debug('Image trouvée avec le chemin normalisé: %s', normalized_path)
         return normalized_path
     
     # Extraire le nom du fichier et essayer avec le nom non normalisé
@@ -273,35 +242,32 @@ def get_image_url(path):
     if filename != original_filename:
         # Essayer avec le nom original
         original_path = normalized_path.replace(filename, original_filename)
-        physical_original_path = os.path.join(current_app.root_path, original_path.lstrip('/'))
-        if os.path.exists(physical_original_path):
-            current_app.logger.debug(f"Image trouvée avec le nom original: {original_path}")
+        if static_asset_index.exists(original_path):
+            current_app.logger.debug('Image trouvée avec le nom original: %s', original_path)
             return original_path
     
     # Si le fichier n'existe pas dans le chemin normalisé, essayer l'autre format
     if '/static/uploads/' in normalized_path:
         # Essayer avec /static/exercises/
         alt_path = normalized_path.replace('/static/uploads/', '/static/exercises/')
-        physical_alt_path = os.path.join(current_app.root_path, alt_path.lstrip('/'))
-        if os.path.exists(physical_alt_path):
-            current_app.logger.debug(f"Image trouvée dans le répertoire exercises: {alt_path}")
+        if static_asset_index.exists(alt_path):
+            current_app.logger.debug('Image trouvée dans le répertoire exercises: %s', alt_path)
             return alt_path
     elif '/static/exercises/' in normalized_path:
         # Essayer avec /static/uploads/
         alt_path = normalized_path.replace('/static/exercises/', '/static/uploads/')
-        physical_alt_path = os.path.join(current_app.root_path, alt_path.lstrip('/'))
-        if os.path.exists(physical_alt_path):
-            current_app.logger.debug(f"Image trouvée dans le répertoire uploads: {alt_path}")
+        if static_asset_index.exists(alt_path):
+            current_app.logger.debug('Image trouvée dans le répertoire uploads: %s', alt_path)
             return alt_path
     
     # Essayer de trouver le fichier dans différents répertoires
     found_path = find_image_file(path)
     if found_path:
-        current_app.logger.debug(f"Image trouvée par recherche approfondie: {found_path}")
+        current_app.logger.debug('Image trouvée par recherche approfondie: %s', found_path)
         return found_path
     
     # Si aucun fichier n'existe, retourner le chemin normalisé
-    current_app.logger.warning(f"Image non trouvée, retour du chemin normalisé: {normalized_path}")
+    current_app.logger.warning('Image non trouvée, retour du chemin normalisé: %s', normalized_path)
     return normalized_path
 
 def normalize_pairs_exercise_content(content, exercise_type='pairs'):
@@ -332,7 +298,7 @@ def normalize_pairs_exercise_content(content, exercise_type='pairs'):
             if left_content:
                 normalized_left = normalize_image_path(left_content, exercise_type)
                 normalized_pair['left']['content'] = normalized_left
-                current_app.logger.info(f'[PAIRS_NORMALIZE] Image gauche normalisée: {left_content} -> {normalized_left}')
+                current_app.logger.info('[PAIRS_NORMALIZE] Image gauche normalisée: %s -> %s', left_content, normalized_left)
         
         # Normaliser le contenu droit s'il s'agit d'une image
         if pair.get('right', {}).get('type') == 'image':
@@ -340,7 +306,7 @@ def normalize_pairs_exercise_content(content, exercise_type='pairs'):
             if right_content:
                 normalized_right = normalize_image_path(right_content, exercise_type)
                 normalized_pair['right']['content'] = normalized_right
-                current_app.logger.info(f'[PAIRS_NORMALIZE] Image droite normalisée: {right_content} -> {normalized_right}')
+                current_app.logger.info('[PAIRS_NORMALIZE] Image droite normalisée: %s -> %s', right_content, normalized_right)
         
         normalized_pairs.append(normalized_pair)
     
@@ -377,14 +343,14 @@ def normalize_qcm_multichoix_image_path(path):
     # Vérifier si le fichier existe dans le chemin normalisé
     physical_path = os.path.join(current_app.root_path, normalized_path.lstrip('/'))
     if os.path.exists(physical_path):
-        current_app.logger.debug(f"Image QCM Multichoix trouvée avec le chemin normalisé: {normalized_path}")
+        current_app.logger.debug('Image QCM Multichoix trouvée avec le chemin normalisé: %s', normalized_path)
         return normalized_path
     
     # Vérifier si l'image existe dans le dossier 'general'
     general_path = f"/static/exercises/general/{filename}"
     physical_general_path = os.path.join(current_app.root_path, general_path.lstrip('/'))
     if os.path.exists(physical_general_path):
-        current_app.logger.info(f"Image QCM Multichoix trouvée dans le dossier 'general': {general_path}")
+        current_app.logger.info("Image QCM Multichoix trouvée dans le dossier 'general': %s", general_path)
         return general_path
     
     # Vérifier si l'image existe dans le dossier 'qcm_multichoix'
@@ -396,9 +362,9 @@ def normalize_qcm_multichoix_image_path(path):
     if not os.path.exists(qcm_dir):
         try:
             os.makedirs(qcm_dir)
-            current_app.logger.info(f"Répertoire créé: {qcm_dir}")
+            current_app.logger.info('Répertoire créé: %s', qcm_dir)
         except Exception as e:
-            current_app.logger.error(f"Erreur lors de la création du répertoire {qcm_dir}: {str(e)}")
+            current_app.logger.error('Erreur lors de la création du répertoire %s: %s', qcm_dir, e)
     
     # Chercher l'image dans d'autres répertoires et la copier si trouvée
     possible_paths = [
@@ -414,14 +380,14 @@ def normalize_qcm_multichoix_image_path(path):
             try:
                 import shutil
                 shutil.copy2(possible_path, physical_qcm_path)
-                current_app.logger.info(f"Image copiée de {possible_path} vers {physical_qcm_path}")
+                current_app.logger.info('Image copiée de %s vers %s', possible_path, physical_qcm_path)
                 return qcm_path
             except Exception as e:
-                current_app.logger.error(f"Erreur lors de la copie de l'image: {str(e)}")
+                current_app.logger.error("Erreur lors de la copie de l'image: %s", e)
                 break
     
     # Si l'image n'a pas été trouvée, retourner le chemin normalisé
-    current_app.logger.warning(f"Image QCM Multichoix non trouvée, retour du chemin normalisé: {normalized_path}")
+    current_app.logger.warning('Image QCM Multichoix non trouvée, retour du chemin normalisé: %s', normalized_path)
     return normalized_path
 
 def normalize_qcm_multichoix_content(content):
@@ -442,7 +408,7 @@ def normalize_qcm_multichoix_content(content):
         normalized_image = normalize_qcm_multichoix_image_path(content['image'])
         if normalized_image != content['image']:
             content['image'] = normalized_image
-            current_app.logger.info(f'[QCM_MULTICHOIX] Image principale normalisée: {content["image"]} -> {normalized_image}')
+            current_app.logger.info('[QCM_MULTICHOIX] Image principale normalisée: %s -> %s', content["image"], normalized_image)
     
     # Normaliser les images dans les questions si elles existent
     if 'questions' in content and isinstance(content['questions'], list):
@@ -451,6 +417,6 @@ def normalize_qcm_multichoix_content(content):
                 normalized_image = normalize_qcm_multichoix_image_path(question['image'])
                 if normalized_image != question['image']:
                     question['image'] = normalized_image
-                    current_app.logger.info(f'[QCM_MULTICHOIX] Image de question {i} normalisée: {question["image"]} -> {normalized_image}')
+                    current_app.logger.info('[QCM_MULTICHOIX] Image de question %s normalisée: %s -> %s', i, question["image"], normalized_image)
     
     return content
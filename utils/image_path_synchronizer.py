@@ -1,6 +1,6 @@
 import os
 import json
-from flask import current_app
+from log_pipeline import category_log
 from utils.image_path_handler import normalize_image_path, clean_duplicated_path_segments
 
 def synchronize_image_paths(exercise):
@@ -24,12 +24,12 @@ def synchronize_image_paths(exercise):
         exercise_path = exercise.image_path
         content_path = content.get('image')
         
-        current_app.logger.info(f'[IMAGE_SYNC] Exercice {exercise.id} - Chemin exercise: {exercise_path}')
-        current_app.logger.info(f'[IMAGE_SYNC] Exercice {exercise.id} - Chemin content: {content_path}')
+        category_log.IMAGE_SYNC.debug('Exercice %s - Chemin exercise: %s', exercise.id, exercise_path)
+        category_log.IMAGE_SYNC.debug('Exercice %s - Chemin content: %s', exercise.id, content_path)
         
         # Si les deux chemins sont None ou vides, rien à faire
         if not exercise_path and not content_path:
-            current_app.logger.info(f'[IMAGE_SYNC] Exercice {exercise.id} - Pas d\'image à synchroniser')
+            category_log.IMAGE_SYNC.debug("Exercice %s - Pas d'image à synchroniser", exercise.id)
             return False
             
         # Déterminer le chemin à utiliser (priorité à exercise_path s'il existe)
@@ -43,30 +43,34 @@ def synchronize_image_paths(exercise):
         # et préserve la structure des dossiers intermédiaires, donc cette partie est redondante
         # et pourrait causer des problèmes avec les chemins déjà normalisés
         
-        current_app.logger.info(f'[IMAGE_SYNC] Exercice {exercise.id} - Chemin normalisé: {cleaned_path}')
+        category_log.IMAGE_SYNC.debug('Exercice %s - Chemin normalisé: %s', exercise.id, cleaned_path)
         
         # Mettre à jour exercise.image_path si nécessaire
         if exercise_path != cleaned_path:
             exercise.image_path = cleaned_path
             modified = True
-            current_app.logger.info(f'[IMAGE_SYNC] Exercice {exercise.id} - Mise à jour exercise.image_path: {cleaned_path}')
+            category_log.IMAGE_SYNC.info('Exercice %s - Mise à jour exercise.image_path: %s', exercise.id, cleaned_path)
         
         # Mettre à jour content['image'] si nécessaire
         if content_path != cleaned_path:
             content['image'] = cleaned_path
             exercise.content = json.dumps(content)
             modified = True
-            current_app.logger.info(f'[IMAGE_SYNC] Exercice {exercise.id} - Mise à jour content[\'image\']: {cleaned_path}')
+            category_log.IMAGE_SYNC.info("Exercice %s - Mise à jour content['image']: %s", exercise.id, cleaned_path)
         
         return modified
     except Exception as e:
-        current_app.logger.error(f'[IMAGE_SYNC] Erreur lors de la synchronisation des chemins d\'images pour l\'exercice {exercise.id}: {str(e)}')
+        category_log.IMAGE_SYNC.error("Erreur lors de la synchronisation des chemins d'images pour l'exercice %s: %s", exercise.id, e)
         return False
 
 def synchronize_all_exercises(db, Exercise):
     """
     Synchronise les chemins d'images pour tous les exercices dans la base de données.
     
+    Les exercices sont parcourus par lots (voir image_path_migration) avec la
+    règle 'normalize' : la mémoire utilisée ne dépend pas du nombre d'exercices.
+    Seuls exercise.image_path et content['image'] sont réécrits, comme avant.
+    
     Args:
         db: L'objet SQLAlchemy database
         Exercise: Le modèle Exercise
@@ -74,6 +78,8 @@ def synchronize_all_exercises(db, Exercise):
     Returns:
         dict: Statistiques sur les modifications effectuées
     """
+    from image_path_migration import ImagePathMigration
+    
     stats = {
         'total': 0,
         'modified': 0,
@@ -82,31 +88,19 @@ def synchronize_all_exercises(db, Exercise):
     }
     
     try:
-        # Récupérer tous les exercices
-        exercises = Exercise.query.all()
-        stats['total'] = len(exercises)
-        
-        for exercise in exercises:
-            try:
-                if synchronize_image_paths(exercise):
-                    stats['modified'] += 1
-                    stats['details'].append({
-                        'id': exercise.id,
-                        'title': exercise.title,
-                        'image_path': exercise.image_path
-                    })
-            except Exception as e:
-                stats['errors'] += 1
-                current_app.logger.error(f'[IMAGE_SYNC] Erreur lors de la synchronisation de l\'exercice {exercise.id}: {str(e)}')
+        migration = ImagePathMigration(rules=('normalize',), main_image_only=True)
+        result = migration.run()
+        stats['total'] = result['scanned']
+        stats['modified'] = result['modified']
+        stats['errors'] = result['errors']
+        stats['details'] = migration.modified_rows
         
-        # Sauvegarder les modifications en base de données
         if stats['modified'] > 0:
-            db.session.commit()
-            current_app.logger.info(f'[IMAGE_SYNC] {stats["modified"]} exercices mis à jour avec succès')
+            category_log.IMAGE_SYNC.info('%s exercices mis à jour avec succès', stats["modified"])
         
         return stats
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f'[IMAGE_SYNC] Erreur lors de la synchronisation des exercices: {str(e)}')
+        category_log.IMAGE_SYNC.error('Erreur lors de la synchronisation des exercices: %s', e)
         stats['errors'] += 1
         return stats
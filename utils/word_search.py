@@ -1,7 +1,6 @@
 import random
 import string
 from typing import List, Tuple, Dict, Optional
-import numpy as np
 
 class WordSearchGenerator:
     def __init__(self, width: int, height: int):